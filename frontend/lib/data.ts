@@ -31,6 +31,7 @@ import {
 import {
   readAiDebateViewFlag,
   readEvidenceLayerFlag,
+  readServePointerFlag,
   readTransmissionLayerFlag
 } from "@/lib/feature-flags";
 
@@ -1106,6 +1107,11 @@ async function querySentinelSignals(client: SupabaseClient): Promise<SentinelSig
   }
 }
 
+// With versioned serve publish, read through `<table>_live` so only the published run is visible.
+function serveSource(table: string): string {
+  return readServePointerFlag() ? `${table}_live` : table;
+}
+
 interface V2SnapshotRow {
   snapshot_time: string;
   market_brief: string;
@@ -1116,7 +1122,7 @@ interface V2SnapshotRow {
 async function queryV2Signals(client: SupabaseClient): Promise<SentinelSignal[]> {
   try {
     const { data, error } = await client
-      .from("stock_signals_v2")
+      .from(serveSource("stock_signals_v2"))
       .select(
         "id,ticker,level,signal_score,explanation,trigger_factors,"
         + "source_event_ids,source_mix,as_of"
@@ -1170,7 +1176,7 @@ async function queryV2Opportunities(client: SupabaseClient): Promise<Opportunity
 
   async function runQuery(selectClause: string): Promise<Array<Record<string, unknown>>> {
     const { data, error } = await client
-      .from("stock_opportunities_v2")
+      .from(serveSource("stock_opportunities_v2"))
       .select(selectClause)
       .eq("is_active", true)
       .order("opportunity_score", { ascending: false })
@@ -1259,7 +1265,7 @@ async function queryV2Opportunities(client: SupabaseClient): Promise<Opportunity
 async function queryV2Regime(client: SupabaseClient): Promise<MarketRegime | null> {
   try {
     const { data, error } = await client
-      .from("stock_market_regime_v2")
+      .from(serveSource("stock_market_regime_v2"))
       .select("regime_date,risk_state,vol_state,liquidity_state,regime_score,summary,as_of")
       .eq("is_active", true)
       .order("as_of", { ascending: false })
@@ -1290,7 +1296,7 @@ async function queryV2Regime(client: SupabaseClient): Promise<MarketRegime | nul
 async function queryV2Snapshot(client: SupabaseClient): Promise<V2SnapshotRow | null> {
   try {
     const { data, error } = await client
-      .from("stock_dashboard_snapshot_v2")
+      .from(serveSource("stock_dashboard_snapshot_v2"))
       .select("snapshot_time,market_brief,risk_badge,as_of")
       .eq("is_active", true)
       .order("snapshot_time", { ascending: false })
@@ -1371,7 +1377,7 @@ async function queryV2EvidenceMap(
   }
   try {
     const { data, error } = await client
-      .from("stock_evidence_v2")
+      .from(serveSource("stock_evidence_v2"))
       .select(
         "id,opportunity_id,ticker,source_type,source_ref,source_url,source_name,published_at,"
         + "quote_snippet,numeric_facts,confidence,as_of"
@@ -1428,7 +1434,7 @@ async function queryV2TransmissionMap(
   }
   try {
     const { data, error } = await client
-      .from("stock_transmission_paths_v2")
+      .from(serveSource("stock_transmission_paths_v2"))
       .select(
         "id,opportunity_id,path_key,ticker,macro_factor,industry,direction,strength,reason,"
         + "evidence_ids,as_of"
@@ -22,3 +22,7 @@ export function readTransmissionLayerFlag(): boolean {
 export function readAiDebateViewFlag(): boolean {
   return readBool(process.env.NEXT_PUBLIC_ENABLE_STOCK_AI_DEBATE_VIEW, false);
 }
+
+export function readServePointerFlag(): boolean {
+  return readBool(process.env.NEXT_PUBLIC_ENABLE_STOCK_SERVE_POINTER, false);
+}
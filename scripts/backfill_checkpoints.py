@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""Stock V2 回填检查点。
+
+回填按文章 id 降序推进，每批写入成功后记录一条已完成区间 [range_low_id, range_high_id)。
+`--resume <job_id>` 从该分区最低的已完成 id 继续；`--partition i/n` 的多个进程共享 job_id，
+各自写 partition_done，最后完成的进程认领一次 serve 层刷新。
+
+优先写 `stock_backfill_checkpoints` 表；表不可用时退回本地 JSONL 文件（同机多进程可共享）。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_TABLE = "stock_backfill_checkpoints"
+CHECKPOINT_CONFLICT = "job_id,kind,partition_index,range_low_id"
+COUNT_FIELDS = ("article_count", "event_count", "mapping_count", "indirect_count", "promoted_count")
+SELECT_COLUMNS = ",".join(
+    ("id", "kind", "partition_index", "partition_count", "range_high_id", "range_low_id") + COUNT_FIELDS
+)
+
+
+def parse_partition(text: str) -> Tuple[int, int]:
+    """解析 `i/n`（0 ≤ i < n）。"""
+    try:
+        index_text, count_text = str(text).split("/", 1)
+        index, count = int(index_text), int(count_text)
+    except ValueError:
+        raise ValueError(f"分区格式应为 i/n：{text!r}") from None
+    if count < 1 or not 0 <= index < count:
+        raise ValueError(f"分区越界：{text!r}")
+    return index, count
+
+
+class BackfillCheckpointStore:
+    """单个回填作业、单个分区的检查点读写。"""
+
+    def __init__(
+        self,
+        supabase: Any,
+        job_id: str,
+        partition: Tuple[int, int] = (0, 1),
+        local_dir: Optional[str] = None,
+    ):
+        self.supabase = supabase
+        self.job_id = job_id
+        self.partition_index, self.partition_count = partition
+        self.local_dir = local_dir or os.getenv("STOCK_BACKFILL_CHECKPOINT_DIR", "logs/backfill_checkpoints")
+        self._use_table = True
+
+    # -- 存储 --------------------------------------------------------
+
+    @property
+    def _local_path(self) -> str:
+        return os.path.join(self.local_dir, f"{self.job_id}.jsonl")
+
+    def _fallback(self, action: str, error: Exception) -> None:
+        if self._use_table:
+            logger.warning(
+                f"[V2_BACKFILL_CHECKPOINT_LOCAL] action={action} path={self._local_path} "
+                f"error={str(error)[:120]}"
+            )
+        self._use_table = False
+
+    def _append_local(self, row: Dict[str, Any]) -> None:
+        os.makedirs(self.local_dir, exist_ok=True)
+        with open(self._local_path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    def _load_local(self) -> List[Dict[str, Any]]:
+        if not os.path.exists(self._local_path):
+            return []
+        rows: List[Dict[str, Any]] = []
+        with open(self._local_path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    continue  # 进程中断时可能留下半行
+        return rows
+
+    def load(self) -> List[Dict[str, Any]]:
+        """读取本作业全部检查点（表 + 本地文件合并）。"""
+        rows: List[Dict[str, Any]] = []
+        if self._use_table:
+            try:
+                last_id = 0
+                while True:
+                    page = (
+                        self.supabase.table(CHECKPOINT_TABLE)
+                        .select(SELECT_COLUMNS)
+                        .eq("job_id", self.job_id)
+                        .gt("id", last_id)
+                        .order("id")
+                        .limit(1000)
+                        .execute()
+                        .data
+                        or []
+                    )
+                    rows.extend(page)
+                    if len(page) < 1000:
+                        break
+                    last_id = int(page[-1]["id"])
+            except Exception as e:
+                self._fallback("load", e)
+        return rows + self._load_local()
+
+    def _write(self, row: Dict[str, Any], ignore_duplicates: bool = False) -> bool:
+        """写一行检查点；返回是否新插入（ignore_duplicates=True 时用于认领）。"""
+        payload = {"job_id": self.job_id, **row}
+        if self._use_table:
+            try:
+                inserted = (
+                    self.supabase.table(CHECKPOINT_TABLE)
+                    .upsert(payload, on_conflict=CHECKPOINT_CONFLICT, ignore_duplicates=ignore_duplicates)
+                    .execute()
+                    .data
+                )
+                return bool(inserted) or not ignore_duplicates
+            except Exception as e:
+                self._fallback(str(row.get("kind") or "write"), e)
+        if ignore_duplicates:
+            # 本地认领用 O_EXCL 建标记文件，保证同机只有一个进程成功
+            os.makedirs(self.local_dir, exist_ok=True)
+            marker = os.path.join(self.local_dir, f"{self.job_id}.{row.get('kind')}.lock")
+            try:
+                os.close(os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            except FileExistsError:
+                return False
+        self._append_local(payload)
+        return True
+
+    # -- 作业状态 ----------------------------------------------------
+
+    def resume_point(self) -> Tuple[Optional[int], Dict[str, int], bool]:
+        """返回 (续跑的 before_id, 已完成计数, 分区是否已完成)；没有检查点时 before_id 为 None。"""
+        before_id: Optional[int] = None
+        totals: Dict[str, int] = defaultdict(int)
+        done = False
+        for row in self.load():
+            count = int(row.get("partition_count") or 1)
+            if count != self.partition_count:
+                raise ValueError(
+                    f"作业 {self.job_id} 的分区数为 {count}，与本次 --partition */{self.partition_count} 不一致"
+                )
+            if int(row.get("partition_index") or 0) != self.partition_index:
+                continue
+            if row.get("kind") == "partition_done":
+                done = True
+            elif row.get("kind") == "range":
+                low = int(row.get("range_low_id") or 0)
+                before_id = low if before_id is None else min(before_id, low)
+                for field in COUNT_FIELDS:
+                    totals[field] += int(row.get(field) or 0)
+        return before_id, dict(totals), done
+
+    def record_range(self, high_id: int, low_id: int, run_id: str, counts: Dict[str, int]) -> None:
+        """一批写入成功后记录已完成区间 [low_id, high_id)。"""
+        self._write(
+            {
+                "kind": "range",
+                "partition_index": self.partition_index,
+                "partition_count": self.partition_count,
+                "range_high_id": int(high_id),
+                "range_low_id": int(low_id),
+                "run_id": run_id,
+                **{field: int(counts.get(field, 0)) for field in COUNT_FIELDS},
+            }
+        )
+
+    def mark_done(self, run_id: str) -> None:
+        self._write(
+            {
+                "kind": "partition_done",
+                "partition_index": self.partition_index,
+                "partition_count": self.partition_count,
+                "range_low_id": 0,
+                "run_id": run_id,
+            }
+        )
+
+    def done_partitions(self) -> Set[int]:
+        return {
+            int(row.get("partition_index") or 0)
+            for row in self.load()
+            if row.get("kind") == "partition_done"
+        }
+
+    def claim_serve_refresh(self, run_id: str) -> bool:
+        """所有分区完成后认领 serve 层刷新；同一作业只有一个进程能认领成功。"""
+        return self._write(
+            {
+                "kind": "serve_refresh",
+                "partition_index": -1,
+                "partition_count": self.partition_count,
+                "range_low_id": 0,
+                "run_id": run_id,
+            },
+            ignore_duplicates=True,
+        )
@@ -0,0 +1,619 @@
+#!/usr/bin/env python3
+"""Stock 事件层本地列式镜像（Parquet，可选依赖 pyarrow）。
+
+`stock_events_v2` / `stock_event_tickers_v2` / `stock_opportunities_v2` 按 as_of 的 UTC 日期分区，
+只追加写：每次同步按 (updated_at, id) 游标增量拉取，新版本追加成新的 part 文件，
+读取时按主键去重、保留最新版本。游标回退 overlap_sec 重读，避免并发事务晚提交的行被跳过。
+镜像列结构变化（如映射表新增 updated_at）时，该表的旧 part 清空后按 horizon 重新同步。
+
+同一行重写时 as_of 只会变大（写入时取当前时间），最新版本总在不早于旧版本的分区里，
+所以窗口查询只需读 [start 所在日, 最新分区]；as_of 下界可下推到 Parquet 过滤，上界和
+is_active 等可变字段必须在去重之后再过滤。事件的映射按窗口内事件 id 读取，不看映射自身的 as_of：
+事件重写后未改动的映射仍留在旧分区，与 PostgREST 按 event_id 查映射的结果一致。
+
+未安装 pyarrow 时 `open_event_store` 返回 None，调用方继续走 PostgREST 查询。
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import json
+import logging
+import os
+import shutil
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # 未安装 pyarrow 时调用方回退到 PostgREST 查询
+    pa = None  # type: ignore[assignment]
+    pc = None  # type: ignore[assignment]
+    pq = None  # type: ignore[assignment]
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.feature_flags import read_bool_env  # noqa: E402
+
+HAS_PYARROW = pa is not None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE_DIR = "data/event_store"
+SYNC_FLUSH_ROWS = 20000
+COMPACT_MIN_PARTS = 8
+
+
+@dataclass(frozen=True)
+class StoreTable:
+    name: str
+    key: Tuple[str, ...]
+    cursor: str
+    columns: Tuple[Tuple[str, str], ...]
+
+    @property
+    def select(self) -> str:
+        return ",".join(name for name, _ in self.columns)
+
+
+EVENTS = StoreTable(
+    name="stock_events_v2",
+    key=("id",),
+    cursor="updated_at",
+    columns=(
+        ("id", "int"),
+        ("event_key", "str"),
+        ("source_type", "str"),
+        ("source_ref", "str"),
+        ("event_type", "str"),
+        ("direction", "str"),
+        ("strength", "float"),
+        ("ttl_hours", "int"),
+        ("summary", "str"),
+        ("details", "json"),
+        ("published_at", "ts"),
+        ("as_of", "ts"),
+        ("run_id", "str"),
+        ("is_active", "bool"),
+        ("created_at", "ts"),
+        ("updated_at", "ts"),
+    ),
+)
+
+# 映射表的 updated_at 由 sql/2026-10-19_stock_event_store_sync_indexes.sql 补齐，冲突更新同样会被同步
+EVENT_TICKERS = StoreTable(
+    name="stock_event_tickers_v2",
+    key=("event_id", "ticker", "role"),
+    cursor="updated_at",
+    columns=(
+        ("id", "int"),
+        ("event_id", "int"),
+        ("ticker", "str"),
+        ("role", "str"),
+        ("weight", "float"),
+        ("confidence", "float"),
+        ("as_of", "ts"),
+        ("run_id", "str"),
+        ("created_at", "ts"),
+        ("updated_at", "ts"),
+    ),
+)
+
+OPPORTUNITIES = StoreTable(
+    name="stock_opportunities_v2",
+    key=("id",),
+    cursor="updated_at",
+    columns=(
+        ("id", "int"),
+        ("opportunity_key", "str"),
+        ("ticker", "str"),
+        ("side", "str"),
+        ("horizon", "str"),
+        ("opportunity_score", "float"),
+        ("confidence", "float"),
+        ("risk_level", "str"),
+        ("why_now", "str"),
+        ("invalid_if", "str"),
+        ("catalysts", "json"),
+        ("source_signal_ids", "ints"),
+        ("source_event_ids", "ints"),
+        ("expires_at", "ts"),
+        ("as_of", "ts"),
+        ("run_id", "str"),
+        ("is_active", "bool"),
+        ("created_at", "ts"),
+        ("updated_at", "ts"),
+    ),
+)
+
+STORE_TABLES: Dict[str, StoreTable] = {table.name: table for table in (EVENTS, EVENT_TICKERS, OPPORTUNITIES)}
+
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _arrow_type(kind: str) -> Any:
+    return {
+        "int": pa.int64(),
+        "float": pa.float64(),
+        "bool": pa.bool_(),
+        "ts": pa.timestamp("us", tz="UTC"),
+        "ints": pa.list_(pa.int64()),
+    }.get(kind, pa.string())
+
+
+def _to_store(kind: str, value: Any) -> Any:
+    """PostgREST 行值 → 列值；无法转换时写 NULL。"""
+    if value is None:
+        return None
+    try:
+        if kind == "int":
+            return int(value)
+        if kind == "float":
+            return float(value)
+        if kind == "bool":
+            return bool(value)
+        if kind == "ts":
+            return _parse_ts(value)
+        if kind == "json":
+            return json.dumps(value, ensure_ascii=False, sort_keys=True)
+        if kind == "ints":
+            return [int(item) for item in value]
+    except (TypeError, ValueError):
+        return None
+    return str(value)
+
+
+def _from_store(kind: str, value: Any) -> Any:
+    """列值 → 与 PostgREST 返回形状一致的行值（时间为 ISO 字符串，JSON 已解析）。"""
+    if value is None:
+        return None
+    if kind == "ts":
+        return value.astimezone(timezone.utc).isoformat()
+    if kind == "json":
+        try:
+            return json.loads(value)
+        except ValueError:
+            return None
+    return value
+
+
+class EventStore:
+    """本地列式镜像：增量同步 + 窗口查询。"""
+
+    def __init__(
+        self,
+        supabase: Any,
+        root: str = DEFAULT_STORE_DIR,
+        overlap_sec: Optional[int] = None,
+        horizon_days: Optional[int] = None,
+    ):
+        if not HAS_PYARROW:
+            raise RuntimeError("EventStore 需要 pyarrow")
+        self.supabase = supabase
+        self.root = root
+        self.overlap_sec = int(
+            overlap_sec if overlap_sec is not None else os.getenv("STOCK_EVENT_STORE_OVERLAP_SEC", "300")
+        )
+        self.horizon_days = int(
+            horizon_days if horizon_days is not None else os.getenv("STOCK_EVENT_STORE_HORIZON_DAYS", "30")
+        )
+        self._schemas = {
+            name: pa.schema([(column, _arrow_type(kind)) for column, kind in table.columns])
+            for name, table in STORE_TABLES.items()
+        }
+
+    # -- 文件布局 ----------------------------------------------------
+
+    def _table_dir(self, table: StoreTable) -> str:
+        return os.path.join(self.root, table.name)
+
+    def _state_path(self, table: StoreTable) -> str:
+        return os.path.join(self._table_dir(table), "_state.json")
+
+    def _load_state(self, table: StoreTable) -> Dict[str, Any]:
+        try:
+            with open(self._state_path(table), encoding="utf-8") as handle:
+                state = json.load(handle)
+        except (OSError, ValueError):
+            state = {}
+        state.setdefault("cursor", "")
+        state.setdefault("recent", {})
+        state.setdefault("next_part", 1)
+        return state
+
+    def _save_state(self, table: StoreTable, state: Dict[str, Any]) -> None:
+        path = self._state_path(table)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            json.dump(state, handle, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _partitions(self, table: StoreTable, start_day: str = "") -> List[Tuple[str, List[str]]]:
+        """[(day, [part 路径按序号升序])]，按日期升序，只含 >= start_day 的分区。"""
+        table_dir = self._table_dir(table)
+        if not os.path.isdir(table_dir):
+            return []
+        partitions: List[Tuple[str, List[str]]] = []
+        for entry in sorted(os.listdir(table_dir)):
+            if not entry.startswith("day=") or entry[4:] < start_day:
+                continue
+            day_dir = os.path.join(table_dir, entry)
+            parts = sorted(name for name in os.listdir(day_dir) if name.endswith(".parquet"))
+            if parts:
+                partitions.append((entry[4:], [os.path.join(day_dir, name) for name in parts]))
+        return partitions
+
+    def _write_part(self, table: StoreTable, day: str, seq: int, rows: Any) -> str:
+        """rows 为 dict 列表或同 schema 的 pa.Table；先写临时文件再原子改名。"""
+        day_dir = os.path.join(self._table_dir(table), f"day={day}")
+        os.makedirs(day_dir, exist_ok=True)
+        path = os.path.join(day_dir, f"part-{seq:08d}.parquet")
+        tmp_path = f"{path}.tmp"
+        if not isinstance(rows, pa.Table):
+            rows = pa.Table.from_pylist(rows, schema=self._schemas[table.name])
+        pq.write_table(rows, tmp_path)
+        os.replace(tmp_path, path)
+        return path
+
+    @contextmanager
+    def _sync_lock(self) -> Iterator[None]:
+        """同机多个脚本共用一个镜像目录时串行同步；读不加锁（part 文件原子替换）。"""
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, ".sync.lock"), "a") as handle:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+
+    # -- 同步 --------------------------------------------------------
+
+    def _pull_pages(
+        self,
+        table: StoreTable,
+        since_iso: str,
+        page_size: int,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """按 (cursor, id) keyset 分页拉取；同一时间戳的大批行（如批量下线）在该时间戳内按 id 翻页。"""
+        boundary = since_iso
+        last_id: Optional[int] = None
+        while True:
+            if last_id is not None:
+                page = (
+                    self.supabase.table(table.name)
+                    .select(table.select)
+                    .eq(table.cursor, boundary)
+                    .gt("id", last_id)
+                    .order("id")
+                    .limit(page_size)
+                    .execute()
+                    .data
+                    or []
+                )
+                if page:
+                    yield page
+                if len(page) >= page_size:
+                    last_id = int(page[-1]["id"])
+                    continue
+            query = self.supabase.table(table.name).select(table.select)
+            if last_id is None:
+                query = query.gte(table.cursor, boundary)
+            else:
+                query = query.gt(table.cursor, boundary)
+            page = query.order(table.cursor).order("id").limit(page_size).execute().data or []
+            if page:
+                yield page
+            if len(page) < page_size:
+                return
+            boundary, last_id = str(page[-1][table.cursor]), int(page[-1]["id"])
+
+    def _layout_matches(self, table: StoreTable) -> bool:
+        """已有 part 的列与当前表定义一致；不一致的 part 无法与新 schema 拼接。"""
+        for _, parts in self._partitions(table):
+            return pq.read_schema(parts[0]).names == [column for column, _ in table.columns]
+        return True
+
+    def _sync_table(self, table: StoreTable, page_size: int) -> int:
+        if not self._layout_matches(table):
+            logger.warning(f"[EVENT_STORE_RESET] table={table.name} reason=columns_changed")
+            shutil.rmtree(self._table_dir(table), ignore_errors=True)
+        state = self._load_state(table)
+        cursor = _parse_ts(state["cursor"])
+        if cursor is None:
+            since = datetime.now(timezone.utc) - timedelta(days=self.horizon_days)
+        else:
+            since = cursor - timedelta(seconds=self.overlap_sec)
+        recent: Dict[str, str] = dict(state["recent"])
+        kinds = dict(table.columns)
+
+        buffered: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        buffered_count = 0
+        appended = 0
+
+        def _flush() -> None:
+            for day in sorted(buffered):
+                self._write_part(table, day, int(state["next_part"]), buffered[day])
+                state["next_part"] = int(state["next_part"]) + 1
+            buffered.clear()
+
+        for page in self._pull_pages(table, since.isoformat(), page_size):
+            for row in page:
+                stamp = _parse_ts(row.get(table.cursor))
+                as_of = _parse_ts(row.get("as_of")) or stamp
+                if stamp is None or as_of is None:
+                    continue
+                row_id, stamp_iso = str(row.get("id")), stamp.isoformat()
+                if recent.get(row_id) == stamp_iso:
+                    continue  # overlap 窗口内已同步过的同一版本
+                recent[row_id] = stamp_iso
+                cursor = stamp if cursor is None else max(cursor, stamp)
+                buffered[as_of.date().isoformat()].append(
+                    {column: _to_store(kinds[column], row.get(column)) for column, _ in table.columns}
+                )
+                buffered_count += 1
+                appended += 1
+            if buffered_count >= SYNC_FLUSH_ROWS:
+                _flush()
+                buffered_count = 0
+        _flush()
+
+        if cursor is not None:
+            floor = (cursor - timedelta(seconds=self.overlap_sec)).isoformat()
+            state["cursor"] = cursor.isoformat()
+            state["recent"] = {row_id: stamp for row_id, stamp in recent.items() if stamp >= floor}
+        os.makedirs(self._table_dir(table), exist_ok=True)
+        self._save_state(table, state)
+        return appended
+
+    def sync(self, tables: Optional[Sequence[str]] = None, page_size: int = 1000) -> Dict[str, int]:
+        """增量同步指定表（默认全部），返回每表追加的行数；分区 part 过多时顺带压实。"""
+        started_at = time.perf_counter()
+        counts: Dict[str, int] = {}
+        with self._sync_lock():
+            for name in tables or list(STORE_TABLES):
+                table = STORE_TABLES[name]
+                counts[name] = self._sync_table(table, page_size=page_size)
+                for day, parts in self._partitions(table):
+                    if len(parts) >= COMPACT_MIN_PARTS:
+                        self._compact_day(table, day, parts)
+        logger.info(
+            f"[EVENT_STORE_SYNC] root={self.root} elapsed={time.perf_counter() - started_at:.2f}s "
+            + " ".join(f"{name}={count}" for name, count in counts.items())
+        )
+        return counts
+
+    def _compact_day(self, table: StoreTable, day: str, parts: List[str]) -> None:
+        """把一个分区的全部 part 去重合并成一个；新 part 序号最大，读端先见新文件再见旧文件删除。"""
+        latest = self._dedupe(table, [(day, parts)], pushdown=None)
+        state = self._load_state(table)
+        self._write_part(table, day, int(state["next_part"]), latest)
+        state["next_part"] = int(state["next_part"]) + 1
+        self._save_state(table, state)
+        for path in parts:
+            os.remove(path)
+
+    def compact(self, tables: Optional[Sequence[str]] = None) -> int:
+        """压实所有多 part 分区，返回处理的分区数。"""
+        compacted = 0
+        with self._sync_lock():
+            for name in tables or list(STORE_TABLES):
+                table = STORE_TABLES[name]
+                for day, parts in self._partitions(table):
+                    if len(parts) > 1:
+                        self._compact_day(table, day, parts)
+                        compacted += 1
+        return compacted
+
+    # -- 查询 --------------------------------------------------------
+
+    def _dedupe(
+        self,
+        table: StoreTable,
+        partitions: List[Tuple[str, List[str]]],
+        pushdown: Optional[List[Tuple[str, str, Any]]],
+    ) -> "pa.Table":
+        """按 (日期, 序号) 顺序拼接 part，同 key 取最后出现的行（即最新版本），全程列式。"""
+        pieces = [
+            pq.read_table(path, filters=pushdown or None)
+            for _, parts in partitions
+            for path in parts
+        ]
+        if not pieces:
+            return self._schemas[table.name].empty_table()
+        merged = pa.concat_tables(pieces)
+        if merged.num_rows == 0:
+            return merged
+        order = pa.array(range(merged.num_rows), type=pa.int64())
+        latest = merged.append_column("_seq", order).group_by(list(table.key)).aggregate([("_seq", "max")])
+        winners = latest.column("_seq_max")
+        return merged.take(pc.take(winners, pc.sort_indices(winners)))
+
+    def _scan(
+        self,
+        table: StoreTable,
+        start_iso: Optional[str],
+        pushdown: Optional[List[Tuple[str, str, Any]]] = None,
+    ) -> "pa.Table":
+        """读取 as_of >= start 的最新版本；读取中途遇到压实删除的文件时重读一次。"""
+        start = _parse_ts(start_iso) if start_iso else None
+        filters = list(pushdown or [])
+        if start is not None:
+            filters.append(("as_of", ">=", start))
+        for attempt in range(2):
+            try:
+                partitions = self._partitions(table, start.date().isoformat() if start else "")
+                return self._dedupe(table, partitions, filters)
+            except FileNotFoundError:
+                if attempt:
+                    raise
+        return self._schemas[table.name].empty_table()
+
+    def _latest(
+        self,
+        table: StoreTable,
+        start_iso: Optional[str],
+        end_iso: Optional[str],
+        active_only: bool,
+        pushdown: Optional[List[Tuple[str, str, Any]]] = None,
+    ) -> "pa.Table":
+        """去重后再按可变字段（is_active）与 as_of 上界过滤，as_of 降序。"""
+        rows = self._scan(table, start_iso, pushdown=pushdown)
+        end = _parse_ts(end_iso) if end_iso else None
+        if active_only:
+            rows = rows.filter(pc.fill_null(rows.column("is_active"), False))
+        if end is not None:
+            rows = rows.filter(pc.less_equal(rows.column("as_of"), pa.scalar(end, type=_arrow_type("ts"))))
+        return rows.sort_by([("as_of", "descending"), ("id", "descending")])
+
+    def _rows_out(self, table: StoreTable, rows: "pa.Table") -> List[Dict[str, Any]]:
+        """物化成 dict；只有时间与 JSON 列需要逐值转换。"""
+        converted = [(column, kind) for column, kind in table.columns if kind in ("ts", "json")]
+        result = rows.to_pylist()
+        for row in result:
+            for column, kind in converted:
+                row[column] = _from_store(kind, row[column])
+        return result
+
+    def events(
+        self,
+        start_iso: Optional[str] = None,
+        end_iso: Optional[str] = None,
+        tickers: Optional[Iterable[str]] = None,
+        active_only: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """窗口内事件（as_of 降序），每行带 `tickers`：[{ticker, role, weight, confidence}]。
+
+        tickers 非空时只返回映射到这些 ticker 的事件，且 `tickers` 只含这些 ticker。
+        """
+        ticker_filter = sorted({str(ticker).upper() for ticker in tickers or [] if str(ticker).strip()})
+        events = self._latest(EVENTS, start_iso, end_iso, active_only)
+        if events.num_rows == 0:
+            return []
+        # 映射按事件 id 读全部分区：映射的 as_of 可能早于事件重写后的 as_of
+        pushdown: List[Tuple[str, str, Any]] = [("event_id", "in", events.column("id").to_pylist())]
+        if ticker_filter:
+            pushdown.append(("ticker", "in", ticker_filter))
+        map_rows = self._scan(EVENT_TICKERS, None, pushdown=pushdown)
+        by_event: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+        map_columns = ["event_id", "ticker", "role", "weight", "confidence"]
+        for row in map_rows.sort_by("id").select(map_columns).to_pylist():
+            by_event[int(row.pop("event_id"))].append(row)
+        if ticker_filter:
+            if not by_event:
+                return []
+            events = events.filter(pc.is_in(events.column("id"), pa.array(sorted(by_event), type=pa.int64())))
+
+        result = self._rows_out(EVENTS, events)
+        for row in result:
+            row["tickers"] = by_event.get(int(row["id"]), [])
+        return result
+
+    def opportunities(
+        self,
+        start_iso: Optional[str] = None,
+        end_iso: Optional[str] = None,
+        run_id: Optional[str] = None,
+        active_only: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """窗口内机会（as_of 降序）；run_id 不可变，可下推到 Parquet 过滤。"""
+        rows = self._latest(
+            OPPORTUNITIES,
+            start_iso,
+            end_iso,
+            active_only,
+            pushdown=[("run_id", "=", run_id)] if run_id else None,
+        )
+        return self._rows_out(OPPORTUNITIES, rows)
+
+    def opportunities_by_run(self, run_id: str) -> List[Dict[str, Any]]:
+        """单个 run 的全部机会，按机会分降序。"""
+        rows = self.opportunities(run_id=run_id)
+        rows.sort(key=lambda item: float(item.get("opportunity_score") or 0.0), reverse=True)
+        return rows
+
+
+def open_event_store(
+    supabase: Any,
+    root: Optional[str] = None,
+    tables: Optional[Sequence[str]] = None,
+    enabled: Optional[bool] = None,
+) -> Optional[EventStore]:
+    """按配置打开并同步镜像；未启用、缺少 pyarrow 或同步失败时返回 None（调用方回退 PostgREST）。
+
+    root 显式传入（如脚本的 --event-store）即启用；否则看 enabled，未给出时读 ENABLE_STOCK_EVENT_STORE。
+    """
+    if not root:
+        if enabled is None:
+            enabled = read_bool_env("ENABLE_STOCK_EVENT_STORE", default=False)
+        if not enabled:
+            return None
+        root = os.getenv("STOCK_EVENT_STORE_DIR", DEFAULT_STORE_DIR)
+    if not HAS_PYARROW:
+        logger.warning("[EVENT_STORE_UNAVAILABLE] 未安装 pyarrow，回退 PostgREST 查询")
+        return None
+    try:
+        store = EventStore(supabase, root=root)
+        store.sync(tables=tables)
+        return store
+    except Exception as e:
+        logger.warning(f"[EVENT_STORE_FALLBACK] root={root} error={str(e)[:160]}")
+        return None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stock event store sync")
+    parser.add_argument("--root", type=str, default=os.getenv("STOCK_EVENT_STORE_DIR", DEFAULT_STORE_DIR))
+    parser.add_argument(
+        "--tables",
+        type=str,
+        default=",".join(STORE_TABLES),
+        help="逗号分隔的表名",
+    )
+    parser.add_argument("--compact", action="store_true", help="同步后压实所有多 part 分区")
+    args = parser.parse_args()
+
+    from supabase import create_client
+
+    url = os.getenv("SUPABASE_URL")
+    key = os.getenv("SUPABASE_KEY")
+    if not url or not key:
+        raise ValueError("缺少 SUPABASE_URL / SUPABASE_KEY")
+    tables = [name.strip() for name in args.tables.split(",") if name.strip()]
+    unknown: Set[str] = set(tables) - set(STORE_TABLES)
+    if unknown:
+        raise ValueError(f"不支持的表：{sorted(unknown)}")
+
+    store = EventStore(create_client(url, key), root=args.root)
+    store.sync(tables=tables)
+    if args.compact:
+        logger.info(f"[EVENT_STORE_COMPACT] partitions={store.compact(tables=tables)}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    main()
@@ -31,6 +31,13 @@ class FeatureFlags:
     enable_stock_evidence_layer: bool = False
     enable_stock_transmission_layer: bool = False
     enable_stock_ai_debate_view: bool = False
+    enable_stock_ticker_universe: bool = False
+    enable_stock_incremental_signals: bool = False
+    enable_stock_serve_pointer: bool = False
+    enable_stock_columnar_signals: bool = False
+    enable_stock_streaming_incremental: bool = False
+    enable_stock_event_store: bool = False
+    enable_stock_x_grok_record: bool = False
 
     @classmethod
     def from_env(cls) -> "FeatureFlags":
@@ -61,4 +68,32 @@ class FeatureFlags:
                 "ENABLE_STOCK_AI_DEBATE_VIEW",
                 default=False,
             ),
+            enable_stock_ticker_universe=read_bool_env(
+                "ENABLE_STOCK_TICKER_UNIVERSE",
+                default=False,
+            ),
+            enable_stock_incremental_signals=read_bool_env(
+                "ENABLE_STOCK_INCREMENTAL_SIGNALS",
+                default=False,
+            ),
+            enable_stock_serve_pointer=read_bool_env(
+                "ENABLE_STOCK_SERVE_POINTER",
+                default=False,
+            ),
+            enable_stock_columnar_signals=read_bool_env(
+                "ENABLE_STOCK_COLUMNAR_SIGNALS",
+                default=False,
+            ),
+            enable_stock_streaming_incremental=read_bool_env(
+                "ENABLE_STOCK_STREAMING_INCREMENTAL",
+                default=False,
+            ),
+            enable_stock_event_store=read_bool_env(
+                "ENABLE_STOCK_EVENT_STORE",
+                default=False,
+            ),
+            enable_stock_x_grok_record=read_bool_env(
+                "ENABLE_STOCK_X_GROK_RECORD",
+                default=False,
+            ),
         )
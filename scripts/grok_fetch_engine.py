@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""Grok 账号采集异步引擎。
+
+每个账号一个协程，共用三道闸：
+- RPM / TPM 令牌桶：发请求前按 1 次请求、预估 token 扣减，响应后按实际 usage 补差；
+- AIMD 并发：成功时每轮 +1，429 / 超时时减半（冷却期内只减一次）；
+- 单账号重试：429 / 5xx / 超时 / 连接错误按指数退避 + 全抖动重试，尊重 Retry-After。
+
+在途时间超过近期 p95 延迟的请求会发一个对冲请求，先返回者胜出、另一个取消；
+对冲数量受比例上限约束。结果按完成顺序逐个产出，调用方可边采集边入库。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, List, Optional, Sequence, Tuple
+
+RETRYABLE_STATUS = {408, 409, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = ("Timeout", "Connection")
+
+
+def classify_error(error: BaseException) -> Tuple[str, float]:
+    """返回 (类别, Retry-After 秒)；类别为 throttled / timeout / retryable / fatal。"""
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    retry_after = 0.0
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            retry_after = max(0.0, float(headers.get("retry-after") or 0))
+        except (TypeError, ValueError):
+            retry_after = 0.0
+    if status == 429:
+        return "throttled", retry_after
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)) or "Timeout" in type(error).__name__:
+        return "timeout", retry_after
+    if status in RETRYABLE_STATUS or (isinstance(status, int) and status >= 500):
+        return "retryable", retry_after
+    if status is None and any(name in type(error).__name__ for name in RETRYABLE_ERROR_NAMES):
+        return "retryable", retry_after
+    return "fatal", retry_after
+
+
+class TokenBucket:
+    """按分钟速率补充的令牌桶；rate_per_min <= 0 表示不限速。"""
+
+    def __init__(self, rate_per_min: float, burst_sec: float = 10.0):
+        self.rate_per_sec = max(0.0, float(rate_per_min)) / 60.0
+        self.capacity = max(1.0, self.rate_per_sec * max(1.0, burst_sec))
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate_per_sec)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """扣减 amount（超过桶容量时按容量扣），返回等待秒数。"""
+        if self.rate_per_sec <= 0:
+            return 0.0
+        need = min(max(0.0, float(amount)), self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= need:
+                    self.tokens -= need
+                    return waited
+                delay = (need - self.tokens) / self.rate_per_sec
+                waited += delay
+                await asyncio.sleep(delay)
+
+    def settle(self, estimated: float, actual: float) -> None:
+        """按实际用量补差；余额可以为负，后续请求相应等待。"""
+        if self.rate_per_sec <= 0 or actual <= 0:
+            return
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + float(estimated) - float(actual))
+
+
+class AIMDLimiter:
+    """加性增、乘性减的并发上限。"""
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        decrease_factor: float = 0.5,
+        cooldown_sec: float = 2.0,
+    ):
+        self.min_limit = max(1, int(min_limit))
+        self.max_limit = max(self.min_limit, int(max_limit))
+        self.limit = float(min(self.max_limit, max(self.min_limit, int(initial))))
+        self.decrease_factor = decrease_factor
+        self.cooldown_sec = cooldown_sec
+        self.inflight = 0
+        self.peak_inflight = 0
+        self.decreases = 0
+        self._last_decrease = float("-inf")
+        self._waiters: List[asyncio.Future] = []
+
+    async def acquire(self) -> None:
+        while self.inflight >= int(self.limit):
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.inflight += 1
+        self.peak_inflight = max(self.peak_inflight, self.inflight)
+
+    def release(self, outcome: str) -> None:
+        self.inflight -= 1
+        if outcome == "ok":
+            self.limit = min(float(self.max_limit), self.limit + 1.0 / max(1.0, self.limit))
+        elif outcome in {"throttled", "timeout"}:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown_sec:
+                self.limit = max(float(self.min_limit), self.limit * self.decrease_factor)
+                self._last_decrease = now
+                self.decreases += 1
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+class LatencyWindow:
+    """最近 N 次成功请求的延迟，用于估算对冲阈值。"""
+
+    def __init__(self, size: int = 200):
+        self.samples: Deque[float] = deque(maxlen=max(1, size))
+
+    def observe(self, latency_sec: float) -> None:
+        self.samples.append(max(0.0, float(latency_sec)))
+
+    def quantile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        if len(self.samples) < max(1, min_samples):
+            return None
+        ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, max(0, int(round(q * len(ordered))) - 1))
+        return ordered[idx]
+
+
+@dataclass
+class EngineStats:
+    """引擎运行指标。"""
+
+    jobs: int = 0
+    jobs_ok: int = 0
+    jobs_failed: int = 0
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0
+    timeouts: int = 0
+    hedges: int = 0
+    hedge_wins: int = 0
+    rate_wait_sec: float = 0.0
+    tokens_used: int = 0
+    peak_concurrency: int = 0
+    final_concurrency: float = 0.0
+    concurrency_decreases: int = 0
+    p95_latency_ms: float = 0.0
+    elapsed_sec: float = 0.0
+
+    def as_dict(self) -> dict:
+        payload = asdict(self)
+        payload["rate_wait_sec"] = round(self.rate_wait_sec, 3)
+        payload["final_concurrency"] = round(self.final_concurrency, 2)
+        payload["elapsed_sec"] = round(self.elapsed_sec, 3)
+        return payload
+
+
+@dataclass
+class FetchOutcome:
+    """单个任务的最终结果；ok=False 时 error 为最后一次失败原因。"""
+
+    job: Any
+    ok: bool
+    value: Any
+    error: str
+    attempts: int
+    elapsed_sec: float
+
+
+class GrokFetchEngine:
+    """按完成顺序产出结果的异步采集引擎。
+
+    `call(job)` 为协程，返回 (value, 实际消耗 token 数)；`estimate_tokens(job)` 给出 TPM 预扣量。
+    """
+
+    def __init__(
+        self,
+        call: Callable[[Any], Awaitable[Tuple[Any, int]]],
+        estimate_tokens: Callable[[Any], int],
+        rpm: float = 60.0,
+        tpm: float = 0.0,
+        initial_concurrency: int = 6,
+        max_concurrency: int = 24,
+        max_attempts: int = 4,
+        request_timeout_sec: float = 120.0,
+        backoff_base_sec: float = 1.0,
+        backoff_max_sec: float = 30.0,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 8,
+        hedge_max_ratio: float = 0.1,
+        rng: Optional[random.Random] = None,
+    ):
+        self.call = call
+        self.estimate_tokens = estimate_tokens
+        self.rpm = rpm
+        self.tpm = tpm
+        self.initial_concurrency = initial_concurrency
+        self.max_concurrency = max(1, max_concurrency, initial_concurrency)
+        self.max_attempts = max(1, int(max_attempts))
+        self.request_timeout_sec = request_timeout_sec
+        self.backoff_base_sec = backoff_base_sec
+        self.backoff_max_sec = backoff_max_sec
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_max_ratio = max(0.0, hedge_max_ratio)
+        self.rng = rng or random.Random()
+        self.latency = LatencyWindow()
+        self.stats = EngineStats()
+        # 令牌桶 / 并发闸依赖事件循环，在 iter_results 内创建
+        self._rpm_bucket: Optional[TokenBucket] = None
+        self._tpm_bucket: Optional[TokenBucket] = None
+        self._limiter: Optional[AIMDLimiter] = None
+
+    async def iter_results(self, jobs: Sequence[Any]) -> AsyncIterator[FetchOutcome]:
+        started = time.perf_counter()
+        self._rpm_bucket = TokenBucket(self.rpm)
+        self._tpm_bucket = TokenBucket(self.tpm)
+        self._limiter = AIMDLimiter(self.initial_concurrency, max_limit=self.max_concurrency)
+        self.stats.jobs = len(jobs)
+        tasks = [asyncio.create_task(self._run_job(job)) for job in jobs]
+        try:
+            for future in asyncio.as_completed(tasks):
+                outcome = await future
+                if outcome.ok:
+                    self.stats.jobs_ok += 1
+                else:
+                    self.stats.jobs_failed += 1
+                yield outcome
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.stats.peak_concurrency = self._limiter.peak_inflight
+            self.stats.final_concurrency = self._limiter.limit
+            self.stats.concurrency_decreases = self._limiter.decreases
+            p95 = self.latency.quantile(0.95)
+            self.stats.p95_latency_ms = round((p95 or 0.0) * 1000, 2)
+            self.stats.elapsed_sec = time.perf_counter() - started
+
+    async def _run_job(self, job: Any) -> FetchOutcome:
+        started = time.perf_counter()
+        error = ""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                value = await self._attempt_with_hedge(job)
+                return FetchOutcome(job, True, value, "", attempt, time.perf_counter() - started)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                kind, retry_after = classify_error(e)
+                error = f"{type(e).__name__}: {str(e)[:300]}"
+                if kind == "fatal" or attempt >= self.max_attempts:
+                    return FetchOutcome(job, False, None, error, attempt, time.perf_counter() - started)
+                self.stats.retries += 1
+                backoff = min(self.backoff_max_sec, self.backoff_base_sec * (2 ** (attempt - 1)))
+                await asyncio.sleep(max(retry_after, self.rng.uniform(0.0, backoff)))
+        return FetchOutcome(job, False, None, error, self.max_attempts, time.perf_counter() - started)
+
+    async def _attempt_with_hedge(self, job: Any) -> Any:
+        dispatched = asyncio.Event()
+        primary = asyncio.create_task(self._single_request(job, dispatched))
+        try:
+            # 对冲计时从请求真正发出（拿到并发槽与令牌）开始
+            waiter = asyncio.create_task(dispatched.wait())
+            await asyncio.wait({primary, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            threshold = self.latency.quantile(self.hedge_quantile, self.hedge_min_samples)
+            if not primary.done() and threshold is not None:
+                await asyncio.wait({primary}, timeout=threshold)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if (
+            primary.done()
+            or threshold is None
+            or self.stats.hedges + 1 > self.hedge_max_ratio * max(1, self.stats.requests)
+        ):
+            return await primary
+
+        self.stats.hedges += 1
+        hedge = asyncio.create_task(self._single_request(job))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats.hedge_wins += 1
+                        return task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        raise primary.exception() or hedge.exception()
+
+    async def _single_request(self, job: Any, dispatched: Optional[asyncio.Event] = None) -> Any:
+        estimate = max(1, int(self.estimate_tokens(job)))
+        await self._limiter.acquire()
+        outcome = "error"
+        try:
+            waited = await self._rpm_bucket.acquire(1)
+            waited += await self._tpm_bucket.acquire(estimate)
+            self.stats.rate_wait_sec += waited
+            self.stats.requests += 1
+            if dispatched is not None:
+                dispatched.set()
+            started = time.perf_counter()
+            value, used = await asyncio.wait_for(self.call(job), timeout=self.request_timeout_sec)
+            self.latency.observe(time.perf_counter() - started)
+            self._tpm_bucket.settle(estimate, used)
+            self.stats.tokens_used += max(0, int(used or 0))
+            outcome = "ok"
+            return value
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        except Exception as e:
+            outcome = classify_error(e)[0]
+            if outcome == "throttled":
+                self.stats.throttled += 1
+            elif outcome == "timeout":
+                self.stats.timeouts += 1
+            raise
+        finally:
+            self._limiter.release(outcome)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""X 信息源 Grok 原始响应录制 / 回放。
+
+采集时把每个账号的 Grok 原始文本按 (handle, 时间桶) 写成一个 gzip JSON 文件：
+`<root>/<run_id>/<handle>.<bucket>.json.gz`，时间桶按采集间隔向下取整（如 20261019T1200）。
+写入走临时文件 + rename，进程中断不会留下半个文件。
+
+`stock_x_source_ingest.py --replay <run_id>` 读回整轮录制，重新走解析、归一化与入库，
+不发任何 API 请求：改 `_normalize_posts` 或信号阈值后可零成本重跑，也可作为压测语料。
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import os
+import re
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = "data/x_grok_cache"
+RECORD_SUFFIX = ".json.gz"
+_UNSAFE_NAME = re.compile(r"[^A-Za-z0-9_.-]")
+
+
+@dataclass
+class GrokResponse:
+    """单账号一次成功调用的原始响应。"""
+
+    handle: str
+    bucket: str
+    run_id: str
+    fetched_at: str
+    post_limit: int
+    attempts: int
+    elapsed_sec: float
+    raw_text: str
+    # 请求时上下文：回放写入的 details.source_model 必须与原始采集一致
+    model: str = ""
+    # 采集时的增量游标（上次入库帖子时间）；非空表示响应只含其后的新帖，回放结果据此标注
+    cursor_since: str = ""
+
+
+_FIELD_NAMES = tuple(item.name for item in fields(GrokResponse))
+
+
+def time_bucket(ts: datetime, bucket_min: float) -> str:
+    """把时间按 bucket_min 分钟向下取整，返回 YYYYMMDDTHHMM（UTC）。"""
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    step = max(60, int(float(bucket_min) * 60))
+    epoch = int(ts.astimezone(timezone.utc).timestamp())
+    floored = datetime.fromtimestamp(epoch - epoch % step, tz=timezone.utc)
+    return floored.strftime("%Y%m%dT%H%M")
+
+
+def _safe_name(value: str) -> str:
+    return _UNSAFE_NAME.sub("_", str(value or "").strip()) or "_"
+
+
+class GrokResponseStore:
+    """本地录制目录；写失败只告警，不影响采集。"""
+
+    def __init__(self, root: str = DEFAULT_CACHE_DIR, bucket_min: float = 120.0):
+        self.root = Path(root)
+        self.bucket_min = max(1.0, float(bucket_min))
+        self.recorded = 0
+
+    def run_dir(self, run_id: str) -> Path:
+        return self.root / _safe_name(run_id)
+
+    def record(
+        self,
+        run_id: str,
+        handle: str,
+        raw_text: str,
+        post_limit: int,
+        model: str,
+        attempts: int = 1,
+        elapsed_sec: float = 0.0,
+        cursor_since: str = "",
+        fetched_at: Optional[datetime] = None,
+    ) -> Optional[Path]:
+        fetched_at = fetched_at or datetime.now(timezone.utc)
+        item = GrokResponse(
+            handle=handle,
+            bucket=time_bucket(fetched_at, self.bucket_min),
+            run_id=run_id,
+            fetched_at=fetched_at.isoformat(),
+            post_limit=int(post_limit),
+            attempts=int(attempts),
+            elapsed_sec=round(float(elapsed_sec), 3),
+            raw_text=str(raw_text or ""),
+            model=str(model or ""),
+            cursor_since=str(cursor_since or ""),
+        )
+        directory = self.run_dir(run_id)
+        path = directory / f"{_safe_name(handle)}.{item.bucket}{RECORD_SUFFIX}"
+        tmp_path = path.with_name(path.name + ".tmp")
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as fp:
+                json.dump(asdict(item), fp, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"[GROK_RECORD_FAILED] handle={handle} path={path} error={str(e)[:120]}")
+            return None
+        self.recorded += 1
+        return path
+
+    def load_run(self, run_id: str) -> List[GrokResponse]:
+        """读回一轮录制；同一账号有多个时间桶时取最新一个。
+
+        损坏文件与缺少 model 的记录跳过：回放会覆盖已入库事件的 details，不能写入空模型名。
+        """
+        directory = self.run_dir(run_id)
+        if not directory.is_dir():
+            return []
+        latest: Dict[str, GrokResponse] = {}
+        for path in sorted(directory.glob(f"*{RECORD_SUFFIX}")):
+            try:
+                with gzip.open(path, "rt", encoding="utf-8") as fp:
+                    data = json.load(fp)
+                item = GrokResponse(**{key: data[key] for key in _FIELD_NAMES if key in data})
+            except Exception as e:
+                logger.warning(f"[GROK_REPLAY_SKIP] path={path} error={str(e)[:120]}")
+                continue
+            if not item.model:
+                logger.warning(f"[GROK_REPLAY_SKIP] path={path} error=missing model")
+                continue
+            current = latest.get(item.handle)
+            if current is None or item.bucket > current.bucket:
+                latest[item.handle] = item
+        return [latest[handle] for handle in sorted(latest)]
+
+    def list_runs(self) -> List[str]:
+        """已录制的 run_id，最近修改的在前。"""
+        if not self.root.is_dir():
+            return []
+        runs = [path for path in self.root.iterdir() if path.is_dir()]
+        runs.sort(key=lambda path: path.stat().st_mtime, reverse=True)
+        return [path.name for path in runs]
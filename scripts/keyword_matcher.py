@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""多模式关键词匹配：把多组关键词编译成一个 trie 正则，单次扫描返回全部命中。"""
+
+from __future__ import annotations
+
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """把关键词编译成 trie 形式的正则片段。
+
+    同一节点的分支首字符互不相同，因此每个位置至多沿一条路径前进，
+    贪婪的 `?` 会停在该位置能匹配到的最长关键词上。
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        is_end = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if is_end:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class KeywordHits:
+    """一次扫描的命中结果：关键词 → 最早出现位置的结束下标。
+
+    aligned=False 表示小写化改变了文本长度，此时下标不能用于截断窗口。
+    """
+
+    __slots__ = ("ends", "aligned", "_groups")
+
+    def __init__(
+        self,
+        ends: Dict[str, int],
+        groups: Dict[str, Tuple[str, ...]],
+        aligned: bool = True,
+    ):
+        self.ends = ends
+        self.aligned = aligned
+        self._groups = groups
+
+    def __contains__(self, word: str) -> bool:
+        return word in self.ends
+
+    def __or__(self, other: "KeywordHits") -> "KeywordHits":
+        merged = dict(other.ends)
+        merged.update(self.ends)
+        return KeywordHits(merged, self._groups, aligned=False)
+
+    def within(self, limit: int) -> "KeywordHits":
+        """只保留完整落在 text[:limit] 内的命中，等价于对截断文本重新扫描。"""
+        return KeywordHits({w: end for w, end in self.ends.items() if end <= limit}, self._groups)
+
+    def matched(self, group: str) -> List[str]:
+        """分组内命中的关键词（按原始顺序，保留重复项）。"""
+        return [word for word in self._groups.get(group, ()) if word in self.ends]
+
+    def count(self, group: str) -> int:
+        """与 `sum(1 for w in keywords if w in text.lower())` 等价的命中数。"""
+        return len(self.matched(group))
+
+    def any(self, group: str) -> bool:
+        return any(word in self.ends for word in self._groups.get(group, ()))
+
+
+class KeywordMatcher:
+    """大小写不敏感的子串匹配器，语义与逐个 `keyword in text.lower()` 一致。"""
+
+    def __init__(self, groups: Dict[str, Iterable[str]]):
+        self.groups: Dict[str, Tuple[str, ...]] = {}
+        vocabulary: Set[str] = set()
+        for group, words in groups.items():
+            normalized = tuple(str(word).lower() for word in words)
+            self.groups[group] = normalized
+            vocabulary.update(word for word in normalized if word)
+        self._has_empty = any("" in words for words in self.groups.values())
+        # 含空白的关键词可能跨越字段拼接处，调用方需要整体扫描
+        self.has_whitespace = any(any(ch.isspace() for ch in word) for word in vocabulary)
+
+        ordered = sorted(vocabulary)
+        # 关键词 → 它包含的所有关键词及偏移；命中最长词时一并计入其子串
+        self._closure: Dict[str, Tuple[Tuple[str, int], ...]] = {
+            word: tuple(
+                (other, word.find(other) + len(other)) for other in ordered if other in word
+            )
+            for word in ordered
+        }
+        self._pattern: Optional[Pattern[str]] = None
+        if ordered:
+            self._pattern = re.compile(trie_pattern(ordered))
+
+    def match(self, text: str) -> KeywordHits:
+        """单次扫描 text，返回全部命中的关键词。"""
+        ends: Dict[str, int] = {"": 0} if self._has_empty else {}
+        aligned = True
+        if self._pattern is not None and text:
+            lower = text.lower()
+            aligned = len(lower) == len(text)
+            search = self._pattern.search
+            item = search(lower)
+            while item is not None:
+                start = item.start()
+                for word, end in self._closure.get(item.group(), ()):
+                    if word not in ends or start + end < ends[word]:
+                        ends[word] = start + end
+                # 从下一个字符继续，保证重叠的关键词也能命中
+                item = search(lower, start + 1)
+        return KeywordHits(ends, self.groups, aligned=aligned)
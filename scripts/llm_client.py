@@ -9,10 +9,17 @@ import json
 import hashlib
 import logging
 import time
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Sequence, Tuple
 from datetime import datetime, timedelta
 from openai import OpenAI
 
+try:
+    from scripts.llm_json_stream import IncrementalJSONObject
+    from scripts.llm_telemetry import get_telemetry
+except Exception:
+    from llm_json_stream import IncrementalJSONObject
+    from llm_telemetry import get_telemetry
+
 # 配置日志 - 同时输出到控制台和文件
 logger = logging.getLogger(__name__)
 _VERBOSE_LOGS = os.getenv("LLM_VERBOSE_LOGS", "false").strip().lower() in (
@@ -39,25 +46,34 @@ console_handler.setLevel(_LOG_LEVEL)
 console_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 
-# 文件处理器 - 记录到日志文件
+# 文件处理器 - 记录到日志文件（delay=True：首条日志写入时才创建文件）
 log_dir = os.path.dirname(os.path.abspath(__file__))
 log_file = os.path.join(log_dir, "..", "logs", "llm_client.log")
 os.makedirs(os.path.dirname(log_file), exist_ok=True)
 
-file_handler = logging.FileHandler(log_file, mode="a", encoding="utf-8")
+file_handler = logging.FileHandler(log_file, mode="a", encoding="utf-8", delay=True)
 file_handler.setLevel(_LOG_LEVEL)
 file_handler.setFormatter(formatter)
 logger.addHandler(file_handler)
 
 # API 配置
 API_KEY = os.getenv("DASHSCOPE_API_KEY") or os.getenv("ALIBABA_API_KEY")
-BASE_URL = "https://dashscope.aliyuncs.com/compatible-mode/v1"
+# LLM_BASE_URL 可指向本地模拟服务（scripts/llm_mock_server.py）做离线压测
+BASE_URL = os.getenv("LLM_BASE_URL") or "https://dashscope.aliyuncs.com/compatible-mode/v1"
 
 # 模型配置
 MODEL_NAME = "qwen3.5-plus"
 MAX_TOKENS = 6000  # 增加 token 限制，防止 JSON 被截断
 TEMPERATURE = 0.7
 
+# 流式模式：增量解析 JSON，必需字段齐备后提前结束
+STREAM_MODE = os.getenv("LLM_STREAM_MODE", "false").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+    "on",
+)
+
 # 重试配置
 MAX_RETRIES = 3
 RETRY_DELAY = 2  # 秒
@@ -70,12 +86,13 @@ _cache_ttl = timedelta(hours=1)
 class LLMClient:
     """LLM API 客户端 (使用 OpenAI 同步 SDK)"""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, caller: Optional[str] = None):
         """
         初始化 LLM 客户端
 
         Args:
             api_key: API key，如果不提供则从环境变量获取
+            caller: 遥测标签（如 pipeline_v2 / translate_backfill），默认读 LLM_CALLER
         """
         self.api_key = api_key or API_KEY
         if not self.api_key:
@@ -92,6 +109,13 @@ class LLMClient:
         self.total_calls = 0
         self.total_tokens = 0
         self.failed_calls = 0
+        self.stream_calls = 0
+        self.stream_early_stops = 0
+        self.stream_ttft_sec = 0.0
+        self.stream_complete_sec = 0.0
+        self.last_stream_timing: Dict[str, float] = {}
+        self.caller = caller or os.getenv("LLM_CALLER", "") or "default"
+        self.telemetry = get_telemetry()
 
         logger.info("LLMClient 初始化完成 (使用 OpenAI 同步 SDK)")
 
@@ -116,6 +140,17 @@ class LLMClient:
         _cache[cache_key] = (result, datetime.now())
         logger.info(f"已缓存: {cache_key[:8]}...")
 
+    def _record_usage(self, model: str, latency_sec: float, usage: Any, attempt: int) -> None:
+        """将单次成功调用写入遥测。"""
+        self.telemetry.record_call(
+            self.caller,
+            model,
+            latency_sec,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            retries=attempt,
+        )
+
     def _call_api(self, prompt: str, model: str = MODEL_NAME) -> str:
         """
         调用 LLM API (同步)
@@ -145,6 +180,7 @@ class LLMClient:
                 self.total_tokens += (
                     response.usage.total_tokens if response.usage else 0
                 )
+                self._record_usage(model, api_duration, response.usage, attempt)
 
                 total_duration = time.time() - start_time
                 logger.info(
@@ -167,13 +203,137 @@ class LLMClient:
                 )
                 if attempt == MAX_RETRIES - 1:
                     self.failed_calls += 1
+                    self.telemetry.record_call(
+                        self.caller, model, error_duration, retries=attempt, ok=False
+                    )
+                    raise
+                time.sleep(RETRY_DELAY)
+
+        raise Exception("达到最大重试次数")
+
+    def _call_api_stream(
+        self,
+        prompt: str,
+        model: str = MODEL_NAME,
+        required_keys: Optional[Sequence[str]] = None,
+    ) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        流式调用 LLM API，边接收边解析 JSON
+
+        Args:
+            prompt: 提示词
+            model: 模型名称
+            required_keys: 必需字段，全部解析出后提前关闭流
+
+        Returns:
+            (已接收文本, 解析结果；未能增量解析时为 None)
+        """
+        start_time = time.time()
+
+        for attempt in range(MAX_RETRIES):
+            try:
+                api_start = time.time()
+                stream = self.client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=MAX_TOKENS,
+                    temperature=TEMPERATURE,
+                    stream=True,
+                    stream_options={"include_usage": True},
+                )
+                parser = IncrementalJSONObject(required_keys)
+                first_token_at: Optional[float] = None
+                chunk_count = 0
+                usage = None
+                early_stop = False
+                try:
+                    for chunk in stream:
+                        usage = getattr(chunk, "usage", None) or usage
+                        if not chunk.choices:
+                            continue
+                        delta = chunk.choices[0].delta.content or ""
+                        if not delta:
+                            continue
+                        if first_token_at is None:
+                            first_token_at = time.time()
+                        chunk_count += 1
+                        parser.feed(delta)
+                        if parser.is_complete():
+                            early_stop = not parser.closed
+                            break
+                finally:
+                    close = getattr(stream, "close", None)
+                    if callable(close):
+                        close()
+
+                api_duration = time.time() - api_start
+                ttft = (first_token_at - api_start) if first_token_at else api_duration
+                self.total_calls += 1
+                self.stream_calls += 1
+                # 提前结束时服务端不会回传 usage，按提示词长度 / chunk 数近似
+                if usage is not None:
+                    self.total_tokens += usage.total_tokens or 0
+                    self._record_usage(model, api_duration, usage, attempt)
+                else:
+                    prompt_estimate = max(1, len(prompt) // 4)
+                    self.total_tokens += prompt_estimate + chunk_count
+                    self.telemetry.record_call(
+                        self.caller,
+                        model,
+                        api_duration,
+                        prompt_tokens=prompt_estimate,
+                        completion_tokens=chunk_count,
+                        retries=attempt,
+                    )
+                self.stream_ttft_sec += ttft
+                self.stream_complete_sec += api_duration
+                if early_stop:
+                    self.stream_early_stops += 1
+                self.last_stream_timing = {
+                    "ttft_sec": round(ttft, 4),
+                    "complete_sec": round(api_duration, 4),
+                    "chunks": chunk_count,
+                    "early_stop": early_stop,
+                }
+
+                logger.info(
+                    f"API 流式调用成功 | "
+                    f"尝试: {attempt + 1}/{MAX_RETRIES} | "
+                    f"首token: {ttft:.2f}s | "
+                    f"完成: {api_duration:.2f}s | "
+                    f"总耗时: {time.time() - start_time:.2f}s | "
+                    f"chunks: {chunk_count} | "
+                    f"提前结束: {early_stop}"
+                )
+                # 闭合但整段解析失败时返回 None，交给调用方走截断修复
+                parsed = parser.final_result()
+                return parser.text, parsed
+
+            except Exception as e:
+                error_duration = time.time() - start_time
+                logger.error(
+                    f"API 流式错误 | "
+                    f"尝试: {attempt + 1}/{MAX_RETRIES} | "
+                    f"耗时: {error_duration:.2f}s | "
+                    f"错误: {str(e)[:100]}"
+                )
+                if attempt == MAX_RETRIES - 1:
+                    self.failed_calls += 1
+                    self.telemetry.record_call(
+                        self.caller, model, error_duration, retries=attempt, ok=False
+                    )
                     raise
                 time.sleep(RETRY_DELAY)
 
         raise Exception("达到最大重试次数")
 
     def summarize(
-        self, prompt: str, use_cache: bool = True, model: str = None
+        self,
+        prompt: str,
+        use_cache: bool = True,
+        model: str = None,
+        stream: Optional[bool] = None,
+        required_keys: Optional[Sequence[str]] = None,
     ) -> Dict[str, Any]:
         """
         生成摘要 (同步)
@@ -182,6 +342,8 @@ class LLMClient:
             prompt: 提示词
             use_cache: 是否使用缓存
             model: 模型名称，不传则使用默认 MODEL_NAME
+            stream: 是否流式调用，不传则使用 LLM_STREAM_MODE
+            required_keys: 流式模式下的必需字段，齐备即提前结束
 
         Returns:
             解析后的 JSON 结果
@@ -197,6 +359,9 @@ class LLMClient:
         cache_check_start = time.time()
         if use_cache:
             cached_result = self._get_from_cache(cache_key)
+            self.telemetry.record_cache(
+                self.caller, model or MODEL_NAME, hit=bool(cached_result)
+            )
             if cached_result:
                 cache_duration = time.time() - cache_check_start
                 total_duration = time.time() - total_start
@@ -211,13 +376,32 @@ class LLMClient:
 
         # 调用 API
         api_start = time.time()
-        content = self._call_api(prompt, model=model or MODEL_NAME)
+        use_stream = STREAM_MODE if stream is None else bool(stream)
+        streamed_result: Optional[Dict[str, Any]] = None
+        if use_stream:
+            content, streamed_result = self._call_api_stream(
+                prompt,
+                model=model or MODEL_NAME,
+                required_keys=required_keys,
+            )
+        else:
+            content = self._call_api(prompt, model=model or MODEL_NAME)
         api_duration = time.time() - api_start
         content_length = len(content)
         logger.info(
             f"[API_COMPLETE] API调用完成 | 耗时: {api_duration:.2f}s | 返回内容长度: {content_length}字符"
         )
 
+        if streamed_result is not None:
+            if use_cache:
+                self._save_to_cache(cache_key, streamed_result)
+            logger.info(
+                f"[SUMMARIZE_STREAM_SUCCESS] 流式解析成功 | "
+                f"总耗时: {time.time() - total_start:.2f}s | "
+                f"返回结果键: {list(streamed_result.keys())}"
+            )
+            return streamed_result
+
         # 清理 markdown
         clean_start = time.time()
         content = content.strip()
@@ -357,6 +541,9 @@ class LLMClient:
         # 检查缓存
         if use_cache:
             cached = self._get_from_cache(cache_key)
+            self.telemetry.record_cache(
+                self.caller, model or MODEL_NAME, hit=bool(cached and "translation" in cached)
+            )
             if cached and "translation" in cached:
                 total_duration = time.time() - total_start
                 logger.debug(
@@ -403,11 +590,13 @@ class LLMClient:
         cache_key = self._generate_cache_key(str(messages))
         if use_cache:
             cached_result = self._get_from_cache(cache_key)
+            self.telemetry.record_cache(self.caller, MODEL_NAME, hit=bool(cached_result))
             if cached_result:
                 return cached_result.get("content", "")
 
         for attempt in range(MAX_RETRIES):
             try:
+                api_start = time.time()
                 response = self.client.chat.completions.create(
                     model=MODEL_NAME,
                     messages=messages,
@@ -419,6 +608,7 @@ class LLMClient:
                 self.total_tokens += (
                     response.usage.total_tokens if response.usage else 0
                 )
+                self._record_usage(MODEL_NAME, time.time() - api_start, response.usage, attempt)
 
                 content = response.choices[0].message.content
 
@@ -431,11 +621,18 @@ class LLMClient:
                 logger.error(f"错误 (尝试 {attempt + 1}): {e}")
                 if attempt == MAX_RETRIES - 1:
                     self.failed_calls += 1
+                    self.telemetry.record_call(
+                        self.caller, MODEL_NAME, 0.0, retries=attempt, ok=False
+                    )
                     raise
                 time.sleep(RETRY_DELAY)
 
         raise Exception("达到最大重试次数")
 
+    def get_telemetry_metrics(self) -> Dict[str, float]:
+        """按 caller 汇总的遥测指标（进程内所有客户端共享）"""
+        return self.telemetry.to_metrics()
+
     def get_stats(self) -> Dict:
         """获取调用统计"""
         return {
@@ -444,6 +641,14 @@ class LLMClient:
             "failed_calls": self.failed_calls,
             "cache_size": len(_cache),
             "estimated_cost": self.total_tokens * 0.002 / 1000,
+            "stream_calls": self.stream_calls,
+            "stream_early_stops": self.stream_early_stops,
+            "stream_avg_ttft_sec": round(
+                self.stream_ttft_sec / max(1, self.stream_calls), 4
+            ),
+            "stream_avg_complete_sec": round(
+                self.stream_complete_sec / max(1, self.stream_calls), 4
+            ),
         }
 
 
@@ -461,7 +666,7 @@ def summarize_cluster(
     from config.analysis_config import LLM_PROMPTS
 
     if client is None:
-        client = LLMClient()
+        client = LLMClient(caller="legacy_analyzer")
 
     prompt = LLM_PROMPTS["cluster_summary"].format(
         article_count=article_count,
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""流式 LLM 输出的增量 JSON 解析。"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, Optional, Sequence
+
+
+class IncrementalJSONObject:
+    """逐块接收模型输出，按顶层字段增量解析 JSON 对象。
+
+    仅在顶层 `,` / `}` 边界尝试 json.loads：每次都从对象开头重新解析已收到的前缀，
+    字段多时总开销随字段数平方增长，对模型输出的短 JSON 可以忽略。
+    当 required_keys 全部就绪或对象闭合时 `is_complete()` 为 True，
+    调用方即可提前结束流；闭合时解析失败的结果不可用（见 `final_result`）。
+    """
+
+    def __init__(self, required_keys: Optional[Sequence[str]] = None):
+        self.required_keys = tuple(required_keys or ())
+        self.text = ""
+        self.result: Dict[str, Any] = {}
+        self.closed = False
+        self.close_parsed = False
+        self._pos = 0
+        self._start = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        """追加一段输出并返回当前已完整解析的字段。"""
+        if not chunk or self.closed:
+            return self.result
+        self.text += chunk
+        boundary = -1
+        text = self.text
+        for idx in range(self._pos, len(text)):
+            char = text[idx]
+            if self._start < 0:
+                if char == "{":
+                    self._start = idx
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    boundary = idx
+                    self.closed = True
+                    break
+            elif char == "," and self._depth == 1:
+                boundary = idx
+        self._pos = len(text) if not self.closed else boundary + 1
+
+        if boundary > self._start >= 0:
+            snippet = text[self._start : boundary]
+            parsed = self._try_parse(snippet + "}")
+            if self.closed:
+                self.close_parsed = parsed
+        return self.result
+
+    def _try_parse(self, snippet: str) -> bool:
+        try:
+            payload = json.loads(snippet)
+        except Exception:
+            return False
+        if not isinstance(payload, dict):
+            return False
+        self.result = payload
+        return True
+
+    def has_required(self) -> bool:
+        """required_keys 是否均已解析出来。"""
+        if not self.required_keys:
+            return False
+        return all(key in self.result for key in self.required_keys)
+
+    def is_complete(self) -> bool:
+        """对象已闭合或必需字段已齐备。"""
+        return self.closed or self.has_required()
+
+    def final_result(self) -> Optional[Dict[str, Any]]:
+        """可直接使用的解析结果：闭合时要求整段解析成功，未闭合时要求必需字段齐备；否则 None。"""
+        if self.closed:
+            return self.result if self.close_parsed else None
+        return self.result if self.has_required() else None
@@ -0,0 +1,474 @@
+#!/usr/bin/env python3
+"""本地 OpenAI 兼容 /v1/chat/completions 模拟服务（LLM / Grok 压测用）。
+
+用法示例：
+    python scripts/llm_mock_server.py --port 8787 --latency-ms 800 --ms-per-token 15 \
+        --rate-429 0.05 --rate-5xx 0.02 --truncate-rate 0.05
+
+    LLM_BASE_URL=http://127.0.0.1:8787/v1 DASHSCOPE_API_KEY=mock \
+        python scripts/stock_pipeline_v2.py --enable-llm ...
+    GROK_BASE_URL=http://127.0.0.1:8787/v1 GROK_API_KEY=mock GROK_MODEL=mock-grok \
+        python scripts/stock_x_source_ingest.py --mode ingest ...
+
+GET /stats 返回累计请求数、错误注入、token 统计；POST /reset 清零。
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(
+        logging.Formatter(
+            "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+    )
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+MOCK_TICKERS = ("AAPL", "MSFT", "NVDA", "AMZN", "TSLA", "META", "SPY", "QQQ", "TLT", "XLE")
+MOCK_SIDES = ("LONG", "SHORT", "NEUTRAL")
+MOCK_EVENT_TYPES = ("news", "earnings", "macro", "policy", "flow", "sector")
+JSON_KEY_PATTERN = re.compile(r'"([A-Za-z_][A-Za-z0-9_]*)"\s*:')
+HANDLE_PATTERN = re.compile(r"目标账号:\s*@([A-Za-z0-9_]+)")
+POST_LIMIT_PATTERN = re.compile(r"返回最近条数:\s*(\d+)")
+CURSOR_PATTERN = re.compile(r"仅返回\s*(\S+)\s*之后发布")
+TRANSLATE_PREFIX = "请将以下英文翻译成中文"
+
+
+@dataclass
+class MockConfig:
+    """模拟服务参数。"""
+
+    latency_ms: float = 400.0
+    latency_jitter: float = 0.35
+    latency_dist: str = "lognormal"
+    ms_per_token: float = 0.0
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    truncate_rate: float = 0.0
+    seed: int = 7
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略 token 估算：约 4 字符 1 token，中文按 1 字 1 token。"""
+    if not text:
+        return 0
+    cjk = sum(1 for ch in text if "\u4e00" <= ch <= "\u9fff")
+    return cjk + int(math.ceil((len(text) - cjk) / 4))
+
+
+def _stable_rng(text: str) -> random.Random:
+    digest = hashlib.md5(text.encode("utf-8")).hexdigest()
+    return random.Random(int(digest[:12], 16))
+
+
+def _fill_value(key: str, rng: random.Random) -> Any:
+    name = key.lower()
+    if name == "direction" or name == "side":
+        return rng.choice(MOCK_SIDES)
+    if name in ("strength", "confidence", "quality_score", "credibility"):
+        return round(rng.uniform(0.55, 0.95), 2)
+    if name == "asset_type":
+        return "equity"
+    if name == "sector":
+        return "Technology"
+    if name == "industry":
+        return "Software"
+    if name == "summary_cn":
+        return "该标的为美股上市公司，业务覆盖软件与云服务，需关注营收增速与利润率变化。"
+    if name.endswith("_zh") or name.endswith("_cn"):
+        return f"模拟{name} #{rng.randint(1000, 9999)}"
+    if name == "summary":
+        return "模拟摘要"
+    return "mock"
+
+
+def build_canned_content(messages: List[Dict[str, Any]]) -> str:
+    """根据请求内容生成确定性的模拟回复。"""
+    prompt = "\n".join(str(item.get("content") or "") for item in messages if isinstance(item, dict))
+    rng = _stable_rng(prompt)
+
+    handle_match = HANDLE_PATTERN.search(prompt)
+    if handle_match:
+        return json.dumps(_build_x_payload(handle_match.group(1), prompt, rng), ensure_ascii=False)
+
+    if TRANSLATE_PREFIX in prompt:
+        source = prompt.split("\n\n", 1)[-1].strip()
+        return f"【模拟译文】{source[:120]}"
+
+    template_start = prompt.find("{")
+    keys: List[str] = []
+    if template_start >= 0:
+        template_end = prompt.find("}", template_start)
+        template = prompt[template_start : template_end + 1 if template_end > 0 else None]
+        for key in JSON_KEY_PATTERN.findall(template):
+            if key not in keys:
+                keys.append(key)
+    if not keys:
+        keys = ["summary"]
+    return json.dumps({key: _fill_value(key, rng) for key in keys}, ensure_ascii=False)
+
+
+def _build_x_payload(handle: str, prompt: str, rng: random.Random) -> Dict[str, Any]:
+    limit_match = POST_LIMIT_PATTERN.search(prompt)
+    post_limit = max(1, min(50, int(limit_match.group(1)) if limit_match else 5))
+    now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    cursor_match = CURSOR_PATTERN.search(prompt)
+    cursor: Optional[datetime] = None
+    if cursor_match:
+        try:
+            cursor = datetime.fromisoformat(cursor_match.group(1).replace("Z", "+00:00"))
+        except ValueError:
+            cursor = None
+    posts: List[Dict[str, Any]] = []
+    for idx in range(post_limit):
+        if cursor is not None and now - timedelta(minutes=37 * idx) <= cursor:
+            break
+        ticker = rng.choice(MOCK_TICKERS)
+        side = rng.choice(MOCK_SIDES)
+        post_id = hashlib.md5(f"{handle}:{now.isoformat()}:{idx}".encode("utf-8")).hexdigest()[:18]
+        posts.append(
+            {
+                "post_id": post_id,
+                "posted_at": (now - timedelta(minutes=37 * idx)).isoformat(),
+                "post_url": f"https://x.com/{handle}/status/{post_id}",
+                "text": f"${ticker} mock post #{idx} from @{handle}",
+                "content_zh": f"@{handle} 模拟帖子 {idx}：关注 {ticker}",
+                "lang": "en",
+                "metrics": {
+                    "likes": rng.randint(0, 5000),
+                    "reposts": rng.randint(0, 800),
+                    "replies": rng.randint(0, 300),
+                    "views": rng.randint(1000, 400000),
+                },
+                "signals": [
+                    {
+                        "ticker": ticker,
+                        "side": side,
+                        "event_type": rng.choice(MOCK_EVENT_TYPES),
+                        "confidence": round(rng.uniform(0.4, 0.9), 2),
+                        "strength": round(rng.uniform(0.4, 0.9), 2),
+                        "summary_zh": f"{ticker} 模拟信号 {side}",
+                        "why_now_zh": "模拟催化",
+                        "invalid_if_zh": "模拟失效条件",
+                        "signal_tags": ["mock"],
+                        "data_quality": "estimated",
+                    }
+                ],
+            }
+        )
+    return {
+        "account_profile": {
+            "display_name": handle,
+            "bio": "mock account",
+            "focus": ["us_stock"],
+            "credibility": round(rng.uniform(0.5, 0.9), 2),
+            "last_active_at": now.isoformat(),
+        },
+        "account_health": {"status": "healthy", "notes": "mock"},
+        "posts": posts,
+    }
+
+
+class MockState:
+    """服务端累计计数（线程安全）。"""
+
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.counters = {
+                "requests": 0,
+                "responses_ok": 0,
+                "injected_429": 0,
+                "injected_5xx": 0,
+                "truncated": 0,
+                "streamed": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "latency_ms_sum": 0.0,
+            }
+
+    def bump(self, key: str, value: float = 1) -> None:
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def roll(self) -> float:
+        with self.lock:
+            return self.rng.random()
+
+    def sample_latency_sec(self) -> float:
+        cfg = self.config
+        with self.lock:
+            if cfg.latency_dist == "fixed":
+                value = cfg.latency_ms
+            elif cfg.latency_dist == "normal":
+                value = self.rng.gauss(cfg.latency_ms, cfg.latency_ms * cfg.latency_jitter)
+            else:
+                value = cfg.latency_ms * math.exp(self.rng.gauss(0.0, cfg.latency_jitter))
+        return max(0.0, value) / 1000.0
+
+    def snapshot(self) -> Dict[str, float]:
+        with self.lock:
+            data = dict(self.counters)
+        ok = max(1, int(data.get("responses_ok", 0)))
+        data["latency_ms_avg"] = round(data.get("latency_ms_sum", 0.0) / ok, 2)
+        return data
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """OpenAI 兼容请求处理。"""
+
+    state: MockState
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt: str, *args: Any) -> None:  # noqa: D401 - 静默默认访问日志
+        return
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.rstrip("/").endswith("/stats"):
+            self._send_json(200, self.state.snapshot())
+        elif self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self) -> None:  # noqa: N802
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length > 0 else b"{}"
+        if self.path.rstrip("/").endswith("/reset"):
+            self.state.reset()
+            self._send_json(200, {"ok": True})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        try:
+            request = json.loads(raw.decode("utf-8") or "{}")
+        except Exception:
+            self._send_json(400, {"error": {"message": "invalid json"}})
+            return
+        self._handle_completion(request)
+
+    def _handle_completion(self, request: Dict[str, Any]) -> None:
+        state = self.state
+        cfg = state.config
+        state.bump("requests")
+        started = time.perf_counter()
+
+        roll = state.roll()
+        if roll < cfg.rate_429:
+            state.bump("injected_429")
+            time.sleep(state.sample_latency_sec() * 0.1)
+            self._send_json(
+                429,
+                {"error": {"message": "mock rate limit", "type": "rate_limit_exceeded"}},
+                headers={"Retry-After": "1"},
+            )
+            return
+        if roll < cfg.rate_429 + cfg.rate_5xx:
+            state.bump("injected_5xx")
+            time.sleep(state.sample_latency_sec())
+            self._send_json(503, {"error": {"message": "mock upstream error", "type": "server_error"}})
+            return
+
+        messages = request.get("messages") if isinstance(request.get("messages"), list) else []
+        model = str(request.get("model") or "mock")
+        content = build_canned_content(messages)
+        content, finish_reason = self._apply_truncation(content, request)
+        prompt_tokens = sum(estimate_tokens(str(item.get("content") or "")) for item in messages if isinstance(item, dict))
+        completion_tokens = estimate_tokens(content)
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        state.bump("prompt_tokens", prompt_tokens)
+        state.bump("completion_tokens", completion_tokens)
+
+        time.sleep(state.sample_latency_sec())
+        if request.get("stream"):
+            state.bump("streamed")
+            include_usage = bool((request.get("stream_options") or {}).get("include_usage"))
+            self._stream_completion(model, content, finish_reason, usage if include_usage else None)
+        else:
+            time.sleep(completion_tokens * cfg.ms_per_token / 1000.0)
+            self._send_json(
+                200,
+                {
+                    "id": f"chatcmpl-mock-{int(time.time() * 1000)}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": finish_reason,
+                        }
+                    ],
+                    "usage": usage,
+                },
+            )
+        state.bump("responses_ok")
+        state.bump("latency_ms_sum", (time.perf_counter() - started) * 1000)
+
+    def _apply_truncation(self, content: str, request: Dict[str, Any]) -> Tuple[str, str]:
+        cfg = self.state.config
+        max_tokens = int(request.get("max_tokens") or 0)
+        if max_tokens > 0 and estimate_tokens(content) > max_tokens:
+            self.state.bump("truncated")
+            return content[: max_tokens * 4], "length"
+        if cfg.truncate_rate > 0 and self.state.roll() < cfg.truncate_rate:
+            self.state.bump("truncated")
+            cut = max(1, int(len(content) * (0.4 + self.state.roll() * 0.5)))
+            return content[:cut], "length"
+        return content, "stop"
+
+    def _stream_completion(
+        self,
+        model: str,
+        content: str,
+        finish_reason: str,
+        usage: Optional[Dict[str, int]],
+    ) -> None:
+        cfg = self.state.config
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        created = int(time.time())
+        chunk_id = f"chatcmpl-mock-{int(time.time() * 1000)}"
+
+        def emit(payload: Dict[str, Any]) -> None:
+            self.wfile.write(f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        try:
+            step = 4
+            for idx in range(0, len(content), step):
+                piece = content[idx : idx + step]
+                emit(
+                    {
+                        "id": chunk_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                    }
+                )
+                if cfg.ms_per_token > 0:
+                    time.sleep(estimate_tokens(piece) * cfg.ms_per_token / 1000.0)
+            emit(
+                {
+                    "id": chunk_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+                }
+            )
+            if usage:
+                emit(
+                    {
+                        "id": chunk_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [],
+                        "usage": usage,
+                    }
+                )
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端提前关闭流（增量解析已拿到必需字段）
+            pass
+        self.close_connection = True
+
+
+def serve(host: str, port: int, config: MockConfig) -> ThreadingHTTPServer:
+    """创建模拟服务（调用方负责 serve_forever / shutdown）。"""
+    state = MockState(config)
+    handler_cls = type("BoundMockHandler", (MockHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler_cls)
+    server.daemon_threads = True
+    return server
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容 LLM/Grok 模拟服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--latency-ms", type=float, default=400.0, help="首包延迟中位数（毫秒）")
+    parser.add_argument("--latency-jitter", type=float, default=0.35, help="延迟抖动（lognormal sigma / normal 相对标准差）")
+    parser.add_argument("--latency-dist", choices=["fixed", "normal", "lognormal"], default="lognormal")
+    parser.add_argument("--ms-per-token", type=float, default=0.0, help="每个输出 token 的生成耗时（毫秒）")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="429 注入比例")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="5xx 注入比例")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="截断输出比例")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    config = MockConfig(
+        latency_ms=max(0.0, args.latency_ms),
+        latency_jitter=max(0.0, args.latency_jitter),
+        latency_dist=args.latency_dist,
+        ms_per_token=max(0.0, args.ms_per_token),
+        rate_429=max(0.0, min(1.0, args.rate_429)),
+        rate_5xx=max(0.0, min(1.0, args.rate_5xx)),
+        truncate_rate=max(0.0, min(1.0, args.truncate_rate)),
+        seed=args.seed,
+    )
+    server = serve(args.host, args.port, config)
+    logger.info(
+        f"[LLM_MOCK_START] base_url=http://{args.host}:{args.port}/v1 "
+        f"latency={config.latency_dist}:{config.latency_ms}ms rate_429={config.rate_429} "
+        f"rate_5xx={config.rate_5xx} truncate={config.truncate_rate}"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"[LLM_MOCK_STATS] {json.dumps(server.RequestHandlerClass.state.snapshot())}")
+
+
+if __name__ == "__main__":
+    main()
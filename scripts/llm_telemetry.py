@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""LLM 调用遥测：按调用方 / 模型聚合 token、延迟直方图、重试与缓存命中。"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# 延迟直方图桶上界（秒），最后一个桶为 +inf
+LATENCY_BUCKETS_SEC: Tuple[float, ...] = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0, 64.0)
+
+# 单价（每 1K token，prompt / completion），未配置的模型使用 DEFAULT_PRICE_PER_1K
+MODEL_PRICE_PER_1K: Dict[str, Tuple[float, float]] = {}
+DEFAULT_PRICE_PER_1K: Tuple[float, float] = (0.002, 0.002)
+
+
+def _price_for(model: str) -> Tuple[float, float]:
+    raw = str(os.getenv("LLM_PRICE_PER_1K", "") or "").strip()
+    if raw:
+        parts = [item.strip() for item in raw.replace(":", ",").split(",")]
+        try:
+            if len(parts) >= 2:
+                return float(parts[0]), float(parts[1])
+            return float(parts[0]), float(parts[0])
+        except Exception:
+            pass
+    return MODEL_PRICE_PER_1K.get(model, DEFAULT_PRICE_PER_1K)
+
+
+@dataclass
+class CallStats:
+    """单个 (caller, model) 的累计指标。"""
+
+    calls: int = 0
+    failed_calls: int = 0
+    retries: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_sum_sec: float = 0.0
+    latency_max_sec: float = 0.0
+    latency_hist: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_SEC) + 1))
+
+    def observe_latency(self, latency_sec: float) -> None:
+        value = max(0.0, float(latency_sec))
+        self.latency_sum_sec += value
+        self.latency_max_sec = max(self.latency_max_sec, value)
+        for idx, bound in enumerate(LATENCY_BUCKETS_SEC):
+            if value <= bound:
+                self.latency_hist[idx] += 1
+                return
+        self.latency_hist[-1] += 1
+
+    def latency_quantile(self, q: float) -> float:
+        """按直方图估算分位数（取所在桶上界）。"""
+        total = sum(self.latency_hist)
+        if total <= 0:
+            return 0.0
+        target = max(1, int(round(total * q)))
+        seen = 0
+        for idx, count in enumerate(self.latency_hist):
+            seen += count
+            if seen >= target:
+                if idx < len(LATENCY_BUCKETS_SEC):
+                    return min(LATENCY_BUCKETS_SEC[idx], self.latency_max_sec)
+                return self.latency_max_sec
+        return self.latency_max_sec
+
+    def cost(self, model: str) -> float:
+        prompt_price, completion_price = _price_for(model)
+        return (
+            self.prompt_tokens * prompt_price / 1000
+            + self.completion_tokens * completion_price / 1000
+        )
+
+    def merge(self, other: "CallStats") -> None:
+        self.calls += other.calls
+        self.failed_calls += other.failed_calls
+        self.retries += other.retries
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.latency_sum_sec += other.latency_sum_sec
+        self.latency_max_sec = max(self.latency_max_sec, other.latency_max_sec)
+        for idx, count in enumerate(other.latency_hist):
+            self.latency_hist[idx] += count
+
+
+class LLMTelemetry:
+    """进程内共享的 LLM 调用遥测（线程安全）。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], CallStats] = {}
+
+    def _get(self, caller: str, model: str) -> CallStats:
+        key = (caller or "default", model or "unknown")
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = CallStats()
+            self._stats[key] = stats
+        return stats
+
+    def record_call(
+        self,
+        caller: str,
+        model: str,
+        latency_sec: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        retries: int = 0,
+        ok: bool = True,
+    ) -> None:
+        with self._lock:
+            stats = self._get(caller, model)
+            stats.retries += max(0, int(retries))
+            if not ok:
+                stats.failed_calls += 1
+                return
+            stats.calls += 1
+            stats.prompt_tokens += max(0, int(prompt_tokens or 0))
+            stats.completion_tokens += max(0, int(completion_tokens or 0))
+            stats.observe_latency(latency_sec)
+
+    def record_cache(self, caller: str, model: str, hit: bool) -> None:
+        with self._lock:
+            stats = self._get(caller, model)
+            if hit:
+                stats.cache_hits += 1
+            else:
+                stats.cache_misses += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """按 (caller, model) 导出明细，含直方图。"""
+        with self._lock:
+            items = sorted(self._stats.items())
+            rows: List[Dict[str, Any]] = []
+            for (caller, model), stats in items:
+                rows.append(self._describe(caller, model, stats))
+            return rows
+
+    def _describe(self, caller: str, model: str, stats: CallStats) -> Dict[str, Any]:
+        lookups = stats.cache_hits + stats.cache_misses
+        return {
+            "caller": caller,
+            "model": model,
+            "calls": stats.calls,
+            "failed_calls": stats.failed_calls,
+            "retries": stats.retries,
+            "prompt_tokens": stats.prompt_tokens,
+            "completion_tokens": stats.completion_tokens,
+            "cache_hits": stats.cache_hits,
+            "cache_hit_ratio": round(stats.cache_hits / lookups, 4) if lookups else 0.0,
+            "latency_avg_ms": round(stats.latency_sum_sec * 1000 / max(1, stats.calls), 2),
+            "latency_p50_ms": round(stats.latency_quantile(0.5) * 1000, 2),
+            "latency_p95_ms": round(stats.latency_quantile(0.95) * 1000, 2),
+            "latency_max_ms": round(stats.latency_max_sec * 1000, 2),
+            "latency_hist": {
+                **{
+                    f"le_{bound:g}s": count
+                    for bound, count in zip(LATENCY_BUCKETS_SEC, stats.latency_hist)
+                },
+                "le_inf": stats.latency_hist[-1],
+            },
+            "estimated_cost": round(stats.cost(model), 6),
+        }
+
+    def to_metrics(self, prefix: str = "llm") -> Dict[str, float]:
+        """按 caller 汇总为扁平指标，用于写入 research_run_metrics。"""
+        with self._lock:
+            by_caller: Dict[str, Tuple[CallStats, float]] = {}
+            for (caller, model), stats in self._stats.items():
+                merged, cost = by_caller.get(caller, (CallStats(), 0.0))
+                merged.merge(stats)
+                by_caller[caller] = (merged, cost + stats.cost(model))
+
+        metrics: Dict[str, float] = {}
+        for caller, (stats, cost) in sorted(by_caller.items()):
+            base = f"{prefix}_{caller}"[:40]
+            lookups = stats.cache_hits + stats.cache_misses
+            metrics[f"{base}_calls"] = stats.calls
+            metrics[f"{base}_failed_calls"] = stats.failed_calls
+            metrics[f"{base}_retries"] = stats.retries
+            metrics[f"{base}_prompt_tokens"] = stats.prompt_tokens
+            metrics[f"{base}_completion_tokens"] = stats.completion_tokens
+            metrics[f"{base}_cache_hit_ratio"] = (
+                round(stats.cache_hits / lookups, 4) if lookups else 0.0
+            )
+            metrics[f"{base}_latency_p50_ms"] = round(stats.latency_quantile(0.5) * 1000, 2)
+            metrics[f"{base}_latency_p95_ms"] = round(stats.latency_quantile(0.95) * 1000, 2)
+            metrics[f"{base}_cost"] = round(cost, 6)
+        return metrics
+
+    def export_jsonl(self, path: str, run_id: str = "") -> int:
+        """追加写入 JSONL，每个 (caller, model) 一行。"""
+        rows = self.snapshot()
+        if not rows:
+            return 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        exported_at = datetime.now(timezone.utc).isoformat()
+        with open(path, "a", encoding="utf-8") as fp:
+            for row in rows:
+                payload = dict(row)
+                payload["run_id"] = run_id
+                payload["exported_at"] = exported_at
+                fp.write(json.dumps(payload, ensure_ascii=False) + "\n")
+        return len(rows)
+
+
+_TELEMETRY = LLMTelemetry()
+
+
+def get_telemetry() -> LLMTelemetry:
+    """返回进程级共享遥测实例。"""
+    return _TELEMETRY
+
+
+def export_telemetry_if_configured(run_id: str = "", path: Optional[str] = None) -> int:
+    """若设置 LLM_TELEMETRY_JSONL（或传入 path），则导出遥测到 JSONL。"""
+    target = path or str(os.getenv("LLM_TELEMETRY_JSONL", "") or "").strip()
+    if not target:
+        return 0
+    try:
+        return _TELEMETRY.export_jsonl(target, run_id=run_id)
+    except Exception:
+        return 0
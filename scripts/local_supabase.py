@@ -0,0 +1,1133 @@
+#!/usr/bin/env python3
+"""进程内 Supabase 替身：内存表（可选 SQLite 落盘）实现项目用到的 PostgREST 查询子集。
+
+用于离线压测 / 回归：表结构从 `sql/` 下的迁移文件解析（列、默认值、自增、主键与唯一约束），
+写入时校验未知列、NOT NULL、唯一冲突，错误码与 PostgREST 保持一致，
+使调用方的兜底分支（如可选列降级）在离线环境也能被走到。
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_SQL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sql")
+
+_SERIAL_TYPES = {"SERIAL", "BIGSERIAL", "SMALLSERIAL", "SERIAL4", "SERIAL8"}
+_COLUMN_KEYWORDS = ("NOT", "NULL", "CHECK", "REFERENCES", "UNIQUE", "PRIMARY", "CONSTRAINT", "GENERATED", "COLLATE")
+
+
+class LocalAPIError(Exception):
+    """与 postgrest APIError 形状一致：message / code / details。"""
+
+    def __init__(self, message: str, code: str = "", details: str = ""):
+        self.message = message
+        self.code = code
+        self.details = details
+        super().__init__(json.dumps({"message": message, "code": code, "details": details}, ensure_ascii=False))
+
+
+# ----------------------------------------------------------------------
+# SQL 结构解析
+# ----------------------------------------------------------------------
+
+
+@dataclass
+class ColumnSpec:
+    name: str
+    serial: bool = False
+    array: bool = False
+    not_null: bool = False
+    default: Optional[str] = None
+
+
+@dataclass
+class TableSchema:
+    name: str
+    columns: Dict[str, ColumnSpec] = field(default_factory=dict)
+    primary_key: Tuple[str, ...] = ()
+    unique: List[Tuple[str, ...]] = field(default_factory=list)
+    # BEFORE UPDATE 触发器 update_updated_at_column()：更新时 updated_at 取 NOW()
+    touch_updated_at: bool = False
+
+    def unique_keys(self) -> List[Tuple[str, ...]]:
+        keys = [self.primary_key] if self.primary_key else []
+        keys.extend(key for key in self.unique if key not in keys)
+        return keys
+
+
+def _strip_comments(sql: str) -> str:
+    out: List[str] = []
+    idx = 0
+    in_quote = False
+    while idx < len(sql):
+        char = sql[idx]
+        if in_quote:
+            out.append(char)
+            if char == "'":
+                in_quote = False
+        elif char == "'":
+            in_quote = True
+            out.append(char)
+        elif sql.startswith("--", idx):
+            end = sql.find("\n", idx)
+            idx = len(sql) if end < 0 else end
+            continue
+        elif sql.startswith("/*", idx):
+            end = sql.find("*/", idx + 2)
+            idx = len(sql) if end < 0 else end + 2
+            continue
+        else:
+            out.append(char)
+        idx += 1
+    return "".join(out)
+
+
+def split_statements(sql: str) -> List[str]:
+    """按分号切分语句，跳过引号与 $tag$ 包裹的函数体 / DO 块。"""
+    sql = _strip_comments(sql)
+    statements: List[str] = []
+    buf: List[str] = []
+    idx = 0
+    in_quote = False
+    dollar_tag: Optional[str] = None
+    while idx < len(sql):
+        char = sql[idx]
+        if dollar_tag is not None:
+            if sql.startswith(dollar_tag, idx):
+                buf.append(dollar_tag)
+                idx += len(dollar_tag)
+                dollar_tag = None
+                continue
+        elif in_quote:
+            if char == "'":
+                in_quote = False
+        elif char == "'":
+            in_quote = True
+        elif char == "$":
+            tag = re.match(r"\$[A-Za-z_]*\$", sql[idx:])
+            if tag:
+                dollar_tag = tag.group(0)
+                buf.append(dollar_tag)
+                idx += len(dollar_tag)
+                continue
+        elif char == ";":
+            statement = "".join(buf).strip()
+            if statement:
+                statements.append(statement)
+            buf = []
+            idx += 1
+            continue
+        buf.append(char)
+        idx += 1
+    tail = "".join(buf).strip()
+    if tail:
+        statements.append(tail)
+    return statements
+
+
+def _split_top_level(text: str, sep: str = ",", quote: str = "'") -> List[str]:
+    parts: List[str] = []
+    depth = 0
+    in_quote = False
+    buf: List[str] = []
+    for char in text:
+        if in_quote:
+            if char == quote:
+                in_quote = False
+        elif char == quote:
+            in_quote = True
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif char == sep and depth == 0:
+            parts.append("".join(buf).strip())
+            buf = []
+            continue
+        buf.append(char)
+    if "".join(buf).strip():
+        parts.append("".join(buf).strip())
+    return parts
+
+
+def _ident(token: str) -> str:
+    token = token.strip()
+    if "." in token and not token.startswith('"'):
+        token = token.split(".")[-1]
+    return token.strip('"').lower()
+
+
+def _column_list(text: str) -> Tuple[str, ...]:
+    inner = text[text.index("(") + 1 : text.rindex(")")]
+    return tuple(_ident(item) for item in _split_top_level(inner))
+
+
+def _parse_column(definition: str) -> Tuple[ColumnSpec, bool, bool]:
+    """解析列定义，返回 (列, 是否主键, 是否唯一)。"""
+    name_match = re.match(r'\s*("[^"]+"|\S+)\s*(.*)$', definition, re.S)
+    name = _ident(name_match.group(1))
+    rest = name_match.group(2)
+    upper_rest = rest.upper()
+    type_token = upper_rest.split()[0] if upper_rest.split() else ""
+    column = ColumnSpec(
+        name=name,
+        serial=type_token in _SERIAL_TYPES or "AS IDENTITY" in upper_rest,
+        array=type_token.endswith("[]"),
+        not_null="NOT NULL" in upper_rest or "PRIMARY KEY" in upper_rest,
+    )
+    default_at = re.search(r"\bDEFAULT\b", rest, re.I)
+    if default_at:
+        column.default = _read_default(rest[default_at.end() :])
+    is_pk = "PRIMARY KEY" in upper_rest
+    is_unique = re.search(r"\bUNIQUE\b", upper_rest) is not None
+    return column, is_pk, is_unique
+
+
+def _read_default(text: str) -> str:
+    depth = 0
+    in_quote = False
+    idx = 0
+    text = text.strip()
+    while idx < len(text):
+        char = text[idx]
+        if in_quote:
+            if char == "'":
+                in_quote = False
+        elif char == "'":
+            in_quote = True
+        elif char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        elif depth == 0 and char.isspace():
+            word = re.match(r"\s+([A-Za-z_]+)", text[idx:])
+            if word and word.group(1).upper() in _COLUMN_KEYWORDS:
+                break
+        idx += 1
+    return text[:idx].strip()
+
+
+def _parse_create_table(statement: str, schemas: Dict[str, TableSchema]) -> None:
+    head = re.match(
+        r"CREATE\s+(?:UNLOGGED\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?(\"[^\"]+\"|[\w.]+)\s*\(",
+        statement,
+        re.I,
+    )
+    if not head:
+        return
+    name = _ident(head.group(1))
+    if name in schemas:
+        return
+    schema = TableSchema(name=name)
+    body = statement[head.end() : statement.rindex(")")]
+    for item in _split_top_level(body):
+        _apply_table_item(schema, item)
+    schemas[name] = schema
+
+
+def _apply_table_item(schema: TableSchema, item: str) -> None:
+    upper = item.upper().lstrip()
+    if upper.startswith("CONSTRAINT"):
+        item = re.sub(r"^\s*CONSTRAINT\s+\S+\s+", "", item, flags=re.I)
+        upper = item.upper().lstrip()
+    if upper.startswith("PRIMARY KEY"):
+        schema.primary_key = _column_list(item)
+    elif upper.startswith("UNIQUE"):
+        schema.unique.append(_column_list(item))
+    elif upper.startswith(("CHECK", "FOREIGN KEY", "EXCLUDE", "LIKE")):
+        return
+    else:
+        column, is_pk, is_unique = _parse_column(item)
+        schema.columns[column.name] = column
+        if is_pk:
+            schema.primary_key = (column.name,)
+        elif is_unique:
+            schema.unique.append((column.name,))
+
+
+def _parse_alter_table(statement: str, schemas: Dict[str, TableSchema]) -> None:
+    head = re.match(
+        r"ALTER\s+TABLE\s+(?:IF\s+EXISTS\s+)?(?:ONLY\s+)?(\"[^\"]+\"|[\w.]+)\s+(.*)$",
+        statement,
+        re.I | re.S,
+    )
+    if not head:
+        return
+    schema = schemas.get(_ident(head.group(1)))
+    if schema is None:
+        return
+    for action in _split_top_level(head.group(2)):
+        added = re.match(r"ADD\s+COLUMN\s+(?:IF\s+NOT\s+EXISTS\s+)?(.*)$", action, re.I | re.S)
+        if added:
+            column, is_pk, is_unique = _parse_column(added.group(1))
+            schema.columns.setdefault(column.name, column)
+            if is_unique:
+                schema.unique.append((column.name,))
+            continue
+        constraint = re.match(r"ADD\s+(.*)$", action, re.I | re.S)
+        if constraint:
+            _apply_table_item(schema, constraint.group(1))
+            continue
+        dropped = re.match(r"DROP\s+COLUMN\s+(?:IF\s+EXISTS\s+)?(\S+)", action, re.I)
+        if dropped:
+            schema.columns.pop(_ident(dropped.group(1)), None)
+
+
+def _parse_unique_index(statement: str, schemas: Dict[str, TableSchema]) -> None:
+    match = re.match(
+        r"CREATE\s+UNIQUE\s+INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?\S+\s+ON\s+(?:ONLY\s+)?"
+        r"(\"[^\"]+\"|[\w.]+)\s*(?:USING\s+\w+\s*)?(\(.*?\))",
+        statement,
+        re.I | re.S,
+    )
+    if not match:
+        return
+    schema = schemas.get(_ident(match.group(1)))
+    if schema is not None:
+        schema.unique.append(_column_list(match.group(2)))
+
+
+def _parse_updated_at_trigger(statement: str, schemas: Dict[str, TableSchema]) -> None:
+    match = re.match(
+        r"CREATE\s+(?:OR\s+REPLACE\s+)?TRIGGER\s+\S+\s+BEFORE\s+UPDATE\s+ON\s+(\"[^\"]+\"|[\w.]+)\s.*"
+        r"\bupdate_updated_at_column\s*\(",
+        statement,
+        re.I | re.S,
+    )
+    if not match:
+        return
+    schema = schemas.get(_ident(match.group(1)))
+    if schema is not None and "updated_at" in schema.columns:
+        schema.touch_updated_at = True
+
+
+def load_sql_schema(paths: Iterable[str]) -> Dict[str, TableSchema]:
+    """解析 SQL 文件中的表结构。
+
+    先处理全部 CREATE TABLE 再处理 ALTER / 唯一索引 / updated_at 触发器，迁移文件的排序不影响结果；
+    DO 块、视图、策略与其他触发器等语句忽略。
+    """
+    statements: List[str] = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as fp:
+            statements.extend(split_statements(fp.read()))
+    schemas: Dict[str, TableSchema] = {}
+    for statement in statements:
+        if re.match(r"CREATE\s+(?:UNLOGGED\s+)?TABLE\b", statement, re.I):
+            _parse_create_table(statement, schemas)
+    for statement in statements:
+        if re.match(r"ALTER\s+TABLE\b", statement, re.I):
+            _parse_alter_table(statement, schemas)
+        elif re.match(r"CREATE\s+UNIQUE\s+INDEX\b", statement, re.I):
+            _parse_unique_index(statement, schemas)
+    for statement in statements:
+        if re.match(r"CREATE\s+(?:OR\s+REPLACE\s+)?TRIGGER\b", statement, re.I):
+            _parse_updated_at_trigger(statement, schemas)
+    return schemas
+
+
+# ----------------------------------------------------------------------
+# 值比较
+# ----------------------------------------------------------------------
+
+
+_TIMESTAMP_RE = re.compile(r"^\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?(?:Z|[+-]\d{2}:?\d{2})?$")
+
+
+@lru_cache(maxsize=65536)
+def _parse_timestamp(value: str) -> Optional[datetime]:
+    if not _TIMESTAMP_RE.match(value):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _comparable(value: Any) -> Any:
+    if isinstance(value, str):
+        parsed = _parse_timestamp(value)
+        if parsed is not None:
+            return parsed
+    return value
+
+
+def _coerce(value: Any, sample: Any) -> Any:
+    """把过滤值（常为字符串）转换成与列值可比较的类型。"""
+    if isinstance(value, str):
+        if isinstance(sample, bool):
+            return value.strip().lower() in ("true", "t", "1")
+        if isinstance(sample, (int, float)):
+            try:
+                return float(value)
+            except ValueError:
+                return value
+    if isinstance(sample, str) and not isinstance(value, str):
+        return str(value).lower() if isinstance(value, bool) else str(value)
+    return value
+
+
+def _compare(row_value: Any, op: str, value: Any) -> bool:
+    if op == "is":
+        target = None if value is None or str(value).lower() == "null" else _coerce(value, True)
+        return row_value is None if target is None else row_value is target
+    if row_value is None or value is None:
+        return False
+    if op in ("like", "ilike"):
+        pattern = "^" + re.escape(str(value)).replace("%", ".*").replace(r"\*", ".*").replace("_", ".") + "$"
+        return re.match(pattern, str(row_value), re.S | (re.I if op == "ilike" else 0)) is not None
+    left = _comparable(row_value)
+    right = _comparable(_coerce(value, row_value))
+    if isinstance(left, datetime) != isinstance(right, datetime):
+        left, right = row_value, _coerce(value, row_value)
+    try:
+        if op == "eq":
+            return left == right
+        if op == "neq":
+            return left != right
+        if op == "gt":
+            return left > right
+        if op == "gte":
+            return left >= right
+        if op == "lt":
+            return left < right
+        if op == "lte":
+            return left <= right
+    except TypeError:
+        return False
+    raise LocalAPIError(f"unsupported operator: {op}", code="PGRST100")
+
+
+RowFilter = Callable[[Dict[str, Any]], bool]
+
+
+def _member_key(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).lower() if str(value).lower() in ("true", "false") else str(value)
+
+
+def _column_filter(column: str, op: str, value: Any, negate: bool = False) -> RowFilter:
+    if op == "in":
+        # 集合成员判断；过滤值可能是字符串形式的数字 / 布尔
+        members = {_member_key(item) for item in value}
+
+        def check_in(row: Dict[str, Any]) -> bool:
+            row_value = row.get(column)
+            return (row_value is not None and _member_key(row_value) in members) != negate
+
+        return check_in
+
+    def check(row: Dict[str, Any]) -> bool:
+        return _compare(row.get(column), op, value) != negate
+
+    return check
+
+
+def _split_filter_value(raw: str) -> Any:
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+        return raw[1:-1]
+    return raw
+
+
+def parse_logic_tree(expression: str) -> RowFilter:
+    """解析 PostgREST 的 or 表达式，如 `a.gt.1,and(b.eq."x",c.is.null)`。"""
+    terms = [_parse_logic_term(item) for item in _split_top_level(expression, quote='"')]
+    return lambda row: any(term(row) for term in terms)
+
+
+def _parse_logic_term(text: str) -> RowFilter:
+    nested = re.match(r"^(not\.)?(and|or)\((.*)\)$", text.strip(), re.S)
+    if nested:
+        parts = [_parse_logic_term(item) for item in _split_top_level(nested.group(3), quote='"')]
+        combine = all if nested.group(2) == "and" else any
+        negate = bool(nested.group(1))
+        return lambda row: combine(part(row) for part in parts) != negate
+    column, rest = text.strip().split(".", 1)
+    negate = False
+    if rest.startswith("not."):
+        negate = True
+        rest = rest[4:]
+    op, raw = rest.split(".", 1)
+    if op == "in":
+        value: Any = [
+            _split_filter_value(part) for part in _split_top_level(raw.strip()[1:-1], quote='"')
+        ]
+    else:
+        value = _split_filter_value(raw)
+    return _column_filter(column, op, value, negate)
+
+
+def _sort_key(value: Any) -> Tuple[int, Any]:
+    value = _comparable(value)
+    if isinstance(value, bool):
+        return (0, int(value))
+    if isinstance(value, (int, float)):
+        return (0, value)
+    if isinstance(value, datetime):
+        return (1, value)
+    if isinstance(value, (dict, list)):
+        return (3, json.dumps(value, sort_keys=True, ensure_ascii=False))
+    return (2, str(value))
+
+
+def _clone(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _clone(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clone(item) for item in value]
+    return value
+
+
+# ----------------------------------------------------------------------
+# 存储
+# ----------------------------------------------------------------------
+
+
+class _Table:
+    """单表存储：内部 rowid → 行；按唯一约束维护哈希索引。"""
+
+    def __init__(self, name: str, schema: Optional[TableSchema]):
+        self.name = name
+        self.schema = schema
+        self.rows: Dict[int, Dict[str, Any]] = {}
+        self.next_rowid = 1
+        self.serials: Dict[str, int] = {}
+        self.indexes: Dict[Tuple[str, ...], Dict[Tuple[Any, ...], int]] = {}
+        if schema is None:
+            self.serials["id"] = 0
+        else:
+            for key in schema.unique_keys():
+                self.indexes[key] = {}
+            for column in schema.columns.values():
+                if column.serial:
+                    self.serials[column.name] = 0
+
+    def index_for(self, key: Tuple[str, ...], strict: bool) -> Dict[Tuple[Any, ...], int]:
+        index = self.indexes.get(key)
+        if index is None:
+            if strict and self.schema is not None:
+                raise LocalAPIError(
+                    "there is no unique or exclusion constraint matching the ON CONFLICT specification",
+                    code="42P10",
+                )
+            index = {}
+            for rowid, row in self.rows.items():
+                values = tuple(row.get(column) for column in key)
+                if None not in values:
+                    index[values] = rowid
+            self.indexes[key] = index
+        return index
+
+    def add(self, row: Dict[str, Any], rowid: Optional[int] = None) -> int:
+        if rowid is None:
+            rowid = self.next_rowid
+        self.next_rowid = max(self.next_rowid, rowid + 1)
+        self.rows[rowid] = row
+        self._index(rowid, row)
+        for column in self.serials:
+            value = row.get(column)
+            if isinstance(value, int) and value > self.serials[column]:
+                self.serials[column] = value
+        return rowid
+
+    def remove(self, rowid: int) -> Dict[str, Any]:
+        row = self.rows.pop(rowid)
+        self._unindex(row)
+        return row
+
+    def _index(self, rowid: int, row: Dict[str, Any]) -> None:
+        for key, index in self.indexes.items():
+            values = tuple(row.get(column) for column in key)
+            if None not in values:
+                index[values] = rowid
+
+    def _unindex(self, row: Dict[str, Any]) -> None:
+        for key, index in self.indexes.items():
+            values = tuple(row.get(column) for column in key)
+            index.pop(values, None)
+
+    def check_unique(self, row: Dict[str, Any], own_rowid: Optional[int] = None) -> None:
+        for key, index in self.indexes.items():
+            values = tuple(row.get(column) for column in key)
+            if None in values:
+                continue
+            existing = index.get(values)
+            if existing is not None and existing != own_rowid:
+                raise LocalAPIError(
+                    f'duplicate key value violates unique constraint "{self.name}_{"_".join(key)}_key"',
+                    code="23505",
+                    details=f"Key ({', '.join(key)})=({', '.join(str(v) for v in values)}) already exists.",
+                )
+
+
+class _SqliteMirror:
+    """SQLite 落盘：每行以 JSON 存储，写操作同步写穿。"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS local_rows ("
+            "table_name TEXT NOT NULL, row_key INTEGER NOT NULL, data TEXT NOT NULL, "
+            "PRIMARY KEY (table_name, row_key))"
+        )
+        self.conn.commit()
+
+    def load(self) -> Iterable[Tuple[str, int, Dict[str, Any]]]:
+        cursor = self.conn.execute("SELECT table_name, row_key, data FROM local_rows ORDER BY table_name, row_key")
+        for table_name, row_key, data in cursor:
+            yield table_name, int(row_key), json.loads(data)
+
+    def write(self, table_name: str, upserts: Sequence[Tuple[int, Dict[str, Any]]], deletes: Sequence[int]) -> None:
+        if upserts:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO local_rows (table_name, row_key, data) VALUES (?, ?, ?)",
+                [(table_name, rowid, json.dumps(row, ensure_ascii=False)) for rowid, row in upserts],
+            )
+        if deletes:
+            self.conn.executemany(
+                "DELETE FROM local_rows WHERE table_name = ? AND row_key = ?",
+                [(table_name, rowid) for rowid in deletes],
+            )
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+class LocalResponse:
+    """与 postgrest APIResponse 相同的 data / count 属性。"""
+
+    __slots__ = ("data", "count")
+
+    def __init__(self, data: Any, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class LocalQuery:
+    """查询构造器：链式方法只记录条件，execute() 时在锁内执行。"""
+
+    def __init__(self, client: "LocalSupabaseClient", table_name: str):
+        self._client = client
+        self._table_name = table_name
+        self._op = "select"
+        self._columns = "*"
+        self._count: Optional[str] = None
+        self._filters: List[RowFilter] = []
+        self._orders: List[Tuple[str, bool, Optional[bool]]] = []
+        self._offset = 0
+        self._limit: Optional[int] = None
+        self._payload: Any = None
+        self._on_conflict: Tuple[str, ...] = ()
+        self._ignore_duplicates = False
+        self._returning = True
+        self._single: Optional[str] = None
+        self._negate_next = False
+
+    # -- 动作 --------------------------------------------------------
+
+    def select(self, *columns: str, count: Optional[str] = None) -> "LocalQuery":
+        self._op = "select"
+        self._columns = ",".join(columns) if columns else "*"
+        self._count = count
+        return self
+
+    def insert(
+        self,
+        json_rows: Any,
+        count: Optional[str] = None,
+        returning: Any = None,
+        upsert: bool = False,
+        default_to_null: bool = True,
+    ) -> "LocalQuery":
+        self._op = "upsert" if upsert else "insert"
+        self._payload = json_rows
+        self._count = count
+        self._returning = "minimal" not in str(returning or "").lower()
+        return self
+
+    def upsert(
+        self,
+        json_rows: Any,
+        count: Optional[str] = None,
+        returning: Any = None,
+        ignore_duplicates: bool = False,
+        on_conflict: str = "",
+        default_to_null: bool = True,
+    ) -> "LocalQuery":
+        self._op = "upsert"
+        self._payload = json_rows
+        self._count = count
+        self._returning = "minimal" not in str(returning or "").lower()
+        self._ignore_duplicates = ignore_duplicates
+        self._on_conflict = tuple(_ident(item) for item in on_conflict.split(",") if item.strip())
+        return self
+
+    def update(self, json_values: Dict[str, Any], count: Optional[str] = None, returning: Any = None) -> "LocalQuery":
+        self._op = "update"
+        self._payload = json_values
+        self._count = count
+        self._returning = "minimal" not in str(returning or "").lower()
+        return self
+
+    def delete(self, count: Optional[str] = None, returning: Any = None) -> "LocalQuery":
+        self._op = "delete"
+        self._count = count
+        self._returning = "minimal" not in str(returning or "").lower()
+        return self
+
+    # -- 过滤 --------------------------------------------------------
+
+    @property
+    def not_(self) -> "LocalQuery":
+        self._negate_next = True
+        return self
+
+    def _filter(self, column: str, op: str, value: Any) -> "LocalQuery":
+        negate = self._negate_next
+        self._negate_next = False
+        self._filters.append(_column_filter(column, op, value, negate))
+        return self
+
+    def eq(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "lte", value)
+
+    def like(self, column: str, pattern: str) -> "LocalQuery":
+        return self._filter(column, "like", pattern)
+
+    def ilike(self, column: str, pattern: str) -> "LocalQuery":
+        return self._filter(column, "ilike", pattern)
+
+    def is_(self, column: str, value: Any) -> "LocalQuery":
+        return self._filter(column, "is", value)
+
+    def in_(self, column: str, values: Iterable[Any]) -> "LocalQuery":
+        return self._filter(column, "in", list(values))
+
+    def or_(self, filters: str, reference_table: Optional[str] = None) -> "LocalQuery":
+        check = parse_logic_tree(filters)
+        if self._negate_next:
+            self._negate_next = False
+            self._filters.append(lambda row: not check(row))
+        else:
+            self._filters.append(check)
+        return self
+
+    def filter(self, column: str, operator: str, criteria: str) -> "LocalQuery":
+        self._filters.append(_parse_logic_term(f"{column}.{operator}.{criteria}"))
+        return self
+
+    # -- 排序 / 分页 -------------------------------------------------
+
+    def order(
+        self,
+        column: str,
+        desc: bool = False,
+        nullsfirst: Optional[bool] = None,
+        foreign_table: Optional[str] = None,
+    ) -> "LocalQuery":
+        self._orders.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, foreign_table: Optional[str] = None) -> "LocalQuery":
+        self._limit = int(size)
+        return self
+
+    def offset(self, size: int) -> "LocalQuery":
+        self._offset = int(size)
+        return self
+
+    def range(self, start: int, end: int, foreign_table: Optional[str] = None) -> "LocalQuery":
+        self._offset = int(start)
+        self._limit = max(0, int(end) - int(start) + 1)
+        return self
+
+    def single(self) -> "LocalQuery":
+        self._single = "single"
+        return self
+
+    def maybe_single(self) -> "LocalQuery":
+        self._single = "maybe"
+        return self
+
+    def execute(self) -> LocalResponse:
+        return self._client._execute(self)
+
+
+class LocalSupabaseClient:
+    """进程内 Supabase client。
+
+    - sql_paths：建表用的 SQL 文件；None 时加载 `sql/*.sql`，传空列表则不加载（全部表宽松模式）
+    - sqlite_path：非空时表数据写穿到 SQLite 文件，重启后可继续使用
+    - latency_ms / latency_per_row_ms：每次 execute() 注入的固定延迟与按行延迟（在锁外 sleep）
+    - strict：已建表的表拒绝未知列、NOT NULL 缺失与无匹配约束的 on_conflict；未建表的表总是宽松
+    - clock：NOW() 默认值使用的时钟
+    """
+
+    def __init__(
+        self,
+        sql_paths: Optional[Iterable[str]] = None,
+        sqlite_path: Optional[str] = None,
+        latency_ms: float = 0.0,
+        latency_per_row_ms: float = 0.0,
+        strict: bool = True,
+        clock: Optional[Callable[[], datetime]] = None,
+    ):
+        if sql_paths is None:
+            sql_paths = sorted(glob.glob(os.path.join(DEFAULT_SQL_DIR, "*.sql")))
+        self.schemas = load_sql_schema(sql_paths)
+        self.latency_ms = max(0.0, float(latency_ms))
+        self.latency_per_row_ms = max(0.0, float(latency_per_row_ms))
+        self.strict = strict
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+        self._lock = threading.RLock()
+        self._tables: Dict[str, _Table] = {}
+        self.calls: Counter = Counter()
+        self.rows_read = 0
+        self.rows_written = 0
+        self._mirror: Optional[_SqliteMirror] = None
+        if sqlite_path:
+            self._mirror = _SqliteMirror(sqlite_path)
+            for table_name, rowid, row in self._mirror.load():
+                self._table(table_name).add(row, rowid=rowid)
+
+    # -- 公共接口 ----------------------------------------------------
+
+    def table(self, table_name: str) -> LocalQuery:
+        return LocalQuery(self, table_name)
+
+    def from_(self, table_name: str) -> LocalQuery:
+        return self.table(table_name)
+
+    def seed(self, table_name: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """直接写入初始数据（补默认值与自增 id），不计入调用统计。"""
+        query = self.table(table_name).insert(list(rows), returning="minimal")
+        with self._lock:
+            written = self._write(query, count_stats=False)
+        return len(written)
+
+    def rows(self, table_name: str) -> List[Dict[str, Any]]:
+        """按写入顺序返回表内全部行的副本。"""
+        with self._lock:
+            table = self._tables.get(table_name)
+            if table is None:
+                return []
+            return [_clone(row) for row in table.rows.values()]
+
+    def table_names(self) -> List[str]:
+        with self._lock:
+            return sorted(name for name, table in self._tables.items() if table.rows)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": sum(self.calls.values()),
+                "rows_read": self.rows_read,
+                "rows_written": self.rows_written,
+                "by_call": {f"{table}.{op}": count for (table, op), count in sorted(self.calls.items())},
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.calls.clear()
+            self.rows_read = 0
+            self.rows_written = 0
+
+    def close(self) -> None:
+        if self._mirror is not None:
+            self._mirror.close()
+            self._mirror = None
+
+    # -- 执行 --------------------------------------------------------
+
+    def _table(self, table_name: str) -> _Table:
+        table = self._tables.get(table_name)
+        if table is None:
+            table = _Table(table_name, self.schemas.get(table_name))
+            self._tables[table_name] = table
+        return table
+
+    def _execute(self, query: LocalQuery) -> LocalResponse:
+        payload_rows = query._payload if isinstance(query._payload, list) else [query._payload]
+        if self.latency_ms or self.latency_per_row_ms:
+            row_count = len(payload_rows) if query._op in ("insert", "upsert") else 1
+            time.sleep((self.latency_ms + self.latency_per_row_ms * row_count) / 1000.0)
+        with self._lock:
+            self.calls[(query._table_name, query._op)] += 1
+            if query._op == "select":
+                return self._select(query)
+            written = self._write(query)
+            data = [_clone(row) for row in written] if query._returning else []
+            count = len(written) if query._count else None
+            return LocalResponse(data, count)
+
+    def _matching(self, table: _Table, query: LocalQuery) -> List[Tuple[int, Dict[str, Any]]]:
+        filters = query._filters
+        return [(rowid, row) for rowid, row in table.rows.items() if all(check(row) for check in filters)]
+
+    def _select(self, query: LocalQuery) -> LocalResponse:
+        table = self._table(query._table_name)
+        columns = self._projection(table, query._columns)
+        rows = [row for _, row in self._matching(table, query)]
+        for column, desc, nullsfirst in reversed(query._orders):
+            # Postgres 默认：升序 NULL 在后，降序 NULL 在前
+            nulls_first = desc if nullsfirst is None else nullsfirst
+            present = [row for row in rows if row.get(column) is not None]
+            missing = [row for row in rows if row.get(column) is None]
+            present.sort(key=lambda row: _sort_key(row[column]), reverse=desc)
+            rows = missing + present if nulls_first else present + missing
+        total = len(rows)
+        end = None if query._limit is None else query._offset + query._limit
+        rows = rows[query._offset : end]
+        data = [
+            _clone(row) if columns is None else {alias: _clone(row.get(source)) for alias, source in columns}
+            for row in rows
+        ]
+        self.rows_read += len(data)
+        count = total if query._count else None
+        if query._single is not None:
+            if len(data) > 1 or (query._single == "single" and not data):
+                raise LocalAPIError(
+                    "JSON object requested, multiple (or no) rows returned",
+                    code="PGRST116",
+                    details=f"The result contains {len(data)} rows",
+                )
+            return LocalResponse(data[0] if data else None, count)
+        return LocalResponse(data, count)
+
+    def _projection(self, table: _Table, columns: str) -> Optional[List[Tuple[str, str]]]:
+        spec = [item.strip() for item in _split_top_level(columns.replace("\n", " ")) if item.strip()]
+        if not spec or "*" in spec:
+            return None
+        out: List[Tuple[str, str]] = []
+        for item in spec:
+            if "(" in item:
+                raise LocalAPIError(f"resource embedding not supported: {item}", code="PGRST200")
+            alias, sep, source = item.partition(":")
+            source = (source or alias).split("::")[0].strip()
+            alias = alias.strip() if sep else source
+            if self.strict and table.schema is not None and source not in table.schema.columns:
+                raise LocalAPIError(
+                    f"column {table.name}.{source} does not exist",
+                    code="42703",
+                )
+            out.append((alias, source))
+        return out
+
+    def _prepare_row(self, table: _Table, raw: Dict[str, Any], fill_defaults: bool) -> Dict[str, Any]:
+        # JSON 往返一次，与真实请求的序列化语义一致（tuple → list、datetime 需调用方自行格式化）
+        row = json.loads(json.dumps(raw, ensure_ascii=False))
+        schema = table.schema
+        if schema is None:
+            if fill_defaults and "id" not in row:
+                table.serials["id"] = table.serials.get("id", 0) + 1
+                row["id"] = table.serials["id"]
+            return row
+        if self.strict:
+            for column in row:
+                if column not in schema.columns:
+                    raise LocalAPIError(
+                        f"Could not find the '{column}' column of '{table.name}' in the schema cache",
+                        code="PGRST204",
+                    )
+        if not fill_defaults:
+            return row
+        for name, column in schema.columns.items():
+            if name in row:
+                continue
+            if column.serial:
+                table.serials[name] = table.serials.get(name, 0) + 1
+                row[name] = table.serials[name]
+            elif column.default is not None:
+                value = self._eval_default(column.default)
+                if column.array and isinstance(value, str):
+                    # Postgres 数组字面量 '{a,b}'
+                    inner = value.strip()[1:-1]
+                    value = [item.strip().strip('"') for item in inner.split(",")] if inner else []
+                row[name] = value
+            else:
+                row[name] = None
+        if self.strict:
+            for name, column in schema.columns.items():
+                if column.not_null and row.get(name) is None:
+                    raise LocalAPIError(
+                        f'null value in column "{name}" of relation "{table.name}" violates not-null constraint',
+                        code="23502",
+                    )
+        return row
+
+    def _eval_default(self, expression: str) -> Any:
+        text = expression.strip()
+        upper = text.upper()
+        if upper in ("NOW()", "CURRENT_TIMESTAMP", "TIMEZONE('UTC'::TEXT, NOW())", "TIMEZONE('UTC', NOW())"):
+            return self.clock().isoformat()
+        if upper == "CURRENT_DATE":
+            return self.clock().date().isoformat()
+        if upper in ("GEN_RANDOM_UUID()", "UUID_GENERATE_V4()"):
+            return str(uuid.uuid4())
+        if upper in ("TRUE", "FALSE"):
+            return upper == "TRUE"
+        if upper == "NULL":
+            return None
+        if upper.startswith("ARRAY["):
+            return []
+        quoted = re.match(r"^'((?:[^']|'')*)'(?:::([\w\s\[\]]+))?$", text)
+        if quoted:
+            value = quoted.group(1).replace("''", "'")
+            cast = (quoted.group(2) or "").strip().lower()
+            if cast in ("jsonb", "json"):
+                return json.loads(value)
+            if cast.endswith("[]"):
+                return []
+            return value
+        try:
+            number = float(text.strip("()"))
+            return int(number) if number.is_integer() and "." not in text else number
+        except ValueError:
+            return None
+
+    def _write(self, query: LocalQuery, count_stats: bool = True) -> List[Dict[str, Any]]:
+        """执行写操作；失败时按 undo 日志回滚，与单条语句的原子性一致。"""
+        table = self._table(query._table_name)
+        undo: List[Tuple[int, Optional[Dict[str, Any]]]] = []
+        try:
+            if query._op == "insert":
+                changed = self._insert(table, query, undo)
+            elif query._op == "upsert":
+                changed = self._upsert(table, query, undo)
+            elif query._op == "update":
+                values = self._touched(table, self._prepare_row(table, query._payload or {}, fill_defaults=False))
+                changed = []
+                for rowid, row in self._matching(table, query):
+                    changed.append((rowid, self._replace(table, rowid, {**row, **values}, undo)))
+            else:
+                changed = []
+                for rowid, row in self._matching(table, query):
+                    undo.append((rowid, table.remove(rowid)))
+                    changed.append((rowid, row))
+        except Exception:
+            for rowid, previous in reversed(undo):
+                if rowid in table.rows:
+                    table.remove(rowid)
+                if previous is not None:
+                    table.add(previous, rowid=rowid)
+            raise
+        if count_stats:
+            self.rows_written += len(changed)
+        if self._mirror is not None and changed:
+            if query._op == "delete":
+                self._mirror.write(table.name, [], [rowid for rowid, _ in changed])
+            else:
+                self._mirror.write(table.name, changed, [])
+        return [row for _, row in changed]
+
+    def _touched(self, table: _Table, values: Dict[str, Any]) -> Dict[str, Any]:
+        if table.schema is not None and table.schema.touch_updated_at:
+            values["updated_at"] = self.clock().isoformat()
+        return values
+
+    def _replace(
+        self,
+        table: _Table,
+        rowid: int,
+        updated: Dict[str, Any],
+        undo: List[Tuple[int, Optional[Dict[str, Any]]]],
+    ) -> Dict[str, Any]:
+        table.check_unique(updated, own_rowid=rowid)
+        undo.append((rowid, table.remove(rowid)))
+        table.add(updated, rowid=rowid)
+        return updated
+
+    def _insert(
+        self,
+        table: _Table,
+        query: LocalQuery,
+        undo: List[Tuple[int, Optional[Dict[str, Any]]]],
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        rows = query._payload if isinstance(query._payload, list) else [query._payload]
+        changed: List[Tuple[int, Dict[str, Any]]] = []
+        for raw in rows:
+            row = self._prepare_row(table, raw, fill_defaults=True)
+            # 逐行入表，批内重复键也会被唯一索引拦下
+            table.check_unique(row)
+            rowid = table.add(row)
+            undo.append((rowid, None))
+            changed.append((rowid, row))
+        return changed
+
+    def _upsert(
+        self,
+        table: _Table,
+        query: LocalQuery,
+        undo: List[Tuple[int, Optional[Dict[str, Any]]]],
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        rows = query._payload if isinstance(query._payload, list) else [query._payload]
+        conflict = query._on_conflict
+        if not conflict:
+            conflict = table.schema.primary_key if table.schema is not None and table.schema.primary_key else ("id",)
+        index = table.index_for(conflict, self.strict)
+        seen: set = set()
+        changed: List[Tuple[int, Dict[str, Any]]] = []
+        for raw in rows:
+            key = tuple(raw.get(column) for column in conflict)
+            if None not in key:
+                if key in seen:
+                    raise LocalAPIError(
+                        "ON CONFLICT DO UPDATE command cannot affect row a second time",
+                        code="21000",
+                    )
+                seen.add(key)
+            rowid = index.get(key) if None not in key else None
+            if rowid is None:
+                row = self._prepare_row(table, raw, fill_defaults=True)
+                table.check_unique(row)
+                rowid = table.add(row)
+                undo.append((rowid, None))
+                changed.append((rowid, row))
+                continue
+            if query._ignore_duplicates:
+                continue
+            values = self._touched(table, self._prepare_row(table, raw, fill_defaults=False))
+            changed.append((rowid, self._replace(table, rowid, {**table.rows[rowid], **values}, undo)))
+        return changed
+
+
+def create_local_client(**kwargs: Any) -> LocalSupabaseClient:
+    """与 `supabase.create_client` 对应的工厂函数。"""
+    return LocalSupabaseClient(**kwargs)
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""共享行情服务：Stooq 收盘价 + FRED 宏观序列。
+
+- 单个连接池 Session，缺失的 key 用线程池并发抓取
+- Stooq 多 symbol 合并成一次请求（`s=a+b+c`），整批失败时退回逐个抓取
+- 本地 SQLite TTL 缓存跨脚本共享（行情分钟级、FRED 日频序列小时级），只缓存有效值
+- 同进程内同一 key 的并发请求合并为一次抓取
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+STOOQ_SYMBOLS = {
+    "spy": "spy.us",
+    "qqq": "qqq.us",
+    "dia": "dia.us",
+}
+FRED_SERIES = {
+    "vix": "VIXCLS",
+    "us10y": "DGS10",
+    "dxy": "DTWEXBGS",
+}
+STOOQ_ENDPOINT = "https://stooq.com/q/l/"
+FRED_ENDPOINT = "https://fred.stlouisfed.org/graph/fredgraph.csv"
+USER_AGENT = "USMonitor/1.0 market-data"
+REQUEST_TIMEOUT_SEC = 12
+STOOQ_BATCH_SIZE = 20
+# FRED 只取最近一段观测，避免每次下载整段历史；窗口内无有效值时再取全量
+FRED_LOOKBACK_DAYS = 60
+
+Fetcher = Callable[[List[str]], Dict[str, Optional[float]]]
+
+
+def _parse_number(value: str) -> Optional[float]:
+    value = value.strip()
+    if value in ("", ".", "N/D"):
+        return None
+    try:
+        return round(float(value), 4)
+    except ValueError:
+        return None
+
+
+def parse_stooq_lines(text: str) -> Dict[str, Optional[float]]:
+    """解析 Stooq 轻量行情 CSV（symbol,date,time,open,high,low,close,volume），symbol 统一小写。"""
+    closes: Dict[str, Optional[float]] = {}
+    for line in text.splitlines():
+        parts = [item.strip() for item in line.split(",")]
+        if len(parts) < 7 or not parts[0] or parts[0].lower() == "symbol":
+            continue
+        closes[parts[0].lower()] = _parse_number(parts[6])
+    return closes
+
+
+def parse_fred_latest(text: str) -> Optional[float]:
+    """取 FRED CSV 最后一个有效观测值。"""
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    for line in reversed(lines[1:]):
+        parts = line.split(",")
+        if len(parts) >= 2:
+            value = _parse_number(parts[1])
+            if value is not None:
+                return value
+    return None
+
+
+class MarketDataService:
+    """带 TTL 缓存与请求合并的行情抓取。"""
+
+    def __init__(
+        self,
+        cache_path: Optional[str] = None,
+        quote_ttl_sec: Optional[int] = None,
+        series_ttl_sec: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        session: Optional[requests.Session] = None,
+    ):
+        if cache_path is None:
+            cache_path = os.getenv("MARKET_DATA_CACHE_PATH", "logs/market_data_cache.sqlite3")
+        if quote_ttl_sec is None:
+            quote_ttl_sec = int(os.getenv("MARKET_DATA_QUOTE_TTL_SEC", "300"))
+        if series_ttl_sec is None:
+            series_ttl_sec = int(os.getenv("MARKET_DATA_SERIES_TTL_SEC", "21600"))
+        self.quote_ttl_sec = quote_ttl_sec
+        self.series_ttl_sec = series_ttl_sec
+        self.max_workers = max(1, int(max_workers or os.getenv("MARKET_DATA_WORKERS", "6")))
+        self.session = session or self._build_session(self.max_workers)
+        self.stats: Dict[str, int] = {"cache_hits": 0, "coalesced": 0, "requests": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._cache: Optional[sqlite3.Connection] = None
+        if cache_path:
+            self._open_cache(cache_path)
+
+    @staticmethod
+    def _build_session(pool_size: int) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["User-Agent"] = USER_AGENT
+        return session
+
+    # -- 缓存 --------------------------------------------------------
+
+    def _open_cache(self, path: str) -> None:
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS market_values "
+                "(key TEXT PRIMARY KEY, value REAL NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._cache = conn
+        except sqlite3.Error as e:
+            logger.warning(f"[MARKET_DATA_CACHE_DISABLED] path={path} error={str(e)[:120]}")
+
+    def _cache_get(self, keys: Sequence[str], ttl_sec: int) -> Dict[str, float]:
+        if self._cache is None or not keys or ttl_sec <= 0:
+            return {}
+        placeholders = ",".join("?" for _ in keys)
+        try:
+            with self._lock:
+                rows = self._cache.execute(
+                    f"SELECT key, value FROM market_values WHERE key IN ({placeholders}) AND fetched_at >= ?",
+                    (*keys, time.time() - ttl_sec),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"[MARKET_DATA_CACHE_READ_FAIL] error={str(e)[:120]}")
+            return {}
+        return {key: float(value) for key, value in rows}
+
+    def _cache_put(self, values: Dict[str, Optional[float]]) -> None:
+        rows = [(key, value, time.time()) for key, value in values.items() if value is not None]
+        if self._cache is None or not rows:
+            return
+        try:
+            with self._lock:
+                self._cache.executemany(
+                    "INSERT INTO market_values (key, value, fetched_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value, fetched_at = excluded.fetched_at",
+                    rows,
+                )
+                self._cache.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"[MARKET_DATA_CACHE_WRITE_FAIL] error={str(e)[:120]}")
+
+    # -- 抓取 --------------------------------------------------------
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="market-data",
+                )
+            return self._pool
+
+    def _get(self, url: str, params: Optional[Dict[str, str]] = None) -> str:
+        with self._lock:
+            self.stats["requests"] += 1
+        response = self.session.get(url, params=params, timeout=REQUEST_TIMEOUT_SEC)
+        response.raise_for_status()
+        return response.text
+
+    def _stooq_batch(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        # `+` 须原样拼进 URL（params 会转义成 %2B）；symbol 列按小写对齐，响应里缺失的 symbol 视为无数据
+        closes = parse_stooq_lines(self._get(f"{STOOQ_ENDPOINT}?s={'+'.join(symbols)}&i=d"))
+        return {symbol: closes.get(symbol.lower()) for symbol in symbols}
+
+    def _fred_one(self, series_id: str) -> Optional[float]:
+        start = (datetime.now(timezone.utc) - timedelta(days=FRED_LOOKBACK_DAYS)).date().isoformat()
+        value = parse_fred_latest(self._get(FRED_ENDPOINT, {"id": series_id, "cosd": start}))
+        if value is None:
+            value = parse_fred_latest(self._get(FRED_ENDPOINT, {"id": series_id}))
+        return value
+
+    def _fetch_stooq(self, symbols: List[str]) -> Dict[str, Optional[float]]:
+        pool = self._executor()
+        chunks = [symbols[idx : idx + STOOQ_BATCH_SIZE] for idx in range(0, len(symbols), STOOQ_BATCH_SIZE)]
+        futures = [(chunk, pool.submit(self._stooq_batch, chunk)) for chunk in chunks]
+        result: Dict[str, Optional[float]] = {}
+        retry: List[str] = []
+        for chunk, future in futures:
+            try:
+                result.update(future.result())
+            except Exception as e:
+                if len(chunk) == 1:
+                    result[chunk[0]] = None
+                    continue
+                logger.warning(
+                    f"[MARKET_DATA_STOOQ_BATCH_FALLBACK] symbols={len(chunk)} error={str(e)[:120]}"
+                )
+                retry.extend(chunk)
+        singles = [(symbol, pool.submit(self._stooq_batch, [symbol])) for symbol in retry]
+        for symbol, future in singles:
+            try:
+                result.update(future.result())
+            except Exception:
+                result[symbol] = None
+        return result
+
+    def _fetch_fred(self, series_ids: List[str]) -> Dict[str, Optional[float]]:
+        pool = self._executor()
+        futures = [(series_id, pool.submit(self._fred_one, series_id)) for series_id in series_ids]
+        result: Dict[str, Optional[float]] = {}
+        for series_id, future in futures:
+            try:
+                result[series_id] = future.result()
+            except Exception:
+                result[series_id] = None
+        return result
+
+    def _get_many(
+        self,
+        prefix: str,
+        names: Iterable[str],
+        ttl_sec: int,
+        fetch: Fetcher,
+    ) -> Dict[str, Optional[float]]:
+        """缓存 → 合并同 key 在途请求 → 只抓剩余 key。"""
+        names = list(dict.fromkeys(name for name in names if name))
+        keys = {name: f"{prefix}:{name}" for name in names}
+        cached = self._cache_get(list(keys.values()), ttl_sec)
+        result: Dict[str, Optional[float]] = {
+            name: cached[keys[name]] for name in names if keys[name] in cached
+        }
+
+        owned: List[str] = []
+        waiting: Dict[str, Future] = {}
+        with self._lock:
+            self.stats["cache_hits"] += len(result)
+            for name in names:
+                if name in result:
+                    continue
+                future = self._inflight.get(keys[name])
+                if future is not None:
+                    waiting[name] = future
+                    self.stats["coalesced"] += 1
+                else:
+                    self._inflight[keys[name]] = Future()
+                    owned.append(name)
+
+        if owned:
+            fetched: Dict[str, Optional[float]] = {}
+            try:
+                fetched = fetch(owned)
+            finally:
+                self._cache_put({keys[name]: fetched.get(name) for name in owned})
+                with self._lock:
+                    for name in owned:
+                        self._inflight.pop(keys[name]).set_result(fetched.get(name))
+                    self.stats["misses"] += sum(1 for name in owned if fetched.get(name) is None)
+            result.update({name: fetched.get(name) for name in owned})
+        for name, future in waiting.items():
+            result[name] = future.result()
+        return {name: result.get(name) for name in names}
+
+    # -- 对外接口 ----------------------------------------------------
+
+    def stooq_closes(self, symbols: Iterable[str]) -> Dict[str, Optional[float]]:
+        """Stooq symbol（如 spy.us）→ 最新收盘价。"""
+        return self._get_many("stooq", symbols, self.quote_ttl_sec, self._fetch_stooq)
+
+    def fred_latest(self, series_ids: Iterable[str]) -> Dict[str, Optional[float]]:
+        """FRED series id → 最新有效值。"""
+        return self._get_many("fred", series_ids, self.series_ttl_sec, self._fetch_fred)
+
+    def us_closes(self, tickers: Iterable[str]) -> Dict[str, Optional[float]]:
+        """美股 ticker → 最新收盘价。"""
+        symbols = {str(ticker).upper(): f"{str(ticker).lower()}.us" for ticker in tickers if ticker}
+        closes = self.stooq_closes(symbols.values())
+        return {ticker: closes.get(symbol) for ticker, symbol in symbols.items()}
+
+    def market_snapshot(self) -> Dict[str, Optional[float]]:
+        """大盘快照：SPY/QQQ/DIA 一次合并请求 + VIX/10Y/美元指数并发请求。"""
+        closes = self.stooq_closes(STOOQ_SYMBOLS.values())
+        series = self.fred_latest(FRED_SERIES.values())
+
+        snapshot: Dict[str, Optional[float]] = {}
+        for field, symbol in STOOQ_SYMBOLS.items():
+            snapshot[field] = closes.get(symbol)
+            if snapshot[field] is None:
+                logger.warning(f"[MARKET_PRICE_STOOQ_MISS] symbol={symbol}")
+        for field, series_id in FRED_SERIES.items():
+            snapshot[field] = series.get(series_id)
+            if snapshot[field] is None:
+                logger.warning(f"[MARKET_PRICE_FRED_MISS] series={series_id}")
+        return snapshot
+
+
+_SERVICE: Optional[MarketDataService] = None
+_SERVICE_LOCK = threading.Lock()
+
+
+def get_market_data() -> MarketDataService:
+    """进程内共享的行情服务实例。"""
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            _SERVICE = MarketDataService()
+        return _SERVICE
+
+
+def fetch_market_snapshot() -> Dict[str, Optional[float]]:
+    return get_market_data().market_snapshot()
+
+
+def fetch_us_closes(tickers: Iterable[str]) -> Dict[str, Optional[float]]:
+    return get_market_data().us_closes(tickers)
+
+
+def fetch_stooq_close(symbol: str) -> Optional[float]:
+    """不走缓存的单个 Stooq 抓取（源健康探测用，需要真实延迟）。"""
+    try:
+        return get_market_data()._stooq_batch([symbol]).get(symbol)
+    except Exception:
+        return None
+
+
+def fetch_fred_latest(series_id: str) -> Optional[float]:
+    """不走缓存的单个 FRED 抓取（源健康探测用）。"""
+    try:
+        return get_market_data()._fred_one(series_id)
+    except Exception:
+        return None
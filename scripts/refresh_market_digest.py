@@ -12,11 +12,12 @@ from collections import Counter, defaultdict
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Set, Tuple
 
-import requests
 from supabase import create_client
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from scripts.market_data import fetch_market_snapshot  # noqa: E402
+
 logger = logging.getLogger(__name__)
 if not logger.handlers:
     handler = logging.StreamHandler()
@@ -76,16 +77,6 @@ STOCK_SIGNAL_HINTS = [
     "vix",
     "dxy",
 ]
-STOOQ_SYMBOLS = {
-    "spy": "spy.us",
-    "qqq": "qqq.us",
-    "dia": "dia.us",
-}
-FRED_SERIES = {
-    "vix": "VIXCLS",
-    "us10y": "DGS10",
-    "dxy": "DTWEXBGS",
-}
 _ANALYSIS_SIGNALS_HAS_DETAILS: bool | None = None
 
 
@@ -145,71 +136,9 @@ def _is_stock_signal(row: Dict[str, Any]) -> bool:
     return any(hint.lower() in text for hint in STOCK_SIGNAL_HINTS)
 
 
-def _fetch_stooq_close(symbol: str) -> float | None:
-    """读取 Stooq 日线收盘价（无需认证）。"""
-    endpoint = f"https://stooq.com/q/l/?s={symbol}&i=d"
-    try:
-        response = requests.get(
-            endpoint,
-            timeout=12,
-            headers={"User-Agent": "USMonitor/1.0 market-digest"},
-        )
-        response.raise_for_status()
-        first_line = next((line.strip() for line in response.text.splitlines() if line.strip()), "")
-        parts = [item.strip() for item in first_line.split(",")]
-        if len(parts) < 7:
-            return None
-        close_value = parts[6]
-        if close_value in ("N/D", ""):
-            return None
-        return round(float(close_value), 4)
-    except Exception:
-        return None
-
-
-def _fetch_fred_latest(series_id: str) -> float | None:
-    """读取 FRED 最新有效值（无需 API key）。"""
-    endpoint = f"https://fred.stlouisfed.org/graph/fredgraph.csv?id={series_id}"
-    try:
-        response = requests.get(
-            endpoint,
-            timeout=12,
-            headers={"User-Agent": "USMonitor/1.0 market-digest"},
-        )
-        response.raise_for_status()
-        lines = [line.strip() for line in response.text.splitlines() if line.strip()]
-        if len(lines) <= 1:
-            return None
-        for line in reversed(lines[1:]):
-            parts = [item.strip() for item in line.split(",")]
-            if len(parts) < 2:
-                continue
-            value = parts[1]
-            if value in ("", "."):
-                continue
-            return round(float(value), 4)
-    except Exception:
-        return None
-    return None
-
-
 def _fetch_market_prices() -> Dict[str, Any]:
-    """市场价格抓取：Stooq + FRED（均无需认证）。"""
-    snapshot = {"spy": None, "qqq": None, "dia": None, "vix": None, "us10y": None, "dxy": None}
-
-    for field, symbol in STOOQ_SYMBOLS.items():
-        value = _fetch_stooq_close(symbol)
-        snapshot[field] = value
-        if value is None:
-            logger.warning(f"[MARKET_PRICE_STOOQ_MISS] symbol={symbol}")
-
-    for field, series_id in FRED_SERIES.items():
-        value = _fetch_fred_latest(series_id)
-        snapshot[field] = value
-        if value is None:
-            logger.warning(f"[MARKET_PRICE_FRED_MISS] series={series_id}")
-
-    return snapshot
+    """市场价格抓取：Stooq + FRED（均无需认证），经共享行情服务并发抓取并走 TTL 缓存。"""
+    return fetch_market_snapshot()
 
 
 def _highest_level(levels: List[str]) -> str:
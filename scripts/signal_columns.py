@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""Stock V2 信号/机会打分的列式实现（NumPy，可选依赖）。
+
+事件包先转成列数组（ticker 编码、方向、强度×权重×置信度、新近度排序键、来源编码），
+按 ticker 分组做归约；只有输出阶段才物化成 dict。
+结果与逐行实现逐位一致：同一 ticker 内按新近度顺序累加，计数器保持首次出现顺序。
+"""
+
+from __future__ import annotations
+
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # 未安装 numpy 时调用方回退到逐行实现
+    np = None  # type: ignore[assignment]
+
+HAS_NUMPY = np is not None
+
+
+def _ordinal_codes(values: List[str]) -> "np.ndarray":
+    """字符串 → 保序整数编码（编码大小关系与字符串比较一致）。"""
+    lookup = {value: idx for idx, value in enumerate(sorted(set(values)))}
+    return np.fromiter((lookup[value] for value in values), dtype=np.int64, count=len(values))
+
+
+def _string_words(values: List[str]) -> "np.ndarray":
+    """字符串 → (n, k) 的 uint64 矩阵，逐列比较的结果与字符串比较一致。
+
+    ISO 时间戳等 ASCII 串按 8 字节大端整数分段，排序走整数 lexsort，比直接排 unicode 数组快；
+    含非 ASCII 字符时退回 np.unique 编码。
+    """
+    try:
+        raw = np.asarray(values, dtype="S")
+    except UnicodeEncodeError:
+        ranks = np.unique(np.asarray(values), return_inverse=True)[1]
+        return ranks.reshape(-1, 1).astype(np.uint64)
+    width = -(-max(1, raw.dtype.itemsize) // 8) * 8
+    return raw.astype(f"S{width}").view(">u8").reshape(len(values), -1).astype(np.uint64)
+
+
+def _first_seen_codes(
+    values: List[Any],
+    normalize: Callable[[Any], str] = str,
+) -> Tuple["np.ndarray", List[str]]:
+    """取值 → 按规整后首次出现编号，同时返回编号对应的取值表；规整只对去重后的取值做一次。"""
+    raw_lookup = {value: idx for idx, value in enumerate(dict.fromkeys(values))}
+    labels: Dict[str, int] = {}
+    remap = np.fromiter(
+        (labels.setdefault(normalize(value), len(labels)) for value in raw_lookup),
+        dtype=np.int64,
+        count=len(raw_lookup),
+    )
+    raw_codes = np.fromiter(map(raw_lookup.__getitem__, values), dtype=np.int64, count=len(values))
+    return remap[raw_codes], list(labels)
+
+
+def _grouped_counts(
+    group: "np.ndarray",
+    codes: "np.ndarray",
+    labels: List[str],
+    group_count: int,
+) -> List[List[List[Any]]]:
+    """按组统计 code 出现次数，组内按首次出现位置排序（等价于 Counter 的插入顺序）。"""
+    result: List[List[List[Any]]] = [[] for _ in range(group_count)]
+    if not len(group):
+        return result
+    width = max(1, len(labels))
+    keys = group * width + codes
+    unique_keys, first_pos, counts = np.unique(keys, return_index=True, return_counts=True)
+    order = np.lexsort((first_pos, unique_keys // width))
+    for key, count in zip(unique_keys[order].tolist(), counts[order].tolist()):
+        result[key // width].append([labels[key % width], count])
+    return result
+
+
+def _first_in_group(group: "np.ndarray", mask: "np.ndarray", group_count: int) -> "np.ndarray":
+    """每组第一个满足 mask 的位置；没有则为 -1。"""
+    first = np.full(group_count, -1, dtype=np.int64)
+    positions = np.flatnonzero(mask)
+    if len(positions):
+        groups, idx = np.unique(group[positions], return_index=True)
+        first[groups] = positions[idx]
+    return first
+
+
+def aggregate_ticker_events(
+    bundle: Sequence[Dict[str, Any]],
+    recent_limit: int,
+    now_iso: str,
+) -> List[Tuple[str, Dict[str, Any], int]]:
+    """列式版本的按 ticker 聚合，返回 [(ticker, aggregate, event_count)]，ticker 按首次出现排序。
+
+    aggregate 结构与 StockPipelineV2._aggregate_ticker_events 相同。
+    """
+    # 全量行只取 ticker 与 published_at 两列，其余字段只对每个 ticker 最近的 recent_limit 行读取
+    rows = list(bundle)
+    raw_tickers = [row.get("ticker") or "" for row in rows]
+    if "" in raw_tickers:
+        rows = [row for row, ticker in zip(rows, raw_tickers) if ticker]
+        raw_tickers = [ticker for ticker in raw_tickers if ticker]
+    if not rows:
+        return []
+    size = len(rows)
+    # ticker 按首次出现编号，输出顺序与逐行实现的 dict 插入顺序一致
+    ticker_lookup = {ticker: idx for idx, ticker in enumerate(dict.fromkeys(raw_tickers))}
+    tickers = [str(ticker) for ticker in ticker_lookup]
+    group_count = len(tickers)
+    ticker_codes = np.fromiter(map(ticker_lookup.__getitem__, raw_tickers), dtype=np.int64, count=size)
+    published = _string_words([row.get("published_at") or "" for row in rows])
+
+    # 组内按 published_at 降序（按位取反即降序）；并列保持输入顺序，与 sorted(reverse=True) 的稳定性一致
+    positions = np.arange(size)
+    descending = [~published[:, col] for col in reversed(range(published.shape[1]))]
+    order = np.lexsort((positions, *descending, ticker_codes))
+    ordered_pub = published[order]
+    ordered_group = ticker_codes[order]
+    tied = (ordered_group[1:] == ordered_group[:-1]) & (ordered_pub[1:] == ordered_pub[:-1]).all(axis=1)
+    if tied.any():
+        # 同一 ticker 下 published_at 相同：再按 (source_ref, event_type, role) 降序，只对并列行取这些字段
+        run_ids = np.cumsum(np.concatenate(([True], ~tied)))
+        in_tie = np.concatenate(([False], tied)) | np.concatenate((tied, [False]))
+        tie_rows = order[in_tie]
+        secondary = np.zeros(size, dtype=np.int64)
+        # \0 小于任何字符（Postgres text 也不允许 \0），拼接后比较结果与元组一致
+        secondary[in_tie] = _ordinal_codes(
+            [
+                f"{row.get('source_ref') or ''}\0{row.get('event_type') or ''}\0{row.get('role') or ''}"
+                for row in (rows[idx] for idx in tie_rows.tolist())
+            ]
+        )
+        order = order[np.lexsort((positions, -secondary, run_ids))]
+
+    event_counts = np.bincount(ticker_codes, minlength=group_count)
+    group_starts = np.concatenate(([0], np.cumsum(event_counts)[:-1]))
+    rank = positions - np.repeat(group_starts, event_counts)
+    top = order[rank < recent_limit]
+    top_group = ticker_codes[top]
+
+    top_rows = [rows[idx] for idx in top.tolist()]
+    count = len(top_rows)
+    top_value = (
+        np.fromiter(map(itemgetter("strength"), top_rows), dtype=np.float64, count=count)
+        * np.fromiter(map(itemgetter("weight"), top_rows), dtype=np.float64, count=count)
+        * np.fromiter(map(itemgetter("map_confidence"), top_rows), dtype=np.float64, count=count)
+    )
+    direction = list(map(itemgetter("direction"), top_rows))
+    is_long = np.fromiter((item == "LONG" for item in direction), dtype=bool, count=count)
+    is_short = np.fromiter((item == "SHORT" for item in direction), dtype=bool, count=count)
+    top_ids = np.fromiter(map(itemgetter("event_id"), top_rows), dtype=np.int64, count=count).tolist()
+    event_type_codes, event_types = _first_seen_codes(list(map(itemgetter("event_type"), top_rows)))
+    top_source, source_types = _first_seen_codes(
+        [row.get("source_type") for row in top_rows],
+        lambda value: str(value or "article").strip().lower(),
+    )
+    handle_codes, handles = _first_seen_codes(
+        [row.get("source_handle") for row in top_rows],
+        lambda value: str(value or "").strip(),
+    )
+
+    # bincount 按数组顺序逐个累加，组内顺序即新近度顺序，浮点结果与逐行相加一致
+    long_mass = np.bincount(top_group, weights=np.where(is_long, top_value, 0.0), minlength=group_count)
+    short_mass = np.bincount(top_group, weights=np.where(is_short, top_value, 0.0), minlength=group_count)
+
+    x_code = source_types.index("x_grok") if "x_grok" in source_types else -1
+    article_code = source_types.index("article") if "article" in source_types else -1
+    is_x = top_source == x_code
+    empty_handle = handles.index("") if "" in handles else -1
+    handle_mask = is_x & (handle_codes != empty_handle)
+
+    event_type_counts = _grouped_counts(top_group, event_type_codes, event_types, group_count)
+    source_type_counts = _grouped_counts(top_group, top_source, source_types, group_count)
+    x_handle_counts = _grouped_counts(
+        top_group[handle_mask],
+        handle_codes[handle_mask],
+        handles,
+        group_count,
+    )
+    first_x = _first_in_group(top_group, is_x, group_count).tolist()
+    first_article = _first_in_group(top_group, top_source == article_code, group_count).tolist()
+
+    top_bounds = np.concatenate(([0], np.cumsum(np.minimum(event_counts, recent_limit)))).tolist()
+    long_list = long_mass.tolist()
+    short_list = short_mass.tolist()
+    count_list = event_counts.tolist()
+
+    def _published_iso(position: int) -> str:
+        if position < 0:
+            return ""
+        raw = top_rows[position].get("published_at")
+        return raw if isinstance(raw, str) and raw.strip() else now_iso
+
+    result: List[Tuple[str, Dict[str, Any], int]] = []
+    for code, ticker in enumerate(tickers):
+        start, end = top_bounds[code], top_bounds[code + 1]
+        result.append(
+            (
+                ticker,
+                {
+                    "long_mass": long_list[code],
+                    "short_mass": short_list[code],
+                    "event_types": event_type_counts[code],
+                    "source_types": source_type_counts[code],
+                    "x_handles": x_handle_counts[code],
+                    "source_event_ids": top_ids[start:end],
+                    "latest_x_at": _published_iso(first_x[code]),
+                    "latest_news_at": _published_iso(first_article[code]),
+                    "summary": str(top_rows[start].get("summary") or ""),
+                },
+                count_list[code],
+            )
+        )
+    return result
+
+
+def score_opportunities(
+    inputs: Sequence[Dict[str, Any]],
+    regime_score: float,
+    boost_factor: float,
+) -> Tuple[List[float], List[float]]:
+    """列式计算机会分与置信度，公式与 StockPipelineV2._score_opportunity 一致。"""
+    size = len(inputs)
+    if not size:
+        return [], []
+
+    def column(name: str, dtype: Any = np.float64) -> "np.ndarray":
+        return np.fromiter((item[name] for item in inputs), dtype=dtype, count=size)
+
+    is_long = np.fromiter((item["side"] == "LONG" for item in inputs), dtype=bool, count=size)
+    x_ratio = column("x_ratio")
+    has_x = column("x_count", np.int64) > 0
+    x_quality = column("x_quality")
+
+    macro_boost = np.where(is_long, regime_score, -regime_score)
+    source_boost = np.zeros(size)
+    source_boost = np.where(has_x, source_boost + (1.2 + x_ratio * 1.8), source_boost)
+    source_boost = np.where(column("mixed_sources", bool), source_boost + 1.5, source_boost)
+    source_boost = source_boost + column("resonance_score") * 1.6
+    source_boost = np.where(has_x & (x_quality < 55), source_boost - 1.1, source_boost)
+    source_boost = source_boost * boost_factor
+
+    opp_score = np.maximum(
+        0.0,
+        np.minimum(100.0, column("signal_score") * 0.82 + (macro_boost + 1.0) * 9.0 + source_boost),
+    )
+    opp_conf = np.maximum(0.4, np.minimum(0.95, column("confidence") * 0.82 + 0.13))
+    penalized = has_x & (x_quality < 50) & (x_ratio >= 0.6)
+    opp_conf = np.where(penalized, np.maximum(0.35, np.minimum(0.95, opp_conf - 0.08)), opp_conf)
+    return opp_score.tolist(), opp_conf.tolist()
+
+
+def rank_desc(values: Sequence[float], limit: int) -> List[int]:
+    """按值降序取前 limit 个下标；值相同保持原顺序。"""
+    if not len(values):
+        return []
+    order = np.argsort(-np.asarray(values, dtype=np.float64), kind="stable")
+    return order[:limit].tolist()
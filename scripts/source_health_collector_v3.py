@@ -16,8 +16,8 @@ from supabase import create_client
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from scripts.refresh_market_digest import FRED_SERIES, STOOQ_SYMBOLS  # noqa: E402
-from scripts.refresh_market_digest import _fetch_fred_latest, _fetch_stooq_close  # noqa: E402
+from scripts.market_data import FRED_SERIES, STOOQ_SYMBOLS  # noqa: E402
+from scripts.market_data import fetch_fred_latest, fetch_stooq_close  # noqa: E402
 
 logger = logging.getLogger(__name__)
 if not logger.handlers:
@@ -168,7 +168,7 @@ def _collect_articles_health(supabase, hours: int, run_id: str) -> Dict[str, Any
 def _collect_stooq_health(run_id: str) -> Dict[str, Any]:
     now = _now_utc()
     success_rate, p95_latency_ms, null_rate, payload = _measure_market_source(
-        fetcher=_fetch_stooq_close,
+        fetcher=fetch_stooq_close,
         targets=STOOQ_SYMBOLS,
     )
     freshness_sec = 0 if success_rate > 0 else 172800
@@ -192,7 +192,7 @@ def _collect_stooq_health(run_id: str) -> Dict[str, Any]:
 def _collect_fred_health(run_id: str) -> Dict[str, Any]:
     now = _now_utc()
     success_rate, p95_latency_ms, null_rate, payload = _measure_market_source(
-        fetcher=_fetch_fred_latest,
+        fetcher=fetch_fred_latest,
         targets=FRED_SERIES,
     )
     freshness_sec = 0 if success_rate > 0 else 259200
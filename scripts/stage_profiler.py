@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""阶段级运行剖析：嵌套 span 记录墙钟 / CPU 时间、DB 调用次数与读写行数。"""
+
+from __future__ import annotations
+
+import functools
+import io
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+# 可选的函数级采样：cprofile / pyinstrument，默认关闭
+CAPTURE_MODES = ("cprofile", "pyinstrument")
+# 火焰图式摘要的条形宽度
+SUMMARY_BAR_WIDTH = 24
+# 写入 research_run_metrics 的 span 深度（根节点为 0）
+METRIC_MAX_DEPTH = 2
+# metric_name 列宽
+METRIC_NAME_MAX_LEN = 64
+
+_WRITE_METHODS = {"insert", "upsert", "update", "delete"}
+
+
+class Span:
+    """span 树节点；同一父节点下的同名 span 合并累计（calls 计次）。"""
+
+    __slots__ = (
+        "name",
+        "calls",
+        "wall_sec",
+        "cpu_sec",
+        "db_calls",
+        "rows_read",
+        "rows_written",
+        "children",
+    )
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.wall_sec = 0.0
+        self.cpu_sec = 0.0
+        self.db_calls = 0
+        self.rows_read = 0
+        self.rows_written = 0
+        self.children: Dict[str, "Span"] = {}
+
+    def child(self, name: str) -> "Span":
+        node = self.children.get(name)
+        if node is None:
+            node = Span(name)
+            self.children[name] = node
+        return node
+
+    def total(self, attr: str) -> int:
+        """含子孙节点的累计值（DB 计数只记在最内层 span 上）。"""
+        return getattr(self, attr) + sum(child.total(attr) for child in self.children.values())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "calls": self.calls,
+            "wall_ms": round(self.wall_sec * 1000, 3),
+            "cpu_ms": round(self.cpu_sec * 1000, 3),
+            "db_calls": self.total("db_calls"),
+            "rows_read": self.total("rows_read"),
+            "rows_written": self.total("rows_written"),
+            "children": [child.to_dict() for child in self.children.values()],
+        }
+
+
+class StageProfiler:
+    """线程安全的 span 记录器。
+
+    每个线程维护自己的 span 栈；在没有打开 span 的线程（如写线程、GC 线程）中
+    打开的 span 挂到根节点下。并发阶段的墙钟时间可能超过父节点；CPU 时间为本线程
+    CPU（time.thread_time），根节点为进程 CPU。
+    """
+
+    def __init__(self, capture: str = "", capture_dir: str = ""):
+        capture = str(capture or "").strip().lower()
+        self.capture = capture if capture in CAPTURE_MODES else ""
+        self.capture_dir = capture_dir or "logs/profiles"
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._root: Optional[Span] = None
+        self._root_started: Optional[tuple] = None
+        self._capturer: Any = None
+
+    @classmethod
+    def from_env(cls, capture: Optional[str] = None) -> "StageProfiler":
+        """STOCK_PROFILE_CAPTURE=cprofile|pyinstrument 开启采样；capture 非 None 时覆盖环境变量。"""
+        return cls(
+            capture=capture if capture is not None else os.getenv("STOCK_PROFILE_CAPTURE", ""),
+            capture_dir=str(os.getenv("STOCK_PROFILE_DIR", "") or "").strip(),
+        )
+
+    @property
+    def active(self) -> bool:
+        return self._root is not None
+
+    def start(self, name: str) -> None:
+        """开始一次运行：重置 span 树，按需启动函数级采样。"""
+        with self._lock:
+            self._root = Span(name)
+            self._root.calls = 1
+            self._root_started = (time.perf_counter(), time.process_time())
+        self._local = threading.local()
+        self._capturer = self._start_capture()
+
+    def stop(self) -> Optional[Span]:
+        """结束运行并返回根节点；未 start 时返回 None。"""
+        root = self._root
+        if root is None or self._root_started is None:
+            return None
+        wall_started, cpu_started = self._root_started
+        root.wall_sec = time.perf_counter() - wall_started
+        root.cpu_sec = time.process_time() - cpu_started
+        self._root = None
+        self._root_started = None
+        return root
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = []
+            self._local.stack = stack
+        return stack
+
+    def _current(self) -> Optional[Span]:
+        stack = self._stack()
+        if stack:
+            return stack[-1]
+        return self._root
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[Optional[Span]]:
+        """记录一个阶段；未 start 时为空操作。"""
+        parent = self._current()
+        if parent is None:
+            yield None
+            return
+        with self._lock:
+            node = parent.child(name)
+        stack = self._stack()
+        stack.append(node)
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield node
+        finally:
+            wall = time.perf_counter() - wall_started
+            cpu = time.thread_time() - cpu_started
+            stack.pop()
+            with self._lock:
+                node.calls += 1
+                node.wall_sec += wall
+                node.cpu_sec += cpu
+
+    def record_db(self, rows_read: int = 0, rows_written: int = 0) -> None:
+        """把一次 DB 调用计入当前 span。"""
+        node = self._current()
+        if node is None:
+            return
+        with self._lock:
+            node.db_calls += 1
+            node.rows_read += max(0, int(rows_read))
+            node.rows_written += max(0, int(rows_written))
+
+    def wrap_client(self, client: Any) -> Any:
+        """包装 supabase client，统计 execute() 次数与读写行数。"""
+        return _ProfiledClient(client, self)
+
+    # ------------------------------------------------------------------
+    # 函数级采样
+    # ------------------------------------------------------------------
+
+    def _start_capture(self) -> Any:
+        if not self.capture:
+            return None
+        try:
+            if self.capture == "pyinstrument":
+                from pyinstrument import Profiler  # type: ignore
+
+                capturer = Profiler()
+                capturer.start()
+            else:
+                import cProfile
+
+                capturer = cProfile.Profile()
+                capturer.enable()
+            return capturer
+        except Exception:
+            # pyinstrument 未安装或已有 profiler 在运行时不采样
+            return None
+
+    def finish_capture(self, run_id: str) -> str:
+        """停止采样并落盘，返回输出路径（未采样时为空串）。"""
+        capturer = self._capturer
+        self._capturer = None
+        if capturer is None:
+            return ""
+        os.makedirs(self.capture_dir, exist_ok=True)
+        safe_id = "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in run_id)
+        if self.capture == "pyinstrument":
+            capturer.stop()
+            path = os.path.join(self.capture_dir, f"{safe_id}.html")
+            with open(path, "w", encoding="utf-8") as fp:
+                fp.write(capturer.output_html())
+            return path
+        capturer.disable()
+        path = os.path.join(self.capture_dir, f"{safe_id}.prof")
+        capturer.dump_stats(path)
+        return path
+
+
+def profiled(name: Union[str, Callable[..., str]]) -> Callable:
+    """方法装饰器：用实例上的 `profiler` 记录 span。
+
+    name 可以是字符串，也可以是接收与方法相同参数的函数（按参数动态命名）。
+    实例没有 profiler（如进程池 worker）时直接调用原方法。
+    """
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            profiler: Optional[StageProfiler] = getattr(self, "profiler", None)
+            if profiler is None or not profiler.active:
+                return func(self, *args, **kwargs)
+            label = name(self, *args, **kwargs) if callable(name) else name
+            with profiler.span(label):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _row_count(value: Any) -> int:
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, dict):
+        return 1
+    return 0
+
+
+class _ProfiledQuery:
+    """查询构造器代理：链式调用透传，execute() 时计数。"""
+
+    def __init__(self, builder: Any, profiler: StageProfiler, written: Optional[int] = None):
+        self._builder = builder
+        self._profiler = profiler
+        self._written = written
+
+    def __getattr__(self, attr: str) -> Any:
+        target = getattr(self._builder, attr)
+        if attr == "execute":
+            return self._execute
+        if not callable(target):
+            if hasattr(target, "execute"):
+                return _ProfiledQuery(target, self._profiler, self._written)
+            return target
+
+        def call(*args, **kwargs):
+            result = target(*args, **kwargs)
+            if not hasattr(result, "execute"):
+                return result
+            written = self._written
+            if attr in _WRITE_METHODS:
+                payload = args[0] if args else kwargs.get("json")
+                written = _row_count(payload) if attr in ("insert", "upsert") else -1
+            return _ProfiledQuery(result, self._profiler, written)
+
+        return call
+
+    def _execute(self, *args, **kwargs) -> Any:
+        response = self._builder.execute(*args, **kwargs)
+        returned = _row_count(getattr(response, "data", None))
+        if self._written is None:
+            self._profiler.record_db(rows_read=returned)
+        elif self._written < 0:
+            # update / delete 以返回行数计写入
+            self._profiler.record_db(rows_written=returned)
+        else:
+            self._profiler.record_db(rows_written=self._written)
+        return response
+
+
+class _ProfiledClient:
+    """supabase client 代理，只拦截 table() / rpc()。"""
+
+    def __init__(self, client: Any, profiler: StageProfiler):
+        self._client = client
+        self._profiler = profiler
+
+    def table(self, name: str) -> _ProfiledQuery:
+        return _ProfiledQuery(self._client.table(name), self._profiler)
+
+    def rpc(self, *args, **kwargs) -> _ProfiledQuery:
+        return _ProfiledQuery(self._client.rpc(*args, **kwargs), self._profiler)
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._client, attr)
+
+
+def span_metrics(root: Span, prefix: str = "stage_") -> Dict[str, float]:
+    """把 span 树展开为 research_run_metrics 可用的扁平指标（毫秒）。"""
+    metrics: Dict[str, float] = {}
+
+    def walk(node: Span, path: str, depth: int) -> None:
+        for child in node.children.values():
+            child_path = f"{path}.{child.name}" if path else child.name
+            key = f"{prefix}{child_path}_ms"
+            if len(key) <= METRIC_NAME_MAX_LEN:
+                metrics[key] = round(child.wall_sec * 1000, 3)
+            if depth < METRIC_MAX_DEPTH:
+                walk(child, child_path, depth + 1)
+
+    metrics[f"{prefix}total_ms"] = round(root.wall_sec * 1000, 3)
+    metrics[f"{prefix}db_calls"] = float(root.total("db_calls"))
+    walk(root, "", 1)
+    return metrics
+
+
+def render_summary(root: Span, width: int = SUMMARY_BAR_WIDTH) -> str:
+    """渲染火焰图式的文本摘要：缩进表示嵌套，条形长度为占根节点墙钟的比例。"""
+    total = max(root.wall_sec, 1e-9)
+    rows: List[tuple] = []
+
+    def walk(node: Span, prefix: str, is_last: bool, depth: int) -> None:
+        if depth == 0:
+            label = node.name
+            child_prefix = ""
+        else:
+            label = prefix + ("└─ " if is_last else "├─ ") + node.name
+            child_prefix = prefix + ("   " if is_last else "│  ")
+        if node.calls > 1:
+            label += f" ×{node.calls}"
+        rows.append((label, node))
+        children = sorted(node.children.values(), key=lambda item: item.wall_sec, reverse=True)
+        for idx, child in enumerate(children):
+            walk(child, child_prefix, idx == len(children) - 1, depth + 1)
+
+    walk(root, "", True, 0)
+    label_width = max(len(label) for label, _ in rows)
+    out = io.StringIO()
+    for label, node in rows:
+        ratio = min(1.0, node.wall_sec / total)
+        bar = "█" * max(1 if node.wall_sec > 0 else 0, int(round(ratio * width)))
+        out.write(
+            f"{label.ljust(label_width)}  {bar.ljust(width)} "
+            f"{node.wall_sec:8.3f}s {ratio * 100:5.1f}% "
+            f"cpu={node.cpu_sec:.3f}s db={node.total('db_calls')} "
+            f"read={node.total('rows_read')} write={node.total('rows_written')}\n"
+        )
+    return out.getvalue().rstrip("\n")
+
+
+def profile_payload(root: Span, capture_path: str = "") -> Dict[str, Any]:
+    """research_runs.profile_json 的内容。"""
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "capture_path": capture_path,
+        "tree": root.to_dict(),
+    }
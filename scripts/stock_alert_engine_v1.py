@@ -88,6 +88,14 @@ def _clamp(value: float, left: float, right: float) -> float:
     return max(left, min(right, value))
 
 
+def _serve_table(table_name: str) -> str:
+    """开启 ENABLE_STOCK_SERVE_POINTER 时经 `<table>_live` 视图读取已发布的 run。"""
+    raw = str(os.getenv("ENABLE_STOCK_SERVE_POINTER", "") or "").strip().lower()
+    if raw in {"1", "true", "yes", "on"}:
+        return f"{table_name}_live"
+    return table_name
+
+
 def _level_value(level: str) -> int:
     return LEVEL_SCORE.get(str(level or "").upper(), 0)
 
@@ -251,7 +259,7 @@ class StockAlertEngineV1:
     def _load_opportunities(self, limit: int) -> List[Dict[str, Any]]:
         try:
             return (
-                self.supabase.table("stock_opportunities_v2")
+                self.supabase.table(_serve_table("stock_opportunities_v2"))
                 .select(
                     "id,ticker,side,horizon,opportunity_score,risk_level,why_now,"
                     "source_signal_ids,source_event_ids,as_of"
@@ -272,7 +280,7 @@ class StockAlertEngineV1:
             return {}
         try:
             rows = (
-                self.supabase.table("stock_signals_v2")
+                self.supabase.table(_serve_table("stock_signals_v2"))
                 .select("ticker,level,signal_score,confidence,source_mix,as_of")
                 .eq("is_active", True)
                 .in_("ticker", list(set(tickers))[:500])
@@ -32,6 +32,7 @@ def run_backfill(
     lookback_hours: int,
     enable_llm: bool,
     llm_event_cap: int,
+    workers: int = 1,
 ) -> Dict[str, Any]:
     """执行 Stock V2 历史回填。"""
     engine = StockPipelineV2(enable_llm=enable_llm)
@@ -40,6 +41,7 @@ def run_backfill(
         max_articles=max_articles,
         llm_event_cap=llm_event_cap,
         lookback_hours=lookback_hours,
+        workers=workers,
     )
 
 
@@ -50,6 +52,7 @@ def main() -> None:
     parser.add_argument("--lookback-hours", type=int, default=336, help="聚合回看小时")
     parser.add_argument("--enable-llm", action="store_true", help="启用 LLM 修正")
     parser.add_argument("--llm-event-cap", type=int, default=0, help="本轮最多 LLM 事件数")
+    parser.add_argument("--workers", type=int, default=1, help="规则打分进程数（>1 启用并行回填）")
     args = parser.parse_args()
 
     metrics = run_backfill(
@@ -58,6 +61,7 @@ def main() -> None:
         lookback_hours=args.lookback_hours,
         enable_llm=args.enable_llm,
         llm_event_cap=args.llm_event_cap,
+        workers=args.workers,
     )
     logger.info("[STOCK_V2_BACKFILL_METRICS] " + ", ".join([f"{k}={v}" for k, v in metrics.items()]))
 
@@ -6,11 +6,16 @@ from __future__ import annotations
 import argparse
 import logging
 import os
+import sys
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
 from supabase import create_client
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.event_store import EventStore, open_event_store  # noqa: E402
+
 logger = logging.getLogger(__name__)
 if not logger.handlers:
     handler = logging.StreamHandler()
@@ -76,8 +81,17 @@ def _parse_as_of(value: Any) -> datetime:
         return _now_utc()
 
 
-def _load_candidates(supabase, lookback_hours: int, limit: int) -> List[Dict[str, Any]]:
+def _load_candidates(
+    supabase,
+    lookback_hours: int,
+    limit: int,
+    store: Optional[EventStore] = None,
+) -> List[Dict[str, Any]]:
     cutoff = (_now_utc() - timedelta(hours=lookback_hours)).isoformat()
+    if store is not None:
+        rows = store.opportunities(start_iso=cutoff, active_only=True)
+        rows.sort(key=lambda row: _safe_float(row.get("opportunity_score"), 0.0), reverse=True)
+        return rows
     rows = (
         supabase.table("stock_opportunities_v2")
         .select(
@@ -321,8 +335,10 @@ def run_champion_challenger(
     promote_margin: float,
     champion_model: str,
     challenger_model: str,
+    event_store_dir: Optional[str] = None,
 ) -> Dict[str, Any]:
     supabase = _init_supabase()
+    store = open_event_store(supabase, root=event_store_dir, tables=["stock_opportunities_v2"])
     final_run_id = run_id or f"cc-{_now_utc().strftime('%Y%m%d%H%M%S')}"
     _log_run_start(
         supabase=supabase,
@@ -339,6 +355,7 @@ def run_champion_challenger(
             supabase=supabase,
             lookback_hours=lookback_hours,
             limit=limit,
+            store=store,
         )
         rows, metrics = _build_scorecards(
             rows=candidates,
@@ -354,6 +371,7 @@ def run_champion_challenger(
             "run_id": final_run_id,
             "candidates": len(candidates),
             "scorecards_upserted": upserted,
+            "event_store": store is not None,
             **metrics,
         }
         _log_run_finish(
@@ -378,10 +396,16 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Stock V3 champion/challenger runner")
     parser.add_argument("--run-id", type=str, default=None, help="评分 run_id")
     parser.add_argument("--lookback-hours", type=int, default=168, help="候选回看小时")
-    parser.add_argument("--limit", type=int, default=1200, help="最多处理候选数")
+    parser.add_argument("--limit", type=int, default=1200, help="最多处理候选数（走本地事件镜像时不限）")
     parser.add_argument("--promote-margin", type=float, default=0.03, help="晋级边际")
     parser.add_argument("--champion-model", type=str, default="v2_rule", help="champion 模型名")
     parser.add_argument("--challenger-model", type=str, default="v3_alt", help="challenger 模型名")
+    parser.add_argument(
+        "--event-store",
+        type=str,
+        default="",
+        help="本地事件镜像目录（需 pyarrow）；留空时看 ENABLE_STOCK_EVENT_STORE",
+    )
     args = parser.parse_args()
 
     summary = run_champion_challenger(
@@ -391,6 +415,7 @@ def main() -> None:
         promote_margin=max(0.0, args.promote_margin),
         champion_model=args.champion_model.strip() or "v2_rule",
         challenger_model=args.challenger_model.strip() or "v3_alt",
+        event_store_dir=args.event_store.strip() or None,
     )
     logger.info("[CC_V3_METRICS] " + ", ".join([f"{k}={v}" for k, v in summary.items()]))
 
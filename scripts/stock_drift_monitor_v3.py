@@ -6,12 +6,17 @@ from __future__ import annotations
 import argparse
 import logging
 import os
+import sys
 from collections import Counter
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
 from supabase import create_client
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.event_store import EventStore, open_event_store  # noqa: E402
+
 logger = logging.getLogger(__name__)
 if not logger.handlers:
     handler = logging.StreamHandler()
@@ -68,7 +73,10 @@ def _load_window_rows(
     start_iso: str,
     end_iso: str,
     limit: int,
+    store: Optional[EventStore] = None,
 ) -> List[Dict[str, Any]]:
+    if store is not None:
+        return store.opportunities(start_iso=start_iso, end_iso=end_iso)
     rows = (
         supabase.table("stock_opportunities_v2")
         .select("id,ticker,side,horizon,risk_level,opportunity_score,confidence,as_of")
@@ -356,8 +364,10 @@ def run_drift_monitor(
     window_hours: int,
     baseline_days: int,
     limit: int,
+    event_store_dir: Optional[str] = None,
 ) -> Dict[str, Any]:
     supabase = _init_supabase()
+    store = open_event_store(supabase, root=event_store_dir, tables=["stock_opportunities_v2"])
     final_run_id = run_id or f"drift-{_now_utc().strftime('%Y%m%d%H%M%S')}"
     _log_run_start(
         supabase=supabase,
@@ -378,12 +388,14 @@ def run_drift_monitor(
             start_iso=current_start.isoformat(),
             end_iso=now.isoformat(),
             limit=limit,
+            store=store,
         )
         baseline_rows = _load_window_rows(
             supabase=supabase,
             start_iso=baseline_start.isoformat(),
             end_iso=baseline_end.isoformat(),
             limit=limit * 3,
+            store=store,
         )
         current_dist = _build_distribution(current_rows)
         baseline_dist = _build_distribution(baseline_rows)
@@ -407,6 +419,7 @@ def run_drift_monitor(
             "run_id": final_run_id,
             "current_rows": len(current_rows),
             "baseline_rows": len(baseline_rows),
+            "event_store": store is not None,
             "drift_rows_upserted": upserted,
             "overall_status": overall,
             **metrics,
@@ -434,7 +447,13 @@ def main() -> None:
     parser.add_argument("--run-id", type=str, default=None, help="监控 run_id")
     parser.add_argument("--window-hours", type=int, default=24, help="当前窗口小时")
     parser.add_argument("--baseline-days", type=int, default=7, help="基线天数")
-    parser.add_argument("--limit", type=int, default=4000, help="最大采样条数")
+    parser.add_argument("--limit", type=int, default=4000, help="最大采样条数（走本地事件镜像时不限）")
+    parser.add_argument(
+        "--event-store",
+        type=str,
+        default="",
+        help="本地事件镜像目录（需 pyarrow）；留空时看 ENABLE_STOCK_EVENT_STORE",
+    )
     args = parser.parse_args()
 
     summary = run_drift_monitor(
@@ -442,6 +461,7 @@ def main() -> None:
         window_hours=max(1, args.window_hours),
         baseline_days=max(1, args.baseline_days),
         limit=max(200, args.limit),
+        event_store_dir=args.event_store.strip() or None,
     )
     logger.info("[DRIFT_V3_METRICS] " + ", ".join([f"{k}={v}" for k, v in summary.items()]))
 
@@ -6,11 +6,16 @@ from __future__ import annotations
 import argparse
 import logging
 import os
+import sys
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
 from supabase import create_client
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.event_store import EventStore, open_event_store  # noqa: E402
+
 logger = logging.getLogger(__name__)
 if not logger.handlers:
     handler = logging.StreamHandler()
@@ -64,17 +69,25 @@ def _calibration_bin(confidence: float) -> int:
     return int(round(bounded * 10))
 
 
-def _load_active_opportunity_map(supabase) -> Dict[str, Dict[str, Any]]:
-    rows = (
-        supabase.table("stock_opportunities_v2")
-        .select("id,ticker,side,horizon,opportunity_score,run_id,as_of")
-        .eq("is_active", True)
-        .order("opportunity_score", desc=True)
-        .limit(500)
-        .execute()
-        .data
-        or []
-    )
+def _load_active_opportunity_map(
+    supabase,
+    store: Optional[EventStore] = None,
+    since_iso: Optional[str] = None,
+) -> Dict[str, Dict[str, Any]]:
+    if store is not None:
+        rows = store.opportunities(start_iso=since_iso, active_only=True)
+        rows.sort(key=lambda row: _safe_float(row.get("opportunity_score"), 0.0), reverse=True)
+    else:
+        rows = (
+            supabase.table("stock_opportunities_v2")
+            .select("id,ticker,side,horizon,opportunity_score,run_id,as_of")
+            .eq("is_active", True)
+            .order("opportunity_score", desc=True)
+            .limit(500)
+            .execute()
+            .data
+            or []
+        )
     result: Dict[str, Dict[str, Any]] = {}
     for row in rows:
         ticker = str(row.get("ticker") or "").upper()
@@ -92,10 +105,13 @@ def _load_eval_candidates(
     window_hours: int,
     max_age_days: int,
     limit: int,
+    store: Optional[EventStore] = None,
 ) -> List[Dict[str, Any]]:
     now = _now_utc()
     older_than = (now - timedelta(hours=window_hours)).isoformat()
     newer_than = (now - timedelta(days=max_age_days)).isoformat()
+    if store is not None:
+        return store.opportunities(start_iso=newer_than, end_iso=older_than)
 
     rows = (
         supabase.table("stock_opportunities_v2")
@@ -283,8 +299,10 @@ def run_eval(
     window_hours: int,
     max_age_days: int,
     limit: int,
+    event_store_dir: Optional[str] = None,
 ) -> Dict[str, Any]:
     supabase = _init_supabase()
+    store = open_event_store(supabase, root=event_store_dir, tables=["stock_opportunities_v2"])
     final_run_id = run_id or f"eval-{_now_utc().strftime('%Y%m%d%H%M%S')}"
     _log_run_start(
         supabase=supabase,
@@ -300,8 +318,13 @@ def run_eval(
             window_hours=window_hours,
             max_age_days=max_age_days,
             limit=limit,
+            store=store,
+        )
+        active_map = _load_active_opportunity_map(
+            supabase=supabase,
+            store=store,
+            since_iso=(_now_utc() - timedelta(days=max_age_days)).isoformat(),
         )
-        active_map = _load_active_opportunity_map(supabase=supabase)
         rows, metrics = _evaluate_rows(
             candidates=candidates,
             active_map=active_map,
@@ -315,6 +338,7 @@ def run_eval(
             "run_id": final_run_id,
             "candidates": len(candidates),
             "rows_upserted": upserted,
+            "event_store": store is not None,
             **metrics,
         }
         _log_run_finish(
@@ -340,7 +364,13 @@ def main() -> None:
     parser.add_argument("--run-id", type=str, default=None, help="评估 run_id")
     parser.add_argument("--window-hours", type=int, default=24, help="评估窗口（小时）")
     parser.add_argument("--max-age-days", type=int, default=14, help="样本最远回看天数")
-    parser.add_argument("--limit", type=int, default=2500, help="最多评估样本数")
+    parser.add_argument("--limit", type=int, default=2500, help="最多评估样本数（走本地事件镜像时不限）")
+    parser.add_argument(
+        "--event-store",
+        type=str,
+        default="",
+        help="本地事件镜像目录（需 pyarrow）；留空时看 ENABLE_STOCK_EVENT_STORE",
+    )
     args = parser.parse_args()
 
     metrics = run_eval(
@@ -348,6 +378,7 @@ def main() -> None:
         window_hours=max(1, args.window_hours),
         max_age_days=max(1, args.max_age_days),
         limit=max(1, args.limit),
+        event_store_dir=args.event_store.strip() or None,
     )
     logger.info("[EVAL_V3_METRICS] " + ", ".join([f"{k}={v}" for k, v in metrics.items()]))
 
@@ -7,6 +7,7 @@ import argparse
 import csv
 import logging
 import os
+import sys
 from collections import Counter
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
@@ -14,6 +15,10 @@ from typing import Any, Dict, List, Optional
 
 from supabase import create_client
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.event_store import EventStore, open_event_store  # noqa: E402
+
 logger = logging.getLogger(__name__)
 if not logger.handlers:
     handler = logging.StreamHandler()
@@ -26,6 +31,8 @@ if not logger.handlers:
     logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
+LIFECYCLE_STORE_LOOKBACK_DAYS = 15
+
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
@@ -65,7 +72,16 @@ def _extract_event_type(text: str) -> str:
     return normalized[:32]
 
 
-def _load_opportunities(supabase, limit: int) -> List[Dict[str, Any]]:
+def _load_opportunities(
+    supabase,
+    limit: int,
+    store: Optional[EventStore] = None,
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    if store is not None:
+        # B 档机会有效期 14 天，多回看 1 天即可覆盖仍 active 与近 24h 内过期的行
+        since = (now or _now_utc()) - timedelta(days=LIFECYCLE_STORE_LOOKBACK_DAYS)
+        return store.opportunities(start_iso=since.isoformat())
     rows = (
         supabase.table("stock_opportunities_v2")
         .select(
@@ -370,8 +386,10 @@ def run_lifecycle_report(
     limit: int,
     report_dir: str,
     csv_dir: str,
+    event_store_dir: Optional[str] = None,
 ) -> Dict[str, Any]:
     supabase = _init_supabase()
+    store = open_event_store(supabase, root=event_store_dir, tables=["stock_opportunities_v2"])
     final_run_id = run_id or f"lifecycle-{_now_utc().strftime('%Y%m%d%H%M%S')}"
     _log_run_start(supabase=supabase, run_id=final_run_id, window_hours=window_hours, limit=limit)
 
@@ -380,7 +398,7 @@ def run_lifecycle_report(
     report_date = now.date().isoformat()
 
     try:
-        rows = _load_opportunities(supabase=supabase, limit=limit)
+        rows = _load_opportunities(supabase=supabase, limit=limit, store=store, now=now)
         lifecycle = _count_rows(rows=rows, now=now, window_hours=window_hours)
         paper = _build_paper_metrics(_load_closed_positions_24h(supabase=supabase, cutoff_iso=cutoff_iso))
         merged = {**lifecycle, **paper}
@@ -410,6 +428,7 @@ def run_lifecycle_report(
         summary = {
             "run_id": final_run_id,
             "opportunities_loaded": len(rows),
+            "event_store": store is not None,
             "report_markdown": str(markdown_path),
             "report_csv": str(csv_path),
             **merged,
@@ -436,7 +455,13 @@ def main() -> None:
     parser = argparse.ArgumentParser(description="Stock V3 lifecycle report runner")
     parser.add_argument("--run-id", type=str, default=None, help="报表 run_id")
     parser.add_argument("--window-hours", type=int, default=24, help="统计窗口小时")
-    parser.add_argument("--limit", type=int, default=8000, help="样本上限")
+    parser.add_argument("--limit", type=int, default=8000, help="样本上限（走本地事件镜像时不限）")
+    parser.add_argument(
+        "--event-store",
+        type=str,
+        default="",
+        help="本地事件镜像目录（需 pyarrow）；留空时看 ENABLE_STOCK_EVENT_STORE",
+    )
     parser.add_argument(
         "--report-dir",
         type=str,
@@ -457,6 +482,7 @@ def main() -> None:
         limit=max(1000, args.limit),
         report_dir=args.report_dir.strip() or "docs/reports",
         csv_dir=args.csv_dir.strip() or "data/reports",
+        event_store_dir=args.event_store.strip() or None,
     )
     logger.info("[LIFECYCLE_V3_METRICS] " + ", ".join([f"{k}={v}" for k, v in summary.items()]))
 
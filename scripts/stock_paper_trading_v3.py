@@ -10,11 +10,11 @@ import sys
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-import requests
 from supabase import create_client
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from scripts.market_data import fetch_us_closes
 from scripts.stock_portfolio_constraints_v3 import (
     ConstraintConfig,
     apply_constraints_to_opportunities,
@@ -62,28 +62,6 @@ def _safe_float(value: Any, default: float = 0.0) -> float:
         return default
 
 
-def _fetch_stooq_price(ticker: str) -> Optional[float]:
-    symbol = f"{ticker.lower()}.us"
-    endpoint = f"https://stooq.com/q/l/?s={symbol}&i=d"
-    try:
-        response = requests.get(
-            endpoint,
-            timeout=12,
-            headers={"User-Agent": "USMonitor/1.0 stock-paper-v3"},
-        )
-        response.raise_for_status()
-        first_line = next((line.strip() for line in response.text.splitlines() if line.strip()), "")
-        parts = [item.strip() for item in first_line.split(",")]
-        if len(parts) < 7:
-            return None
-        close_value = parts[6]
-        if close_value in ("N/D", ""):
-            return None
-        return round(float(close_value), 4)
-    except Exception:
-        return None
-
-
 def _load_active_opportunities(supabase, topn: int) -> List[Dict[str, Any]]:
     rows = (
         supabase.table("stock_opportunities_v2")
@@ -136,6 +114,8 @@ def _update_open_positions(
     now_iso = _now_utc().isoformat()
     closed = 0
     updated = 0
+    # 一次批量取齐全部持仓价格（Stooq 多 symbol 请求 + 共享缓存）
+    prices = fetch_us_closes(str(row.get("ticker") or "").upper() for row in open_positions)
 
     for row in open_positions:
         position_id = int(row.get("id") or 0)
@@ -145,7 +125,7 @@ def _update_open_positions(
         if position_id <= 0 or not ticker:
             continue
 
-        market_price = _fetch_stooq_price(ticker)
+        market_price = prices.get(ticker)
         if market_price is None:
             logger.warning(f"[PAPER_V3_PRICE_MISS] ticker={ticker}")
             continue
@@ -215,6 +195,7 @@ def _open_new_positions(
         for item in open_positions
     }
 
+    prices = fetch_us_closes(str(row.get("ticker") or "").upper() for row in opportunities)
     opened = 0
     for row in opportunities:
         ticker = str(row.get("ticker") or "").upper()
@@ -227,7 +208,7 @@ def _open_new_positions(
         if key in existing:
             continue
 
-        entry_price = _fetch_stooq_price(ticker)
+        entry_price = prices.get(ticker)
         if entry_price is None:
             continue
 
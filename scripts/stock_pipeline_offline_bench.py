@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""Stock V2 离线压测：在进程内 Supabase 替身上跑合成语料，输出耗时并校验多次运行结果一致。
+
+示例：
+    python scripts/stock_pipeline_offline_bench.py --mode incremental --articles 3000 --waves 6
+    python scripts/stock_pipeline_offline_bench.py --mode backfill --articles 20000 --workers 4 --latency-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import stock_pipeline_v2
+from scripts.local_supabase import LocalSupabaseClient
+from scripts.stock_pipeline_v2 import StockPipelineV2
+
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(
+        logging.Formatter(
+            "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+    )
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+BASE_TIME = datetime(2026, 1, 5, 14, 30, tzinfo=timezone.utc)
+# 结果摘要不比较的表：运行日志含墙钟耗时
+DIGEST_SKIP_TABLES = {"research_runs", "research_run_metrics", "stock_backfill_checkpoints"}
+
+_SUBJECTS = [
+    ("NVDA", "英伟达"),
+    ("AAPL", "苹果"),
+    ("MSFT", "微软"),
+    ("TSLA", "特斯拉"),
+    ("AMZN", "亚马逊"),
+    ("META", "Meta"),
+    ("GOOGL", "谷歌"),
+    ("SPY", "标普500"),
+    ("QQQ", "纳斯达克100"),
+    ("XLE", "能源板块"),
+]
+_EVENT_PHRASES = [
+    "earnings beat and raised guidance",
+    "财报超预期，上调全年指引",
+    "faces antitrust investigation and possible ban",
+    "宣布新一轮回购计划",
+    "ETF inflow accelerates into semiconductor names",
+    "downgrade on demand warning",
+    "Fed minutes lift treasury yield",
+    "CPI surprise pushes rates higher",
+    "半导体出口监管收紧",
+    "cloud AI capex rebound",
+]
+_MACRO_PHRASES = [
+    "FOMC holds rates, dollar index DXY rises",
+    "oil jumps as Middle East conflict escalates, brent above 90",
+    "tariff threat hits shipping and freight rates",
+    "美国非农就业与通胀数据公布，美元走强",
+]
+
+
+class FrozenClock:
+    """可控时钟：流水线的 _now_utc 与本地库的 NOW() 默认值共用。"""
+
+    def __init__(self, start: datetime):
+        self.now = start
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def build_corpus(count: int, seed: int, span_hours: int) -> List[Dict[str, Any]]:
+    """生成确定性的合成文章；analyzed_at 均匀分布在 [BASE_TIME, BASE_TIME + span_hours)。"""
+    rng = random.Random(seed)
+    rows: List[Dict[str, Any]] = []
+    for idx in range(1, count + 1):
+        analyzed_at = BASE_TIME + timedelta(seconds=int(span_hours * 3600 * (idx - 1) / max(1, count)))
+        published_at = analyzed_at - timedelta(minutes=rng.randint(5, 240))
+        if rng.random() < 0.25:
+            title = rng.choice(_MACRO_PHRASES)
+            content = f"{title}. 华尔街 strategists expect treasury yield volatility; {rng.choice(_MACRO_PHRASES)}."
+        else:
+            ticker, name = rng.choice(_SUBJECTS)
+            phrase = rng.choice(_EVENT_PHRASES)
+            lead = f"${ticker}" if rng.random() < 0.5 else name
+            title = f"{lead} {phrase}"
+            content = (
+                f"{name} ({ticker}) {phrase}. 美股盘前 {rng.choice(_EVENT_PHRASES)}; "
+                f"analysts see {rng.choice(['upgrade', 'miss', 'approval', 'outflow'])} risk. "
+                + " ".join(rng.choice(["market", "volume", "session", "investors", "index"]) for _ in range(40))
+            )
+        rows.append(
+            {
+                "id": idx,
+                "title": title,
+                "content": content,
+                "url": f"https://example.com/a/{seed}/{idx}",
+                "category": "economy",
+                "published_at": published_at.isoformat(),
+                "fetched_at": published_at.isoformat(),
+                "analyzed_at": analyzed_at.isoformat(),
+            }
+        )
+    return rows
+
+
+def _strip_surrogates(value: Any) -> Any:
+    """去掉自增 id 及其引用：并发写入时 id 分配顺序取决于线程调度。"""
+    if isinstance(value, dict):
+        return {
+            key: _strip_surrogates(item)
+            for key, item in value.items()
+            if key != "id" and not ((key.endswith("_id") or key.endswith("_ids")) and key != "run_id")
+        }
+    if isinstance(value, list):
+        return [_strip_surrogates(item) for item in value]
+    return value
+
+
+def digest_tables(client: LocalSupabaseClient) -> Tuple[str, Dict[str, int]]:
+    """对输出表做与行顺序无关的摘要。"""
+    sha = hashlib.sha256()
+    sizes: Dict[str, int] = {}
+    for name in client.table_names():
+        if name in DIGEST_SKIP_TABLES or name == "articles":
+            continue
+        rows = sorted(
+            json.dumps(_strip_surrogates(row), sort_keys=True, ensure_ascii=False)
+            for row in client.rows(name)
+        )
+        sizes[name] = len(rows)
+        sha.update(name.encode("utf-8"))
+        for row in rows:
+            sha.update(row.encode("utf-8"))
+    return sha.hexdigest()[:16], sizes
+
+
+def _stage_metrics(client: LocalSupabaseClient, run_id: str) -> Dict[str, float]:
+    return {
+        row["metric_name"]: float(row["metric_value"])
+        for row in client.rows("research_run_metrics")
+        if row.get("run_id") == run_id and str(row.get("metric_name", "")).startswith("stage_")
+    }
+
+
+def run_pass(args: argparse.Namespace, pass_idx: int) -> Dict[str, Any]:
+    """在全新的本地库上完整跑一遍场景。"""
+    clock = FrozenClock(BASE_TIME)
+    stock_pipeline_v2._now_utc = clock
+    # 离线运行：不抓行情，regime 走默认值
+    stock_pipeline_v2._fetch_market_prices = None
+    sqlite_path: Optional[str] = None
+    if args.sqlite_dir:
+        sqlite_path = os.path.join(args.sqlite_dir, f"offline_bench_pass{pass_idx}.sqlite3")
+        if os.path.exists(sqlite_path):
+            os.remove(sqlite_path)
+    client = LocalSupabaseClient(
+        sqlite_path=sqlite_path,
+        latency_ms=args.latency_ms,
+        latency_per_row_ms=args.latency_per_row_ms,
+        clock=clock,
+    )
+    corpus = build_corpus(args.articles, seed=args.seed, span_hours=args.span_hours)
+    engine = StockPipelineV2(supabase_client=client)
+
+    runs: List[Dict[str, Any]] = []
+    if args.mode == "backfill":
+        clock.now = BASE_TIME + timedelta(hours=args.span_hours)
+        client.seed("articles", corpus)
+        client.reset_stats()
+        started = time.perf_counter()
+        metrics = engine.run_backfill(
+            batch_size=args.batch_size,
+            max_articles=None,
+            lookback_hours=max(args.lookback_hours, 336),
+            workers=args.workers,
+        )
+        runs.append(_run_record(client, metrics, time.perf_counter() - started))
+    else:
+        per_wave = max(1, len(corpus) // args.waves)
+        for wave in range(args.waves):
+            chunk = corpus[wave * per_wave : None if wave == args.waves - 1 else (wave + 1) * per_wave]
+            if not chunk:
+                continue
+            client.seed("articles", chunk)
+            clock.now = datetime.fromisoformat(chunk[-1]["analyzed_at"]) + timedelta(minutes=1)
+            client.reset_stats()
+            started = time.perf_counter()
+            metrics = engine.run_incremental(
+                hours=args.span_hours + 24,
+                article_limit=args.article_limit,
+                lookback_hours=args.lookback_hours,
+            )
+            runs.append(_run_record(client, metrics, time.perf_counter() - started))
+
+    digest, sizes = digest_tables(client)
+    stages = _stage_metrics(client, runs[-1]["run_id"]) if runs else {}
+    client.close()
+    return {"runs": runs, "digest": digest, "sizes": sizes, "stages": stages}
+
+
+def _run_record(client: LocalSupabaseClient, metrics: Dict[str, Any], wall_sec: float) -> Dict[str, Any]:
+    stats = client.stats()
+    return {
+        "run_id": metrics.get("run_id", ""),
+        "wall_sec": wall_sec,
+        "calls": stats["calls"],
+        "rows_read": stats["rows_read"],
+        "rows_written": stats["rows_written"],
+        "events": metrics.get("events_upserted", 0),
+        "signals": metrics.get("signals_written", 0),
+        "opportunities": metrics.get("opportunities_written", 0),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stock V2 离线压测（进程内 Supabase 替身）")
+    parser.add_argument("--mode", choices=["incremental", "backfill"], default="incremental")
+    parser.add_argument("--articles", type=int, default=2000, help="合成文章数")
+    parser.add_argument("--waves", type=int, default=4, help="增量模式分几轮到达")
+    parser.add_argument("--span-hours", type=int, default=48, help="文章 analyzed_at 覆盖的小时数")
+    parser.add_argument("--article-limit", type=int, default=5000, help="增量单轮最大文章数")
+    parser.add_argument("--batch-size", type=int, default=500, help="回填批大小")
+    parser.add_argument("--workers", type=int, default=1, help="回填规则打分进程数")
+    parser.add_argument("--lookback-hours", type=int, default=168, help="信号聚合回看小时")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每次 DB 调用注入延迟")
+    parser.add_argument("--latency-per-row-ms", type=float, default=0.0, help="写入按行注入延迟")
+    parser.add_argument("--sqlite-dir", default="", help="非空时本地库写穿到该目录下的 SQLite 文件")
+    parser.add_argument("--repeat", type=int, default=2, help="重复次数（≥2 时校验结果一致）")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true", help="保留流水线 INFO 日志")
+    args = parser.parse_args()
+
+    # 运行日志开启后阶段耗时会写入本地 research_run_metrics
+    os.environ.setdefault("ENABLE_STOCK_V3_RUN_LOG", "true")
+    if not args.verbose:
+        logging.getLogger(stock_pipeline_v2.__name__).setLevel(logging.WARNING)
+
+    results = [run_pass(args, idx) for idx in range(max(1, args.repeat))]
+    for idx, result in enumerate(results):
+        for run in result["runs"]:
+            logger.info(
+                f"[OFFLINE_BENCH_RUN] pass={idx} run_id={run['run_id']} wall={run['wall_sec']:.3f}s "
+                f"calls={run['calls']} read={run['rows_read']} written={run['rows_written']} "
+                f"events={run['events']} signals={run['signals']} opps={run['opportunities']}"
+            )
+        total = sum(run["wall_sec"] for run in result["runs"])
+        logger.info(f"[OFFLINE_BENCH_PASS] pass={idx} total={total:.3f}s digest={result['digest']}")
+
+    stages = results[-1]["stages"]
+    for name, value in sorted(stages.items(), key=lambda item: -item[1]):
+        if name.endswith("_ms") and name.count(".") == 0:
+            logger.info(f"[OFFLINE_BENCH_STAGE] {name[len('stage_'):-len('_ms')]}={value:.1f}ms")
+    logger.info("[OFFLINE_BENCH_TABLES] " + ", ".join(f"{k}={v}" for k, v in results[-1]["sizes"].items()))
+
+    digests = {result["digest"] for result in results}
+    if len(digests) > 1:
+        logger.error(f"[OFFLINE_BENCH_MISMATCH] digests={[result['digest'] for result in results]}")
+        sys.exit(1)
+    logger.info(f"[OFFLINE_BENCH_OK] passes={len(results)} digest={results[0]['digest']}")
+
+
+if __name__ == "__main__":
+    main()
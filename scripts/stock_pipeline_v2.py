@@ -5,23 +5,50 @@ from __future__ import annotations
 
 import argparse
 import hashlib
+import heapq
 import json
 import logging
+import multiprocessing
 import os
+import queue
 import re
 import sys
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from collections import Counter, defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from collections import Counter, defaultdict, deque
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union
 from urllib.parse import urlparse
 
-from supabase import Client, create_client
+try:
+    from supabase import Client, create_client
+except ImportError:  # 离线运行（scripts/local_supabase.py）不依赖 supabase 包
+    Client = Any  # type: ignore[misc,assignment]
+    create_client = None
+
+try:
+    from postgrest import ReturnMethod
+
+    RETURN_REPRESENTATION: Any = ReturnMethod.representation
+except Exception:
+    RETURN_REPRESENTATION = "representation"
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from scripts.backfill_checkpoints import COUNT_FIELDS, BackfillCheckpointStore, parse_partition
+from scripts.event_store import open_event_store
 from scripts.feature_flags import FeatureFlags
+from scripts.keyword_matcher import KeywordHits, KeywordMatcher
+from scripts import signal_columns
+from scripts.stage_profiler import (
+    StageProfiler,
+    profile_payload,
+    profiled,
+    render_summary,
+    span_metrics,
+)
+from scripts.ticker_universe import TickerExtractor, TrackedTickerExtractor, load_ticker_universe
 
 try:
     from scripts.llm_client import LLMClient
@@ -29,7 +56,13 @@ except Exception:
     LLMClient = None
 
 try:
-    from scripts.refresh_market_digest import _fetch_market_prices
+    from scripts.llm_telemetry import export_telemetry_if_configured, get_telemetry
+except Exception:
+    export_telemetry_if_configured = None
+    get_telemetry = None
+
+try:
+    from scripts.market_data import fetch_market_snapshot as _fetch_market_prices
 except Exception:
     _fetch_market_prices = None
 
@@ -45,7 +78,6 @@ if not logger.handlers:
     logger.addHandler(handler)
 logger.setLevel(logging.INFO)
 
-TICKER_PATTERN = re.compile(r"\b[A-Z]{2,5}\b")
 TRACKED_TICKERS: Set[str] = {
     "SPY",
     "QQQ",
@@ -129,6 +161,48 @@ EVENT_RULES: Sequence[Tuple[str, Sequence[str], int]] = (
     ("sector", ("半导体", "semiconductor", "ai", "cloud"), 96),
 )
 
+LLM_REQUIRED_KEYS: Tuple[str, ...] = ("direction", "strength", "title_zh", "summary_zh")
+LLM_RECENCY_HALF_LIFE_HOURS = 24.0
+LLM_TICKER_IMPORTANCE: Dict[str, float] = {
+    "SPY": 1.0,
+    "QQQ": 1.0,
+    "DIA": 0.95,
+    "NVDA": 1.0,
+    "AAPL": 0.98,
+    "MSFT": 0.98,
+    "AMZN": 0.95,
+    "GOOGL": 0.95,
+    "META": 0.95,
+    "TSLA": 0.95,
+    "TLT": 0.9,
+    "SMH": 0.9,
+}
+LLM_EVENT_TYPE_WEIGHT: Dict[str, float] = {
+    "earnings": 1.15,
+    "policy": 1.1,
+    "macro": 1.05,
+    "flow": 1.0,
+    "sector": 0.95,
+    "news": 0.9,
+}
+
+# 增量水位：已提交的 (analyzed_at, article_id)，事件写入成功后才推进
+WATERMARK_PIPELINE_INCREMENTAL = "stock_pipeline_v2_incremental"
+SIGNAL_RECENT_EVENTS = 24
+# 每轮发布的机会条数上限（按机会分降序截断）
+OPPORTUNITY_LIMIT = 80
+# 增量读取事件（按 updated_at）时向前重叠的分钟数，覆盖并发写入（事件先于映射落库）的时间差
+SIGNAL_STATE_OVERLAP_MINUTES = 10
+SIGNAL_STATE_PAGE_SIZE = 1000
+# 事件写入：按块 upsert 并直接取回 id，块内映射紧随其后写入
+EVENT_WRITE_CHUNK_SIZE = 250
+EVENT_WRITE_WORKERS = 4
+# serve 层版本化发布：每层一行指针，读端经 `<table>_live` 视图解析到已发布的 run
+SERVE_POINTER_TABLE = "stock_serve_pointer"
+SERVE_INSERT_CHUNK_SIZE = 500
+# 分区回填：文章 id 按块轮转分配给各分区（块号 % 分区数），各进程无需协调即可互不重叠
+BACKFILL_PARTITION_BLOCK = 50000
+
 INDIRECT_MIN_SCORE = 55.0
 INDIRECT_PROMOTE_SCORE = 70.0
 INDIRECT_PROMOTE_MIN_THEME_SOURCES = 2
@@ -140,6 +214,14 @@ INDIRECT_THEME_RULES: Dict[str, Sequence[str]] = {
     "commodity": ("oil", "wti", "brent", "gas", "铜", "原油", "天然气"),
     "supply_chain": ("shipping", "freight", "port", "供应链", "运价", "港口"),
 }
+INDIRECT_RELEVANCE_BOOST_WORDS = ("fed", "fomc", "yield", "dxy", "oil", "tariff", "sanction")
+INDEX_FALLBACK_WORDS = ("fed", "fomc", "yield")
+INDEX_FALLBACK_TICKERS = {"SPY", "QQQ", "DIA"}
+# 文章字段扫描窗口：与各规则原先使用的截断长度保持一致
+STOCK_CONTENT_WINDOW = 1200
+RULE_TITLE_WINDOW = 240
+RULE_CONTENT_WINDOW = 1800
+INDIRECT_CONTENT_WINDOW = 2400
 INDIRECT_THEME_SCOPE: Dict[str, str] = {
     "macro": "index",
     "rate_fx": "index",
@@ -224,6 +306,27 @@ def _to_iso(value: Any, fallback: Optional[str] = None) -> str:
     return fallback or _now_utc().isoformat()
 
 
+def _parse_as_of(value: Any) -> datetime:
+    try:
+        text = str(value or "").replace("Z", "+00:00")
+        parsed = datetime.fromisoformat(text)
+        if parsed.tzinfo:
+            return parsed.astimezone(timezone.utc)
+        return parsed.replace(tzinfo=timezone.utc)
+    except Exception:
+        return _now_utc()
+
+
+def _recency_key(row: Dict[str, Any]) -> Tuple[str, str, str, str]:
+    """事件新近度排序键；并列时按来源再排，结果不依赖数据库返回顺序或事件 id 分配顺序。"""
+    return (
+        str(row.get("published_at") or ""),
+        str(row.get("source_ref") or ""),
+        str(row.get("event_type") or ""),
+        str(row.get("role") or ""),
+    )
+
+
 def _safe_float(value: Any, default: float = 0.0) -> float:
     try:
         return float(value)
@@ -251,17 +354,58 @@ def _hash_text(text: str) -> str:
     return hashlib.md5(text.encode("utf-8")).hexdigest()[:12]
 
 
+def _article_cursor(row: Dict[str, Any]) -> Optional[Tuple[str, int]]:
+    """文章的 keyset 游标 (analyzed_at, id)。"""
+    analyzed_at = str(row.get("analyzed_at") or "")
+    article_id = int(_safe_float(row.get("id"), 0))
+    if not analyzed_at or article_id <= 0:
+        return None
+    return analyzed_at, article_id
+
+
+def _checkpoint_counts(*counts: int) -> Dict[str, int]:
+    """(文章, 事件, 映射, 间接, 晋升) 计数 → 检查点字段。"""
+    return dict(zip(COUNT_FIELDS, counts))
+
+
+def _metric_unit(name: str) -> str:
+    if name.endswith("_ms"):
+        return "ms"
+    if name.endswith("_ratio"):
+        return "ratio"
+    if name.endswith("_cost"):
+        return "usd"
+    if name.endswith("_tokens"):
+        return "tokens"
+    return "count"
+
+
 class StockPipelineV2:
     """Stock V2 增量/回填引擎。"""
 
-    def __init__(self, enable_llm: bool = False, llm_workers: int = 1):
-        self.supabase = self._init_supabase()
+    def __init__(
+        self,
+        enable_llm: bool = False,
+        llm_workers: int = 1,
+        llm_stream: bool = False,
+        profile_capture: Optional[str] = None,
+        supabase_client: Optional[Any] = None,
+    ):
+        self.profiler = StageProfiler.from_env(capture=profile_capture)
+        self.supabase = self.profiler.wrap_client(supabase_client or self._init_supabase())
         self.enable_llm = enable_llm
         self.llm_client = self._init_llm_client(enable_llm)
         self.llm_workers = max(1, llm_workers)
+        self.llm_stream = llm_stream
         self.macro_factors = self._load_macro_factor_config()
+        self.keyword_matcher = self._build_keyword_matcher()
+        self.summary_vocab, self.summary_vocab_sig = self._summary_keyword_vocab()
         self.flags = FeatureFlags.from_env()
+        self.ticker_extractor = self._init_ticker_extractor()
         self.stats: Dict[str, int] = defaultdict(int)
+        self._serve_gc_futures: List[Future] = []
+        self._serve_gc_pool: Optional[ThreadPoolExecutor] = None
+        self._columnar_fallback_logged = False
         logger.info(
             "[FEATURE_FLAGS] "
             f"ENABLE_STOCK_V3_RUN_LOG={self.flags.enable_stock_v3_run_log} "
@@ -274,13 +418,20 @@ class StockPipelineV2:
             f"{self.flags.enable_stock_v3_subscription_alert} "
             f"ENABLE_STOCK_EVIDENCE_LAYER={self.flags.enable_stock_evidence_layer} "
             f"ENABLE_STOCK_TRANSMISSION_LAYER={self.flags.enable_stock_transmission_layer} "
-            f"ENABLE_STOCK_AI_DEBATE_VIEW={self.flags.enable_stock_ai_debate_view}"
+            f"ENABLE_STOCK_AI_DEBATE_VIEW={self.flags.enable_stock_ai_debate_view} "
+            f"ENABLE_STOCK_TICKER_UNIVERSE={self.flags.enable_stock_ticker_universe} "
+            f"ENABLE_STOCK_INCREMENTAL_SIGNALS={self.flags.enable_stock_incremental_signals} "
+            f"ENABLE_STOCK_SERVE_POINTER={self.flags.enable_stock_serve_pointer} "
+            f"ENABLE_STOCK_COLUMNAR_SIGNALS={self.flags.enable_stock_columnar_signals} "
+            f"ENABLE_STOCK_STREAMING_INCREMENTAL={self.flags.enable_stock_streaming_incremental} "
+            f"ENABLE_STOCK_EVENT_STORE={self.flags.enable_stock_event_store}"
         )
 
     def _build_v3_params(self, params: Dict[str, Any]) -> Dict[str, Any]:
         merged = dict(params)
         merged["enable_llm"] = self.enable_llm
         merged["llm_workers"] = self.llm_workers
+        merged["llm_stream"] = self.llm_stream
         merged["flag_enable_stock_v3_run_log"] = self.flags.enable_stock_v3_run_log
         merged["flag_enable_stock_v3_eval"] = self.flags.enable_stock_v3_eval
         merged["flag_enable_stock_v3_paper"] = self.flags.enable_stock_v3_paper
@@ -333,6 +484,7 @@ class StockPipelineV2:
         metrics: Dict[str, Any],
         notes: str = "",
     ) -> None:
+        profile = self._finish_profile(run_id)
         if not self.flags.enable_stock_v3_run_log:
             return
 
@@ -340,24 +492,33 @@ class StockPipelineV2:
         duration_sec = max(0, int((ended_at - started_at).total_seconds()))
         status = status if status in ("success", "failed", "degraded") else "failed"
 
+        update = {
+            "status": status,
+            "ended_at": ended_at.isoformat(),
+            "duration_sec": duration_sec,
+            "notes": notes[:1000],
+            "as_of": ended_at.isoformat(),
+        }
+        if profile is not None:
+            update["profile_json"] = profile["payload"]
         try:
-            (
-                self.supabase.table("research_runs")
-                .update(
-                    {
-                        "status": status,
-                        "ended_at": ended_at.isoformat(),
-                        "duration_sec": duration_sec,
-                        "notes": notes[:1000],
-                        "as_of": ended_at.isoformat(),
-                    }
-                )
-                .eq("run_id", run_id)
-                .execute()
-            )
+            self.supabase.table("research_runs").update(update).eq("run_id", run_id).execute()
         except Exception as e:
-            logger.warning(f"[V3_RUN_LOG_FINISH_FAILED] run_id={run_id} error={str(e)[:120]}")
+            if "profile_json" in update:
+                # 兼容未执行 profile_json 迁移的库
+                logger.warning(f"[V3_RUN_PROFILE_SKIPPED] run_id={run_id} error={str(e)[:120]}")
+                update.pop("profile_json")
+                try:
+                    self.supabase.table("research_runs").update(update).eq("run_id", run_id).execute()
+                except Exception as retry_error:
+                    logger.warning(
+                        f"[V3_RUN_LOG_FINISH_FAILED] run_id={run_id} error={str(retry_error)[:120]}"
+                    )
+            else:
+                logger.warning(f"[V3_RUN_LOG_FINISH_FAILED] run_id={run_id} error={str(e)[:120]}")
 
+        if profile is not None:
+            metrics = {**metrics, **profile["metrics"]}
         rows = []
         for key, value in metrics.items():
             try:
@@ -369,7 +530,7 @@ class StockPipelineV2:
                     "run_id": run_id,
                     "metric_name": str(key)[:64],
                     "metric_value": number,
-                    "metric_unit": "count",
+                    "metric_unit": _metric_unit(str(key)),
                 }
             )
         if not rows:
@@ -382,11 +543,39 @@ class StockPipelineV2:
         except Exception as e:
             logger.warning(f"[V3_RUN_METRICS_FAILED] run_id={run_id} error={str(e)[:120]}")
 
+    def _collect_llm_telemetry(self, run_id: str) -> Dict[str, float]:
+        """汇总本进程 LLM 遥测，并按需导出 JSONL。"""
+        if not self.llm_client or get_telemetry is None:
+            return {}
+        if export_telemetry_if_configured is not None:
+            export_telemetry_if_configured(run_id=run_id)
+        return get_telemetry().to_metrics()
+
+    def _finish_profile(self, run_id: str) -> Optional[Dict[str, Any]]:
+        """结束本轮 span 记录，打印火焰图式摘要，返回 profile_json 与阶段指标。"""
+        root = self.profiler.stop()
+        if root is None:
+            return None
+        capture_path = ""
+        try:
+            capture_path = self.profiler.finish_capture(run_id)
+        except Exception as e:
+            logger.warning(f"[STOCK_V2_PROFILE_CAPTURE_FAILED] run_id={run_id} error={str(e)[:120]}")
+        logger.info(f"[STOCK_V2_PROFILE] run_id={run_id}\n{render_summary(root)}")
+        if capture_path:
+            logger.info(f"[STOCK_V2_PROFILE_CAPTURE] path={capture_path}")
+        return {
+            "payload": profile_payload(root, capture_path=capture_path),
+            "metrics": span_metrics(root),
+        }
+
     def _init_supabase(self) -> Client:
         url = os.getenv("SUPABASE_URL")
         key = os.getenv("SUPABASE_KEY")
         if not url or not key:
             raise ValueError("缺少 SUPABASE_URL / SUPABASE_KEY")
+        if create_client is None:
+            raise ImportError("未安装 supabase 包")
         return create_client(url, key)
 
     def _init_llm_client(self, enable_llm: bool) -> Optional[Any]:
@@ -396,7 +585,7 @@ class StockPipelineV2:
             logger.warning("[V2_LLM_DISABLED] LLMClient 不可用，降级规则模式")
             return None
         try:
-            return LLMClient()
+            return LLMClient(caller="pipeline_v2")
         except Exception as e:
             logger.warning(f"[V2_LLM_DISABLED] LLM 初始化失败: {str(e)[:160]}")
             return None
@@ -442,25 +631,116 @@ class StockPipelineV2:
             logger.warning(f"[V2_MACRO_DICT_FALLBACK] error={str(e)[:120]}")
         return [dict(item) for item in DEFAULT_MACRO_FACTORS]
 
+    def _build_keyword_matcher(self) -> KeywordMatcher:
+        """把全部规则词典编译成一个匹配器，每段文本只扫描一次。"""
+        groups: Dict[str, Sequence[str]] = {
+            "stock": STOCK_HINTS,
+            "bullish": BULLISH_HINTS,
+            "bearish": BEARISH_HINTS,
+            "indirect_boost": INDIRECT_RELEVANCE_BOOST_WORDS,
+            "index_fallback": INDEX_FALLBACK_WORDS,
+        }
+        for event_type, keywords, _ in EVENT_RULES:
+            groups[f"event:{event_type}"] = keywords
+        for theme, keywords in INDIRECT_THEME_RULES.items():
+            groups[f"theme:{theme}"] = keywords
+        for idx, factor in enumerate(self.macro_factors):
+            tokens = [str(word or "").strip().lower() for word in factor.get("keywords") or []]
+            groups[f"macro:{idx}"] = [token for token in tokens if token]
+        return KeywordMatcher(groups)
+
+    def _summary_keyword_vocab(self) -> Tuple[Set[str], str]:
+        """事件摘要命中向量的词表（宏观因子 + 间接主题）及其签名；词典变更后旧向量按签名失效。"""
+        vocab = {
+            word
+            for group, words in self.keyword_matcher.groups.items()
+            if group.startswith(("macro:", "theme:"))
+            for word in words
+            if word
+        }
+        return vocab, _hash_text("\n".join(sorted(vocab)))
+
+    def _summary_keyword_hits(self, summary: str) -> Dict[str, Any]:
+        """事件摘要的命中向量：命中的宏观/主题关键词集合，计数按当前分组从集合推出。"""
+        ends = self.keyword_matcher.match(summary.strip()).ends
+        return {
+            "vocab": self.summary_vocab_sig,
+            "words": sorted(word for word in ends if word in self.summary_vocab),
+        }
+
+    def _event_keyword_words(self, row: Dict[str, Any], memo: Dict[str, List[str]]) -> List[str]:
+        """取 bundle 行预存的命中词；旧事件 / 外部写入的事件没有向量时扫描摘要一次（按摘要去重）。"""
+        words = row.get("keyword_hits")
+        if isinstance(words, list):
+            return words
+        summary = str(row.get("summary") or "").strip()
+        if summary not in memo:
+            memo[summary] = self._summary_keyword_hits(summary)["words"]
+        return memo[summary]
+
+    def _article_keyword_hits(self, article: Dict[str, Any]) -> Dict[str, KeywordHits]:
+        """单次扫描文章各字段，按规则原先的文本窗口切出 stock / rule / indirect 命中。"""
+        title = str(article.get("title") or "")
+        content = str(article.get("content") or "")
+        category = str(article.get("category") or "")
+        content_window = content[:INDIRECT_CONTENT_WINDOW]
+        matcher = self.keyword_matcher
+        aligned = False
+        if not matcher.has_whitespace:
+            title_hits = matcher.match(title)
+            content_hits = matcher.match(content_window)
+            category_hits = matcher.match(category)
+            aligned = title_hits.aligned and content_hits.aligned
+        if not aligned:
+            # 关键词可能跨字段拼接处，或小写后长度变化：退回按完整文本扫描
+            return {
+                "stock": matcher.match(
+                    " ".join([title, content[:STOCK_CONTENT_WINDOW], category])
+                ),
+                "rule": matcher.match(
+                    f"{title[:RULE_TITLE_WINDOW]} {content[:RULE_CONTENT_WINDOW]}"
+                ),
+                "indirect": matcher.match(
+                    f"{title[:RULE_TITLE_WINDOW]} {content_window} {category}"
+                ),
+            }
+
+        short_title_hits = title_hits.within(RULE_TITLE_WINDOW)
+        return {
+            "stock": title_hits | content_hits.within(STOCK_CONTENT_WINDOW) | category_hits,
+            "rule": short_title_hits | content_hits.within(RULE_CONTENT_WINDOW),
+            "indirect": short_title_hits | content_hits | category_hits,
+        }
+
+    def _init_ticker_extractor(self) -> Union[TickerExtractor, TrackedTickerExtractor]:
+        """加载代码全集（profile 表 + 本地快照）；未开启时沿用旧版 TRACKED_TICKERS 大写匹配。"""
+        if not self.flags.enable_stock_ticker_universe:
+            logger.info(f"[V2_TICKER_UNIVERSE] source=tracked tickers={len(TRACKED_TICKERS)}")
+            return TrackedTickerExtractor(TRACKED_TICKERS)
+        universe = load_ticker_universe(self.supabase, seed=TRACKED_TICKERS)
+        logger.info(f"[V2_TICKER_UNIVERSE] source={universe.source} tickers={len(universe)}")
+        return TickerExtractor(universe)
+
     def _extract_tickers(self, text: str) -> Set[str]:
-        found: Set[str] = set()
-        for token in TICKER_PATTERN.findall(text.upper()):
-            if token in TRACKED_TICKERS:
-                found.add(token)
-        return found
+        return self.ticker_extractor.extract(text)
 
-    def _is_stock_article(self, article: Dict[str, Any]) -> bool:
+    def _is_stock_article(
+        self,
+        article: Dict[str, Any],
+        hits: Optional[KeywordHits] = None,
+    ) -> bool:
         payload = " ".join(
             [
                 str(article.get("title") or ""),
-                str(article.get("content") or "")[:1200],
+                str(article.get("content") or "")[:STOCK_CONTENT_WINDOW],
                 str(article.get("category") or ""),
             ]
         )
         if self._extract_tickers(payload):
             return True
-        upper = payload.upper()
-        return any(word.upper() in upper for word in STOCK_HINTS)
+        if hits is None:
+            hits = self.keyword_matcher.match(payload)
+        return hits.any("stock")
 
     def _source_name_from_url(self, url: str, source_id: Any) -> str:
         parsed = urlparse(url or "")
@@ -478,17 +758,20 @@ class StockPipelineV2:
         article: Dict[str, Any],
         run_id: str,
         now_iso: str,
+        hits: Optional[KeywordHits] = None,
     ) -> Optional[Dict[str, Any]]:
-        title = str(article.get("title") or "")[:240]
-        content = str(article.get("content") or "")[:2400]
+        title = str(article.get("title") or "")[:RULE_TITLE_WINDOW]
+        content = str(article.get("content") or "")[:INDIRECT_CONTENT_WINDOW]
         category = str(article.get("category") or "")
-        payload = f"{title} {content} {category}".lower()
+        payload = f"{title} {content} {category}"
         if not payload.strip():
             return None
+        if hits is None:
+            hits = self.keyword_matcher.match(payload)
 
         theme_hits: Dict[str, int] = {}
-        for theme, keywords in INDIRECT_THEME_RULES.items():
-            hit_count = sum(1 for keyword in keywords if keyword in payload)
+        for theme in INDIRECT_THEME_RULES:
+            hit_count = hits.count(f"theme:{theme}")
             if hit_count > 0:
                 theme_hits[theme] = hit_count
         if not theme_hits:
@@ -502,10 +785,7 @@ class StockPipelineV2:
             0,
             100,
         )
-        if any(
-            token in payload
-            for token in ("fed", "fomc", "yield", "dxy", "oil", "tariff", "sanction")
-        ):
+        if hits.any("indirect_boost"):
             relevance = _clamp(relevance + 6, 0, 100)
         if relevance < INDIRECT_MIN_SCORE:
             return None
@@ -574,11 +854,14 @@ class StockPipelineV2:
         indirect_rows: List[Dict[str, Any]],
         run_id: str,
         now_iso: str,
+        theme_sources: Optional[Dict[str, Set[str]]] = None,
     ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int]:
+        """theme_sources 为跨批次共享的主题来源集合（原地更新）；不传时读取近 24h 并只在本批内累计。"""
         if not indirect_rows:
             return [], [], 0
 
-        theme_sources = self._load_recent_indirect_theme_sources(lookback_hours=24)
+        if theme_sources is None:
+            theme_sources = self._load_recent_indirect_theme_sources(lookback_hours=24)
         promoted_events: List[Dict[str, Any]] = []
         promoted_mappings: List[Dict[str, Any]] = []
         promoted_count = 0
@@ -664,6 +947,7 @@ class StockPipelineV2:
 
         return promoted_events, promoted_mappings, promoted_count
 
+    @profiled("upsert_indirect")
     def _upsert_indirect_events(self, rows: List[Dict[str, Any]]) -> int:
         if not rows:
             return 0
@@ -677,17 +961,27 @@ class StockPipelineV2:
             logger.warning(f"[V2_INDIRECT_UPSERT_FALLBACK] error={str(e)[:120]}")
             return 0
 
-    def _classify_event(self, text: str) -> Tuple[str, int]:
-        lower = text.lower()
-        for event_type, keywords, ttl_hours in EVENT_RULES:
-            if any(word.lower() in lower for word in keywords):
+    def _classify_event(
+        self,
+        text: str,
+        hits: Optional[KeywordHits] = None,
+    ) -> Tuple[str, int]:
+        if hits is None:
+            hits = self.keyword_matcher.match(text)
+        for event_type, _, ttl_hours in EVENT_RULES:
+            if hits.any(f"event:{event_type}"):
                 return event_type, ttl_hours
         return "news", 72
 
-    def _direction_strength(self, text: str) -> Tuple[str, float, float]:
-        lower = text.lower()
-        bull = sum(1 for word in BULLISH_HINTS if word in lower)
-        bear = sum(1 for word in BEARISH_HINTS if word in lower)
+    def _direction_strength(
+        self,
+        text: str,
+        hits: Optional[KeywordHits] = None,
+    ) -> Tuple[str, float, float]:
+        if hits is None:
+            hits = self.keyword_matcher.match(text)
+        bull = hits.count("bullish")
+        bear = hits.count("bearish")
         total = bull + bear
         if total == 0:
             return "NEUTRAL", 0.45, 0.0
@@ -718,7 +1012,12 @@ class StockPipelineV2:
             f"规则基线: direction={base_direction}, strength={base_strength:.2f}"
         )
         try:
-            result = self.llm_client.summarize(prompt, use_cache=True)
+            result = self.llm_client.summarize(
+                prompt,
+                use_cache=True,
+                stream=True if self.llm_stream else None,
+                required_keys=LLM_REQUIRED_KEYS,
+            )
             direction = str(result.get("direction") or base_direction).upper()
             if direction not in ("LONG", "SHORT", "NEUTRAL"):
                 direction = base_direction
@@ -735,22 +1034,141 @@ class StockPipelineV2:
             short = title[:160]
             return base_direction, base_strength, short, False, short, short
 
+    @profiled("load_articles")
     def _load_articles_batch(
         self,
-        offset: int,
         batch_size: int,
         fetched_after: Optional[str],
+        before_id: Optional[int] = None,
+        after_cursor: Optional[Tuple[str, int]] = None,
+        min_id: Optional[int] = None,
     ) -> List[Dict[str, Any]]:
+        """按 keyset 分页读取已分析文章。
+
+        - after_cursor=(analyzed_at, id)：按 (analyzed_at, id) 升序读取水位之后的文章（增量）
+        - 否则按 id 降序读取 `min_id <= id < before_id` 的文章（回填 / 无水位的首次增量）
+        """
         query = (
             self.supabase.table("articles")
             .select("id,title,content,url,category,source_id,published_at,fetched_at,analyzed_at")
             .not_.is_("analyzed_at", "null")
-            .order("id", desc=True)
-            .range(offset, offset + batch_size - 1)
         )
+        if after_cursor is not None:
+            analyzed_at, last_id = after_cursor
+            query = query.or_(
+                f'analyzed_at.gt."{analyzed_at}",'
+                f'and(analyzed_at.eq."{analyzed_at}",id.gt.{int(last_id)})'
+            )
+            query = query.order("analyzed_at").order("id")
+        else:
+            if before_id is not None:
+                query = query.lt("id", int(before_id))
+            if min_id is not None:
+                query = query.gte("id", int(min_id))
+            query = query.order("id", desc=True)
         if fetched_after:
             query = query.gte("fetched_at", fetched_after)
-        return query.execute().data or []
+        return query.limit(batch_size).execute().data or []
+
+    def _load_watermark(self, pipeline_name: str) -> Optional[Tuple[str, int]]:
+        """读取已提交的文章水位 (analyzed_at, id)；表不存在或无记录时返回 None。"""
+        try:
+            rows = (
+                self.supabase.table("stock_pipeline_watermarks")
+                .select("last_article_id,last_analyzed_at")
+                .eq("pipeline_name", pipeline_name)
+                .limit(1)
+                .execute()
+                .data
+                or []
+            )
+        except Exception as e:
+            logger.warning(
+                f"[STOCK_V2_WATERMARK_LOAD_FAILED] pipeline={pipeline_name} error={str(e)[:120]}"
+            )
+            return None
+        if not rows:
+            return None
+        analyzed_at = str(rows[0].get("last_analyzed_at") or "")
+        last_id = int(_safe_float(rows[0].get("last_article_id"), 0))
+        if not analyzed_at or last_id <= 0:
+            return None
+        return analyzed_at, last_id
+
+    @profiled("watermark")
+    def _commit_watermark(
+        self,
+        pipeline_name: str,
+        cursor: Tuple[str, int],
+        run_id: str,
+        processed: int,
+    ) -> bool:
+        """单行 upsert 推进水位；只在事件写入成功之后调用。"""
+        analyzed_at, last_id = cursor
+        payload = {
+            "pipeline_name": pipeline_name,
+            "last_article_id": int(last_id),
+            "last_analyzed_at": analyzed_at,
+            "run_id": run_id,
+            "processed_count": int(processed),
+            "as_of": _now_utc().isoformat(),
+        }
+        try:
+            self.supabase.table("stock_pipeline_watermarks").upsert(
+                payload,
+                on_conflict="pipeline_name",
+            ).execute()
+            return True
+        except Exception as e:
+            logger.warning(
+                f"[STOCK_V2_WATERMARK_COMMIT_FAILED] pipeline={pipeline_name} "
+                f"error={str(e)[:120]}"
+            )
+            return False
+
+    def _llm_priority(
+        self,
+        tickers: Set[str],
+        event_type: str,
+        bias: float,
+        content: str,
+        published_at: str,
+        now: datetime,
+    ) -> float:
+        """LLM 期望收益：标的重要性 × 规则歧义度 × 正文信息量 × 新鲜度。"""
+        importance = max(LLM_TICKER_IMPORTANCE.get(ticker, 0.8) for ticker in tickers)
+        importance += min(0.15, 0.05 * max(0, len(tickers) - 1))
+        ambiguity = 1.0 - _clamp(abs(bias), 0.0, 1.0)
+        richness = _clamp(len(content) / 1500.0, 0.0, 1.0)
+        try:
+            published = datetime.fromisoformat(published_at.replace("Z", "+00:00"))
+            if published.tzinfo is None:
+                published = published.replace(tzinfo=timezone.utc)
+            age_hours = max(0.0, (now - published).total_seconds() / 3600.0)
+        except Exception:
+            age_hours = 24.0
+        recency = 0.5 ** (age_hours / LLM_RECENCY_HALF_LIFE_HOURS)
+        return (
+            importance
+            * LLM_EVENT_TYPE_WEIGHT.get(event_type, 0.9)
+            * (0.35 + 0.65 * ambiguity)
+            * (0.6 + 0.4 * richness)
+            * (0.5 + 0.5 * recency)
+        )
+
+    def _select_llm_candidates(
+        self,
+        llm_candidates: List[Tuple[int, str, str, str, float, float]],
+        llm_budget: int,
+    ) -> List[Tuple[int, str, str, str, float, float]]:
+        """按期望收益排序，只对 Top-K 候选花费 LLM 预算。"""
+        if not self.llm_client or llm_budget <= 0 or not llm_candidates:
+            return []
+        ranked = sorted(llm_candidates, key=lambda item: item[5], reverse=True)
+        selected = ranked[:llm_budget]
+        self.stats["llm_candidates_seen"] += len(llm_candidates)
+        self.stats["llm_candidates_selected"] += len(selected)
+        return selected
 
     def _build_events(
         self,
@@ -759,33 +1177,97 @@ class StockPipelineV2:
         now_iso: str,
         llm_budget: int,
     ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], int, List[Dict[str, Any]], int]:
+        """规则建事件后，在本批内按期望收益分配 LLM 预算。"""
+        (
+            event_rows,
+            raw_map_rows,
+            llm_candidates,
+            indirect_rows,
+            promoted_count,
+        ) = self._build_rule_events(articles, run_id=run_id, now_iso=now_iso)
+        selected = self._select_llm_candidates(llm_candidates, llm_budget)
+        llm_used_count = self._apply_llm_adjustments(event_rows, selected)
+        return event_rows, raw_map_rows, llm_used_count, indirect_rows, promoted_count
+
+    def _build_rule_events(
+        self,
+        articles: List[Dict[str, Any]],
+        run_id: str,
+        now_iso: str,
+        theme_sources: Optional[Dict[str, Set[str]]] = None,
+    ) -> Tuple[
+        List[Dict[str, Any]],
+        List[Dict[str, Any]],
+        List[Tuple[int, str, str, str, float, float]],
+        List[Dict[str, Any]],
+        int,
+    ]:
+        """纯规则事件构建；返回的 LLM 候选带期望收益分，由调用方统一排序。"""
+        event_rows, raw_map_rows, llm_candidates, indirect_rows = self._score_articles(
+            articles,
+            run_id=run_id,
+            now_iso=now_iso,
+            collect_llm=bool(self.llm_client),
+        )
+        return self._finish_rule_events(
+            event_rows,
+            raw_map_rows,
+            llm_candidates,
+            indirect_rows,
+            run_id=run_id,
+            now_iso=now_iso,
+            theme_sources=theme_sources,
+        )
+
+    @profiled("rule_scoring")
+    def _score_articles(
+        self,
+        articles: List[Dict[str, Any]],
+        run_id: str,
+        now_iso: str,
+        collect_llm: bool,
+    ) -> Tuple[
+        List[Dict[str, Any]],
+        List[Dict[str, Any]],
+        List[Tuple[int, str, str, str, float, float]],
+        List[Dict[str, Any]],
+    ]:
+        """逐篇规则打分，不访问数据库与 LLM，可在子进程中运行。"""
         event_rows: List[Dict[str, Any]] = []
         raw_map_rows: List[Dict[str, Any]] = []
-        llm_candidates: List[Tuple[int, str, str, str, float]] = []
+        llm_candidates: List[Tuple[int, str, str, str, float, float]] = []
         indirect_rows: List[Dict[str, Any]] = []
+        now = _now_utc()
 
         for article in articles:
             self.stats["articles_seen"] += 1
-            if not self._is_stock_article(article):
-                indirect_row = self._build_indirect_candidate(article, run_id=run_id, now_iso=now_iso)
+            article_hits = self._article_keyword_hits(article)
+            if not self._is_stock_article(article, hits=article_hits["stock"]):
+                indirect_row = self._build_indirect_candidate(
+                    article,
+                    run_id=run_id,
+                    now_iso=now_iso,
+                    hits=article_hits["indirect"],
+                )
                 if indirect_row:
                     indirect_rows.append(indirect_row)
                     self.stats["articles_indirect_related"] += 1
                 continue
             self.stats["articles_stock_related"] += 1
 
-            title = str(article.get("title") or "")[:240]
+            title = str(article.get("title") or "")[:RULE_TITLE_WINDOW]
             content = str(article.get("content") or "")
-            payload = f"{title} {content[:1800]}"
+            payload = f"{title} {content[:RULE_CONTENT_WINDOW]}"
+            rule_hits = article_hits["rule"]
             tickers = self._extract_tickers(payload)
 
-            if not tickers and any(word in payload.lower() for word in ("fed", "fomc", "yield")):
-                tickers = {"SPY", "QQQ", "DIA"}
+            if not tickers and rule_hits.any("index_fallback"):
+                tickers = set(INDEX_FALLBACK_TICKERS)
             if not tickers:
                 continue
 
-            event_type, ttl_hours = self._classify_event(payload)
-            base_direction, base_strength, bias = self._direction_strength(payload)
+            event_type, ttl_hours = self._classify_event(payload, hits=rule_hits)
+            base_direction, base_strength, bias = self._direction_strength(payload, hits=rule_hits)
             direction = base_direction
             strength = base_strength
             summary = title or "美股事件"
@@ -822,9 +1304,18 @@ class StockPipelineV2:
                 }
             )
             event_idx = len(event_rows) - 1
-            if self.llm_client and llm_budget > 0:
-                llm_candidates.append((event_idx, title, content, base_direction, base_strength))
-                llm_budget -= 1
+            if collect_llm:
+                priority = self._llm_priority(
+                    tickers=tickers,
+                    event_type=event_type,
+                    bias=bias,
+                    content=content,
+                    published_at=published_at,
+                    now=now,
+                )
+                llm_candidates.append(
+                    (event_idx, title, content, base_direction, base_strength, priority)
+                )
 
             for ticker in sorted(tickers):
                 raw_map_rows.append(
@@ -838,23 +1329,43 @@ class StockPipelineV2:
                         "run_id": run_id,
                     }
                 )
+        return event_rows, raw_map_rows, llm_candidates, indirect_rows
 
-        llm_used_count = self._apply_llm_adjustments(event_rows, llm_candidates)
+    @profiled("promotion")
+    def _finish_rule_events(
+        self,
+        event_rows: List[Dict[str, Any]],
+        raw_map_rows: List[Dict[str, Any]],
+        llm_candidates: List[Tuple[int, str, str, str, float, float]],
+        indirect_rows: List[Dict[str, Any]],
+        run_id: str,
+        now_iso: str,
+        theme_sources: Optional[Dict[str, Set[str]]] = None,
+    ) -> Tuple[
+        List[Dict[str, Any]],
+        List[Dict[str, Any]],
+        List[Tuple[int, str, str, str, float, float]],
+        List[Dict[str, Any]],
+        int,
+    ]:
+        """间接事件晋升（需读取近 24h 主题来源），在主进程执行。"""
         promoted_events, promoted_mappings, promoted_count = self._promote_indirect_candidates(
             indirect_rows,
             run_id=run_id,
             now_iso=now_iso,
+            theme_sources=theme_sources,
         )
         if promoted_events:
             event_rows.extend(promoted_events)
             raw_map_rows.extend(promoted_mappings)
             self.stats["indirect_promoted"] += promoted_count
-        return event_rows, raw_map_rows, llm_used_count, indirect_rows, promoted_count
+        return event_rows, raw_map_rows, llm_candidates, indirect_rows, promoted_count
 
+    @profiled("llm")
     def _apply_llm_adjustments(
         self,
         event_rows: List[Dict[str, Any]],
-        llm_candidates: List[Tuple[int, str, str, str, float]],
+        llm_candidates: List[Tuple[int, str, str, str, float, float]],
     ) -> int:
         if not self.llm_client or not llm_candidates:
             return 0
@@ -884,7 +1395,7 @@ class StockPipelineV2:
                     base_direction,
                     base_strength,
                 ): event_idx
-                for event_idx, title, content, base_direction, base_strength in llm_candidates
+                for event_idx, title, content, base_direction, base_strength, _ in llm_candidates
             }
             for future in as_completed(future_map):
                 event_idx = future_map[future]
@@ -924,31 +1435,45 @@ class StockPipelineV2:
         )
         return used_count
 
-    def _upsert_events(
+    def _upsert_event_chunk(
         self,
         event_rows: List[Dict[str, Any]],
         raw_map_rows: List[Dict[str, Any]],
     ) -> Tuple[int, int]:
-        if not event_rows:
-            return 0, 0
-
-        self.supabase.table("stock_events_v2").upsert(
-            event_rows,
-            on_conflict="event_key",
-        ).execute()
-
-        keys = [row["event_key"] for row in event_rows]
-        id_rows = (
+        """写入一块事件并用返回行取 id，随后写入该块的 ticker 映射。"""
+        returned = (
             self.supabase.table("stock_events_v2")
-            .select("id,event_key")
-            .in_("event_key", keys)
+            .upsert(
+                event_rows,
+                on_conflict="event_key",
+                returning=RETURN_REPRESENTATION,
+            )
             .execute()
             .data
             or []
         )
-        key_to_id = {str(row.get("event_key")): int(row.get("id") or 0) for row in id_rows}
-        map_rows: List[Dict[str, Any]] = []
+        key_to_id = {
+            str(row.get("event_key")): int(row.get("id") or 0)
+            for row in returned
+            if int(row.get("id") or 0) > 0
+        }
+        missing = [row["event_key"] for row in event_rows if row["event_key"] not in key_to_id]
+        if missing:
+            # 返回行缺失时（如网关裁剪了 representation）只回读缺失的 key
+            logger.warning(f"[STOCK_V2_EVENT_IDS_READBACK] missing={len(missing)}")
+            id_rows = (
+                self.supabase.table("stock_events_v2")
+                .select("id,event_key")
+                .in_("event_key", missing)
+                .execute()
+                .data
+                or []
+            )
+            key_to_id.update(
+                {str(row.get("event_key")): int(row.get("id") or 0) for row in id_rows}
+            )
 
+        map_rows: List[Dict[str, Any]] = []
         for row in raw_map_rows:
             event_id = key_to_id.get(row["event_key"])
             if not event_id:
@@ -973,8 +1498,68 @@ class StockPipelineV2:
 
         return len(event_rows), len(map_rows)
 
+    @profiled("upsert_events")
+    def _upsert_events(
+        self,
+        event_rows: List[Dict[str, Any]],
+        raw_map_rows: List[Dict[str, Any]],
+    ) -> Tuple[int, int]:
+        """分块流水线写入事件与映射：每块事件返回后立即写其映射，最多 4 块并发。"""
+        if not event_rows:
+            return 0, 0
+
+        # 同一 event_key 只保留最后一行，避免不同块并发更新同一行
+        unique_rows: List[Dict[str, Any]] = []
+        for row in {row["event_key"]: row for row in event_rows}.values():
+            details = row.get("details")
+            if isinstance(details, dict):
+                # 摘要已定稿（LLM 修正之后），在此计算一次命中向量，serve 层直接复用；
+                # 写入副本，调用方的事件行与 details 保持不变
+                keyword_hits = self._summary_keyword_hits(str(row.get("summary") or ""))
+                row = {**row, "details": {**details, "keyword_hits": keyword_hits}}
+            unique_rows.append(row)
+        # 重复事件的映射按 (event_key, ticker, role) 去重并保留最后一行，否则同批 upsert 会撞唯一约束
+        maps_by_key: Dict[str, Dict[Tuple[str, str], Dict[str, Any]]] = defaultdict(dict)
+        for row in raw_map_rows:
+            maps_by_key[row["event_key"]][(row["ticker"], row["role"])] = row
+
+        chunks: List[Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]] = []
+        for start in range(0, len(unique_rows), EVENT_WRITE_CHUNK_SIZE):
+            chunk = unique_rows[start:start + EVENT_WRITE_CHUNK_SIZE]
+            chunk_maps = [
+                item for row in chunk for item in maps_by_key.get(row["event_key"], {}).values()
+            ]
+            chunks.append((chunk, chunk_maps))
+
+        if len(chunks) == 1:
+            return self._upsert_event_chunk(*chunks[0])
+
+        event_count = 0
+        mapping_count = 0
+        with ThreadPoolExecutor(max_workers=min(EVENT_WRITE_WORKERS, len(chunks))) as executor:
+            futures = [executor.submit(self._upsert_event_chunk, *chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                chunk_events, chunk_mappings = future.result()
+                event_count += chunk_events
+                mapping_count += chunk_mappings
+        return event_count, mapping_count
+
+    @profiled("event_bundle")
     def _load_event_bundle(self, lookback_hours: int) -> List[Dict[str, Any]]:
         cutoff_iso = (_now_utc() - timedelta(hours=lookback_hours)).isoformat()
+        store = open_event_store(
+            self.supabase,
+            tables=["stock_events_v2", "stock_event_tickers_v2"],
+            enabled=self.flags.enable_stock_event_store,
+        )
+        if store is not None:
+            # 本地镜像窗口读取完整，不受 4000 条上限截断
+            return [
+                self._bundle_row(event_row, {**mapping, "event_id": event_row["id"]})
+                for event_row in store.events(start_iso=cutoff_iso)
+                for mapping in event_row["tickers"]
+            ]
+
         event_rows = (
             self.supabase.table("stock_events_v2")
             .select(
@@ -1005,30 +1590,37 @@ class StockPipelineV2:
         event_map = {int(row.get("id") or 0): row for row in event_rows}
         bundle: List[Dict[str, Any]] = []
         for row in map_rows:
-            event_id = int(row.get("event_id") or 0)
-            event_row = event_map.get(event_id)
-            if not event_row:
-                continue
-            details = event_row.get("details")
-            detail_map = details if isinstance(details, dict) else {}
-            bundle.append(
-                {
-                    "event_id": event_id,
-                    "ticker": str(row.get("ticker") or "").upper(),
-                    "weight": _safe_float(row.get("weight"), 1.0),
-                    "map_confidence": _safe_float(row.get("confidence"), 0.5),
-                    "event_type": str(event_row.get("event_type") or "news"),
-                    "direction": str(event_row.get("direction") or "NEUTRAL"),
-                    "strength": _safe_float(event_row.get("strength"), 0.45),
-                    "summary": str(event_row.get("summary") or ""),
-                    "published_at": _to_iso(event_row.get("published_at")),
-                    "source_type": str(event_row.get("source_type") or "article").strip().lower(),
-                    "source_ref": str(event_row.get("source_ref") or "")[:256],
-                    "source_handle": str(detail_map.get("handle") or "").strip(),
-                }
-            )
+            event_row = event_map.get(int(row.get("event_id") or 0))
+            if event_row:
+                bundle.append(self._bundle_row(event_row, row))
         return bundle
 
+    def _bundle_row(self, event_row: Dict[str, Any], map_row: Dict[str, Any]) -> Dict[str, Any]:
+        """事件行 + 映射行 → 聚合用的扁平行（可直接 JSON 序列化进状态表）。"""
+        details = event_row.get("details")
+        detail_map = details if isinstance(details, dict) else {}
+        keyword_hits = detail_map.get("keyword_hits")
+        keyword_words: Optional[List[str]] = None
+        if isinstance(keyword_hits, dict) and keyword_hits.get("vocab") == self.summary_vocab_sig:
+            keyword_words = [str(word) for word in keyword_hits.get("words") or []]
+        return {
+            "event_id": int(map_row.get("event_id") or 0),
+            "ticker": str(map_row.get("ticker") or "").upper(),
+            "role": str(map_row.get("role") or "primary"),
+            "weight": _safe_float(map_row.get("weight"), 1.0),
+            "map_confidence": _safe_float(map_row.get("confidence"), 0.5),
+            "event_type": str(event_row.get("event_type") or "news"),
+            "direction": str(event_row.get("direction") or "NEUTRAL"),
+            "strength": _safe_float(event_row.get("strength"), 0.45),
+            "summary": str(event_row.get("summary") or ""),
+            "published_at": _to_iso(event_row.get("published_at")),
+            "as_of": _parse_as_of(event_row.get("as_of")).isoformat(),
+            "source_type": str(event_row.get("source_type") or "article").strip().lower(),
+            "source_ref": str(event_row.get("source_ref") or "")[:256],
+            "source_handle": str(detail_map.get("handle") or "").strip(),
+            "keyword_hits": keyword_words,
+        }
+
     def _to_int_list(self, value: Any, limit: int = 20) -> List[int]:
         """将任意数组值转换为 int 列表。"""
         if not isinstance(value, list):
@@ -1141,6 +1733,7 @@ class StockPipelineV2:
             "pre_trade_checks": pre_trade_checks[:3],
         }
 
+    @profiled("build_evidence")
     def _build_evidence_rows(
         self,
         opportunities: List[Dict[str, Any]],
@@ -1206,6 +1799,7 @@ class StockPipelineV2:
                 )
         return rows
 
+    @profiled("build_paths")
     def _build_transmission_rows(
         self,
         opportunities: List[Dict[str, Any]],
@@ -1214,9 +1808,15 @@ class StockPipelineV2:
         run_id: str,
         now: datetime,
     ) -> List[Dict[str, Any]]:
-        """基于宏观词典构建宏观→行业→个股传导链。"""
+        """基于宏观词典构建宏观→行业→个股传导链。
+
+        因子命中数取最近 16 条摘要命中词的并集，等价于合并摘要整体扫描（但不跨摘要拼接处匹配）；
+        同一 ticker 的多个机会共用一次结果。
+        """
         rows: List[Dict[str, Any]] = []
         now_iso = now.isoformat()
+        memo: Dict[str, List[str]] = {}
+        hits_by_ticker: Dict[str, Optional[KeywordHits]] = {}
         for opp in opportunities:
             opp_id = int(opp.get("id") or 0)
             if opp_id <= 0:
@@ -1226,23 +1826,24 @@ class StockPipelineV2:
                 continue
             side = str(opp.get("side") or "LONG").upper()
             industry = TICKER_TO_INDUSTRY.get(ticker, "Unknown")
-            summaries = [
-                str(row.get("summary") or "").strip()
-                for row in (events_by_ticker.get(ticker) or [])[:16]
-                if str(row.get("summary") or "").strip()
-            ]
-            merged_text = " ".join(summaries).lower()
-            if not merged_text:
+            if ticker not in hits_by_ticker:
+                recent = [
+                    row
+                    for row in (events_by_ticker.get(ticker) or [])[:16]
+                    if str(row.get("summary") or "").strip()
+                ]
+                words = {word for row in recent for word in self._event_keyword_words(row, memo)}
+                hits_by_ticker[ticker] = (
+                    KeywordHits(dict.fromkeys(words, 0), self.keyword_matcher.groups, aligned=False)
+                    if recent
+                    else None
+                )
+            text_hits = hits_by_ticker[ticker]
+            if text_hits is None:
                 continue
-
             factor_hits: List[Tuple[float, Dict[str, Any]]] = []
-            for factor in self.macro_factors:
-                keywords = factor.get("keywords") or []
-                hit_count = 0
-                for word in keywords:
-                    token = str(word or "").strip().lower()
-                    if token and token in merged_text:
-                        hit_count += 1
+            for idx, factor in enumerate(self.macro_factors):
+                hit_count = text_hits.count(f"macro:{idx}")
                 if hit_count <= 0:
                     continue
                 factor_hits.append((float(hit_count), factor))
@@ -1280,135 +1881,597 @@ class StockPipelineV2:
                 )
         return rows
 
+    def _columnar_enabled(self) -> bool:
+        """ENABLE_STOCK_COLUMNAR_SIGNALS 开启且 numpy 可用时走列式打分。"""
+        if not self.flags.enable_stock_columnar_signals:
+            return False
+        if not signal_columns.HAS_NUMPY:
+            if not self._columnar_fallback_logged:
+                logger.warning("[V2_COLUMNAR_FALLBACK] 未安装 numpy，信号/机会打分回退逐行实现")
+                self._columnar_fallback_logged = True
+            return False
+        return True
+
+    def _aggregate_ticker_events(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """对单个 ticker 最近 24 条事件做滚动聚合（多空质量、事件类型/来源计数）。"""
+        pos = 0.0
+        neg = 0.0
+        counts: Counter[str] = Counter()
+        source_counts: Counter[str] = Counter()
+        x_handles: Counter[str] = Counter()
+        source_event_ids: List[int] = []
+        sorted_rows = sorted(rows, key=_recency_key, reverse=True)
+        latest_x_at = ""
+        latest_news_at = ""
+
+        for row in sorted_rows[:SIGNAL_RECENT_EVENTS]:
+            value = row["strength"] * row["weight"] * row["map_confidence"]
+            if row["direction"] == "LONG":
+                pos += value
+            elif row["direction"] == "SHORT":
+                neg += value
+            source_event_ids.append(int(row["event_id"]))
+            counts[str(row["event_type"])] += 1
+            source_type = str(row.get("source_type") or "article").strip().lower()
+            source_counts[source_type] += 1
+            published_at = _to_iso(row.get("published_at"))
+            if source_type == "x_grok":
+                if not latest_x_at:
+                    latest_x_at = published_at
+                handle = str(row.get("source_handle") or "").strip()
+                if handle:
+                    x_handles[handle] += 1
+            elif source_type == "article" and not latest_news_at:
+                latest_news_at = published_at
+
+        # 计数器存成有序 [name, count] 列表：jsonb 不保序，most_common 的并列顺序依赖插入顺序
+        return {
+            "long_mass": pos,
+            "short_mass": neg,
+            "event_types": [[name, count] for name, count in counts.items()],
+            "source_types": [[name, count] for name, count in source_counts.items()],
+            "x_handles": [[name, count] for name, count in x_handles.items()],
+            "source_event_ids": source_event_ids,
+            "latest_x_at": latest_x_at,
+            "latest_news_at": latest_news_at,
+            "summary": str(sorted_rows[0].get("summary") or "") if sorted_rows else "",
+        }
+
+    def _signal_from_aggregate(
+        self,
+        ticker: str,
+        aggregate: Dict[str, Any],
+        event_count: int,
+        run_id: str,
+        now: datetime,
+    ) -> Dict[str, Any]:
+        pos = _safe_float(aggregate.get("long_mass"), 0.0)
+        neg = _safe_float(aggregate.get("short_mass"), 0.0)
+        counts: Counter[str] = Counter(
+            {str(name): int(count) for name, count in aggregate.get("event_types") or []}
+        )
+        source_counts: Counter[str] = Counter(
+            {str(name): int(count) for name, count in aggregate.get("source_types") or []}
+        )
+        x_handles: Counter[str] = Counter(
+            {str(name): int(count) for name, count in aggregate.get("x_handles") or []}
+        )
+        source_event_ids = [int(item) for item in aggregate.get("source_event_ids") or []]
+        latest_x_at = str(aggregate.get("latest_x_at") or "")
+        latest_news_at = str(aggregate.get("latest_news_at") or "")
+
+        net = pos - neg
+        side = "LONG" if net >= 0 else "SHORT"
+        magnitude = _clamp(abs(net) / max(0.1, pos + neg), 0.0, 1.0)
+        score = _clamp(42 + magnitude * 38 + min(event_count, 10) * 2.2, 0.0, 100.0)
+        level = _risk_level(score)
+        confidence = _clamp(0.44 + magnitude * 0.26 + min(event_count, 8) * 0.03, 0.4, 0.95)
+        expire_hours = 96 if level in ("L3", "L4") else 72
+        trigger_factors = [
+            {"event_type": name, "count": count}
+            for name, count in counts.most_common(3)
+        ]
+        x_count = int(source_counts.get("x_grok", 0))
+        article_count = int(source_counts.get("article", 0))
+        other_count = max(0, sum(source_counts.values()) - x_count - article_count)
+        source_total = max(1, x_count + article_count + other_count)
+        x_ratio = round(x_count / source_total, 4)
+        event_diversity = min(1.0, len(counts) / 3.0)
+        count_density = min(1.0, event_count / 8.0)
+        mixed_flag = bool(x_count > 0 and article_count > 0)
+        resonance_score = _clamp(
+            (0.5 if mixed_flag else 0.0) + event_diversity * 0.25 + count_density * 0.25,
+            0.0,
+            1.0,
+        )
+        top_x_handles = [name for name, _ in x_handles.most_common(3)]
+        source_mix = {
+            "x_count": x_count,
+            "article_count": article_count,
+            "other_count": other_count,
+            "source_total": source_total,
+            "x_ratio": x_ratio,
+            "mixed_sources": mixed_flag,
+            "resonance_score": round(resonance_score, 4),
+            "top_x_handles": top_x_handles,
+            "latest_x_at": latest_x_at,
+            "latest_news_at": latest_news_at,
+        }
+
+        explanation = str(aggregate.get("summary") or f"{ticker} 事件聚合")[:220]
+        if x_count > 0:
+            explanation = (
+                f"{explanation} | X贡献 {x_count}/{source_total}"
+                f"({int(round(x_ratio * 100))}%)"
+            )[:220]
+
+        return {
+            "signal_key": f"{ticker}:{run_id}",
+            "ticker": ticker,
+            "level": level,
+            "side": side,
+            "signal_score": round(score, 2),
+            "confidence": round(confidence, 4),
+            "trigger_factors": trigger_factors,
+            "llm_used": bool(self.llm_client),
+            "explanation": explanation,
+            "source_event_ids": source_event_ids[:20],
+            "source_mix": source_mix,
+            "expires_at": (now + timedelta(hours=expire_hours)).isoformat(),
+            "as_of": now.isoformat(),
+            "run_id": run_id,
+            "is_active": True,
+        }
+
+    @profiled("build_signals")
     def _build_signals(
         self,
         event_bundle: List[Dict[str, Any]],
         run_id: str,
         now: datetime,
     ) -> List[Dict[str, Any]]:
-        by_ticker: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-        for row in event_bundle:
-            ticker = str(row.get("ticker") or "")
-            if ticker:
-                by_ticker[ticker].append(row)
-
-        signal_rows: List[Dict[str, Any]] = []
-        for ticker, rows in by_ticker.items():
-            if not rows:
-                continue
-
-            pos = 0.0
-            neg = 0.0
-            counts: Counter[str] = Counter()
-            source_counts: Counter[str] = Counter()
-            x_handles: Counter[str] = Counter()
-            source_event_ids: List[int] = []
-            sorted_rows = sorted(rows, key=lambda item: item.get("published_at", ""), reverse=True)
-            latest_x_at = ""
-            latest_news_at = ""
-
-            for row in sorted_rows[:24]:
-                value = row["strength"] * row["weight"] * row["map_confidence"]
-                if row["direction"] == "LONG":
-                    pos += value
-                elif row["direction"] == "SHORT":
-                    neg += value
-                source_event_ids.append(int(row["event_id"]))
-                counts[str(row["event_type"])] += 1
-                source_type = str(row.get("source_type") or "article").strip().lower()
-                source_counts[source_type] += 1
-                published_at = _to_iso(row.get("published_at"))
-                if source_type == "x_grok":
-                    if not latest_x_at:
-                        latest_x_at = published_at
-                    handle = str(row.get("source_handle") or "").strip()
-                    if handle:
-                        x_handles[handle] += 1
-                elif source_type == "article" and not latest_news_at:
-                    latest_news_at = published_at
-
-            event_count = len(rows)
-            net = pos - neg
-            side = "LONG" if net >= 0 else "SHORT"
-            magnitude = _clamp(abs(net) / max(0.1, pos + neg), 0.0, 1.0)
-            score = _clamp(42 + magnitude * 38 + min(event_count, 10) * 2.2, 0.0, 100.0)
-            level = _risk_level(score)
-            confidence = _clamp(0.44 + magnitude * 0.26 + min(event_count, 8) * 0.03, 0.4, 0.95)
-            expire_hours = 96 if level in ("L3", "L4") else 72
-            trigger_factors = [
-                {"event_type": name, "count": count}
-                for name, count in counts.most_common(3)
-            ]
-            x_count = int(source_counts.get("x_grok", 0))
-            article_count = int(source_counts.get("article", 0))
-            other_count = max(0, sum(source_counts.values()) - x_count - article_count)
-            source_total = max(1, x_count + article_count + other_count)
-            x_ratio = round(x_count / source_total, 4)
-            event_diversity = min(1.0, len(counts) / 3.0)
-            count_density = min(1.0, event_count / 8.0)
-            mixed_flag = bool(x_count > 0 and article_count > 0)
-            resonance_score = _clamp(
-                (0.5 if mixed_flag else 0.0) + event_diversity * 0.25 + count_density * 0.25,
-                0.0,
-                1.0,
+        if self._columnar_enabled():
+            aggregates = signal_columns.aggregate_ticker_events(
+                event_bundle,
+                recent_limit=SIGNAL_RECENT_EVENTS,
+                now_iso=_now_utc().isoformat(),
             )
-            top_x_handles = [name for name, _ in x_handles.most_common(3)]
-            source_mix = {
-                "x_count": x_count,
-                "article_count": article_count,
-                "other_count": other_count,
-                "source_total": source_total,
-                "x_ratio": x_ratio,
-                "mixed_sources": mixed_flag,
-                "resonance_score": round(resonance_score, 4),
-                "top_x_handles": top_x_handles,
-                "latest_x_at": latest_x_at,
-                "latest_news_at": latest_news_at,
-            }
-
-            explanation = str(sorted_rows[0].get("summary") or f"{ticker} 事件聚合")[:220]
-            if x_count > 0:
-                explanation = (
-                    f"{explanation} | X贡献 {x_count}/{source_total}"
-                    f"({int(round(x_ratio * 100))}%)"
-                )[:220]
+        else:
+            by_ticker: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for row in event_bundle:
+                ticker = str(row.get("ticker") or "")
+                if ticker:
+                    by_ticker[ticker].append(row)
+            aggregates = [
+                (ticker, self._aggregate_ticker_events(rows), len(rows))
+                for ticker, rows in by_ticker.items()
+                if rows
+            ]
 
-            signal_rows.append(
-                {
-                    "signal_key": f"{ticker}:{run_id}",
-                    "ticker": ticker,
-                    "level": level,
-                    "side": side,
-                    "signal_score": round(score, 2),
-                    "confidence": round(confidence, 4),
-                    "trigger_factors": trigger_factors,
-                    "llm_used": bool(self.llm_client),
-                    "explanation": explanation,
-                    "source_event_ids": source_event_ids[:20],
-                    "source_mix": source_mix,
-                    "expires_at": (now + timedelta(hours=expire_hours)).isoformat(),
-                    "as_of": now.isoformat(),
-                    "run_id": run_id,
-                    "is_active": True,
-                }
+        signal_rows = [
+            self._signal_from_aggregate(
+                ticker,
+                aggregate,
+                event_count=event_count,
+                run_id=run_id,
+                now=now,
             )
-
+            for ticker, aggregate, event_count in aggregates
+        ]
         signal_rows.sort(key=lambda row: float(row.get("signal_score", 0.0)), reverse=True)
         return signal_rows
 
-    def _build_regime(self, run_id: str, now: datetime) -> Dict[str, Any]:
-        prices: Dict[str, Any] = {}
-        if _fetch_market_prices is not None:
-            try:
-                prices = _fetch_market_prices() or {}
-            except Exception as e:
-                logger.warning(f"[V2_MARKET_PRICE_FALLBACK] error={str(e)[:120]}")
-
-        vix = _safe_float(prices.get("vix"), 19.0)
-        us10y = _safe_float(prices.get("us10y"), 4.1)
-        dxy = _safe_float(prices.get("dxy"), 103.0)
+    def _attach_event_tickers(
+        self,
+        event_rows: List[Dict[str, Any]],
+        tickers: Optional[Set[str]] = None,
+    ) -> List[Dict[str, Any]]:
+        """为一页事件补齐 ticker 映射，返回聚合行；tickers 非空时只保留这些 ticker。"""
+        event_map = {int(row.get("id") or 0): row for row in event_rows}
+        event_ids = [event_id for event_id in event_map if event_id > 0]
+        bundle: List[Dict[str, Any]] = []
+        for start in range(0, len(event_ids), 250):
+            map_rows = (
+                self.supabase.table("stock_event_tickers_v2")
+                .select("event_id,ticker,role,weight,confidence")
+                .in_("event_id", event_ids[start:start + 250])
+                .execute()
+                .data
+                or []
+            )
+            for row in map_rows:
+                event_row = event_map.get(int(row.get("event_id") or 0))
+                if not event_row:
+                    continue
+                item = self._bundle_row(event_row, row)
+                if item["ticker"] and (tickers is None or item["ticker"] in tickers):
+                    bundle.append(item)
+        return bundle
 
-        score = 0.0
+    def _load_event_changes_since(
+        self,
+        since_iso: Optional[str],
+        cutoff_iso: str,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], Optional[Tuple[str, int]]]:
+        """按 id keyset 分页读取事件变更（不设 4000 条上限）。
+
+        since_iso 为 None（首次构建）时读取窗口内全部活跃事件，否则读取 updated_at >= since 的事件，
+        包括已停用的。返回 (窗口内活跃事件的聚合行, 已停用或移出窗口事件的聚合行, 最大 (updated_at, id))。
+        """
+        live: List[Dict[str, Any]] = []
+        gone: List[Dict[str, Any]] = []
+        high: Optional[Tuple[str, int]] = None
+        last_id = 0
+        while True:
+            query = self.supabase.table("stock_events_v2").select(
+                "id,event_type,direction,strength,summary,published_at,as_of,"
+                "source_type,source_ref,details,is_active,updated_at"
+            )
+            if since_iso is None:
+                query = query.eq("is_active", True).gte("as_of", cutoff_iso)
+            else:
+                query = query.gte("updated_at", since_iso)
+            event_rows = (
+                query.gt("id", last_id).order("id").limit(SIGNAL_STATE_PAGE_SIZE).execute().data or []
+            )
+            if not event_rows:
+                break
+            active: List[Dict[str, Any]] = []
+            inactive: List[Dict[str, Any]] = []
+            for row in event_rows:
+                row_cursor = (_parse_as_of(row.get("updated_at")).isoformat(), int(row.get("id") or 0))
+                if high is None or row_cursor > high:
+                    high = row_cursor
+                in_window = _parse_as_of(row.get("as_of")).isoformat() >= cutoff_iso
+                (active if row.get("is_active") and in_window else inactive).append(row)
+            live.extend(self._attach_event_tickers(active))
+            gone.extend(self._attach_event_tickers(inactive))
+            if len(event_rows) < SIGNAL_STATE_PAGE_SIZE:
+                break
+            last_id = int(event_rows[-1].get("id") or 0)
+        return live, gone, high
+
+    def _load_ticker_event_rows(self, tickers: Set[str], cutoff_iso: str) -> List[Dict[str, Any]]:
+        """按 ticker 重建窗口内全部事件（最近事件过期、需要补位时使用）。"""
+        bundle: List[Dict[str, Any]] = []
+        ordered = sorted(tickers)
+        for start in range(0, len(ordered), 50):
+            chunk = ordered[start:start + 50]
+            event_ids: Set[int] = set()
+            last_id = 0
+            while True:
+                map_rows = (
+                    self.supabase.table("stock_event_tickers_v2")
+                    .select("id,event_id")
+                    .in_("ticker", chunk)
+                    .gte("as_of", cutoff_iso)
+                    .gt("id", last_id)
+                    .order("id")
+                    .limit(SIGNAL_STATE_PAGE_SIZE)
+                    .execute()
+                    .data
+                    or []
+                )
+                event_ids.update(int(row.get("event_id") or 0) for row in map_rows)
+                if len(map_rows) < SIGNAL_STATE_PAGE_SIZE:
+                    break
+                last_id = int(map_rows[-1].get("id") or 0)
+
+            ids = sorted(event_id for event_id in event_ids if event_id > 0)
+            for id_start in range(0, len(ids), 250):
+                event_rows = (
+                    self.supabase.table("stock_events_v2")
+                    .select(
+                        "id,event_type,direction,strength,summary,published_at,as_of,"
+                        "source_type,source_ref,details"
+                    )
+                    .in_("id", ids[id_start:id_start + 250])
+                    .eq("is_active", True)
+                    .gte("as_of", cutoff_iso)
+                    .execute()
+                    .data
+                    or []
+                )
+                if event_rows:
+                    bundle.extend(self._attach_event_tickers(event_rows, tickers=set(chunk)))
+        return bundle
+
+    def _load_signal_state(self, lookback_hours: int) -> Dict[str, Dict[str, Any]]:
+        """读取各 ticker 的聚合摘要；事件窗口等大字段只按需读取脏 ticker。"""
+        state: Dict[str, Dict[str, Any]] = {}
+        last_ticker = ""
+        while True:
+            query = (
+                self.supabase.table("stock_ticker_signal_state_v2")
+                .select("ticker,event_count,oldest_as_of,aggregate")
+                .eq("lookback_hours", int(lookback_hours))
+            )
+            if last_ticker:
+                query = query.gt("ticker", last_ticker)
+            rows = query.order("ticker").limit(SIGNAL_STATE_PAGE_SIZE).execute().data or []
+            for row in rows:
+                ticker = str(row.get("ticker") or "").upper()
+                aggregate = row.get("aggregate")
+                if not ticker or not isinstance(aggregate, dict):
+                    continue
+                state[ticker] = {
+                    "event_count": int(_safe_float(row.get("event_count"), 0)),
+                    "oldest_as_of": _parse_as_of(row.get("oldest_as_of")).isoformat(),
+                    "aggregate": aggregate,
+                }
+            if len(rows) < SIGNAL_STATE_PAGE_SIZE:
+                break
+            last_ticker = str(rows[-1].get("ticker") or "")
+        return state
+
+    @profiled("signal_state_detail")
+    def _load_signal_state_detail(
+        self,
+        lookback_hours: int,
+        tickers: Set[str],
+    ) -> Dict[str, Dict[str, Any]]:
+        """读取指定 ticker 的事件窗口 {event_id:role → as_of} 与最近 24 条事件。"""
+        details: Dict[str, Dict[str, Any]] = {}
+        ordered = sorted(tickers)
+        for start in range(0, len(ordered), 200):
+            rows = (
+                self.supabase.table("stock_ticker_signal_state_v2")
+                .select("ticker,event_window,recent_events")
+                .eq("lookback_hours", int(lookback_hours))
+                .in_("ticker", ordered[start:start + 200])
+                .execute()
+                .data
+                or []
+            )
+            for row in rows:
+                window = row.get("event_window")
+                recent = row.get("recent_events")
+                details[str(row.get("ticker") or "").upper()] = {
+                    "window": {str(k): str(v) for k, v in window.items()}
+                    if isinstance(window, dict)
+                    else {},
+                    "recent": [item for item in recent if isinstance(item, dict)]
+                    if isinstance(recent, list)
+                    else [],
+                }
+        return details
+
+    def _load_signal_watermark(self, lookback_hours: int) -> Optional[Tuple[str, int]]:
+        """读取信号聚合状态水位 (last_event_updated_at, last_event_id)；无记录时返回 None。"""
+        rows = (
+            self.supabase.table("stock_signal_state_watermarks_v2")
+            .select("last_event_updated_at,last_event_id")
+            .eq("lookback_hours", int(lookback_hours))
+            .limit(1)
+            .execute()
+            .data
+            or []
+        )
+        if not rows or not rows[0].get("last_event_updated_at"):
+            return None
+        return (
+            _parse_as_of(rows[0]["last_event_updated_at"]).isoformat(),
+            int(_safe_float(rows[0].get("last_event_id"), 0)),
+        )
+
+    def _commit_signal_watermark(
+        self,
+        lookback_hours: int,
+        cursor: Tuple[str, int],
+        run_id: str,
+        processed: int,
+    ) -> None:
+        """状态写回成功后推进水位。"""
+        updated_at, last_id = cursor
+        self.supabase.table("stock_signal_state_watermarks_v2").upsert(
+            {
+                "lookback_hours": int(lookback_hours),
+                "last_event_updated_at": updated_at,
+                "last_event_id": int(last_id),
+                "run_id": run_id,
+                "processed_count": int(processed),
+                "as_of": _now_utc().isoformat(),
+            },
+            on_conflict="lookback_hours",
+        ).execute()
+
+    def _merge_recent_events(
+        self,
+        recent: List[Dict[str, Any]],
+        rows: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """按 (event_id, role) 覆盖合并，保留 published_at 最新的 24 条。"""
+        incoming = {(int(row["event_id"]), str(row.get("role") or "primary")): row for row in rows}
+        merged = [
+            row
+            for row in recent
+            if (int(row.get("event_id") or 0), str(row.get("role") or "primary")) not in incoming
+        ]
+        merged.extend(incoming.values())
+        merged.sort(key=_recency_key, reverse=True)
+        return merged[:SIGNAL_RECENT_EVENTS]
+
+    def _save_signal_state(
+        self,
+        lookback_hours: int,
+        details: Dict[str, Dict[str, Any]],
+        removed: Set[str],
+        run_id: str,
+        reset: bool = False,
+    ) -> None:
+        """写回脏 ticker 的状态；reset=True（无水位的首次构建）时先清空该窗口的旧状态。"""
+        if reset:
+            (
+                self.supabase.table("stock_ticker_signal_state_v2")
+                .delete()
+                .eq("lookback_hours", int(lookback_hours))
+                .execute()
+            )
+        now_iso = _now_utc().isoformat()
+        rows = [
+            {
+                "lookback_hours": int(lookback_hours),
+                "ticker": ticker,
+                "event_count": len(detail["window"]),
+                "oldest_as_of": min(detail["window"].values()),
+                "event_window": detail["window"],
+                "recent_events": detail["recent"],
+                "aggregate": detail["aggregate"],
+                "run_id": run_id,
+                "as_of": now_iso,
+            }
+            for ticker, detail in sorted(details.items())
+        ]
+        for start in range(0, len(rows), 200):
+            self.supabase.table("stock_ticker_signal_state_v2").upsert(
+                rows[start:start + 200],
+                on_conflict="lookback_hours,ticker",
+            ).execute()
+        ordered = sorted(removed)
+        for start in range(0, len(ordered), 200):
+            (
+                self.supabase.table("stock_ticker_signal_state_v2")
+                .delete()
+                .eq("lookback_hours", int(lookback_hours))
+                .in_("ticker", ordered[start:start + 200])
+                .execute()
+            )
+
+    @profiled("signals_incremental")
+    def _build_signals_incremental(
+        self,
+        run_id: str,
+        lookback_hours: int,
+        now: datetime,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """基于持久化的 ticker 聚合状态增量生成信号；状态不可用时返回 None 由调用方全量重建。
+
+        - 只读取水位之后有变更（updated_at）的事件，以及最老事件已超出 lookback 的 ticker 的状态
+        - 停用（is_active=false）或 as_of 移出窗口的事件与过期事件一样从状态中剔除，结果与全量重建一致
+        - 仅当最近 24 条中有事件被剔除且窗口里还有未缓存的事件时，才按 ticker 回源重建
+        - 只对脏 ticker 重新聚合，其余 ticker 直接用已存聚合生成信号行
+        """
+        cutoff_iso = (now - timedelta(hours=lookback_hours)).isoformat()
+        try:
+            cursor = self._load_signal_watermark(lookback_hours)
+            state = self._load_signal_state(lookback_hours) if cursor else {}
+            since_iso: Optional[str] = None
+            if cursor is not None:
+                since = _parse_as_of(cursor[0]) - timedelta(minutes=SIGNAL_STATE_OVERLAP_MINUTES)
+                since_iso = since.isoformat()
+            delta_rows, gone_rows, high = self._load_event_changes_since(since_iso, cutoff_iso)
+
+            rows_by_ticker: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+            for row in delta_rows:
+                rows_by_ticker[row["ticker"]].append(row)
+            gone_ids = {str(row["event_id"]) for row in gone_rows}
+            expiring = {
+                ticker for ticker, item in state.items() if item["oldest_as_of"] < cutoff_iso
+            }
+            dirty = set(rows_by_ticker) | expiring | ({row["ticker"] for row in gone_rows} & set(state))
+            details = self._load_signal_state_detail(lookback_hours, dirty & set(state))
+
+            reload: Set[str] = set()
+            for ticker in dirty:
+                detail = details.setdefault(ticker, {"window": {}, "recent": []})
+                window = detail["window"]
+                expired = {
+                    key
+                    for key, as_of in window.items()
+                    if as_of < cutoff_iso or key.split(":", 1)[0] in gone_ids
+                }
+                for key in expired:
+                    window.pop(key, None)
+                recent = [
+                    row
+                    for row in detail["recent"]
+                    if f"{int(row.get('event_id') or 0)}:{row.get('role') or 'primary'}" not in expired
+                ]
+                if len(recent) < len(detail["recent"]) and len(window) > len(recent):
+                    reload.add(ticker)
+                for row in rows_by_ticker.get(ticker, []):
+                    window[f"{row['event_id']}:{row['role']}"] = row["as_of"]
+                detail["recent"] = self._merge_recent_events(recent, rows_by_ticker.get(ticker, []))
+
+            if reload:
+                reloaded: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+                for row in self._load_ticker_event_rows(reload, cutoff_iso):
+                    reloaded[row["ticker"]].append(row)
+                for ticker in reload:
+                    rows = reloaded.get(ticker, [])
+                    details[ticker] = {
+                        "window": {f"{row['event_id']}:{row['role']}": row["as_of"] for row in rows},
+                        "recent": self._merge_recent_events([], rows),
+                    }
+
+            removed: Set[str] = set()
+            for ticker in dirty:
+                detail = details[ticker]
+                if not detail["window"]:
+                    removed.add(ticker)
+                    details.pop(ticker, None)
+                    state.pop(ticker, None)
+                    continue
+                detail["aggregate"] = self._aggregate_ticker_events(detail["recent"])
+                state[ticker] = {
+                    "event_count": len(detail["window"]),
+                    "oldest_as_of": min(detail["window"].values()),
+                    "aggregate": detail["aggregate"],
+                }
+
+            self._save_signal_state(
+                lookback_hours,
+                {ticker: details[ticker] for ticker in dirty if ticker in details},
+                removed,
+                run_id=run_id,
+                reset=cursor is None,
+            )
+            if high is not None and (cursor is None or high > cursor):
+                self._commit_signal_watermark(
+                    lookback_hours,
+                    high,
+                    run_id=run_id,
+                    processed=len(delta_rows) + len(gone_rows),
+                )
+        except Exception as e:
+            logger.warning(f"[STOCK_V2_SIGNAL_STATE_FALLBACK] error={str(e)[:160]}")
+            return None
+
+        self.stats["signal_state_delta_rows"] += len(delta_rows)
+        self.stats["signal_state_dirty_tickers"] += len(dirty)
+        self.stats["signal_state_reloaded_tickers"] += len(reload)
+        logger.info(
+            f"[STOCK_V2_SIGNAL_STATE] tickers={len(state)} delta_rows={len(delta_rows)} "
+            f"gone_rows={len(gone_rows)} dirty={len(dirty)} expired={len(expiring)} reloaded={len(reload)} "
+            f"removed={len(removed)} bootstrap={cursor is None}"
+        )
+        signal_rows = [
+            self._signal_from_aggregate(
+                ticker,
+                item["aggregate"],
+                event_count=item["event_count"],
+                run_id=run_id,
+                now=now,
+            )
+            for ticker, item in state.items()
+        ]
+        signal_rows.sort(key=lambda row: float(row.get("signal_score", 0.0)), reverse=True)
+        return signal_rows
+
+    @profiled("regime")
+    def _build_regime(self, run_id: str, now: datetime) -> Dict[str, Any]:
+        prices: Dict[str, Any] = {}
+        if _fetch_market_prices is not None:
+            try:
+                prices = _fetch_market_prices() or {}
+            except Exception as e:
+                logger.warning(f"[V2_MARKET_PRICE_FALLBACK] error={str(e)[:120]}")
+
+        vix = _safe_float(prices.get("vix"), 19.0)
+        us10y = _safe_float(prices.get("us10y"), 4.1)
+        dxy = _safe_float(prices.get("dxy"), 103.0)
+
+        score = 0.0
         if vix <= 16:
             score += 0.35
         elif vix >= 24:
@@ -1440,6 +2503,7 @@ class StockPipelineV2:
             "is_active": True,
         }
 
+    @profiled("x_context")
     def _load_x_quality_context(self) -> Dict[str, Any]:
         """加载 X 源健康状态与账号质量评分。"""
         context: Dict[str, Any] = {
@@ -1493,6 +2557,144 @@ class StockPipelineV2:
 
         return context
 
+    def _opportunity_inputs(
+        self,
+        signal: Dict[str, Any],
+        x_handle_scores: Dict[str, Any],
+        x_avg_score: float,
+    ) -> Dict[str, Any]:
+        """解析机会打分所需的信号字段与 X 账号质量。"""
+        source_mix_raw = signal.get("source_mix")
+        source_mix = source_mix_raw if isinstance(source_mix_raw, dict) else {}
+        top_x_handles = source_mix.get("top_x_handles")
+        handles = top_x_handles if isinstance(top_x_handles, list) else []
+        quality_scores = [
+            _clamp(_safe_float(x_handle_scores.get(str(handle or "").strip()), x_avg_score), 0.0, 100.0)
+            for handle in handles
+            if str(handle or "").strip()
+        ]
+        return {
+            "side": str(signal.get("side") or "LONG"),
+            "signal_score": _safe_float(signal.get("signal_score"), 0.0),
+            "confidence": _safe_float(signal.get("confidence"), 0.5),
+            "source_mix": source_mix,
+            "x_ratio": _clamp(_safe_float(source_mix.get("x_ratio"), 0.0), 0.0, 1.0),
+            "x_count": max(0, int(_safe_float(source_mix.get("x_count"), 0.0))),
+            "source_total": max(1, int(_safe_float(source_mix.get("source_total"), 0.0))),
+            "mixed_sources": bool(source_mix.get("mixed_sources")),
+            "resonance_score": _clamp(_safe_float(source_mix.get("resonance_score"), 0.0), 0.0, 1.0),
+            "x_quality": round(
+                (sum(quality_scores) / max(1, len(quality_scores)))
+                if quality_scores
+                else x_avg_score,
+                2,
+            ),
+        }
+
+    def _score_opportunity(
+        self,
+        inputs: Dict[str, Any],
+        regime_score: float,
+        boost_factor: float,
+    ) -> Tuple[float, float]:
+        """机会分与置信度；boost_factor 为 X 源健康度对来源加成的折扣。"""
+        x_ratio = inputs["x_ratio"]
+        x_count = inputs["x_count"]
+        x_quality = inputs["x_quality"]
+        macro_boost = regime_score if inputs["side"] == "LONG" else -regime_score
+        source_boost = 0.0
+        if x_count > 0:
+            source_boost += 1.2 + x_ratio * 1.8
+        if inputs["mixed_sources"]:
+            source_boost += 1.5
+        source_boost += inputs["resonance_score"] * 1.6
+        if x_count > 0 and x_quality < 55:
+            source_boost -= 1.1
+        source_boost *= boost_factor
+        opp_score = _clamp(
+            inputs["signal_score"] * 0.82 + (macro_boost + 1.0) * 9.0 + source_boost,
+            0.0,
+            100.0,
+        )
+        opp_conf = _clamp(inputs["confidence"] * 0.82 + 0.13, 0.4, 0.95)
+        if x_count > 0 and x_quality < 50 and x_ratio >= 0.6:
+            opp_conf = _clamp(opp_conf - 0.08, 0.35, 0.95)
+        return opp_score, opp_conf
+
+    def _opportunity_row(
+        self,
+        signal: Dict[str, Any],
+        inputs: Dict[str, Any],
+        opp_score: float,
+        opp_conf: float,
+        regime: Dict[str, Any],
+        run_id: str,
+        now: datetime,
+    ) -> Dict[str, Any]:
+        """物化单条机会（文案、辩论视图、失效条件）。"""
+        side = inputs["side"]
+        signal_score = inputs["signal_score"]
+        source_mix = inputs["source_mix"]
+        x_ratio = inputs["x_ratio"]
+        x_count = inputs["x_count"]
+        horizon = "A" if signal_score >= 65 else "B"
+        expiry = now + timedelta(hours=72 if horizon == "A" else 24 * 14)
+
+        if side == "LONG":
+            invalid_if = "若风险偏好转弱且相关事件显著减少，则机会失效。"
+        else:
+            invalid_if = "若风险偏好快速修复且负面事件衰减，则机会失效。"
+        x_note = ""
+        if x_count > 0:
+            x_note = (
+                f" X贡献 {x_count}/{inputs['source_total']}"
+                f"（{int(round(x_ratio * 100))}%），"
+                f"共振 {int(round(inputs['resonance_score'] * 100))}，"
+                f"质量 {int(round(inputs['x_quality']))}。"
+            )
+        debate_view = self._build_ai_debate_view(
+            opportunity={
+                "ticker": signal.get("ticker"),
+                "side": side,
+                "confidence": opp_conf,
+                "source_mix": source_mix,
+            },
+            regime=regime,
+        )
+        counter_view = str(debate_view.get("counter_case") or "")
+        uncertainty_flags = [
+            str(item or "").strip()
+            for item in (debate_view.get("uncertainties") or [])
+            if str(item or "").strip()
+        ]
+
+        return {
+            "opportunity_key": f"{signal['ticker']}:{side}:{horizon}:{run_id}",
+            "ticker": signal["ticker"],
+            "side": side,
+            "horizon": horizon,
+            "opportunity_score": round(opp_score, 2),
+            "confidence": round(opp_conf, 4),
+            "risk_level": signal.get("level", "L1"),
+            "why_now": (
+                f"{signal['ticker']} 当前信号分 {signal_score:.1f}，方向 {side}，"
+                f"市场状态 {regime.get('risk_state', 'neutral')}。"
+                f"{x_note}"
+            ),
+            "invalid_if": invalid_if,
+            "catalysts": signal.get("trigger_factors") or [],
+            "source_signal_ids": [],
+            "source_event_ids": signal.get("source_event_ids") or [],
+            "source_mix": source_mix,
+            "counter_view": counter_view[:260],
+            "uncertainty_flags": uncertainty_flags[:4],
+            "expires_at": expiry.isoformat(),
+            "as_of": now.isoformat(),
+            "run_id": run_id,
+            "is_active": True,
+        }
+
+    @profiled("build_opportunities")
     def _build_opportunities(
         self,
         signals: List[Dict[str, Any]],
@@ -1508,168 +2710,222 @@ class StockPipelineV2:
         handle_scores = x_ctx.get("handle_scores")
         x_handle_scores = handle_scores if isinstance(handle_scores, dict) else {}
         x_avg_score = _clamp(_safe_float(x_ctx.get("avg_quality_score"), 60.0), 0.0, 100.0)
-        rows: List[Dict[str, Any]] = []
-        for signal in signals:
-            side = str(signal.get("side") or "LONG")
-            signal_score = _safe_float(signal.get("signal_score"), 0.0)
-            confidence = _safe_float(signal.get("confidence"), 0.5)
-            macro_boost = regime_score if side == "LONG" else -regime_score
-            source_mix_raw = signal.get("source_mix")
-            source_mix = source_mix_raw if isinstance(source_mix_raw, dict) else {}
-            x_ratio = _clamp(_safe_float(source_mix.get("x_ratio"), 0.0), 0.0, 1.0)
-            x_count = max(0, int(_safe_float(source_mix.get("x_count"), 0.0)))
-            source_total = max(1, int(_safe_float(source_mix.get("source_total"), 0.0)))
-            mixed_sources = bool(source_mix.get("mixed_sources"))
-            resonance_score = _clamp(_safe_float(source_mix.get("resonance_score"), 0.0), 0.0, 1.0)
-            top_x_handles = source_mix.get("top_x_handles")
-            handles = top_x_handles if isinstance(top_x_handles, list) else []
-            quality_scores = [
-                _clamp(_safe_float(x_handle_scores.get(str(handle or "").strip()), x_avg_score), 0.0, 100.0)
-                for handle in handles
-                if str(handle or "").strip()
-            ]
-            x_quality = round(
-                (sum(quality_scores) / max(1, len(quality_scores)))
-                if quality_scores
-                else x_avg_score,
-                2,
-            )
-            horizon = "A" if signal_score >= 65 else "B"
-            source_boost = 0.0
-            if x_count > 0:
-                source_boost += 1.2 + x_ratio * 1.8
-            if mixed_sources:
-                source_boost += 1.5
-            source_boost += resonance_score * 1.6
-            if x_count > 0 and x_quality < 55:
-                source_boost -= 1.1
-            if x_health_status == "critical" or x_freshness_sec > 43200:
-                source_boost *= 0.2
-            elif x_health_status == "degraded" or x_freshness_sec > 21600:
-                source_boost *= 0.6
-            opp_score = _clamp(
-                signal_score * 0.82 + (macro_boost + 1.0) * 9.0 + source_boost,
-                0.0,
-                100.0,
-            )
-            opp_conf = _clamp(confidence * 0.82 + 0.13, 0.4, 0.95)
-            if x_count > 0 and x_quality < 50 and x_ratio >= 0.6:
-                opp_conf = _clamp(opp_conf - 0.08, 0.35, 0.95)
-            expiry = now + timedelta(hours=72 if horizon == "A" else 24 * 14)
-
-            if side == "LONG":
-                invalid_if = "若风险偏好转弱且相关事件显著减少，则机会失效。"
-            else:
-                invalid_if = "若风险偏好快速修复且负面事件衰减，则机会失效。"
-            x_note = ""
-            if x_count > 0:
-                x_note = (
-                    f" X贡献 {x_count}/{source_total}"
-                    f"（{int(round(x_ratio * 100))}%），"
-                    f"共振 {int(round(resonance_score * 100))}，"
-                    f"质量 {int(round(x_quality))}。"
+        boost_factor = 1.0
+        if x_health_status == "critical" or x_freshness_sec > 43200:
+            boost_factor = 0.2
+        elif x_health_status == "degraded" or x_freshness_sec > 21600:
+            boost_factor = 0.6
+
+        inputs = [self._opportunity_inputs(signal, x_handle_scores, x_avg_score) for signal in signals]
+        if self._columnar_enabled():
+            # 先列式打分排序，只为前 80 个机会构建文案与辩论视图
+            opp_scores, opp_confs = signal_columns.score_opportunities(inputs, regime_score, boost_factor)
+            ranked = signal_columns.rank_desc([round(score, 2) for score in opp_scores], OPPORTUNITY_LIMIT)
+            return [
+                self._opportunity_row(
+                    signals[idx],
+                    inputs[idx],
+                    opp_scores[idx],
+                    opp_confs[idx],
+                    regime,
+                    run_id=run_id,
+                    now=now,
                 )
-            debate_view = self._build_ai_debate_view(
-                opportunity={
-                    "ticker": signal.get("ticker"),
-                    "side": side,
-                    "confidence": opp_conf,
-                    "source_mix": source_mix,
-                },
-                regime=regime,
-            )
-            counter_view = str(debate_view.get("counter_case") or "")
-            uncertainty_flags = [
-                str(item or "").strip()
-                for item in (debate_view.get("uncertainties") or [])
-                if str(item or "").strip()
+                for idx in ranked
             ]
 
+        rows: List[Dict[str, Any]] = []
+        for signal, item in zip(signals, inputs):
+            opp_score, opp_conf = self._score_opportunity(item, regime_score, boost_factor)
             rows.append(
-                {
-                    "opportunity_key": f"{signal['ticker']}:{side}:{horizon}:{run_id}",
-                    "ticker": signal["ticker"],
-                    "side": side,
-                    "horizon": horizon,
-                    "opportunity_score": round(opp_score, 2),
-                    "confidence": round(opp_conf, 4),
-                    "risk_level": signal.get("level", "L1"),
-                    "why_now": (
-                        f"{signal['ticker']} 当前信号分 {signal_score:.1f}，方向 {side}，"
-                        f"市场状态 {regime.get('risk_state', 'neutral')}。"
-                        f"{x_note}"
-                    ),
-                    "invalid_if": invalid_if,
-                    "catalysts": signal.get("trigger_factors") or [],
-                    "source_signal_ids": [],
-                    "source_event_ids": signal.get("source_event_ids") or [],
-                    "source_mix": source_mix,
-                    "counter_view": counter_view[:260],
-                    "uncertainty_flags": uncertainty_flags[:4],
-                    "expires_at": expiry.isoformat(),
-                    "as_of": now.isoformat(),
-                    "run_id": run_id,
-                    "is_active": True,
-                }
+                self._opportunity_row(signal, item, opp_score, opp_conf, regime, run_id=run_id, now=now)
             )
         rows.sort(key=lambda row: float(row.get("opportunity_score", 0.0)), reverse=True)
-        return rows[:80]
+        return rows[:OPPORTUNITY_LIMIT]
 
+    def _insert_serve_rows(
+        self,
+        table_name: str,
+        rows: List[Dict[str, Any]],
+    ) -> List[Dict[str, Any]]:
+        """分块插入并返回写入后的行（含 id），调用方无需再按 run_id 回读。"""
+        inserted: List[Dict[str, Any]] = []
+        optional_columns = [
+            "source_mix",
+            "counter_view",
+            "uncertainty_flags",
+            "evidence_ids",
+            "path_ids",
+        ]
+        drop_cols: List[str] = []
+        for start in range(0, len(rows), SERVE_INSERT_CHUNK_SIZE):
+            chunk = rows[start:start + SERVE_INSERT_CHUNK_SIZE]
+            if drop_cols:
+                chunk = [{key: value for key, value in row.items() if key not in drop_cols} for row in chunk]
+            try:
+                returned = (
+                    self.supabase.table(table_name)
+                    .insert(chunk, returning=RETURN_REPRESENTATION)
+                    .execute()
+                    .data
+                )
+            except Exception as e:
+                error_text = str(e).lower()
+                missing = [col for col in optional_columns if col in error_text and col not in drop_cols]
+                if not missing:
+                    raise
+                drop_cols.extend(missing)
+                fallback_rows = [
+                    {key: value for key, value in row.items() if key not in drop_cols}
+                    for row in chunk
+                ]
+                returned = (
+                    self.supabase.table(table_name)
+                    .insert(fallback_rows, returning=RETURN_REPRESENTATION)
+                    .execute()
+                    .data
+                )
+                logger.warning(
+                    f"[V2_OPTIONAL_COLUMN_MISSING] table={table_name} dropped={','.join(drop_cols)}"
+                )
+            inserted.extend(returned or [])
+        return inserted
+
+    @profiled(lambda self, table_name, *args, **kwargs: f"publish:{table_name}")
     def _replace_active(
         self,
         table_name: str,
         rows: List[Dict[str, Any]],
         clear_when_empty: bool = False,
+        run_id: Optional[str] = None,
+        returned_rows: Optional[List[Dict[str, Any]]] = None,
     ) -> int:
+        """替换 serve 层数据；returned_rows 非 None 时追加写入后的行（含 id）。"""
+        if run_id and self.flags.enable_stock_serve_pointer:
+            return self._publish_serve_layer(
+                table_name,
+                rows,
+                run_id=run_id,
+                clear_when_empty=clear_when_empty,
+                returned_rows=returned_rows,
+            )
         if not rows:
             if clear_when_empty:
                 self.supabase.table(table_name).update({"is_active": False}).eq("is_active", True).execute()
             return 0
         self.supabase.table(table_name).update({"is_active": False}).eq("is_active", True).execute()
+        inserted = self._insert_serve_rows(table_name, rows)
+        if returned_rows is not None:
+            returned_rows.extend(inserted)
+        return len(rows)
+
+    def _publish_serve_layer(
+        self,
+        table_name: str,
+        rows: List[Dict[str, Any]],
+        run_id: str,
+        clear_when_empty: bool = False,
+        returned_rows: Optional[List[Dict[str, Any]]] = None,
+    ) -> int:
+        """版本化发布：先按 run_id 写入新行，写完后单行 upsert 翻转该层指针。
+
+        读端通过 `<table>_live` 视图只看到指针指向的 run，不会读到空窗口或半写入的层；
+        旧 run 的 is_active 清理交给后台 GC，不占发布关键路径。
+        """
+        if not rows and not clear_when_empty:
+            return 0
+        published_at = _now_utc().isoformat()
+        # 本轮行的 as_of 早于更晚启动的并发 run，GC 只清理比它更旧的行
+        gc_before = str(rows[0].get("as_of") or published_at) if rows else published_at
+        inserted = self._insert_serve_rows(table_name, rows)
+        if returned_rows is not None:
+            returned_rows.extend(inserted)
         try:
-            self.supabase.table(table_name).insert(rows).execute()
+            self.supabase.table(SERVE_POINTER_TABLE).upsert(
+                {
+                    "layer": table_name,
+                    "run_id": run_id,
+                    "row_count": len(rows),
+                    "published_at": published_at,
+                },
+                on_conflict="layer",
+            ).execute()
         except Exception as e:
-            error_text = str(e).lower()
-            optional_columns = [
-                "source_mix",
-                "counter_view",
-                "uncertainty_flags",
-                "evidence_ids",
-                "path_ids",
-            ]
-            drop_cols = [col for col in optional_columns if col in error_text]
-            if not drop_cols:
-                raise
-            fallback_rows = [
-                {key: value for key, value in row.items() if key not in drop_cols}
-                for row in rows
-            ]
-            self.supabase.table(table_name).insert(fallback_rows).execute()
             logger.warning(
-                f"[V2_OPTIONAL_COLUMN_MISSING] table={table_name} dropped={','.join(drop_cols)}"
+                f"[V2_SERVE_POINTER_FALLBACK] table={table_name} error={str(e)[:160]}"
+            )
+            self._gc_serve_layer(table_name, run_id=run_id, before_as_of=gc_before)
+            return len(rows)
+
+        self._serve_gc_futures.append(
+            self._serve_gc_executor().submit(
+                self._gc_serve_layer,
+                table_name,
+                run_id,
+                gc_before,
             )
+        )
         return len(rows)
 
+    def _serve_gc_executor(self) -> ThreadPoolExecutor:
+        if self._serve_gc_pool is None:
+            self._serve_gc_pool = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="stock-v2-serve-gc",
+            )
+        return self._serve_gc_pool
+
+    @profiled("serve_gc")
+    def _gc_serve_layer(self, table_name: str, run_id: str, before_as_of: str) -> None:
+        """下线已被指针替换的旧 run（只改仍为 active 的行，历史行保留给评估脚本）。"""
+        (
+            self.supabase.table(table_name)
+            .update({"is_active": False})
+            .eq("is_active", True)
+            .neq("run_id", run_id)
+            .lt("as_of", before_as_of)
+            .execute()
+        )
+
+    @profiled("serve_gc_wait")
+    def _drain_serve_gc(self) -> int:
+        """等待本轮后台 GC 完成；失败只告警，不影响已发布的指针。"""
+        done = 0
+        for future in self._serve_gc_futures:
+            try:
+                future.result()
+                done += 1
+            except Exception as e:
+                logger.warning(f"[V2_SERVE_GC_FAILED] error={str(e)[:160]}")
+        self._serve_gc_futures = []
+        return done
+
     def _safe_replace_optional_table(
         self,
         table_name: str,
         rows: List[Dict[str, Any]],
+        run_id: Optional[str] = None,
+        returned_rows: Optional[List[Dict[str, Any]]] = None,
     ) -> int:
         """写入可选表，若表未创建则告警降级。"""
         try:
-            return self._replace_active(table_name, rows, clear_when_empty=True)
+            return self._replace_active(
+                table_name,
+                rows,
+                clear_when_empty=True,
+                run_id=run_id,
+                returned_rows=returned_rows,
+            )
         except Exception as e:
             logger.warning(f"[V2_OPTIONAL_TABLE_FALLBACK] table={table_name} error={str(e)[:160]}")
             return 0
 
     def _load_active_opportunities_by_run(self, run_id: str) -> List[Dict[str, Any]]:
-        """加载本轮机会行，用于证据/链路二次写入。"""
+        """回读本轮机会整行（写入未返回行时的兜底），用于证据/链路写入与批量回写。"""
         try:
             rows = (
                 self.supabase.table("stock_opportunities_v2")
-                .select(
-                    "id,opportunity_key,ticker,side,confidence,source_event_ids,source_mix,as_of"
-                )
+                .select("*")
                 .eq("run_id", run_id)
                 .eq("is_active", True)
                 .order("opportunity_score", desc=True)
@@ -1698,7 +2954,9 @@ class StockPipelineV2:
         except Exception as e:
             logger.warning(f"[V2_ID_MAP_FALLBACK] table={table_name} error={str(e)[:140]}")
             return {}
+        return self._group_ids_by_opportunity(rows)
 
+    def _group_ids_by_opportunity(self, rows: List[Dict[str, Any]]) -> Dict[int, List[int]]:
         grouped: Dict[int, List[int]] = defaultdict(list)
         for row in rows:
             opp_id = int(row.get("opportunity_id") or 0)
@@ -1707,6 +2965,7 @@ class StockPipelineV2:
                 grouped[opp_id].append(item_id)
         return dict(grouped)
 
+    @profiled("enrich_opportunities")
     def _patch_opportunity_enrichment(
         self,
         opportunities: List[Dict[str, Any]],
@@ -1714,38 +2973,46 @@ class StockPipelineV2:
         path_ids_by_opp: Dict[int, List[int]],
         regime: Dict[str, Any],
     ) -> int:
-        """回写机会证据与反方观点字段。"""
-        updated = 0
+        """回写机会证据与反方观点字段：按 id 单次批量 upsert。
+
+        upsert 对 NOT NULL 列需要整行，opportunities 须为写入返回或回读的整行。
+        """
+        payloads: List[Dict[str, Any]] = []
         for opp in opportunities:
             opp_id = int(opp.get("id") or 0)
             if opp_id <= 0:
                 continue
             debate_view = self._build_ai_debate_view(opp, regime)
-            payload: Dict[str, Any] = {
-                "counter_view": str(debate_view.get("counter_case") or "")[:260],
-                "uncertainty_flags": [
-                    str(item or "").strip()
-                    for item in (debate_view.get("uncertainties") or [])
-                    if str(item or "").strip()
-                ][:4],
-                "evidence_ids": (evidence_ids_by_opp.get(opp_id) or [])[:24],
-                "path_ids": (path_ids_by_opp.get(opp_id) or [])[:12],
-            }
+            payloads.append(
+                {
+                    **opp,
+                    "counter_view": str(debate_view.get("counter_case") or "")[:260],
+                    "uncertainty_flags": [
+                        str(item or "").strip()
+                        for item in (debate_view.get("uncertainties") or [])
+                        if str(item or "").strip()
+                    ][:4],
+                    "evidence_ids": (evidence_ids_by_opp.get(opp_id) or [])[:24],
+                    "path_ids": (path_ids_by_opp.get(opp_id) or [])[:12],
+                }
+            )
+        updated = 0
+        for start in range(0, len(payloads), SERVE_INSERT_CHUNK_SIZE):
+            chunk = payloads[start:start + SERVE_INSERT_CHUNK_SIZE]
             try:
-                (
-                    self.supabase.table("stock_opportunities_v2")
-                    .update(payload)
-                    .eq("id", opp_id)
-                    .execute()
-                )
-                updated += 1
+                self.supabase.table("stock_opportunities_v2").upsert(
+                    chunk,
+                    on_conflict="id",
+                ).execute()
+                updated += len(chunk)
             except Exception as e:
                 logger.warning(
-                    f"[V2_OPP_ENRICH_FALLBACK] opp_id={opp_id} error={str(e)[:160]}"
+                    f"[V2_OPP_ENRICH_FALLBACK] rows={len(chunk)} error={str(e)[:160]}"
                 )
                 break
         return updated
 
+    @profiled("build_snapshot")
     def _build_snapshot(
         self,
         opportunities: List[Dict[str, Any]],
@@ -1839,15 +3106,25 @@ class StockPipelineV2:
             "is_active": True,
         }
 
+    @profiled("serve_layer")
     def refresh_serve_layer(self, run_id: str, lookback_hours: int) -> Dict[str, int]:
         """从事件层重建信号/机会/快照。"""
         now = _now_utc()
         regime = self._build_regime(run_id=run_id, now=now)
         x_context = self._load_x_quality_context()
-        self._replace_active("stock_market_regime_v2", [regime])
+        self._replace_active("stock_market_regime_v2", [regime], run_id=run_id)
 
-        bundle = self._load_event_bundle(lookback_hours=lookback_hours)
-        signal_rows = self._build_signals(bundle, run_id=run_id, now=now)
+        bundle: Optional[List[Dict[str, Any]]] = None
+        signal_rows: Optional[List[Dict[str, Any]]] = None
+        if self.flags.enable_stock_incremental_signals:
+            signal_rows = self._build_signals_incremental(
+                run_id=run_id,
+                lookback_hours=lookback_hours,
+                now=now,
+            )
+        if signal_rows is None:
+            bundle = self._load_event_bundle(lookback_hours=lookback_hours)
+            signal_rows = self._build_signals(bundle, run_id=run_id, now=now)
         if not signal_rows:
             logger.warning("[V2_KEEP_OLD] 未生成新信号，本轮仅刷新市场状态和快照")
             snapshot = self._build_snapshot(
@@ -1858,10 +3135,11 @@ class StockPipelineV2:
                 now=now,
                 x_context=x_context,
             )
-            self._replace_active("stock_dashboard_snapshot_v2", [snapshot])
+            self._replace_active("stock_dashboard_snapshot_v2", [snapshot], run_id=run_id)
+            self._drain_serve_gc()
             return {"signals": 0, "opportunities": 0, "snapshot": 1, "evidence": 0, "paths": 0}
 
-        signal_count = self._replace_active("stock_signals_v2", signal_rows)
+        signal_count = self._replace_active("stock_signals_v2", signal_rows, run_id=run_id)
         opp_rows = self._build_opportunities(
             signal_rows,
             regime,
@@ -1869,18 +3147,46 @@ class StockPipelineV2:
             now=now,
             x_context=x_context,
         )
-        opp_count = self._replace_active("stock_opportunities_v2", opp_rows)
+        inserted_opps: List[Dict[str, Any]] = []
+        opp_count = self._replace_active(
+            "stock_opportunities_v2",
+            opp_rows,
+            run_id=run_id,
+            returned_rows=inserted_opps,
+        )
 
         evidence_count = 0
         path_count = 0
         enriched_opp_count = 0
         if self.flags.enable_stock_evidence_layer or self.flags.enable_stock_transmission_layer:
-            active_opps = self._load_active_opportunities_by_run(run_id=run_id)
+            if inserted_opps:
+                active_opps = sorted(
+                    inserted_opps,
+                    key=lambda row: _safe_float(row.get("opportunity_score"), 0.0),
+                    reverse=True,
+                )
+            else:
+                active_opps = self._load_active_opportunities_by_run(run_id=run_id)
             events_by_ticker: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-            for row in bundle:
-                ticker = str(row.get("ticker") or "").upper()
-                if ticker:
-                    events_by_ticker[ticker].append(row)
+            if bundle is None:
+                # 增量模式只为本轮机会涉及的 ticker 读取最近事件
+                opp_tickers = {
+                    str(opp.get("ticker") or "").upper()
+                    for opp in active_opps
+                    if str(opp.get("ticker") or "").strip()
+                }
+                for ticker, detail in self._load_signal_state_detail(
+                    lookback_hours,
+                    opp_tickers,
+                ).items():
+                    events_by_ticker[ticker] = detail["recent"]
+            else:
+                for row in bundle:
+                    ticker = str(row.get("ticker") or "").upper()
+                    if ticker:
+                        events_by_ticker[ticker].append(row)
+                for rows in events_by_ticker.values():
+                    rows.sort(key=_recency_key, reverse=True)
 
             evidence_ids_by_opp: Dict[int, List[int]] = {}
             if self.flags.enable_stock_evidence_layer:
@@ -1890,8 +3196,17 @@ class StockPipelineV2:
                     run_id=run_id,
                     now=now,
                 )
-                evidence_count = self._safe_replace_optional_table("stock_evidence_v2", evidence_rows)
-                evidence_ids_by_opp = self._load_active_id_map("stock_evidence_v2", run_id=run_id)
+                inserted_evidence: List[Dict[str, Any]] = []
+                evidence_count = self._safe_replace_optional_table(
+                    "stock_evidence_v2",
+                    evidence_rows,
+                    run_id=run_id,
+                    returned_rows=inserted_evidence,
+                )
+                if inserted_evidence or evidence_count == 0:
+                    evidence_ids_by_opp = self._group_ids_by_opportunity(inserted_evidence)
+                else:
+                    evidence_ids_by_opp = self._load_active_id_map("stock_evidence_v2", run_id=run_id)
 
             path_ids_by_opp: Dict[int, List[int]] = {}
             if self.flags.enable_stock_transmission_layer:
@@ -1902,14 +3217,20 @@ class StockPipelineV2:
                     run_id=run_id,
                     now=now,
                 )
+                inserted_paths: List[Dict[str, Any]] = []
                 path_count = self._safe_replace_optional_table(
                     "stock_transmission_paths_v2",
                     path_rows,
-                )
-                path_ids_by_opp = self._load_active_id_map(
-                    "stock_transmission_paths_v2",
                     run_id=run_id,
+                    returned_rows=inserted_paths,
                 )
+                if inserted_paths or path_count == 0:
+                    path_ids_by_opp = self._group_ids_by_opportunity(inserted_paths)
+                else:
+                    path_ids_by_opp = self._load_active_id_map(
+                        "stock_transmission_paths_v2",
+                        run_id=run_id,
+                    )
 
             if (
                 self.flags.enable_stock_ai_debate_view
@@ -1936,7 +3257,8 @@ class StockPipelineV2:
             now=now,
             x_context=x_context,
         )
-        snap_count = self._replace_active("stock_dashboard_snapshot_v2", [snapshot])
+        snap_count = self._replace_active("stock_dashboard_snapshot_v2", [snapshot], run_id=run_id)
+        self._drain_serve_gc()
         return {
             "signals": signal_count,
             "opportunities": opp_count,
@@ -1952,9 +3274,14 @@ class StockPipelineV2:
         llm_event_cap: int = 60,
         lookback_hours: int = 168,
     ) -> Dict[str, Any]:
-        """执行增量计算。"""
+        """执行增量计算。
+
+        有水位时按 (analyzed_at, id) 升序只处理水位之后的文章，`hours` 仅作为安全下界；
+        无水位（首次运行或表不存在）时退回按 id 降序读取 `hours` 窗口。
+        """
         run_id = f"inc-{_now_utc().strftime('%Y%m%d%H%M%S')}"
         run_started_at = _now_utc()
+        self.profiler.start("run_incremental")
         cutoff_iso = (_now_utc() - timedelta(hours=hours)).isoformat()
         logger.info(
             f"[STOCK_V2_INCREMENTAL_START] run_id={run_id} hours={hours} limit={article_limit}"
@@ -1977,50 +3304,47 @@ class StockPipelineV2:
         )
 
         try:
-            offset = 0
-            page_size = 500
-            remaining = article_limit
-            llm_budget = llm_event_cap
-            all_events: List[Dict[str, Any]] = []
-            all_mappings: List[Dict[str, Any]] = []
-            all_indirect_rows: List[Dict[str, Any]] = []
-            indirect_promoted_total = 0
-
-            while remaining > 0:
-                current_size = min(page_size, remaining)
-                rows = self._load_articles_batch(
-                    offset=offset,
-                    batch_size=current_size,
-                    fetched_after=cutoff_iso,
-                )
-                if not rows:
-                    break
+            watermark = self._load_watermark(WATERMARK_PIPELINE_INCREMENTAL)
+            progress: Dict[str, Any] = {"loaded": 0, "high_mark": watermark}
 
-                events, mappings, llm_used, indirect_rows, promoted_count = self._build_events(
-                    rows,
-                    run_id=run_id,
-                    now_iso=_now_utc().isoformat(),
-                    llm_budget=llm_budget,
-                )
-                llm_budget -= llm_used
-                all_events.extend(events)
-                all_mappings.extend(mappings)
-                all_indirect_rows.extend(indirect_rows)
-                indirect_promoted_total += promoted_count
-
-                offset += current_size
-                remaining -= len(rows)
-                if len(rows) < current_size:
-                    break
+            def _pages() -> Iterator[List[Dict[str, Any]]]:
+                for rows in self._iter_incremental_pages(cutoff_iso, watermark, article_limit):
+                    progress["loaded"] += len(rows)
+                    for row in rows:
+                        key = _article_cursor(row)
+                        if key is not None and (progress["high_mark"] is None or key > progress["high_mark"]):
+                            progress["high_mark"] = key
+                    yield rows
 
-            event_count = 0
-            mapping_count = 0
-            indirect_count = self._upsert_indirect_events(all_indirect_rows)
-            if all_events:
-                event_count, mapping_count = self._upsert_events(all_events, all_mappings)
+            if self.flags.enable_stock_streaming_incremental:
+                totals = self._incremental_streaming(_pages(), run_id=run_id, llm_event_cap=llm_event_cap)
             else:
+                totals = self._incremental_in_memory(_pages(), run_id=run_id, llm_event_cap=llm_event_cap)
+            articles_loaded = progress["loaded"]
+            high_mark = progress["high_mark"]
+            event_count = totals["events"]
+            mapping_count = totals["mappings"]
+            indirect_count = totals["indirect"]
+            indirect_promoted_total = totals["indirect_promoted"]
+            llm_used_total = totals["llm_used"]
+            if not event_count:
                 logger.warning("[STOCK_V2_NO_EVENTS] 本轮未发现可用事件")
 
+            watermark_committed = False
+            if high_mark is not None and high_mark != watermark:
+                watermark_committed = self._commit_watermark(
+                    WATERMARK_PIPELINE_INCREMENTAL,
+                    high_mark,
+                    run_id=run_id,
+                    processed=articles_loaded,
+                )
+            logger.info(
+                "[STOCK_V2_WATERMARK] "
+                f"from={watermark[1] if watermark else '-'} "
+                f"to={high_mark[1] if high_mark else '-'} "
+                f"loaded={articles_loaded} committed={watermark_committed}"
+            )
+
             serve_stats = self.refresh_serve_layer(run_id=run_id, lookback_hours=lookback_hours)
             logger.info(
                 "[STOCK_V2_INCREMENTAL_DONE] "
@@ -2035,12 +3359,16 @@ class StockPipelineV2:
             metrics = {
                 "run_id": run_id,
                 "articles_seen": self.stats["articles_seen"],
+                "articles_loaded": articles_loaded,
+                "watermark_article_id": high_mark[1] if high_mark else 0,
                 "stock_articles": self.stats["articles_stock_related"],
                 "indirect_articles": self.stats["articles_indirect_related"],
                 "events_upserted": event_count,
                 "mappings_upserted": mapping_count,
                 "indirect_rows_written": indirect_count,
                 "indirect_promoted": indirect_promoted_total,
+                "llm_candidates": self.stats["llm_candidates_seen"],
+                "llm_events_used": llm_used_total,
                 "signals_written": serve_stats["signals"],
                 "opportunities_written": serve_stats["opportunities"],
                 "evidence_rows_written": serve_stats.get("evidence", 0),
@@ -2050,7 +3378,7 @@ class StockPipelineV2:
                 run_id=run_id,
                 started_at=run_started_at,
                 status="success",
-                metrics=metrics,
+                metrics={**metrics, **self._collect_llm_telemetry(run_id)},
             )
             return metrics
         except Exception as e:
@@ -2067,18 +3395,438 @@ class StockPipelineV2:
             )
             raise
 
+    def _iter_incremental_pages(
+        self,
+        cutoff_iso: str,
+        watermark: Optional[Tuple[str, int]],
+        article_limit: int,
+        page_size: int = 500,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """增量逐页读取：有水位按 (analyzed_at, id) 升序，否则按 id 降序读取 cutoff 之后的文章。"""
+        cursor = watermark
+        before_id: Optional[int] = None
+        remaining = article_limit
+        while remaining > 0:
+            current_size = min(page_size, remaining)
+            rows = self._load_articles_batch(
+                batch_size=current_size,
+                fetched_after=cutoff_iso,
+                before_id=before_id,
+                after_cursor=cursor,
+            )
+            if not rows:
+                return
+            yield rows
+            if cursor is not None:
+                cursor = _article_cursor(rows[-1]) or cursor
+            else:
+                before_id = min(int(row["id"]) for row in rows)
+            remaining -= len(rows)
+            if len(rows) < current_size:
+                return
+
+    def _incremental_in_memory(
+        self,
+        pages: Iterator[List[Dict[str, Any]]],
+        run_id: str,
+        llm_event_cap: int,
+    ) -> Dict[str, int]:
+        """整窗模式：第一遍整个窗口只跑规则；第二遍按期望收益把 LLM 预算花在 Top-K，最后一次写入。"""
+        all_events: List[Dict[str, Any]] = []
+        all_mappings: List[Dict[str, Any]] = []
+        all_indirect_rows: List[Dict[str, Any]] = []
+        all_llm_candidates: List[Tuple[int, str, str, str, float, float]] = []
+        totals: Dict[str, int] = defaultdict(int)
+        for rows in pages:
+            events, mappings, llm_candidates, indirect_rows, promoted_count = self._build_rule_events(
+                rows,
+                run_id=run_id,
+                now_iso=_now_utc().isoformat(),
+            )
+            base_idx = len(all_events)
+            all_llm_candidates.extend((base_idx + item[0],) + tuple(item[1:]) for item in llm_candidates)
+            all_events.extend(events)
+            all_mappings.extend(mappings)
+            all_indirect_rows.extend(indirect_rows)
+            totals["indirect_promoted"] += promoted_count
+
+        totals["llm_used"] = self._apply_llm_adjustments(
+            all_events,
+            self._select_llm_candidates(all_llm_candidates, llm_event_cap),
+        )
+        totals["indirect"] = self._upsert_indirect_events(all_indirect_rows)
+        if all_events:
+            totals["events"], totals["mappings"] = self._upsert_events(all_events, all_mappings)
+        return totals
+
+    def _incremental_streaming(
+        self,
+        pages: Iterator[List[Dict[str, Any]]],
+        run_id: str,
+        llm_event_cap: int,
+        max_inflight_writes: int = 2,
+    ) -> Dict[str, int]:
+        """流式模式：每页规则建事件后立即交给写线程，内存只随页大小而非窗口大小增长。
+
+        - 写入按页顺序串行执行，在途最多 max_inflight_writes 页
+        - 跨页只保留间接晋升需要的主题来源集合，以及 LLM Top-K 候选（最多 llm_event_cap 条）
+        - 全部写完后对 Top-K 事件做 LLM 修正并重写这些事件；选中集合与整窗模式一致
+        """
+        totals: Dict[str, int] = defaultdict(int)
+        theme_sources = self._load_recent_indirect_theme_sources(lookback_hours=24)
+        keep_llm = bool(self.llm_client) and llm_event_cap > 0
+        # 最小堆保留 Top-K：键 (分数, -序号)，与整窗模式稳定排序后取前 K 个一致
+        top_llm: List[Tuple[float, int, Tuple[int, str, str, str, float, float], Dict[str, Any]]] = []
+        seen_llm = 0
+        pending_writes: Deque[Future] = deque()
+
+        def _drain_write() -> None:
+            event_count, mapping_count, indirect_count = pending_writes.popleft().result()
+            totals["events"] += event_count
+            totals["mappings"] += mapping_count
+            totals["indirect"] += indirect_count
+            totals["pages_written"] += 1
+            if totals["pages_written"] == 1:
+                logger.info(f"[STOCK_V2_STREAM_FIRST_WRITE] elapsed={time.perf_counter() - started_at:.2f}s")
+
+        started_at = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            for rows in pages:
+                events, mappings, llm_candidates, indirect_rows, promoted_count = self._build_rule_events(
+                    rows,
+                    run_id=run_id,
+                    now_iso=_now_utc().isoformat(),
+                    theme_sources=theme_sources,
+                )
+                totals["indirect_promoted"] += promoted_count
+                if keep_llm:
+                    for candidate in llm_candidates:
+                        entry = (candidate[5], -seen_llm, candidate, events[candidate[0]])
+                        seen_llm += 1
+                        if len(top_llm) < llm_event_cap:
+                            heapq.heappush(top_llm, entry)
+                        elif entry[:2] > top_llm[0][:2]:
+                            heapq.heapreplace(top_llm, entry)
+                while len(pending_writes) >= max_inflight_writes:
+                    _drain_write()
+                pending_writes.append(
+                    writer.submit(self._write_backfill_batch, events, mappings, indirect_rows)
+                )
+            while pending_writes:
+                _drain_write()
+
+        if top_llm:
+            ranked = sorted(top_llm, key=lambda item: item[:2], reverse=True)
+            llm_events = [event for _, _, _, event in ranked]
+            selected = [(idx,) + tuple(candidate[1:]) for idx, (_, _, candidate, _) in enumerate(ranked)]
+            self.stats["llm_candidates_seen"] += seen_llm
+            self.stats["llm_candidates_selected"] += len(selected)
+            totals["llm_used"] = self._apply_llm_adjustments(llm_events, selected)
+            self._upsert_events(llm_events, [])
+        return totals
+
+    def _iter_article_batches(
+        self,
+        batch_size: int,
+        max_articles: Optional[int],
+        before_id: Optional[int] = None,
+        partition: Tuple[int, int] = (0, 1),
+    ) -> Iterator[Tuple[List[Dict[str, Any]], int, int]]:
+        """按 id 降序 keyset 逐批读取已分析文章，产出 (rows, 区间上界(不含), 区间最小 id)。
+
+        分区模式只读 `(id // BACKFILL_PARTITION_BLOCK) % n == i` 的块，块内仍按 id 降序分页。
+        """
+        index, count = partition
+        if before_id is None:
+            top = self._load_articles_batch(batch_size=1, fetched_after=None)
+            if not top:
+                return
+            before_id = int(top[0]["id"]) + 1
+        high = int(before_id)
+        loaded = 0
+        while high > 0 and (max_articles is None or loaded < max_articles):
+            floor: Optional[int] = None
+            if count > 1:
+                block = (high - 1) // BACKFILL_PARTITION_BLOCK
+                owned = block - (block - index) % count
+                if owned < 0:
+                    return
+                if owned != block:
+                    high = (owned + 1) * BACKFILL_PARTITION_BLOCK
+                floor = owned * BACKFILL_PARTITION_BLOCK
+            current_size = batch_size
+            if max_articles is not None:
+                current_size = min(batch_size, max_articles - loaded)
+            rows = self._load_articles_batch(
+                batch_size=current_size,
+                fetched_after=None,
+                before_id=high,
+                min_id=floor,
+            )
+            if rows:
+                low = min(int(row["id"]) for row in rows)
+                loaded += len(rows)
+                yield rows, high, low
+                high = low
+            if len(rows) < current_size:
+                if floor is None:
+                    return
+                high = floor
+
+    @profiled("write_batch")
+    def _write_backfill_batch(
+        self,
+        event_rows: List[Dict[str, Any]],
+        raw_map_rows: List[Dict[str, Any]],
+        indirect_rows: List[Dict[str, Any]],
+    ) -> Tuple[int, int, int]:
+        indirect_count = self._upsert_indirect_events(indirect_rows)
+        event_count, mapping_count = self._upsert_events(event_rows, raw_map_rows)
+        return event_count, mapping_count, indirect_count
+
+    def _backfill_sequential(
+        self,
+        run_id: str,
+        batch_size: int,
+        max_articles: Optional[int],
+        llm_event_cap: int,
+        checkpoints: Optional[BackfillCheckpointStore] = None,
+        before_id: Optional[int] = None,
+        partition: Tuple[int, int] = (0, 1),
+    ) -> Dict[str, int]:
+        totals: Dict[str, int] = defaultdict(int)
+        llm_budget = llm_event_cap
+        for rows, high_id, low_id in self._iter_article_batches(
+            batch_size,
+            max_articles,
+            before_id=before_id,
+            partition=partition,
+        ):
+            events, mappings, llm_used, indirect_rows, promoted_count = self._build_events(
+                rows,
+                run_id=run_id,
+                now_iso=_now_utc().isoformat(),
+                llm_budget=llm_budget,
+            )
+            llm_budget -= llm_used
+
+            event_count, mapping_count, indirect_count = self._write_backfill_batch(
+                events,
+                mappings,
+                indirect_rows,
+            )
+            totals["processed"] += len(rows)
+            totals["events"] += event_count
+            totals["mappings"] += mapping_count
+            totals["indirect"] += indirect_count
+            totals["indirect_promoted"] += promoted_count
+            if checkpoints is not None:
+                checkpoints.record_range(
+                    high_id,
+                    low_id,
+                    run_id,
+                    _checkpoint_counts(len(rows), event_count, mapping_count, indirect_count, promoted_count),
+                )
+            logger.info(
+                f"[STOCK_V2_BACKFILL_PROGRESS] processed={totals['processed']} "
+                f"events={totals['events']}"
+            )
+        return totals
+
+    def _rule_worker_state(self) -> Dict[str, Any]:
+        """子进程重建规则打分所需的最小状态（均可 pickle）。"""
+        return {
+            "keyword_matcher": self.keyword_matcher,
+            "ticker_extractor": self.ticker_extractor,
+        }
+
+    def _backfill_parallel(
+        self,
+        run_id: str,
+        batch_size: int,
+        max_articles: Optional[int],
+        llm_event_cap: int,
+        workers: int,
+        max_inflight_writes: int = 2,
+        checkpoints: Optional[BackfillCheckpointStore] = None,
+        before_id: Optional[int] = None,
+        partition: Tuple[int, int] = (0, 1),
+    ) -> Dict[str, int]:
+        """并行回填：读线程预取 → 进程池规则打分 → 主线程晋升/LLM → 写线程落库。
+
+        打分结果按提交顺序消费，LLM 预算与写入顺序与串行模式一致；
+        LLM 仍由 `_apply_llm_adjustments` 的线程池按 llm_workers 限流。
+        检查点在该批写入完成后按写入顺序记录，中断时不会越过未落库的批次。
+        """
+        totals: Dict[str, int] = defaultdict(int)
+        llm_budget = llm_event_cap
+        max_inflight_scores = workers * 2
+        batches: "queue.Queue[Optional[Tuple[List[Dict[str, Any]], int, int]]]" = queue.Queue(
+            maxsize=max_inflight_scores
+        )
+        reader_errors: List[BaseException] = []
+        stop_reader = threading.Event()
+
+        def _put(item: Optional[Tuple[List[Dict[str, Any]], int, int]]) -> bool:
+            # 主循环中止后不再消费队列：限时重试，stop_reader 置位即放弃，避免读线程卡在满队列上
+            while not stop_reader.is_set():
+                try:
+                    batches.put(item, timeout=1.0)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def _reader() -> None:
+            try:
+                for batch in self._iter_article_batches(
+                    batch_size,
+                    max_articles,
+                    before_id=before_id,
+                    partition=partition,
+                ):
+                    if not _put(batch):
+                        return
+            except BaseException as e:
+                reader_errors.append(e)
+            finally:
+                _put(None)
+
+        pending_scores: Deque[Tuple[Future, str, int, int, int]] = deque()
+        pending_writes: Deque[Tuple[Future, int, int, int, int]] = deque()
+
+        def _drain_write() -> None:
+            future, high_id, low_id, row_count, promoted_count = pending_writes.popleft()
+            event_count, mapping_count, indirect_count = future.result()
+            totals["events"] += event_count
+            totals["mappings"] += mapping_count
+            totals["indirect"] += indirect_count
+            if checkpoints is not None:
+                checkpoints.record_range(
+                    high_id,
+                    low_id,
+                    run_id,
+                    _checkpoint_counts(row_count, event_count, mapping_count, indirect_count, promoted_count),
+                )
+
+        started_at = time.perf_counter()
+        logger.info(
+            f"[STOCK_V2_BACKFILL_PARALLEL] workers={workers} batch={batch_size} "
+            f"inflight_scores={max_inflight_scores} inflight_writes={max_inflight_writes}"
+        )
+        reader = threading.Thread(target=_reader, name="stock-v2-backfill-reader", daemon=True)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_rule_worker,
+            initargs=(self._rule_worker_state(),),
+        ) as pool, ThreadPoolExecutor(max_workers=1) as writer:
+            reader.start()
+            try:
+                exhausted = False
+                while True:
+                    while not exhausted and len(pending_scores) < max_inflight_scores:
+                        try:
+                            # 已有打分任务时不阻塞等待读线程
+                            batch = batches.get(block=not pending_scores, timeout=None)
+                        except queue.Empty:
+                            break
+                        if batch is None:
+                            exhausted = True
+                            break
+                        rows, high_id, low_id = batch
+                        now_iso = _now_utc().isoformat()
+                        future = pool.submit(
+                            _score_articles_in_worker,
+                            rows,
+                            run_id,
+                            now_iso,
+                            bool(self.llm_client),
+                        )
+                        pending_scores.append((future, now_iso, len(rows), high_id, low_id))
+                    if not pending_scores:
+                        break
+
+                    future, now_iso, row_count, high_id, low_id = pending_scores.popleft()
+                    with self.profiler.span("rule_scoring_wait"):
+                        events, mappings, candidates, indirect_rows, worker_stats = future.result()
+                    for key, value in worker_stats.items():
+                        self.stats[key] += value
+                    events, mappings, candidates, indirect_rows, promoted_count = (
+                        self._finish_rule_events(
+                            events,
+                            mappings,
+                            candidates,
+                            indirect_rows,
+                            run_id=run_id,
+                            now_iso=now_iso,
+                        )
+                    )
+                    llm_budget -= self._apply_llm_adjustments(
+                        events,
+                        self._select_llm_candidates(candidates, llm_budget),
+                    )
+
+                    while len(pending_writes) >= max_inflight_writes:
+                        _drain_write()
+                    pending_writes.append(
+                        (
+                            writer.submit(self._write_backfill_batch, events, mappings, indirect_rows),
+                            high_id,
+                            low_id,
+                            row_count,
+                            promoted_count,
+                        )
+                    )
+                    totals["processed"] += row_count
+                    totals["indirect_promoted"] += promoted_count
+                    elapsed = max(1e-6, time.perf_counter() - started_at)
+                    logger.info(
+                        f"[STOCK_V2_BACKFILL_PROGRESS] processed={totals['processed']} "
+                        f"events={totals['events']} rate={totals['processed'] / elapsed:.1f}/s"
+                    )
+                while pending_writes:
+                    _drain_write()
+            finally:
+                stop_reader.set()
+                for future, *_ in pending_scores:
+                    future.cancel()
+                reader.join(timeout=30)
+        if reader_errors:
+            raise reader_errors[0]
+        return totals
+
     def run_backfill(
         self,
         batch_size: int = 500,
         max_articles: Optional[int] = None,
         llm_event_cap: int = 0,
         lookback_hours: int = 336,
+        workers: int = 1,
+        resume: Optional[str] = None,
+        partition: Tuple[int, int] = (0, 1),
     ) -> Dict[str, Any]:
-        """执行全量回填。"""
+        """执行全量回填；workers > 1 时规则打分走进程池。
+
+        - resume：回填作业 ID（首次运行的 run_id），从该作业最低的已完成 id 继续
+        - partition=(i, n)：只处理第 i 个分区的 id 块；所有分区完成后由最后一个进程刷新 serve 层一次
+        """
+        partition_index, partition_count = partition
+        if partition_count > 1 and not resume:
+            raise ValueError("分区回填需要 --resume <job_id>，各分区进程共享同一作业 ID")
         run_id = f"backfill-{_now_utc().strftime('%Y%m%d%H%M%S')}"
+        if partition_count > 1:
+            run_id = f"{run_id}-p{partition_index}of{partition_count}"
+        job_id = resume or run_id
+        checkpoints = BackfillCheckpointStore(self.supabase, job_id, partition=partition)
+        before_id, resumed, partition_done = checkpoints.resume_point() if resume else (None, {}, False)
         run_started_at = _now_utc()
+        self.profiler.start("run_backfill")
         logger.info(
-            f"[STOCK_V2_BACKFILL_START] run_id={run_id} batch={batch_size} max={max_articles}"
+            f"[STOCK_V2_BACKFILL_START] run_id={run_id} job_id={job_id} "
+            f"partition={partition_index}/{partition_count} batch={batch_size} max={max_articles} "
+            f"resume_before_id={before_id} resumed_articles={resumed.get('article_count', 0)} "
+            f"partition_done={partition_done}"
         )
         self._v3_log_run_start(
             run_id=run_id,
@@ -2088,61 +3836,63 @@ class StockPipelineV2:
                 "batch_size": batch_size,
                 "max_articles": max_articles,
                 "lookback_hours": lookback_hours,
+                "resume_before_id": before_id,
             },
             params_json=self._build_v3_params(
                 {
                     "mode": "backfill",
                     "llm_event_cap": llm_event_cap,
+                    "workers": workers,
+                    "job_id": job_id,
+                    "partition": f"{partition_index}/{partition_count}",
                 }
             ),
         )
 
         try:
-            offset = 0
-            processed = 0
-            llm_budget = llm_event_cap
-            total_events = 0
-            total_mappings = 0
-            total_indirect = 0
-            total_indirect_promoted = 0
-
-            while True:
-                if max_articles is not None and processed >= max_articles:
-                    break
-                current_size = batch_size
-                if max_articles is not None:
-                    current_size = min(batch_size, max_articles - processed)
-                rows = self._load_articles_batch(
-                    offset=offset,
-                    batch_size=current_size,
-                    fetched_after=None,
-                )
-                if not rows:
-                    break
-
-                events, mappings, llm_used, indirect_rows, promoted_count = self._build_events(
-                    rows,
-                    run_id=run_id,
-                    now_iso=_now_utc().isoformat(),
-                    llm_budget=llm_budget,
-                )
-                llm_budget -= llm_used
-
-                total_indirect += self._upsert_indirect_events(indirect_rows)
-                total_indirect_promoted += promoted_count
-                event_count, mapping_count = self._upsert_events(events, mappings)
-                total_events += event_count
-                total_mappings += mapping_count
-                processed += len(rows)
-                offset += current_size
-
+            totals: Dict[str, int] = defaultdict(int)
+            if not partition_done:
+                if workers > 1:
+                    totals = self._backfill_parallel(
+                        run_id=run_id,
+                        batch_size=batch_size,
+                        max_articles=max_articles,
+                        llm_event_cap=llm_event_cap,
+                        workers=workers,
+                        checkpoints=checkpoints,
+                        before_id=before_id,
+                        partition=partition,
+                    )
+                else:
+                    totals = self._backfill_sequential(
+                        run_id=run_id,
+                        batch_size=batch_size,
+                        max_articles=max_articles,
+                        llm_event_cap=llm_event_cap,
+                        checkpoints=checkpoints,
+                        before_id=before_id,
+                        partition=partition,
+                    )
+                # --max-articles 截断的运行不算完成，可继续 --resume
+                if max_articles is None or totals["processed"] < max_articles:
+                    checkpoints.mark_done(run_id)
+            processed = totals["processed"]
+            total_events = totals["events"]
+            total_mappings = totals["mappings"]
+            total_indirect = totals["indirect"]
+            total_indirect_promoted = totals["indirect_promoted"]
+
+            serve_stats: Dict[str, int] = {"signals": 0, "opportunities": 0}
+            pending_partitions: Set[int] = set()
+            if partition_count > 1:
+                pending_partitions = set(range(partition_count)) - checkpoints.done_partitions()
+            if partition_count == 1 or (not pending_partitions and checkpoints.claim_serve_refresh(run_id)):
+                serve_stats = self.refresh_serve_layer(run_id=run_id, lookback_hours=lookback_hours)
+            else:
                 logger.info(
-                    f"[STOCK_V2_BACKFILL_PROGRESS] processed={processed} events={total_events}"
+                    f"[STOCK_V2_BACKFILL_SERVE_DEFERRED] job_id={job_id} "
+                    f"pending_partitions={sorted(pending_partitions)}"
                 )
-                if len(rows) < current_size:
-                    break
-
-            serve_stats = self.refresh_serve_layer(run_id=run_id, lookback_hours=lookback_hours)
             logger.info(
                 "[STOCK_V2_BACKFILL_DONE] "
                 f"processed={processed} stock_articles={self.stats['articles_stock_related']} "
@@ -2154,6 +3904,9 @@ class StockPipelineV2:
             )
             metrics = {
                 "run_id": run_id,
+                "job_id": job_id,
+                "partition": f"{partition_index}/{partition_count}",
+                "resumed_articles": resumed.get("article_count", 0),
                 "processed_articles": processed,
                 "stock_articles": self.stats["articles_stock_related"],
                 "indirect_articles": self.stats["articles_indirect_related"],
@@ -2170,7 +3923,7 @@ class StockPipelineV2:
                 run_id=run_id,
                 started_at=run_started_at,
                 status="success",
-                metrics=metrics,
+                metrics={**metrics, **self._collect_llm_telemetry(run_id)},
             )
             return metrics
         except Exception as e:
@@ -2188,6 +3941,38 @@ class StockPipelineV2:
             raise
 
 
+_RULE_WORKER: Optional[StockPipelineV2] = None
+
+
+def _init_rule_worker(state: Dict[str, Any]) -> None:
+    """进程池初始化：只装配规则打分所需状态，不连接数据库 / LLM。"""
+    global _RULE_WORKER
+    worker = StockPipelineV2.__new__(StockPipelineV2)
+    worker.__dict__.update(state)
+    worker.llm_client = None
+    worker.stats = defaultdict(int)
+    _RULE_WORKER = worker
+
+
+def _score_articles_in_worker(
+    articles: List[Dict[str, Any]],
+    run_id: str,
+    now_iso: str,
+    collect_llm: bool,
+) -> Tuple[Any, ...]:
+    worker = _RULE_WORKER
+    if worker is None:
+        raise RuntimeError("rule worker not initialized")
+    worker.stats.clear()
+    result = worker._score_articles(
+        articles,
+        run_id=run_id,
+        now_iso=now_iso,
+        collect_llm=collect_llm,
+    )
+    return result + (dict(worker.stats),)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Stock V2 分析流水线")
     parser.add_argument("--mode", choices=["incremental", "backfill"], default="incremental")
@@ -2195,13 +3980,37 @@ def main() -> None:
     parser.add_argument("--article-limit", type=int, default=1200, help="增量最大文章数")
     parser.add_argument("--batch-size", type=int, default=500, help="回填批大小")
     parser.add_argument("--max-articles", type=int, default=None, help="回填最大文章数")
+    parser.add_argument("--workers", type=int, default=1, help="回填规则打分进程数")
+    parser.add_argument("--resume", default=None, help="回填作业 ID（首次运行的 run_id），从检查点继续")
+    parser.add_argument(
+        "--partition",
+        type=parse_partition,
+        default=(0, 1),
+        help="回填分区 i/n，多进程共享 --resume 作业 ID 各跑一个分区",
+    )
     parser.add_argument("--lookback-hours", type=int, default=168, help="信号聚合回看小时")
     parser.add_argument("--enable-llm", action="store_true", help="启用 LLM 修正")
     parser.add_argument("--llm-event-cap", type=int, default=60, help="本轮最多 LLM 事件数")
     parser.add_argument("--llm-workers", type=int, default=1, help="LLM 并发 worker 数")
+    parser.add_argument(
+        "--llm-stream",
+        action="store_true",
+        help="LLM 流式输出，必需字段齐备后提前结束",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["cprofile", "pyinstrument"],
+        default=None,
+        help="函数级采样（默认读 STOCK_PROFILE_CAPTURE），输出到 STOCK_PROFILE_DIR",
+    )
     args = parser.parse_args()
 
-    engine = StockPipelineV2(enable_llm=args.enable_llm, llm_workers=args.llm_workers)
+    engine = StockPipelineV2(
+        enable_llm=args.enable_llm,
+        llm_workers=args.llm_workers,
+        llm_stream=args.llm_stream,
+        profile_capture=args.profile,
+    )
     if args.mode == "incremental":
         metrics = engine.run_incremental(
             hours=args.hours,
@@ -2215,6 +4024,9 @@ def main() -> None:
             max_articles=args.max_articles,
             llm_event_cap=args.llm_event_cap,
             lookback_hours=max(args.lookback_hours, 336),
+            workers=args.workers,
+            resume=args.resume,
+            partition=args.partition,
         )
     logger.info("[STOCK_V2_METRICS] " + ", ".join([f"{key}={value}" for key, value in metrics.items()]))
 
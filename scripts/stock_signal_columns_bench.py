@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""信号/机会打分基准：逐行实现 vs NumPy 列式实现，并校验两者输出一致。
+
+示例：
+    python scripts/stock_signal_columns_bench.py --sizes 10000,100000,1000000
+"""
+
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import signal_columns, stock_pipeline_v2
+from scripts.local_supabase import LocalSupabaseClient
+from scripts.stock_pipeline_v2 import StockPipelineV2
+
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(
+        logging.Formatter(
+            "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+    )
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+BASE_TIME = datetime(2026, 1, 5, 14, 30, tzinfo=timezone.utc)
+_EVENT_TYPES = ["earnings", "guidance", "regulation", "buyback", "flow", "rating", "macro", "news"]
+_DIRECTIONS = ["LONG", "LONG", "SHORT", "NEUTRAL"]
+_SOURCE_TYPES = ["article", "article", "article", "x_grok", "rss"]
+_HANDLES = ["", "macro_desk", "chip_watch", "fedwatcher", "oil_tape", "flowtrader"]
+_ROLES = ["primary", "secondary", "indirect"]
+
+
+def build_bundle(size: int, seed: int, hours: int = 168) -> List[Dict[str, Any]]:
+    """生成与 _bundle_row 同结构的合成事件映射行；ticker 数随规模增长（≤5000）。"""
+    rng = random.Random(seed)
+    ticker_count = max(10, min(5000, size // 40))
+    tickers = [f"T{idx:04d}" for idx in range(ticker_count)]
+    summaries = [f"合成事件摘要 {idx}" for idx in range(64)]
+    rows: List[Dict[str, Any]] = []
+    for idx in range(size):
+        event_id = idx // 2 + 1
+        source_type = rng.choice(_SOURCE_TYPES)
+        rows.append(
+            {
+                "event_id": event_id,
+                # 长尾分布：少数 ticker 占大多数映射
+                "ticker": tickers[min(ticker_count - 1, int(rng.paretovariate(1.2)) - 1)]
+                if rng.random() < 0.6
+                else rng.choice(tickers),
+                "role": rng.choice(_ROLES),
+                "weight": rng.choice([1.0, 0.8, 0.6]),
+                "map_confidence": round(rng.uniform(0.4, 0.95), 4),
+                "event_type": rng.choice(_EVENT_TYPES),
+                "direction": rng.choice(_DIRECTIONS),
+                "strength": round(rng.uniform(0.3, 0.95), 4),
+                "summary": rng.choice(summaries),
+                # 同一文章的多条事件共享发布时间，制造组内并列
+                "published_at": (
+                    BASE_TIME - timedelta(seconds=(event_id * 7919) % (hours * 3600))
+                ).isoformat(),
+                "as_of": BASE_TIME.isoformat(),
+                "source_type": source_type,
+                "source_ref": f"{source_type}:{event_id}",
+                "source_handle": rng.choice(_HANDLES) if source_type == "x_grok" else "",
+            }
+        )
+    return rows
+
+
+def _timed(fn: Any, repeat: int) -> Tuple[float, Any]:
+    best = float("inf")
+    result: Any = None
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def _dump(rows: List[Dict[str, Any]]) -> str:
+    return json.dumps(rows, sort_keys=True, ensure_ascii=False)
+
+
+def bench_size(engine: StockPipelineV2, size: int, seed: int, repeat: int) -> Dict[str, Any]:
+    bundle = build_bundle(size, seed=seed)
+    now = BASE_TIME
+    regime = {"regime_score": 0.35, "risk_state": "risk_on"}
+    x_context = {
+        "health_status": "healthy",
+        "freshness_sec": 0,
+        "avg_quality_score": 58.0,
+        "handle_scores": {"macro_desk": 72.0, "chip_watch": 44.0, "fedwatcher": 61.0},
+    }
+    row_flags = dataclasses.replace(engine.flags, enable_stock_columnar_signals=False)
+    col_flags = dataclasses.replace(engine.flags, enable_stock_columnar_signals=True)
+
+    timings: Dict[str, float] = {}
+    outputs: Dict[str, Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]] = {}
+    for label, flags in (("row", row_flags), ("columnar", col_flags)):
+        engine.flags = flags
+        sig_sec, signals = _timed(lambda: engine._build_signals(bundle, run_id="bench", now=now), repeat)
+        opp_sec, opps = _timed(
+            lambda: engine._build_opportunities(
+                signals,
+                regime,
+                run_id="bench",
+                now=now,
+                x_context=x_context,
+            ),
+            repeat,
+        )
+        timings[f"{label}_signals"] = sig_sec
+        timings[f"{label}_opportunities"] = opp_sec
+        outputs[label] = (signals, opps)
+
+    return {
+        "size": size,
+        "tickers": len(outputs["row"][0]),
+        "timings": timings,
+        "signals_equal": _dump(outputs["row"][0]) == _dump(outputs["columnar"][0]),
+        "opportunities_equal": _dump(outputs["row"][1]) == _dump(outputs["columnar"][1]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="信号/机会打分基准（逐行 vs 列式）")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="事件映射行数，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=3, help="每项取最优的重复次数")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if not signal_columns.HAS_NUMPY:
+        logger.error("[SIGNAL_BENCH] 未安装 numpy，无法对比列式实现")
+        sys.exit(1)
+    logging.getLogger(stock_pipeline_v2.__name__).setLevel(logging.WARNING)
+    engine = StockPipelineV2(supabase_client=LocalSupabaseClient(sql_paths=[]))
+
+    mismatched = False
+    for size in [int(item) for item in args.sizes.split(",") if item.strip()]:
+        result = bench_size(engine, size, seed=args.seed, repeat=args.repeat)
+        t = result["timings"]
+        logger.info(
+            f"[SIGNAL_BENCH] mappings={size} tickers={result['tickers']} "
+            f"signals row={t['row_signals'] * 1000:.1f}ms columnar={t['columnar_signals'] * 1000:.1f}ms "
+            f"x{t['row_signals'] / max(1e-9, t['columnar_signals']):.2f} | "
+            f"opportunities row={t['row_opportunities'] * 1000:.1f}ms "
+            f"columnar={t['columnar_opportunities'] * 1000:.1f}ms "
+            f"x{t['row_opportunities'] / max(1e-9, t['columnar_opportunities']):.2f} | "
+            f"equal={result['signals_equal'] and result['opportunities_equal']}"
+        )
+        mismatched = mismatched or not (result["signals_equal"] and result["opportunities_equal"])
+
+    if mismatched:
+        logger.error("[SIGNAL_BENCH_MISMATCH] 列式输出与逐行输出不一致")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
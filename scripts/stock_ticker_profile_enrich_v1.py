@@ -16,8 +16,10 @@ from supabase import create_client
 
 try:
     from scripts.llm_client import LLMClient
+    from scripts.llm_telemetry import export_telemetry_if_configured, get_telemetry
 except Exception:  # pragma: no cover - 兼容直接执行
     from llm_client import LLMClient  # type: ignore
+    from llm_telemetry import export_telemetry_if_configured, get_telemetry  # type: ignore
 
 logger = logging.getLogger(__name__)
 if not logger.handlers:
@@ -166,7 +168,7 @@ def _get_worker_supabase():
 def _get_worker_llm_client() -> LLMClient:
     client = getattr(_thread_local, "llm_client", None)
     if client is None:
-        client = LLMClient()
+        client = LLMClient(caller="profile_enrich")
         setattr(_thread_local, "llm_client", client)
     return client
 
@@ -556,7 +558,9 @@ def run_enrich(
         "llm_failed_count": failed,
         "error_summary": " | ".join(errors[:8]),
         "duration_sec": round(time.time() - start_ts, 3),
+        "llm_telemetry": get_telemetry().to_metrics(),
     }
+    export_telemetry_if_configured(run_id=run_id)
     _insert_run_log(supabase, run_id=run_id, payload=result)
     return result
 
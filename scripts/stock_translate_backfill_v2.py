@@ -18,6 +18,7 @@ from supabase import Client, create_client
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from scripts.llm_client import LLMClient  # noqa: E402
+from scripts.llm_telemetry import export_telemetry_if_configured, get_telemetry  # noqa: E402
 
 
 logger = logging.getLogger(__name__)
@@ -74,7 +75,7 @@ class StockV2TranslationBackfill:
         """Thread-local LLM client for concurrent translation."""
         client = getattr(self._thread_local, "llm_client", None)
         if client is None:
-            client = LLMClient()
+            client = LLMClient(caller="translate_backfill")
             self._thread_local.llm_client = client
         return client
 
@@ -328,6 +329,11 @@ def main() -> None:
         active_only=bool(args.active_only),
     )
     logger.info("[STOCK_V2_TRANSLATE_METRICS] " + ", ".join([f"{k}={v}" for k, v in metrics.items()]))
+    export_telemetry_if_configured(run_id="stock-translate-backfill")
+    logger.info(
+        "[STOCK_V2_TRANSLATE_LLM_TELEMETRY] "
+        + ", ".join([f"{k}={v}" for k, v in get_telemetry().to_metrics().items()])
+    )
 
 
 if __name__ == "__main__":
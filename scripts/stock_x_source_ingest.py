@@ -4,6 +4,7 @@
 from __future__ import annotations
 
 import argparse
+import asyncio
 import csv
 import hashlib
 import json
@@ -13,17 +14,30 @@ import os
 import re
 import sys
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from dataclasses import dataclass
-from datetime import datetime, timezone
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
 
-from openai import OpenAI
+from openai import AsyncOpenAI
 from supabase import Client, create_client
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from scripts.feature_flags import read_bool_env  # noqa: E402
+from scripts.grok_fetch_engine import FetchOutcome, GrokFetchEngine  # noqa: E402
+from scripts.grok_response_store import DEFAULT_CACHE_DIR, GrokResponse, GrokResponseStore  # noqa: E402
+from scripts.x_account_schedule import AccountScheduleStore, plan_run, tier_breakdown  # noqa: E402
+from scripts.x_handle_cursor import (  # noqa: E402
+    CURSOR_LOOKBACK_DAYS,
+    HandleCursor,
+    cursor_post_limit,
+    partition_posts,
+    window_activity,
+)
+
 
 logger = logging.getLogger(__name__)
 if not logger.handlers:
@@ -93,6 +107,16 @@ EVENT_TYPE_MAP = {
 
 TICKER_PATTERN = re.compile(r"\$?([A-Z]{1,5})")
 
+GROK_MAX_TOKENS = 6000
+GROK_TIMEOUT_SEC = 120
+# 预估每条帖子的输出 token（含信号），用于 TPM 预扣
+GROK_TOKENS_PER_POST = 260
+# 逐账号入库：单线程写入器最多积压的账号数（超过则采集侧等待，内存随之有界）
+PERSIST_MAX_INFLIGHT = 4
+POST_UPSERT_CHUNK = 200
+SIGNAL_UPSERT_CHUNK = 300
+EVENT_UPSERT_CHUNK = 250
+
 
 @dataclass
 class AccountSeed:
@@ -119,6 +143,9 @@ class IngestStats:
     posts_written: int = 0
     signals_written: int = 0
     events_written: int = 0
+    posts_seen_skipped: int = 0
+    # 健康度口径：各账号窗口内活跃帖子数之和（含已入库），不随“本轮无新帖”归零
+    posts_active: int = 0
 
 
 @dataclass
@@ -131,6 +158,10 @@ class AccountResult:
     error: str
     account_profile: Dict[str, Any]
     posts: List[Dict[str, Any]]
+    # Grok 返回但游标窗口内已入库的帖子，不写入、只计数
+    stored_post_ids: List[str] = field(default_factory=list)
+    # 产出该结果的模型；回放时取录制值
+    source_model: str = ""
 
 
 class StockXSourceIngestor:
@@ -146,12 +177,35 @@ class StockXSourceIngestor:
         run_id: str,
         dry_run: bool,
         deactivate_others: bool,
+        max_workers: int = 0,
+        grok_rpm: float = 60.0,
+        grok_tpm: float = 0.0,
+        max_attempts: int = 4,
+        full_refresh: bool = False,
+        schedule: bool = True,
+        run_interval_min: float = 120.0,
+        token_budget: int = 0,
+        record: bool = False,
+        cache_dir: str = DEFAULT_CACHE_DIR,
+        replay_run_id: str = "",
     ):
         self.mode = mode
         self.accounts_file = Path(accounts_file)
         self.topn = max(1, topn)
         self.post_limit = max(1, post_limit)
         self.workers = max(1, workers)
+        self.max_workers = max(self.workers, max_workers or self.workers * 4)
+        self.grok_rpm = max(0.0, grok_rpm)
+        self.grok_tpm = max(0.0, grok_tpm)
+        self.max_attempts = max(1, max_attempts)
+        self.full_refresh = full_refresh
+        self.schedule = schedule
+        self.run_interval_min = max(1.0, run_interval_min)
+        self.token_budget = max(0, token_budget)
+        self.record = record
+        self.replay_run_id = replay_run_id
+        self.response_store = GrokResponseStore(cache_dir, bucket_min=self.run_interval_min)
+        self.cursors: Dict[str, HandleCursor] = {}
         self.run_id = run_id
         self.dry_run = dry_run
         self.deactivate_others = deactivate_others
@@ -160,7 +214,7 @@ class StockXSourceIngestor:
         self.grok_model = ""
         self.grok_base_url = ""
         self.grok_api_key = ""
-        self.grok_client: Optional[OpenAI] = None
+        self.grok_client: Optional[AsyncOpenAI] = None
         if self.mode in {"full", "ingest"}:
             self.grok_model, self.grok_base_url, self.grok_api_key = self._resolve_grok_config()
             self.grok_client = self._init_grok_client()
@@ -173,14 +227,21 @@ class StockXSourceIngestor:
         return create_client(url, key)
 
     def _resolve_grok_config(self) -> Tuple[str, str, str]:
+        # GROK_BASE_URL / GROK_API_KEY / GROK_MODEL 可覆盖文件配置（如指向本地模拟服务压测）
+        env_model = str(os.getenv("GROK_MODEL") or "").strip()
+        env_base_url = str(os.getenv("GROK_BASE_URL") or "").strip()
+        env_api_key = str(os.getenv("GROK_API_KEY") or "").strip()
+
         config_path = Path("grok_apikey.txt")
-        if not config_path.exists():
+        parsed: Dict[str, str] = {}
+        if config_path.exists():
+            parsed = self._parse_grok_file(config_path)
+        elif not (env_model and env_base_url and env_api_key):
             raise ValueError("缺少 grok_apikey.txt，必须使用该文件提供 Grok 配置")
 
-        parsed = self._parse_grok_file(config_path)
-        model = str(parsed.get("model") or "").strip()
-        base_url = str(parsed.get("base_url") or "").strip()
-        api_key = str(parsed.get("api_key") or "").strip()
+        model = env_model or str(parsed.get("model") or "").strip()
+        base_url = env_base_url or str(parsed.get("base_url") or "").strip()
+        api_key = env_api_key or str(parsed.get("api_key") or "").strip()
 
         missing: List[str] = []
         if not model:
@@ -217,8 +278,9 @@ class StockXSourceIngestor:
                 info["api_key"] = value
         return info
 
-    def _init_grok_client(self) -> OpenAI:
-        return OpenAI(api_key=self.grok_api_key, base_url=self.grok_base_url)
+    def _init_grok_client(self) -> AsyncOpenAI:
+        # 重试由 GrokFetchEngine 统一负责（带抖动与 AIMD），关闭 SDK 内置重试避免叠加
+        return AsyncOpenAI(api_key=self.grok_api_key, base_url=self.grok_base_url, max_retries=0)
 
     def _load_accounts(self) -> List[AccountSeed]:
         if not self.accounts_file.exists():
@@ -499,13 +561,122 @@ class StockXSourceIngestor:
             raise
         return rows
 
-    def _grok_fetch_account(self, account: Dict[str, Any]) -> AccountResult:
-        if self.grok_client is None:
-            raise ValueError("Grok client 未初始化")
+    def _load_account_ids(self, handles: Sequence[str]) -> Dict[str, int]:
+        if not handles:
+            return {}
+        try:
+            rows = (
+                self.supabase.table("stock_x_accounts")
+                .select("id,handle")
+                .in_("handle", list(handles))
+                .execute()
+                .data
+                or []
+            )
+        except Exception as e:
+            logger.warning(f"[STOCK_X_ACCOUNT_IDS_FALLBACK] error={str(e)[:160]}")
+            return {}
+        return {str(row.get("handle") or ""): int(row.get("id") or 0) for row in rows}
 
+    def _load_handle_cursors(self, handles: Sequence[str]) -> Dict[str, HandleCursor]:
+        """一次查询（按页）读取各账号回看窗口内已入库帖子，构建增量游标。"""
+        cursors = {handle: HandleCursor(handle=handle) for handle in handles if handle}
+        if not cursors or self.full_refresh:
+            return {}
+        since = (_now_utc() - timedelta(days=CURSOR_LOOKBACK_DAYS)).isoformat()
+        row_ids: Dict[int, Tuple[HandleCursor, str]] = {}
+        page_size = 1000
+        offset = 0
+        try:
+            while True:
+                rows = (
+                    self.supabase.table("stock_x_posts_raw")
+                    .select("id,handle,post_id,posted_at")
+                    .in_("handle", list(cursors))
+                    .gte("posted_at", since)
+                    .order("posted_at", desc=True)
+                    .range(offset, offset + page_size - 1)
+                    .execute()
+                    .data
+                    or []
+                )
+                for row in rows:
+                    cursor = cursors.get(str(row.get("handle") or ""))
+                    post_id = str(row.get("post_id") or "")
+                    if cursor is None or not post_id:
+                        continue
+                    # 按 posted_at 倒序读取，首条即最新
+                    cursor.add_stored_post(post_id, _to_iso_datetime(row.get("posted_at")))
+                    row_ids[int(row.get("id") or 0)] = (cursor, post_id)
+                if len(rows) < page_size:
+                    break
+                offset += page_size
+        except Exception as e:
+            logger.warning(f"[STOCK_X_CURSOR_LOAD_FAILED] fallback=full error={str(e)[:160]}")
+            return {}
+
+        loaded = {handle: cursor for handle, cursor in cursors.items() if cursor.last_posted_at}
+        if loaded:
+            self._load_window_signal_counts(list(loaded), row_ids, since)
+            limits = [self._account_post_limit(handle, loaded) for handle in loaded]
+            logger.info(
+                f"[STOCK_X_CURSORS_LOADED] handles={len(cursors)} with_cursor={len(loaded)} "
+                f"seen_posts={len(row_ids)} avg_post_limit={sum(limits) / len(limits):.1f}"
+            )
+        return loaded
+
+    def _load_window_signal_counts(
+        self,
+        handles: Sequence[str],
+        row_ids: Dict[int, Tuple[HandleCursor, str]],
+        since: str,
+    ) -> None:
+        """补齐窗口内已入库帖子的信号数（健康度活跃口径用）；失败只告警，信号数按 0 计。"""
+        page_size = 1000
+        offset = 0
+        try:
+            while True:
+                rows = (
+                    self.supabase.table("stock_x_post_signals")
+                    .select("post_id")
+                    .in_("handle", list(handles))
+                    .gte("as_of", since)
+                    .order("id", desc=False)
+                    .range(offset, offset + page_size - 1)
+                    .execute()
+                    .data
+                    or []
+                )
+                for row in rows:
+                    target = row_ids.get(int(row.get("post_id") or 0))
+                    if target is not None:
+                        cursor, post_id = target
+                        cursor.window_posts[post_id] += 1
+                if len(rows) < page_size:
+                    break
+                offset += page_size
+        except Exception as e:
+            logger.warning(f"[STOCK_X_CURSOR_SIGNALS_FAILED] error={str(e)[:160]}")
+
+    def _account_post_limit(
+        self,
+        handle: str,
+        cursors: Optional[Dict[str, HandleCursor]] = None,
+    ) -> int:
+        cursor = (self.cursors if cursors is None else cursors).get(handle)
+        return cursor_post_limit(cursor, self.post_limit, _now_utc())
+
+    def _build_grok_prompt(self, account: Dict[str, Any]) -> str:
         handle = str(account.get("handle") or "")
-        started = time.perf_counter()
-        prompt = (
+        post_limit = self._account_post_limit(handle)
+        cursor = self.cursors.get(handle)
+        cursor_hint = ""
+        if cursor is not None:
+            cursor_hint = (
+                f"增量游标: 仅返回 {cursor.last_posted_at} 之后发布的帖子，"
+                f"已采集 post_id: {','.join(cursor.recent_post_ids)}；没有新帖时 posts 返回空数组。\n"
+            )
+        return (
             "你是美股投研数据工程助手。"
             "请尽量基于公开信息提取目标 X 账号最近内容，聚焦美股投资相关动态。"
             "如果无法确认真实数据，请返回空数组并在 notes 说明，禁止编造。"
@@ -536,47 +707,72 @@ class StockXSourceIngestor:
             f"账号类别: {account.get('category') or ''}\n"
             f"账号定位: {account.get('signal_type') or ''}\n"
             f"价值备注: {account.get('value_note') or ''}\n"
-            f"返回最近条数: {self.post_limit}\n"
+            f"返回最近条数: {post_limit}\n"
+            f"{cursor_hint}"
             "要求: posts 最多返回该条数，按时间倒序。"
         )
 
-        try:
-            response = self.grok_client.chat.completions.create(
-                model=self.grok_model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "你是结构化金融数据助手，必须输出合法 JSON。",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                max_tokens=6000,
-                temperature=0.1,
-                timeout=120,
-            )
-            raw_text = str(response.choices[0].message.content or "")
-            payload = self._parse_json_payload(raw_text)
-            posts = self._normalize_posts(handle=handle, payload=payload)
-            elapsed = time.perf_counter() - started
-            return AccountResult(
-                handle=handle,
-                ok=True,
-                elapsed_sec=elapsed,
-                error="",
-                account_profile=payload.get("account_profile") or {},
-                posts=posts,
-            )
-        except Exception as e:
-            elapsed = time.perf_counter() - started
-            logger.warning(f"[STOCK_X_FETCH_FAILED] handle={handle} error={str(e)[:160]}")
-            return AccountResult(
-                handle=handle,
-                ok=False,
-                elapsed_sec=elapsed,
-                error=str(e)[:500],
-                account_profile={},
-                posts=[],
-            )
+    def _estimate_grok_tokens(self, account: Dict[str, Any]) -> int:
+        prompt_tokens = len(self._build_grok_prompt(account)) // 2
+        post_limit = self._account_post_limit(str(account.get("handle") or ""))
+        return prompt_tokens + min(GROK_MAX_TOKENS, post_limit * GROK_TOKENS_PER_POST)
+
+    async def _grok_request(self, account: Dict[str, Any]) -> Tuple[str, int]:
+        """单次 Grok 调用，返回 (原始文本, 实际 token 数)；异常交给引擎分类重试。"""
+        if self.grok_client is None:
+            raise ValueError("Grok client 未初始化")
+        response = await self.grok_client.chat.completions.create(
+            model=self.grok_model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": "你是结构化金融数据助手，必须输出合法 JSON。",
+                },
+                {"role": "user", "content": self._build_grok_prompt(account)},
+            ],
+            max_tokens=GROK_MAX_TOKENS,
+            temperature=0.1,
+            timeout=GROK_TIMEOUT_SEC,
+        )
+        usage = getattr(response, "usage", None)
+        raw_text = str(response.choices[0].message.content or "")
+        return raw_text, int(getattr(usage, "total_tokens", 0) or 0)
+
+    def _account_result(self, outcome: FetchOutcome) -> AccountResult:
+        handle = str(outcome.job.get("handle") or "")
+        if outcome.ok:
+            try:
+                payload = self._parse_json_payload(outcome.value)
+                posts, stored_post_ids = self._normalize_posts(
+                    handle=handle,
+                    payload=payload,
+                    post_limit=int(outcome.job.get("post_limit") or 0)
+                    or self._account_post_limit(handle),
+                )
+                return AccountResult(
+                    handle=handle,
+                    ok=True,
+                    elapsed_sec=outcome.elapsed_sec,
+                    error="",
+                    account_profile=payload.get("account_profile") or {},
+                    posts=posts,
+                    stored_post_ids=stored_post_ids,
+                    source_model=str(outcome.job.get("source_model") or self.grok_model),
+                )
+            except Exception as e:
+                outcome.error = str(e)
+        logger.warning(
+            f"[STOCK_X_FETCH_FAILED] handle={handle} attempts={outcome.attempts} "
+            f"error={outcome.error[:160]}"
+        )
+        return AccountResult(
+            handle=handle,
+            ok=False,
+            elapsed_sec=outcome.elapsed_sec,
+            error=outcome.error[:500],
+            account_profile={},
+            posts=[],
+        )
 
     def _parse_json_payload(self, raw_text: str) -> Dict[str, Any]:
         text = str(raw_text or "").strip()
@@ -604,27 +800,35 @@ class StockXSourceIngestor:
                 return {}
         return {}
 
-    def _normalize_posts(self, handle: str, payload: Dict[str, Any]) -> List[Dict[str, Any]]:
+    def _normalize_posts(
+        self,
+        handle: str,
+        payload: Dict[str, Any],
+        post_limit: Optional[int] = None,
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """返回 (未入库帖子的归一化结果, 已入库帖子的 post_id)。"""
         posts = payload.get("posts") if isinstance(payload.get("posts"), list) else []
+        candidates = [
+            item
+            for item in posts[: post_limit or self.post_limit]
+            if isinstance(item, dict)
+            and (_safe_text(item.get("text"), 3000) or _safe_text(item.get("content_zh"), 3000))
+        ]
+        # 游标窗口内已入库的帖子不再归一化与重复写入，只计数
+        fresh, stored_post_ids = partition_posts(
+            candidates,
+            self.cursors.get(handle),
+            lambda item: _post_id_of(handle, item),
+        )
         normalized: List[Dict[str, Any]] = []
 
-        for item in posts[: self.post_limit]:
-            if not isinstance(item, dict):
-                continue
+        for post_id, item in fresh:
             text = _safe_text(item.get("text"), 3000)
             content_zh = _safe_text(item.get("content_zh"), 3000)
-            if not text and not content_zh:
-                continue
-
-            post_id = _safe_text(item.get("post_id"), 80)
             posted_at = _to_iso_datetime(item.get("posted_at"))
             post_url = _safe_text(item.get("post_url"), 500)
             lang = _safe_text(item.get("lang"), 16).lower() or "unknown"
             metrics = _normalize_metrics(item.get("metrics"))
-
-            if not post_id:
-                seed = f"{handle}|{posted_at}|{text[:120]}"
-                post_id = hashlib.md5(seed.encode("utf-8")).hexdigest()[:24]
             if not post_url:
                 post_url = f"https://x.com/{handle}/status/{post_id}"
 
@@ -699,7 +903,7 @@ class StockXSourceIngestor:
                     "signals": signals,
                 }
             )
-        return normalized
+        return normalized, stored_post_ids
 
     def _create_run_record(self, params_json: Dict[str, Any]) -> None:
         if self.dry_run:
@@ -749,111 +953,88 @@ class StockXSourceIngestor:
         except Exception as e:
             logger.warning(f"[STOCK_X_RUN_RECORD_FINISH_FAILED] error={str(e)[:160]}")
 
-    def _persist_account_results(
+    def _account_health_row(self, result: AccountResult, persist_error: str = "") -> Dict[str, Any]:
+        """单账号健康行；入库失败时按失败计（failure_count=1，latest_error 记入库错误）。"""
+        ok = result.ok and not persist_error
+        # 健康行按账号活跃度计（本轮新帖 + 窗口内已入库帖子），不按本轮写入数：
+        # 同一天多轮覆盖写，没有新帖的一轮不能把当天计数冲成 0
+        active_posts, active_signals = window_activity(
+            self.cursors.get(result.handle),
+            [(post["post_id"], len(post.get("signals") or [])) for post in result.posts],
+            self.post_limit,
+        )
+        return {
+            "health_date": datetime.now(timezone.utc).date().isoformat(),
+            "handle": result.handle,
+            "success_count": 1 if ok else 0,
+            "failure_count": 0 if ok else 1,
+            "post_count": active_posts,
+            "signal_count": active_signals,
+            "avg_latency_ms": round(result.elapsed_sec * 1000, 2),
+            "status": _health_status(ok, active_posts, active_signals),
+            "latest_error": (f"persist: {persist_error}" if persist_error else result.error)[:500],
+            "run_id": self.run_id,
+            "as_of": _now_utc().isoformat(),
+        }
+
+    def _persist_account_result(
         self,
         account_id_map: Dict[str, int],
-        results: List[AccountResult],
-    ) -> Tuple[int, int, int]:
+        result: AccountResult,
+    ) -> Tuple[int, int, int, Optional[Dict[str, Any]]]:
+        """写入单账号的帖子 / 信号 / 事件，返回 (帖子数, 信号数, 事件数, 健康行)；健康行由调用方最后统一写。"""
+        account_id = int(account_id_map.get(result.handle) or 0)
+        if account_id <= 0:
+            return 0, 0, 0, None
         now_iso = _now_utc().isoformat()
 
         post_rows: List[Dict[str, Any]] = []
         post_key_meta: Dict[str, Dict[str, Any]] = {}
-        per_account_health: List[Dict[str, Any]] = []
-
-        for result in results:
-            account_id = int(account_id_map.get(result.handle) or 0)
-            if account_id <= 0:
-                continue
-
-            success_count = 1 if result.ok else 0
-            failure_count = 0 if result.ok else 1
-            account_post_count = 0
-            account_signal_count = 0
-
-            for post in result.posts:
-                post_key = f"{result.handle}:{post['post_id']}"
-                raw_payload = {
-                    "source": "grok",
-                    "account_profile": result.account_profile,
-                }
-                post_rows.append(
-                    {
-                        "post_key": post_key,
-                        "account_id": account_id,
-                        "handle": result.handle,
-                        "post_id": post["post_id"],
-                        "post_url": post["post_url"],
-                        "posted_at": post["posted_at"],
-                        "content": _safe_text(post["text"], 5000),
-                        "content_zh": _safe_text(post.get("content_zh"), 5000),
-                        "lang": _safe_text(post.get("lang"), 16) or "unknown",
-                        "metrics": post.get("metrics") or {},
-                        "raw_payload": raw_payload,
-                        "run_id": self.run_id,
-                        "as_of": now_iso,
-                    }
-                )
-                post_key_meta[post_key] = {
-                    "handle": result.handle,
+        for post in result.posts:
+            post_key = f"{result.handle}:{post['post_id']}"
+            raw_payload = {
+                "source": "grok",
+                "account_profile": result.account_profile,
+            }
+            post_rows.append(
+                {
+                    "post_key": post_key,
                     "account_id": account_id,
+                    "handle": result.handle,
+                    "post_id": post["post_id"],
                     "post_url": post["post_url"],
                     "posted_at": post["posted_at"],
-                    "content": post["text"],
-                    "content_zh": post.get("content_zh") or "",
-                    "signals": post.get("signals") or [],
-                }
-                account_post_count += 1
-                account_signal_count += len(post.get("signals") or [])
-
-            per_account_health.append(
-                {
-                    "health_date": datetime.now(timezone.utc).date().isoformat(),
-                    "handle": result.handle,
-                    "success_count": success_count,
-                    "failure_count": failure_count,
-                    "post_count": account_post_count,
-                    "signal_count": account_signal_count,
-                    "avg_latency_ms": round(result.elapsed_sec * 1000, 2),
-                    "status": _health_status(result.ok, account_post_count, account_signal_count),
-                    "latest_error": result.error[:500],
+                    "content": _safe_text(post["text"], 5000),
+                    "content_zh": _safe_text(post.get("content_zh"), 5000),
+                    "lang": _safe_text(post.get("lang"), 16) or "unknown",
+                    "metrics": post.get("metrics") or {},
+                    "raw_payload": raw_payload,
                     "run_id": self.run_id,
                     "as_of": now_iso,
                 }
             )
+            post_key_meta[post_key] = {
+                "handle": result.handle,
+                "account_id": account_id,
+                "post_url": post["post_url"],
+                "posted_at": post["posted_at"],
+                "content": post["text"],
+                "content_zh": post.get("content_zh") or "",
+                "signals": post.get("signals") or [],
+            }
 
-        if self.dry_run:
-            return len(post_rows), 0, 0
-
-        if post_rows:
-            for batch in _chunks(post_rows, 200):
-                self.supabase.table("stock_x_posts_raw").upsert(
-                    batch,
-                    on_conflict="post_key",
-                ).execute()
-
-        if per_account_health:
-            for batch in _chunks(per_account_health, 100):
-                self.supabase.table("stock_x_account_health_daily").upsert(
-                    batch,
-                    on_conflict="health_date,handle",
-                ).execute()
-
-        post_keys = [row["post_key"] for row in post_rows]
-        stored_posts: List[Dict[str, Any]] = []
-        for batch in _chunks(post_keys, 200):
-            if not batch:
-                continue
-            fetched = (
-                self.supabase.table("stock_x_posts_raw")
-                .select("id,post_key")
-                .in_("post_key", batch)
-                .execute()
-                .data
-                or []
-            )
-            stored_posts.extend(fetched)
+        health_row = self._account_health_row(result)
 
-        post_id_map = {str(row.get("post_key") or ""): int(row.get("id") or 0) for row in stored_posts}
+        if self.dry_run or not post_rows:
+            return len(post_rows), 0, 0, health_row
+
+        post_id_map = self._upsert_returning_ids(
+            table="stock_x_posts_raw",
+            rows=post_rows,
+            on_conflict="post_key",
+            key_field="post_key",
+            chunk_size=POST_UPSERT_CHUNK,
+        )
 
         signal_rows: List[Dict[str, Any]] = []
         event_rows: List[Dict[str, Any]] = []
@@ -923,7 +1104,7 @@ class StockXSourceIngestor:
                             "post_url": meta.get("post_url"),
                             "signal_tags": signal.get("signal_tags") or [],
                             "llm_used": True,
-                            "source_model": self.grok_model,
+                            "source_model": result.source_model,
                             "source_pipeline": "stock_x_source_ingest",
                             "data_quality": signal.get("data_quality") or "unknown",
                         },
@@ -946,15 +1127,53 @@ class StockXSourceIngestor:
                     }
                 )
 
-        if signal_rows:
-            for batch in _chunks(signal_rows, 300):
-                self.supabase.table("stock_x_post_signals").upsert(
-                    batch,
-                    on_conflict="post_id,ticker,event_type,side",
-                ).execute()
+        for batch in _chunks(signal_rows, SIGNAL_UPSERT_CHUNK):
+            self.supabase.table("stock_x_post_signals").upsert(
+                batch,
+                on_conflict="post_id,ticker,event_type,side",
+                returning="minimal",
+            ).execute()
 
         events_written = self._upsert_events(event_rows=event_rows, raw_map_rows=event_map_rows)
-        return len(post_rows), len(signal_rows), events_written
+        return len(post_rows), len(signal_rows), events_written, health_row
+
+    def _upsert_returning_ids(
+        self,
+        table: str,
+        rows: List[Dict[str, Any]],
+        on_conflict: str,
+        key_field: str,
+        chunk_size: int,
+    ) -> Dict[str, int]:
+        """分块 upsert 并直接取回 id；返回体缺行时按 key 补查一次。"""
+        key_to_id: Dict[str, int] = {}
+        for batch in _chunks(rows, chunk_size):
+            returned = self.supabase.table(table).upsert(batch, on_conflict=on_conflict).execute().data or []
+            for row in returned:
+                key_to_id[str(row.get(key_field) or "")] = int(row.get("id") or 0)
+            missing = [row[key_field] for row in batch if not key_to_id.get(row[key_field])]
+            if missing:
+                fetched = (
+                    self.supabase.table(table)
+                    .select(f"id,{key_field}")
+                    .in_(key_field, missing)
+                    .execute()
+                    .data
+                    or []
+                )
+                for row in fetched:
+                    key_to_id[str(row.get(key_field) or "")] = int(row.get("id") or 0)
+        return key_to_id
+
+    def _flush_account_health(self, rows: List[Dict[str, Any]]) -> None:
+        if self.dry_run or not rows:
+            return
+        for batch in _chunks(rows, 100):
+            self.supabase.table("stock_x_account_health_daily").upsert(
+                batch,
+                on_conflict="health_date,handle",
+                returning="minimal",
+            ).execute()
 
     def _upsert_events(
         self,
@@ -964,26 +1183,13 @@ class StockXSourceIngestor:
         if not event_rows:
             return 0
 
-        for batch in _chunks(event_rows, 250):
-            self.supabase.table("stock_events_v2").upsert(
-                batch,
-                on_conflict="event_key",
-            ).execute()
-
-        event_keys = [row["event_key"] for row in event_rows]
-        id_rows: List[Dict[str, Any]] = []
-        for batch in _chunks(event_keys, 250):
-            fetched = (
-                self.supabase.table("stock_events_v2")
-                .select("id,event_key")
-                .in_("event_key", batch)
-                .execute()
-                .data
-                or []
-            )
-            id_rows.extend(fetched)
-
-        key_to_id = {str(row.get("event_key") or ""): int(row.get("id") or 0) for row in id_rows}
+        key_to_id = self._upsert_returning_ids(
+            table="stock_events_v2",
+            rows=event_rows,
+            on_conflict="event_key",
+            key_field="event_key",
+            chunk_size=EVENT_UPSERT_CHUNK,
+        )
 
         map_rows: List[Dict[str, Any]] = []
         for row in raw_map_rows:
@@ -1002,16 +1208,21 @@ class StockXSourceIngestor:
                 }
             )
 
-        if map_rows:
-            for batch in _chunks(map_rows, 300):
-                self.supabase.table("stock_event_tickers_v2").upsert(
-                    batch,
-                    on_conflict="event_id,ticker,role",
-                ).execute()
+        for batch in _chunks(map_rows, SIGNAL_UPSERT_CHUNK):
+            self.supabase.table("stock_event_tickers_v2").upsert(
+                batch,
+                on_conflict="event_id,ticker,role",
+                returning="minimal",
+            ).execute()
 
         return len(event_rows)
 
-    def _upsert_source_health(self, stats: IngestStats, freshest_post_at: str) -> None:
+    def _upsert_source_health(
+        self,
+        stats: IngestStats,
+        freshest_post_at: str,
+        p95_latency_ms: float = 0.0,
+    ) -> None:
         if self.dry_run:
             return
 
@@ -1019,7 +1230,8 @@ class StockXSourceIngestor:
         total = max(1, stats.accounts_total)
         success_rate = stats.accounts_success / total
         error_rate = 1.0 - success_rate
-        null_rate = 1.0 if stats.posts_written <= 0 else 0.0
+        # 按活跃帖子判断空结果：有游标时本轮没有新帖属正常，不算 null
+        null_rate = 1.0 if stats.posts_active <= 0 else 0.0
         freshness_sec = 999999
         if freshest_post_at:
             freshness_sec = _seconds_since_iso(freshest_post_at)
@@ -1034,14 +1246,15 @@ class StockXSourceIngestor:
             "source_id": "x_grok_accounts",
             "health_date": now.date().isoformat(),
             "success_rate": round(success_rate, 4),
-            "p95_latency_ms": 0,
+            "p95_latency_ms": round(p95_latency_ms, 2),
             "freshness_sec": max(0, freshness_sec),
             "null_rate": round(null_rate, 4),
             "error_rate": round(error_rate, 4),
             "status": status,
             "notes": (
                 f"accounts={stats.accounts_total}, success={stats.accounts_success}, "
-                f"posts={stats.posts_written}, signals={stats.signals_written}"
+                f"posts={stats.posts_written}, signals={stats.signals_written}, "
+                f"active_posts={stats.posts_active}, seen_skipped={stats.posts_seen_skipped}"
             ),
             "source_payload": {
                 "mode": self.mode,
@@ -1074,11 +1287,24 @@ class StockXSourceIngestor:
                 "topn": self.topn,
                 "post_limit": self.post_limit,
                 "workers": self.workers,
+                "max_workers": self.max_workers,
+                "grok_rpm": self.grok_rpm,
+                "grok_tpm": self.grok_tpm,
+                "max_attempts": self.max_attempts,
+                "full_refresh": self.full_refresh,
+                "schedule": self.schedule,
+                "run_interval_min": self.run_interval_min,
+                "token_budget": self.token_budget,
+                "record": self.record,
+                "replay_of": self.replay_run_id,
                 "accounts_file": str(self.accounts_file),
                 "deactivate_others": self.deactivate_others,
             }
         )
 
+        if self.mode == "replay":
+            return self._run_replay(started_at=started_at, stats=stats, errors=errors)
+
         accounts_for_ingest: List[Dict[str, Any]] = []
         account_id_map: Dict[str, int] = {}
 
@@ -1137,53 +1363,54 @@ class StockXSourceIngestor:
                 "stats": stats.__dict__,
             }
 
-        stats.accounts_total = len(accounts_for_ingest)
-        worker_count = min(self.workers, max(1, len(accounts_for_ingest)))
-        results: List[AccountResult] = []
-
-        with ThreadPoolExecutor(max_workers=worker_count) as executor:
-            futures = {
-                executor.submit(self._grok_fetch_account, account): account
-                for account in accounts_for_ingest
-            }
-            for idx, future in enumerate(as_completed(futures), start=1):
-                account = futures[future]
-                handle = str(account.get("handle") or "")
-                try:
-                    result = future.result()
-                except Exception as e:
-                    result = AccountResult(
-                        handle=handle,
-                        ok=False,
-                        elapsed_sec=0.0,
-                        error=str(e)[:300],
-                        account_profile={},
-                        posts=[],
-                    )
-                results.append(result)
-
-                if result.ok:
-                    stats.accounts_success += 1
-                else:
-                    stats.accounts_failed += 1
-                    errors.append(f"{handle}:{result.error}")
-
-                logger.info(
-                    "[STOCK_X_FETCH_PROGRESS] "
-                    f"idx={idx}/{len(accounts_for_ingest)} handle={handle} "
-                    f"ok={result.ok} posts={len(result.posts)} elapsed={result.elapsed_sec:.2f}s"
+        self.cursors = self._load_handle_cursors(
+            [str(account.get("handle") or "") for account in accounts_for_ingest]
+        )
+        schedule_store: Optional[AccountScheduleStore] = None
+        schedule_plans: Dict[str, Any] = {}
+        schedule_summary: Dict[str, Any] = {}
+        if self.schedule:
+            schedule_store = AccountScheduleStore(self.supabase, run_interval_min=self.run_interval_min)
+            accounts_for_ingest, schedule_plans, schedule_summary = self._plan_schedule(
+                schedule_store, accounts_for_ingest
+            )
+            if not accounts_for_ingest:
+                logger.info(f"[STOCK_X_NOTHING_DUE] run_id={self.run_id} pool={len(schedule_plans)}")
+                self._finish_run_record(
+                    status="success",
+                    stats=stats,
+                    started_at=started_at,
+                    error_summary="",
                 )
+                return {
+                    "run_id": self.run_id,
+                    "mode": self.mode,
+                    "stats": stats.__dict__,
+                    "schedule": schedule_summary,
+                }
 
-        post_count, signal_count, events_count = self._persist_account_results(
-            account_id_map=account_id_map,
-            results=results,
+        stats.accounts_total = len(accounts_for_ingest)
+        fetched_ok, freshest_post_at, engine_stats = asyncio.run(
+            self._fetch_and_persist(
+                accounts=accounts_for_ingest,
+                account_id_map=account_id_map,
+                stats=stats,
+                errors=errors,
+            )
         )
-        stats.posts_written = post_count
-        stats.signals_written = signal_count
-        stats.events_written = events_count
 
-        freshest_post_at = _find_freshest_post(results)
-        self._upsert_source_health(stats=stats, freshest_post_at=freshest_post_at)
+        if schedule_store is not None and not self.dry_run:
+            schedule_store.save(
+                plans=schedule_plans,
+                fetched_ok=fetched_ok,
+                now=_now_utc(),
+                run_id=self.run_id,
+            )
+        self._upsert_source_health(
+            stats=stats,
+            freshest_post_at=freshest_post_at,
+            p95_latency_ms=float(engine_stats.get("p95_latency_ms") or 0.0),
+        )
 
         status = "success" if stats.accounts_failed == 0 else "failed"
         self._finish_run_record(
@@ -1197,15 +1424,267 @@ class StockXSourceIngestor:
             "[STOCK_X_RUN_DONE] "
             f"run_id={self.run_id} accounts={stats.accounts_total} success={stats.accounts_success} "
             f"failed={stats.accounts_failed} posts={stats.posts_written} "
-            f"signals={stats.signals_written} events={stats.events_written}"
+            f"signals={stats.signals_written} events={stats.events_written} "
+            f"seen_skipped={stats.posts_seen_skipped} tokens={engine_stats.get('tokens_used')} "
+            f"requests={engine_stats.get('requests')} retries={engine_stats.get('retries')} "
+            f"throttled={engine_stats.get('throttled')} hedges={engine_stats.get('hedges')} "
+            f"concurrency={engine_stats.get('final_concurrency')}"
         )
         return {
             "run_id": self.run_id,
             "mode": self.mode,
             "stats": stats.__dict__,
+            "fetch_engine": engine_stats,
+            "schedule": schedule_summary,
+            "recorded": self.response_store.recorded,
             "error_summary": "; ".join(errors)[:1000],
         }
 
+    def _run_replay(self, started_at: datetime, stats: IngestStats, errors: List[str]) -> Dict[str, Any]:
+        """用录制的 Grok 原始响应重跑解析与入库，不调用 API；不写健康度与调度表。"""
+        records = self.response_store.load_run(self.replay_run_id)
+        if not records:
+            available = ",".join(self.response_store.list_runs()[:5])
+            logger.warning(
+                f"[STOCK_X_REPLAY_EMPTY] replay_of={self.replay_run_id} "
+                f"dir={self.response_store.run_dir(self.replay_run_id)} recent_runs={available}"
+            )
+            self._finish_run_record(
+                status="failed",
+                stats=stats,
+                started_at=started_at,
+                error_summary="no recorded responses",
+            )
+            return {
+                "run_id": self.run_id,
+                "mode": self.mode,
+                "replay_of": self.replay_run_id,
+                "error": "no recorded responses",
+                "stats": stats.__dict__,
+            }
+
+        # 回放要重写录制中的全部帖子（upsert 幂等），不按已入库 post_id 跳过
+        self.cursors = {}
+        account_id_map = self._load_account_ids([item.handle for item in records])
+        stats.accounts_total = len(records)
+        replay_started = time.perf_counter()
+        asyncio.run(
+            self._persist_outcomes(
+                outcomes=self._replay_outcomes(records),
+                total=len(records),
+                account_id_map=account_id_map,
+                stats=stats,
+                errors=errors,
+                write_health=False,
+            )
+        )
+        elapsed_sec = time.perf_counter() - replay_started
+        # 带游标录制的响应只含游标之后的新帖，回放结果按账号标出，避免误读为账号停更
+        cursor_limited = {item.handle: item.cursor_since for item in records if item.cursor_since}
+
+        status = "success" if stats.accounts_failed == 0 else "failed"
+        self._finish_run_record(
+            status=status,
+            stats=stats,
+            started_at=started_at,
+            error_summary="; ".join(errors)[:5000],
+        )
+        logger.info(
+            "[STOCK_X_REPLAY_DONE] "
+            f"run_id={self.run_id} replay_of={self.replay_run_id} accounts={stats.accounts_total} "
+            f"failed={stats.accounts_failed} posts={stats.posts_written} signals={stats.signals_written} "
+            f"events={stats.events_written} cursor_limited={len(cursor_limited)} "
+            f"elapsed={elapsed_sec:.2f}s"
+        )
+        return {
+            "run_id": self.run_id,
+            "mode": self.mode,
+            "replay_of": self.replay_run_id,
+            "stats": stats.__dict__,
+            "cursor_limited": cursor_limited,
+            "elapsed_sec": round(elapsed_sec, 3),
+            "error_summary": "; ".join(errors)[:1000],
+        }
+
+    def _plan_schedule(
+        self,
+        store: AccountScheduleStore,
+        accounts: List[Dict[str, Any]],
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, Any], Dict[str, Any]]:
+        """按质量分级与到期时间挑出本轮账号，并在 token 预算内截断。"""
+        now = _now_utc()
+        handles = [str(account.get("handle") or "") for account in accounts]
+        schedule_rows = store.load_schedule(handles)
+        score_rows = store.load_scores(handles, now)
+        selected, plans = plan_run(
+            accounts,
+            score_rows=score_rows,
+            schedule_rows=schedule_rows if store.available else {},
+            now=now,
+            token_budget=self.token_budget,
+            estimate_tokens=self._estimate_grok_tokens,
+        )
+        breakdown = tier_breakdown(plans)
+        estimated = sum(plan.estimated_tokens for plan in plans.values() if plan.selected)
+        deferred = sum(1 for plan in plans.values() if plan.skip_reason == "token_budget")
+        summary = {
+            "pool": len(plans),
+            "selected": len(selected),
+            "not_due": sum(1 for plan in plans.values() if plan.skip_reason == "not_due"),
+            "budget_deferred": deferred,
+            "estimated_tokens": estimated,
+            "token_budget": self.token_budget,
+            "tiers": breakdown,
+            "store_available": store.available,
+        }
+        logger.info(
+            f"[STOCK_X_SCHEDULE] pool={len(plans)} selected={len(selected)} "
+            f"not_due={summary['not_due']} budget_deferred={deferred} "
+            f"est_tokens={estimated} budget={self.token_budget or 'unlimited'} "
+            f"tiers={json.dumps(breakdown, ensure_ascii=False)}"
+        )
+        return selected, plans, summary
+
+    async def _fetch_and_persist(
+        self,
+        accounts: List[Dict[str, Any]],
+        account_id_map: Dict[str, int],
+        stats: IngestStats,
+        errors: List[str],
+    ) -> Tuple[Dict[str, bool], str, Dict[str, Any]]:
+        """异步采集并逐账号入库；开启录制时成功响应同时写入本地录制目录。
+
+        返回 (handle -> 是否成功, 最新帖子时间, 引擎指标)。
+        """
+        engine = GrokFetchEngine(
+            call=self._grok_request,
+            estimate_tokens=self._estimate_grok_tokens,
+            rpm=self.grok_rpm,
+            tpm=self.grok_tpm,
+            initial_concurrency=min(self.workers, len(accounts)),
+            max_concurrency=self.max_workers,
+            max_attempts=self.max_attempts,
+            request_timeout_sec=GROK_TIMEOUT_SEC,
+        )
+        outcomes = engine.iter_results(accounts)
+        if self.record:
+            outcomes = self._record_outcomes(outcomes)
+        fetched_ok, freshest_post_at = await self._persist_outcomes(
+            outcomes=outcomes,
+            total=len(accounts),
+            account_id_map=account_id_map,
+            stats=stats,
+            errors=errors,
+        )
+        return fetched_ok, freshest_post_at, engine.stats.as_dict()
+
+    async def _record_outcomes(self, outcomes: AsyncIterator[FetchOutcome]) -> AsyncIterator[FetchOutcome]:
+        async for outcome in outcomes:
+            if outcome.ok:
+                handle = str(outcome.job.get("handle") or "")
+                cursor = self.cursors.get(handle)
+                self.response_store.record(
+                    run_id=self.run_id,
+                    handle=handle,
+                    raw_text=str(outcome.value or ""),
+                    post_limit=self._account_post_limit(handle),
+                    model=self.grok_model,
+                    attempts=outcome.attempts,
+                    elapsed_sec=outcome.elapsed_sec,
+                    cursor_since=cursor.last_posted_at if cursor is not None else "",
+                )
+            yield outcome
+
+    async def _replay_outcomes(self, records: Sequence[GrokResponse]) -> AsyncIterator[FetchOutcome]:
+        for item in records:
+            # 回放按录制时的单账号上限截断、沿用录制时的模型名，与原始采集一致
+            job = {"handle": item.handle, "post_limit": item.post_limit, "source_model": item.model}
+            yield FetchOutcome(
+                job=job,
+                ok=True,
+                value=item.raw_text,
+                error="",
+                attempts=item.attempts,
+                elapsed_sec=item.elapsed_sec,
+            )
+
+    async def _persist_outcomes(
+        self,
+        outcomes: AsyncIterator[FetchOutcome],
+        total: int,
+        account_id_map: Dict[str, int],
+        stats: IngestStats,
+        errors: List[str],
+        write_health: bool = True,
+    ) -> Tuple[Dict[str, bool], str]:
+        """每个账号完成即交单线程写入器落库，在途写入超过上限时等待最早一个完成。
+
+        返回 (handle -> 是否成功, 最新帖子时间)；健康行在全部写完后统一写一次。
+        """
+        loop = asyncio.get_running_loop()
+        fetched_ok: Dict[str, bool] = {}
+        health_rows: List[Dict[str, Any]] = []
+        freshest_post_at = ""
+        freshest_age = 10**9
+        pending_writes: Deque[Tuple[AccountResult, asyncio.Future]] = deque()
+
+        async def settle_oldest() -> None:
+            """等最早一个账号写完再记成功 / 失败：入库失败的账号按失败计并保留健康行。"""
+            result, future = pending_writes.popleft()
+            try:
+                post_count, signal_count, events_count, health_row = await future
+            except Exception as e:
+                logger.warning(f"[STOCK_X_PERSIST_FAILED] handle={result.handle} error={str(e)[:160]}")
+                errors.append(f"{result.handle}:persist:{str(e)[:200]}")
+                post_count, signal_count, events_count = 0, 0, 0
+                health_row = None
+                if int(account_id_map.get(result.handle) or 0) > 0:
+                    health_row = self._account_health_row(result, persist_error=str(e))
+                fetched_ok[result.handle] = False
+            if fetched_ok[result.handle]:
+                stats.accounts_success += 1
+            else:
+                stats.accounts_failed += 1
+            stats.posts_written += post_count
+            stats.signals_written += signal_count
+            stats.events_written += events_count
+            if health_row is not None:
+                stats.posts_active += int(health_row.get("post_count") or 0)
+                health_rows.append(health_row)
+
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            async for outcome in outcomes:
+                result = self._account_result(outcome)
+                fetched_ok[result.handle] = result.ok
+                if not result.ok:
+                    errors.append(f"{result.handle}:{result.error}")
+                stats.posts_seen_skipped += len(result.stored_post_ids)
+                # 没有新帖时以游标里已入库的最新帖子为新鲜度下限
+                cursor = self.cursors.get(result.handle)
+                posted_times = [str(post.get("posted_at") or "") for post in result.posts]
+                if cursor is not None:
+                    posted_times.append(cursor.last_posted_at)
+                for posted_at in posted_times:
+                    age = _seconds_since_iso(posted_at) if posted_at else freshest_age
+                    if age < freshest_age:
+                        freshest_age = age
+                        freshest_post_at = posted_at
+                logger.info(
+                    "[STOCK_X_FETCH_PROGRESS] "
+                    f"idx={len(fetched_ok)}/{total} handle={result.handle} ok={result.ok} "
+                    f"attempts={outcome.attempts} posts={len(result.posts)} elapsed={result.elapsed_sec:.2f}s"
+                )
+                while len(pending_writes) >= PERSIST_MAX_INFLIGHT:
+                    await settle_oldest()
+                future = loop.run_in_executor(writer, self._persist_account_result, account_id_map, result)
+                pending_writes.append((result, future))
+            while pending_writes:
+                await settle_oldest()
+
+        if write_health:
+            await asyncio.to_thread(self._flush_account_health, health_rows)
+        return fetched_ok, freshest_post_at
+
 
 def _safe_text(value: Any, max_len: int) -> str:
     return str(value or "").strip()[:max_len]
@@ -1226,6 +1705,15 @@ def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def _post_id_of(handle: str, item: Dict[str, Any]) -> str:
+    post_id = _safe_text(item.get("post_id"), 80)
+    if post_id:
+        return post_id
+    text = _safe_text(item.get("text"), 3000)
+    seed = f"{handle}|{_to_iso_datetime(item.get('posted_at'))}|{text[:120]}"
+    return hashlib.md5(seed.encode("utf-8")).hexdigest()[:24]
+
+
 def _to_iso_datetime(value: Any) -> str:
     if isinstance(value, datetime):
         dt = value
@@ -1326,19 +1814,6 @@ def _seconds_since_iso(value: str) -> int:
     return max(0, int((_now_utc() - dt.astimezone(timezone.utc)).total_seconds()))
 
 
-def _find_freshest_post(results: Sequence[AccountResult]) -> str:
-    freshest = ""
-    freshest_age = 10**9
-    for result in results:
-        for post in result.posts:
-            posted_at = str(post.get("posted_at") or "")
-            age = _seconds_since_iso(posted_at)
-            if age < freshest_age:
-                freshest_age = age
-                freshest = posted_at
-    return freshest
-
-
 def _default_run_id(mode: str) -> str:
     ts = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
     return f"stock-x-{mode}-{ts}"
@@ -1359,7 +1834,70 @@ def parse_args() -> argparse.Namespace:
     )
     parser.add_argument("--topn", type=int, default=30, help="入选账号数量")
     parser.add_argument("--post-limit", type=int, default=20, help="每账号最多采集帖子数量")
-    parser.add_argument("--workers", type=int, default=6, help="并发账号采集线程数")
+    parser.add_argument("--workers", type=int, default=6, help="初始并发请求数（AIMD 自适应调整）")
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=int(os.getenv("GROK_MAX_CONCURRENCY", "0") or 0),
+        help="并发上限，0=4 倍 --workers",
+    )
+    parser.add_argument(
+        "--grok-rpm",
+        type=float,
+        default=float(os.getenv("GROK_RPM", "60") or 60),
+        help="Grok 每分钟请求数上限，0=不限",
+    )
+    parser.add_argument(
+        "--grok-tpm",
+        type=float,
+        default=float(os.getenv("GROK_TPM", "0") or 0),
+        help="Grok 每分钟 token 上限，0=不限",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=int(os.getenv("GROK_MAX_ATTEMPTS", "4") or 4),
+        help="单账号最多尝试次数（429/5xx/超时退避重试）",
+    )
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="忽略增量游标，按 --post-limit 重新拉取最近帖子",
+    )
+    parser.add_argument(
+        "--no-schedule",
+        action="store_true",
+        help="关闭分级节奏，每轮采集全部活跃账号",
+    )
+    parser.add_argument(
+        "--run-interval-min",
+        type=float,
+        default=float(os.getenv("STOCK_X_RUN_INTERVAL_MIN", "120") or 120),
+        help="采集调度间隔（分钟），B 档按 3 倍间隔到期",
+    )
+    parser.add_argument(
+        "--token-budget",
+        type=int,
+        default=int(os.getenv("STOCK_X_RUN_TOKEN_BUDGET", "0") or 0),
+        help="单轮 Grok token 预算（按预估截断到期账号），0=不限",
+    )
+    parser.add_argument(
+        "--record",
+        action="store_true",
+        default=read_bool_env("ENABLE_STOCK_X_GROK_RECORD", default=False),
+        help="把 Grok 原始响应按 (账号, 时间桶) 录制到 --cache-dir/<run_id>/",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.getenv("STOCK_X_GROK_CACHE_DIR", DEFAULT_CACHE_DIR),
+        help="Grok 响应录制目录",
+    )
+    parser.add_argument(
+        "--replay",
+        default="",
+        metavar="RUN_ID",
+        help="用该 run_id 的录制重跑解析与入库，不调用 Grok（忽略 --mode）",
+    )
     parser.add_argument("--run-id", default="", help="自定义 run_id")
     parser.add_argument("--dry-run", action="store_true", help="仅演练，不写库")
     parser.add_argument(
@@ -1372,10 +1910,11 @@ def parse_args() -> argparse.Namespace:
 
 def main() -> int:
     args = parse_args()
-    run_id = args.run_id or _default_run_id(args.mode)
+    mode = "replay" if args.replay else args.mode
+    run_id = args.run_id or _default_run_id(mode)
 
     ingestor = StockXSourceIngestor(
-        mode=args.mode,
+        mode=mode,
         accounts_file=args.accounts_file,
         topn=args.topn,
         post_limit=args.post_limit,
@@ -1383,6 +1922,17 @@ def main() -> int:
         run_id=run_id,
         dry_run=bool(args.dry_run),
         deactivate_others=not bool(args.no_deactivate_others),
+        max_workers=args.max_workers,
+        grok_rpm=args.grok_rpm,
+        grok_tpm=args.grok_tpm,
+        max_attempts=args.max_attempts,
+        full_refresh=bool(args.full_refresh),
+        schedule=not bool(args.no_schedule),
+        run_interval_min=args.run_interval_min,
+        token_budget=args.token_budget,
+        record=bool(args.record),
+        cache_dir=args.cache_dir,
+        replay_run_id=args.replay,
     )
     result = ingestor.run()
     logger.info(f"[STOCK_X_RESULT] {json.dumps(result, ensure_ascii=False)}")
@@ -0,0 +1,443 @@
+#!/usr/bin/env python3
+"""股票代码全集与文本抽取：基于 stock_ticker_profiles_v1，本地快照兜底。"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Set, Tuple
+
+try:
+    from scripts.keyword_matcher import trie_pattern
+except Exception:
+    from keyword_matcher import trie_pattern
+
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(
+        logging.Formatter(
+            "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
+    )
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+
+DEFAULT_SNAPSHOT_PATH = "data/stock_ticker_universe_snapshot.json"
+DEFAULT_SNAPSHOT_TTL_HOURS = 24.0
+PROFILE_PAGE_SIZE = 1000
+
+# ASCII 词元：内部允许 . - & 连接（BRK.B / AT&T / Coca-Cola）
+TOKEN_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9]*(?:[.\-&][A-Za-z0-9]+)*")
+# 候选起点：$ 开头或大写开头的词元；小写词既不是代码也不是名称首词。
+# 不用后顾断言（会让正则失去首字符快速跳过），词中起点在 extract 里过滤
+CANDIDATE_PATTERN = re.compile(r"[$A-Z][A-Za-z0-9]*(?:[.\-&][A-Za-z0-9]+)*")
+# 旧版抽取：全文转大写后的 2-5 位字母词
+LEGACY_TICKER_PATTERN = re.compile(r"\b[A-Z]{2,5}\b")
+SYMBOL_PATTERN = re.compile(r"[A-Z]{1,5}(?:[.\-][A-Z]{1,2})?")
+NAME_GAP = re.compile(r"[\s']+")
+CJK_EXCHANGE_PREFIX = re.compile(r"(?:纳斯达克|納斯達克|纽交所|紐交所|美股)\s*[:：]?\s*$")
+NAME_SUFFIX_PATTERN = re.compile(
+    r"(?:[\s,]+(?:inc|corp|corporation|co|company|ltd|limited|plc|holdings?|group|"
+    r"sa|nv|ag|se|lp|llc|class\s+[a-z]|common\s+stock|ordinary\s+shares)\.?|\.com|"
+    r"\s*\(the\)|/[a-z]+/?)$",
+    re.IGNORECASE,
+)
+
+EXCHANGE_PREFIXES = frozenset(
+    {"NASDAQ", "NYSE", "NYSEARCA", "NYSEAMERICAN", "AMEX", "ARCA", "BATS", "CBOE", "OTC"}
+)
+
+# 与常见英文/财经缩写重名的代码：裸写时不计入，只认 $TICKER / 交易所前缀 / 公司名
+COMMON_WORD_TICKERS = frozenset(
+    {
+        "A", "AI", "ALL", "AM", "AN", "ANY", "ARE", "AT", "BE", "BEST", "BIG", "BY",
+        "CAN", "CAR", "CASH", "CEO", "CFO", "CPI", "DAY", "DD", "DOW", "EAT", "ETF",
+        "EU", "EV", "FAST", "FED", "FOR", "FUN", "GDP", "GO", "GOOD", "HAS", "HE",
+        "HOME", "HOPE", "IPO", "IT", "JOB", "KEY", "LIFE", "LOVE", "LOW", "MAIN",
+        "MAN", "MOST", "NEW", "NICE", "NOW", "ON", "ONE", "OPEN", "OR", "OUT", "PCE",
+        "PEAK", "PLAY", "PM", "POST", "REAL", "RUN", "SAFE", "SEC", "SEE", "SO",
+        "TECH", "TRUE", "TV", "TWO", "UK", "US", "USA", "VERY", "WELL", "WIN", "YOU",
+    }
+)
+
+# 公司名单独出现时歧义过大（普通英文单词），不作为名称匹配
+COMMON_WORD_NAMES = frozenset(
+    {
+        "block", "target", "gap", "visa", "apple hospitality", "match", "progressive",
+        "general", "american", "first", "united", "national", "global", "international",
+    }
+)
+
+# 名称匹配只对个股启用；ETF/指数的全称基本不会在正文里出现
+NAME_ASSET_TYPES = frozenset({"equity", "unknown"})
+
+# 内置中文别名，profile metadata.aliases 可继续扩展
+SEED_ALIASES: Dict[str, Tuple[str, ...]] = {
+    "AAPL": ("苹果公司", "蘋果公司"),
+    "MSFT": ("微软", "微軟"),
+    "NVDA": ("英伟达", "輝達", "英偉達"),
+    "AMZN": ("亚马逊", "亞馬遜"),
+    "GOOGL": ("谷歌", "Alphabet"),
+    "META": ("Meta Platforms", "脸书", "臉書"),
+    "TSLA": ("特斯拉", "Tesla"),
+}
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def normalize_symbol(text: str) -> str:
+    """与 profile 同步脚本一致：大写，`.` 统一为 `-`。"""
+    return str(text or "").strip().upper().replace(".", "-")
+
+
+def _is_cjk(text: str) -> bool:
+    return any("㐀" <= char <= "鿿" for char in text)
+
+
+def _strip_name_suffix(name: str) -> str:
+    value = str(name or "").strip().strip(",")
+    while True:
+        stripped = NAME_SUFFIX_PATTERN.sub("", value).strip().strip(",")
+        if stripped == value:
+            return value
+        value = stripped
+
+
+@dataclass(frozen=True)
+class TickerProfile:
+    """抽取所需的最小 profile 字段。"""
+
+    ticker: str
+    display_name: str = ""
+    asset_type: str = "unknown"
+    exchange: str = ""
+    aliases: Tuple[str, ...] = field(default_factory=tuple)
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> Optional["TickerProfile"]:
+        ticker = normalize_symbol(row.get("ticker") or "")
+        if not ticker:
+            return None
+        metadata = row.get("metadata") if isinstance(row.get("metadata"), dict) else {}
+        aliases = row.get("aliases")
+        if aliases is None:
+            aliases = metadata.get("aliases") or []
+        return cls(
+            ticker=ticker,
+            display_name=str(row.get("display_name") or "").strip(),
+            asset_type=str(row.get("asset_type") or "unknown").strip().lower() or "unknown",
+            exchange=str(row.get("exchange") or "").strip(),
+            aliases=tuple(str(item).strip() for item in aliases if str(item or "").strip()),
+        )
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            "ticker": self.ticker,
+            "display_name": self.display_name,
+            "asset_type": self.asset_type,
+            "exchange": self.exchange,
+            "aliases": list(self.aliases),
+        }
+
+
+class TickerUniverse:
+    """代码 → profile 映射。"""
+
+    def __init__(self, profiles: Iterable[TickerProfile], source: str = "seed"):
+        self.profiles: Dict[str, TickerProfile] = {}
+        for profile in profiles:
+            self.profiles[profile.ticker] = profile
+        self.source = source
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self.profiles
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    @property
+    def tickers(self) -> Set[str]:
+        return set(self.profiles)
+
+    def with_seed(self, tickers: Iterable[str]) -> "TickerUniverse":
+        """补齐种子代码与内置别名，保证核心标的始终可识别。"""
+        profiles = dict(self.profiles)
+        for ticker in tickers:
+            symbol = normalize_symbol(ticker)
+            if symbol and symbol not in profiles:
+                profiles[symbol] = TickerProfile(ticker=symbol)
+        for ticker, aliases in SEED_ALIASES.items():
+            profile = profiles.get(ticker)
+            if profile is None:
+                continue
+            merged = tuple(dict.fromkeys(profile.aliases + aliases))
+            profiles[ticker] = TickerProfile(
+                ticker=profile.ticker,
+                display_name=profile.display_name,
+                asset_type=profile.asset_type,
+                exchange=profile.exchange,
+                aliases=merged,
+            )
+        return TickerUniverse(profiles.values(), source=self.source)
+
+
+def _read_snapshot(path: str) -> Tuple[Optional[TickerUniverse], Optional[datetime]]:
+    try:
+        with open(path, "r", encoding="utf-8") as fp:
+            payload = json.load(fp)
+        saved_at = datetime.fromisoformat(str(payload.get("saved_at") or ""))
+        if saved_at.tzinfo is None:
+            saved_at = saved_at.replace(tzinfo=timezone.utc)
+        profiles = [TickerProfile.from_row(row) for row in payload.get("profiles") or []]
+        universe = TickerUniverse([item for item in profiles if item], source="snapshot")
+        return (universe if len(universe) else None), saved_at
+    except FileNotFoundError:
+        return None, None
+    except Exception as e:
+        logger.warning(f"[TICKER_UNIVERSE_SNAPSHOT_INVALID] path={path} error={str(e)[:120]}")
+        return None, None
+
+
+def _write_snapshot(path: str, universe: TickerUniverse) -> None:
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fp:
+            json.dump(
+                {
+                    "saved_at": _now_utc().isoformat(),
+                    "count": len(universe),
+                    "profiles": [
+                        universe.profiles[ticker].to_row() for ticker in sorted(universe.profiles)
+                    ],
+                },
+                fp,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning(f"[TICKER_UNIVERSE_SNAPSHOT_WRITE_FAILED] path={path} error={str(e)[:120]}")
+
+
+def _fetch_profiles(supabase) -> List[TickerProfile]:
+    """按 id keyset 分页拉取全部启用中的 profile。"""
+    profiles: List[TickerProfile] = []
+    last_id = 0
+    while True:
+        rows = (
+            supabase.table("stock_ticker_profiles_v1")
+            .select("id,ticker,display_name,asset_type,exchange,metadata")
+            .eq("is_active", True)
+            .gt("id", last_id)
+            .order("id")
+            .limit(PROFILE_PAGE_SIZE)
+            .execute()
+            .data
+            or []
+        )
+        for row in rows:
+            profile = TickerProfile.from_row(row)
+            if profile:
+                profiles.append(profile)
+        if len(rows) < PROFILE_PAGE_SIZE:
+            return profiles
+        last_id = int(rows[-1].get("id") or 0)
+
+
+def load_ticker_universe(
+    supabase=None,
+    seed: Iterable[str] = (),
+    snapshot_path: Optional[str] = None,
+    max_age_hours: Optional[float] = None,
+) -> TickerUniverse:
+    """加载代码全集：新鲜快照 → 数据库（并刷新快照）→ 过期快照 → 种子。"""
+    path = snapshot_path or os.getenv("STOCK_TICKER_UNIVERSE_SNAPSHOT") or DEFAULT_SNAPSHOT_PATH
+    if max_age_hours is None:
+        try:
+            max_age_hours = float(
+                os.getenv("STOCK_TICKER_UNIVERSE_TTL_HOURS", DEFAULT_SNAPSHOT_TTL_HOURS)
+            )
+        except ValueError:
+            max_age_hours = DEFAULT_SNAPSHOT_TTL_HOURS
+    seed = list(seed)
+
+    snapshot, saved_at = _read_snapshot(path)
+    if snapshot is not None and saved_at is not None:
+        if _now_utc() - saved_at <= timedelta(hours=max_age_hours):
+            logger.info(f"[TICKER_UNIVERSE_SNAPSHOT] path={path} count={len(snapshot)}")
+            return snapshot.with_seed(seed)
+
+    if supabase is not None:
+        try:
+            profiles = _fetch_profiles(supabase)
+            if profiles:
+                universe = TickerUniverse(profiles, source="database")
+                _write_snapshot(path, universe)
+                logger.info(f"[TICKER_UNIVERSE_LOADED] count={len(universe)}")
+                return universe.with_seed(seed)
+        except Exception as e:
+            logger.warning(f"[TICKER_UNIVERSE_LOAD_FAILED] error={str(e)[:120]}")
+
+    if snapshot is not None:
+        logger.warning(f"[TICKER_UNIVERSE_STALE_SNAPSHOT] path={path} count={len(snapshot)}")
+        return snapshot.with_seed(seed)
+    logger.warning(f"[TICKER_UNIVERSE_SEED_ONLY] count={len(seed)}")
+    return TickerUniverse([], source="seed").with_seed(seed)
+
+
+class TrackedTickerExtractor:
+    """旧版抽取：全文转大写后按 2-5 位字母词匹配固定代码集，不认公司名 / 别名。
+
+    ENABLE_STOCK_TICKER_UNIVERSE 关闭时使用，默认路径的命中结果与改造前一致。
+    """
+
+    def __init__(self, tickers: Iterable[str]):
+        self.tickers = frozenset(str(ticker).upper() for ticker in tickers)
+
+    def extract(self, text: str) -> Set[str]:
+        if not text:
+            return set()
+        return {token for token in LEGACY_TICKER_PATTERN.findall(text.upper()) if token in self.tickers}
+
+
+class TickerExtractor:
+    """单次扫描文本抽取代码。
+
+    - `$NVDA` / `NASDAQ: NVDA` / `纳斯达克：NVDA`：显式写法，全集内即命中
+    - 裸写大写代码：需在全集内，且不在 COMMON_WORD_TICKERS、长度 ≥ 2
+    - 公司名 / 别名：英文按原大小写或首字母大写匹配，中文别名走 trie 正则
+
+    英文词元由一个字符类正则切出，之后全部是字典查找，
+    代价随文本长度线性增长，与全集大小无关。
+    """
+
+    def __init__(self, universe: TickerUniverse):
+        self.universe = universe
+        self.tickers: Set[str] = universe.tickers
+        self._names: Dict[Tuple[str, ...], str] = {}
+        self._name_first: Set[str] = set()
+        self._max_name_words = 1
+        self._cjk_aliases: Dict[str, str] = {}
+        self._cjk_pattern: Optional[Pattern[str]] = None
+
+        collisions: Set[Tuple[str, ...]] = set()
+        cjk_collisions: Set[str] = set()
+        for profile in universe.profiles.values():
+            names: List[str] = list(profile.aliases)
+            if profile.asset_type in NAME_ASSET_TYPES and profile.display_name:
+                names.append(_strip_name_suffix(profile.display_name))
+            for name in names:
+                if _is_cjk(name):
+                    if len(name) < 2:
+                        continue
+                    if self._cjk_aliases.get(name, profile.ticker) != profile.ticker:
+                        cjk_collisions.add(name)
+                    self._cjk_aliases[name] = profile.ticker
+                    continue
+                for key in self._name_keys(name):
+                    if self._names.get(key, profile.ticker) != profile.ticker:
+                        collisions.add(key)
+                    self._names[key] = profile.ticker
+
+        # 同名映射到多个代码时无法判定，直接丢弃
+        for key in collisions:
+            self._names.pop(key, None)
+        for name in cjk_collisions:
+            self._cjk_aliases.pop(name, None)
+        for key in self._names:
+            self._name_first.add(key[0])
+            self._max_name_words = max(self._max_name_words, len(key))
+        if self._cjk_aliases:
+            self._cjk_pattern = re.compile(trie_pattern(sorted(self._cjk_aliases)))
+
+    @staticmethod
+    def _name_keys(name: str) -> Set[Tuple[str, ...]]:
+        words = [item.group() for item in TOKEN_PATTERN.finditer(name)]
+        if not words:
+            return set()
+        if len(words) == 1 and (len(words[0]) < 4 or SYMBOL_PATTERN.fullmatch(words[0])):
+            # 过短或形如代码的单词名与代码本身难以区分
+            return set()
+        if " ".join(words).lower() in COMMON_WORD_NAMES:
+            return set()
+        return {
+            tuple(words),
+            tuple(word[:1].upper() + word[1:].lower() for word in words),
+            tuple(word.upper() for word in words),
+        }
+
+    def _explicit_prefix(self, text: str, start: int) -> bool:
+        head = text[max(0, start - 16) : start]
+        prefix = re.search(r"([A-Za-z]+)\s*[:：]\s*$", head)
+        if prefix and prefix.group(1).upper() in EXCHANGE_PREFIXES:
+            return True
+        return bool(CJK_EXCHANGE_PREFIX.search(head))
+
+    def _match_name(self, text: str, first: Any) -> Tuple[Optional[str], int]:
+        """从候选词元起做最长名称匹配，返回 (代码, 匹配结束位置)。"""
+        words = [first.group()]
+        ticker = self._names.get(tuple(words))
+        best: Tuple[Optional[str], int] = (ticker, first.end())
+        pos = first.end()
+        for _ in range(1, self._max_name_words):
+            gap = NAME_GAP.match(text, pos)
+            if gap is None:
+                break
+            token = TOKEN_PATTERN.match(text, gap.end())
+            if token is None:
+                break
+            words.append(token.group())
+            pos = token.end()
+            ticker = self._names.get(tuple(words))
+            if ticker:
+                best = (ticker, pos)
+        return best
+
+    def extract(self, text: str) -> Set[str]:
+        found: Set[str] = set()
+        if not text:
+            return found
+        consumed_until = 0
+        for item in CANDIDATE_PATTERN.finditer(text):
+            start = item.start()
+            if start < consumed_until:
+                continue
+            if start > 0 and text[start - 1].isascii() and text[start - 1].isalnum():
+                continue
+            raw = item.group()
+            if raw[0] == "$":
+                symbol = normalize_symbol(raw[1:])
+                if symbol in self.tickers:
+                    found.add(symbol)
+                continue
+
+            if raw in self._name_first:
+                ticker, end = self._match_name(text, item)
+                if ticker:
+                    found.add(ticker)
+                    consumed_until = end
+                    continue
+
+            if SYMBOL_PATTERN.fullmatch(raw):
+                symbol = normalize_symbol(raw)
+                if symbol in self.tickers and (
+                    (len(symbol) >= 2 and symbol not in COMMON_WORD_TICKERS)
+                    or self._explicit_prefix(text, start)
+                ):
+                    found.add(symbol)
+
+        if self._cjk_pattern is not None:
+            for item in self._cjk_pattern.finditer(text):
+                ticker = self._cjk_aliases.get(item.group())
+                if ticker:
+                    found.add(ticker)
+        return found
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""X 账号分级采集节奏。
+
+按最近一次 `stock_x_account_score_daily` 的质量分、信号产出率与新鲜度给账号分级：
+A 档每轮采集，B 档每 3 轮一次，C 档每天一次。每个账号的下次到期时间写入
+`stock_x_account_schedule`；表不可用时告警并退回“每轮全采”。
+
+每轮只采到期账号，按档位、逾期时长、价值分排序，在 token 预算内截断；
+未入选的到期账号保持到期，下一轮优先。
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_TABLE = "stock_x_account_schedule"
+SCORE_TABLE = "stock_x_account_score_daily"
+SCORE_COLUMNS = "handle,score_date,quality_score,freshness_score,posts_7d,signals_7d,status"
+SCORE_LOOKBACK_DAYS = 7
+
+TIER_ORDER = ("A", "B", "C")
+# 价值分阈值：value = 质量分 0.6 + 信号产出率 0.25 + 新鲜度 0.15（均归一到 0-1）
+TIER_A_MIN_VALUE = 0.6
+TIER_B_MIN_VALUE = 0.35
+# 没有评分的账号（新导入）先按 B 档对待
+DEFAULT_TIER = "B"
+TIER_B_EVERY_RUNS = 3
+TIER_C_INTERVAL_HOURS = 24
+# 提前量：到期时间按间隔的 10% 提前，避免调度抖动让账号恰好错过一轮
+DUE_SLACK_RATIO = 0.1
+
+
+def _safe_float(value: Any, default: float) -> float:
+    try:
+        return float(value)
+    except Exception:
+        return default
+
+
+def _clamp(value: float, left: float, right: float) -> float:
+    return max(left, min(right, value))
+
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    text = str(value or "").strip().replace("Z", "+00:00")
+    if not text:
+        return None
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def account_value(score_row: Optional[Dict[str, Any]]) -> Optional[float]:
+    """账号价值分（0-1）；没有评分时返回 None。"""
+    if not score_row:
+        return None
+    quality = _clamp(_safe_float(score_row.get("quality_score"), 0.0) / 100.0, 0.0, 1.0)
+    posts = max(0.0, _safe_float(score_row.get("posts_7d"), 0.0))
+    signals = max(0.0, _safe_float(score_row.get("signals_7d"), 0.0))
+    signal_yield = _clamp(signals / posts, 0.0, 1.0) if posts > 0 else 0.0
+    freshness = _clamp(_safe_float(score_row.get("freshness_score"), 0.0), 0.0, 1.0)
+    return round(quality * 0.6 + signal_yield * 0.25 + freshness * 0.15, 4)
+
+
+def assign_tier(score_row: Optional[Dict[str, Any]]) -> str:
+    value = account_value(score_row)
+    if value is None:
+        return DEFAULT_TIER
+    if str(score_row.get("status") or "") == "critical":
+        return "C"
+    if value >= TIER_A_MIN_VALUE:
+        return "A"
+    if value >= TIER_B_MIN_VALUE:
+        return "B"
+    return "C"
+
+
+def tier_interval(tier: str, run_interval_min: float) -> timedelta:
+    """档位采集间隔；A 档为 0（每轮）。"""
+    if tier == "A":
+        return timedelta(0)
+    if tier == "B":
+        return timedelta(minutes=max(1.0, run_interval_min) * TIER_B_EVERY_RUNS)
+    return timedelta(hours=TIER_C_INTERVAL_HOURS)
+
+
+def next_due_at(tier: str, fetched_at: datetime, run_interval_min: float) -> datetime:
+    interval = tier_interval(tier, run_interval_min)
+    return fetched_at + interval * (1.0 - DUE_SLACK_RATIO)
+
+
+def _run_interval_of(schedule_row: Optional[Dict[str, Any]]) -> float:
+    return max(1.0, _safe_float((schedule_row or {}).get("run_interval_min"), 120.0))
+
+
+@dataclass
+class ScheduledAccount:
+    """单账号本轮调度决策。"""
+
+    handle: str
+    tier: str
+    value: Optional[float]
+    next_due_at: Optional[datetime]
+    due: bool
+    selected: bool = False
+    estimated_tokens: int = 0
+    skip_reason: str = ""
+
+
+def plan_run(
+    accounts: Sequence[Dict[str, Any]],
+    score_rows: Dict[str, Dict[str, Any]],
+    schedule_rows: Dict[str, Dict[str, Any]],
+    now: datetime,
+    token_budget: int = 0,
+    estimate_tokens: Optional[Callable[[Dict[str, Any]], int]] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, ScheduledAccount]]:
+    """返回 (本轮要采集的账号, handle -> 调度决策)。token_budget <= 0 表示不限。"""
+    plans: Dict[str, ScheduledAccount] = {}
+    due_accounts: List[Tuple[Dict[str, Any], ScheduledAccount]] = []
+    for account in accounts:
+        handle = str(account.get("handle") or "")
+        if not handle:
+            continue
+        score_row = score_rows.get(handle)
+        tier = assign_tier(score_row)
+        stored_due = _parse_ts((schedule_rows.get(handle) or {}).get("next_due_at"))
+        due_at = stored_due
+        # 档位升级后不必等旧的到期时间：按新档位间隔从上次采集重算
+        last_fetched = _parse_ts((schedule_rows.get(handle) or {}).get("last_fetched_at"))
+        if last_fetched is not None:
+            recomputed = next_due_at(tier, last_fetched, _run_interval_of(schedule_rows.get(handle)))
+            due_at = recomputed if due_at is None else min(due_at, recomputed)
+        plan = ScheduledAccount(
+            handle=handle,
+            tier=tier,
+            value=account_value(score_row),
+            next_due_at=due_at,
+            due=tier == "A" or due_at is None or due_at <= now,
+        )
+        plans[handle] = plan
+        if plan.due:
+            due_accounts.append((account, plan))
+        else:
+            plan.skip_reason = "not_due"
+
+    def priority(item: Tuple[Dict[str, Any], ScheduledAccount]) -> Tuple[int, float, float]:
+        plan = item[1]
+        overdue_sec = (now - plan.next_due_at).total_seconds() if plan.next_due_at else float("inf")
+        return (TIER_ORDER.index(plan.tier), -overdue_sec, -(plan.value or 0.0))
+
+    due_accounts.sort(key=priority)
+    selected: List[Dict[str, Any]] = []
+    spent = 0
+    for account, plan in due_accounts:
+        plan.estimated_tokens = int(estimate_tokens(account)) if estimate_tokens else 0
+        if token_budget > 0 and selected and spent + plan.estimated_tokens > token_budget:
+            plan.skip_reason = "token_budget"
+            continue
+        spent += plan.estimated_tokens
+        plan.selected = True
+        selected.append(account)
+    return selected, plans
+
+
+class AccountScheduleStore:
+    """调度状态读写；表缺失时告警并退化为每轮全采。"""
+
+    def __init__(self, supabase: Any, run_interval_min: float = 120.0):
+        self.supabase = supabase
+        self.run_interval_min = max(1.0, float(run_interval_min))
+        self.available = True
+
+    def load_scores(self, handles: Sequence[str], now: datetime) -> Dict[str, Dict[str, Any]]:
+        """每个账号近 7 天内最近一天的评分行。"""
+        if not handles:
+            return {}
+        cutoff = (now - timedelta(days=SCORE_LOOKBACK_DAYS)).date().isoformat()
+        try:
+            rows = (
+                self.supabase.table(SCORE_TABLE)
+                .select(SCORE_COLUMNS)
+                .in_("handle", list(handles))
+                .gte("score_date", cutoff)
+                .order("score_date", desc=True)
+                .limit(len(handles) * (SCORE_LOOKBACK_DAYS + 1))
+                .execute()
+                .data
+                or []
+            )
+        except Exception as e:
+            logger.warning(f"[STOCK_X_SCHEDULE_SCORE_FALLBACK] error={str(e)[:120]}")
+            return {}
+        latest: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            handle = str(row.get("handle") or "")
+            if handle and handle not in latest:
+                latest[handle] = row
+        return latest
+
+    def load_schedule(self, handles: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        if not handles:
+            return {}
+        try:
+            rows = (
+                self.supabase.table(SCHEDULE_TABLE)
+                .select("handle,tier,next_due_at,last_fetched_at,run_interval_min")
+                .in_("handle", list(handles))
+                .execute()
+                .data
+                or []
+            )
+        except Exception as e:
+            logger.warning(f"[STOCK_X_SCHEDULE_UNAVAILABLE] fallback=all_due error={str(e)[:120]}")
+            self.available = False
+            return {}
+        return {str(row.get("handle") or ""): row for row in rows}
+
+    def save(
+        self,
+        plans: Dict[str, ScheduledAccount],
+        fetched_ok: Dict[str, bool],
+        now: datetime,
+        run_id: str,
+    ) -> int:
+        """写回本轮采集过的账号；失败的账号保持到期，下轮重试。"""
+        if not self.available:
+            return 0
+        rows: List[Dict[str, Any]] = []
+        for handle, ok in fetched_ok.items():
+            plan = plans.get(handle)
+            if plan is None:
+                continue
+            due_at = next_due_at(plan.tier, now, self.run_interval_min) if ok else now
+            rows.append(
+                {
+                    "handle": handle,
+                    "tier": plan.tier,
+                    "value_score": plan.value if plan.value is not None else 0.0,
+                    "next_due_at": due_at.isoformat(),
+                    "last_fetched_at": now.isoformat(),
+                    "last_ok": bool(ok),
+                    "run_interval_min": self.run_interval_min,
+                    "run_id": run_id,
+                    "as_of": now.isoformat(),
+                }
+            )
+        if not rows:
+            return 0
+        try:
+            self.supabase.table(SCHEDULE_TABLE).upsert(rows, on_conflict="handle").execute()
+        except Exception as e:
+            logger.warning(f"[STOCK_X_SCHEDULE_SAVE_FAILED] error={str(e)[:120]}")
+            return 0
+        return len(rows)
+
+
+def tier_breakdown(plans: Dict[str, ScheduledAccount]) -> Dict[str, Dict[str, int]]:
+    """按档位统计 总数 / 到期 / 入选。"""
+    summary: Dict[str, Dict[str, int]] = {
+        tier: {"total": 0, "due": 0, "selected": 0} for tier in TIER_ORDER
+    }
+    for plan in plans.values():
+        item = summary[plan.tier]
+        item["total"] += 1
+        item["due"] += int(plan.due)
+        item["selected"] += int(plan.selected)
+    return summary
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""X 账号增量游标。
+
+每轮采集前从 `stock_x_posts_raw` 读近 CURSOR_LOOKBACK_DAYS 天已入库帖子：
+- 最新 posted_at 与最近几个 post_id 写进提示词，只要新帖；
+- 按发帖速度收缩请求条数；
+- Grok 仍返回的已入库帖子不再归一化与写入，但单独计数。
+
+健康度口径与“本轮写入”分开：账号活跃度 = 本轮新帖 + 窗口内已入库帖子（取最新的
+post_limit 条），与不带游标时“每轮拉最近 post_limit 条”的口径一致，没有新帖不等于账号停更。
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+# 增量游标：回看窗口内的已入库帖子用于去重与估算发帖速度
+CURSOR_LOOKBACK_DAYS = 3
+CURSOR_PROMPT_IDS = 5
+CURSOR_MIN_POST_LIMIT = 3
+# 预期新帖数的放大系数与固定余量，避免发帖突增时漏采
+CURSOR_LIMIT_FACTOR = 1.5
+CURSOR_LIMIT_SLACK = 2
+
+
+def _clamp(value: float, left: float, right: float) -> float:
+    return max(left, min(right, value))
+
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    text = str(value or "").strip().replace("Z", "+00:00")
+    if not text:
+        return None
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+@dataclass
+class HandleCursor:
+    """单账号增量游标（来自 stock_x_posts_raw 回看窗口）。"""
+
+    handle: str
+    last_posted_at: str = ""
+    recent_post_ids: List[str] = field(default_factory=list)
+    # 窗口内已入库帖子 post_id -> 信号数，按 posted_at 倒序
+    window_posts: Dict[str, int] = field(default_factory=dict)
+    posts_per_day: float = 0.0
+
+    def add_stored_post(self, post_id: str, posted_at: str) -> None:
+        """按 posted_at 倒序逐条加入，首条即最新。"""
+        if not post_id or post_id in self.window_posts:
+            return
+        if not self.last_posted_at:
+            self.last_posted_at = posted_at
+        if len(self.recent_post_ids) < CURSOR_PROMPT_IDS:
+            self.recent_post_ids.append(post_id)
+        self.window_posts[post_id] = 0
+        self.posts_per_day = len(self.window_posts) / CURSOR_LOOKBACK_DAYS
+
+    def is_stored(self, post_id: str) -> bool:
+        return post_id in self.window_posts
+
+
+def cursor_post_limit(cursor: Optional[HandleCursor], post_limit: int, now: datetime) -> int:
+    """按游标之后的预期新帖数收缩请求条数：速度 × 距上次帖子的天数 × 系数 + 余量。"""
+    last_posted = _parse_ts(cursor.last_posted_at) if cursor is not None else None
+    if last_posted is None:
+        return post_limit
+    elapsed_days = max(0.0, (now - last_posted).total_seconds()) / 86400
+    expected = cursor.posts_per_day * elapsed_days * CURSOR_LIMIT_FACTOR + CURSOR_LIMIT_SLACK
+    return int(_clamp(math.ceil(expected), CURSOR_MIN_POST_LIMIT, post_limit))
+
+
+def partition_posts(
+    items: Sequence[Dict[str, Any]],
+    cursor: Optional[HandleCursor],
+    post_id_of: Callable[[Dict[str, Any]], str],
+) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[str]]:
+    """按游标拆分返回的帖子：(未入库的 (post_id, 原始帖子), 已入库的 post_id)。"""
+    fresh: List[Tuple[str, Dict[str, Any]]] = []
+    stored: List[str] = []
+    for item in items:
+        post_id = post_id_of(item)
+        if cursor is not None and cursor.is_stored(post_id):
+            stored.append(post_id)
+        else:
+            fresh.append((post_id, item))
+    return fresh, stored
+
+
+def window_activity(
+    cursor: Optional[HandleCursor],
+    new_posts: Sequence[Tuple[str, int]],
+    post_limit: int,
+) -> Tuple[int, int]:
+    """账号活跃度 (帖子数, 信号数)：本轮新帖在前，再接窗口内已入库帖子，取最新 post_limit 条。"""
+    window: List[int] = []
+    new_ids = set()
+    for post_id, signal_count in new_posts:
+        new_ids.add(post_id)
+        window.append(signal_count)
+    if cursor is not None:
+        for post_id, signal_count in cursor.window_posts.items():
+            if len(window) >= post_limit:
+                break
+            if post_id not in new_ids:
+                window.append(signal_count)
+    window = window[: max(0, post_limit)]
+    return len(window), sum(window)
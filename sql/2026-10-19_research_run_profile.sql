@@ -0,0 +1,7 @@
+-- Research run stage profile (span tree)
+-- 日期: 2026-10-19
+
+ALTER TABLE research_runs
+    ADD COLUMN IF NOT EXISTS profile_json JSONB NOT NULL DEFAULT '{}'::jsonb;
+
+COMMENT ON COLUMN research_runs.profile_json IS '阶段级 span 树：墙钟/CPU 时间、DB 调用次数与读写行数；采样文件路径见 capture_path';
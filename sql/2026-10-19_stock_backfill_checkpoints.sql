@@ -0,0 +1,34 @@
+-- Stock V2 backfill checkpoints (resume / partitioned backfill)
+-- 日期: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS stock_backfill_checkpoints (
+    id BIGSERIAL PRIMARY KEY,
+    job_id VARCHAR(96) NOT NULL,
+    kind VARCHAR(24) NOT NULL DEFAULT 'range'
+        CHECK (kind IN ('range', 'partition_done', 'serve_refresh')),
+    partition_index INTEGER NOT NULL DEFAULT 0,
+    partition_count INTEGER NOT NULL DEFAULT 1 CHECK (partition_count >= 1),
+    range_high_id BIGINT NOT NULL DEFAULT 0,
+    range_low_id BIGINT NOT NULL DEFAULT 0,
+    article_count INTEGER NOT NULL DEFAULT 0 CHECK (article_count >= 0),
+    event_count INTEGER NOT NULL DEFAULT 0 CHECK (event_count >= 0),
+    mapping_count INTEGER NOT NULL DEFAULT 0 CHECK (mapping_count >= 0),
+    indirect_count INTEGER NOT NULL DEFAULT 0 CHECK (indirect_count >= 0),
+    promoted_count INTEGER NOT NULL DEFAULT 0 CHECK (promoted_count >= 0),
+    run_id VARCHAR(96) NOT NULL DEFAULT '',
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    UNIQUE (job_id, kind, partition_index, range_low_id)
+);
+
+DROP TRIGGER IF EXISTS update_stock_backfill_checkpoints_updated_at ON stock_backfill_checkpoints;
+CREATE TRIGGER update_stock_backfill_checkpoints_updated_at
+    BEFORE UPDATE ON stock_backfill_checkpoints
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+COMMENT ON TABLE stock_backfill_checkpoints IS '回填检查点：每批写入成功后记录已完成的文章 id 区间，--resume 从最低已完成区间继续';
+COMMENT ON COLUMN stock_backfill_checkpoints.job_id IS '回填作业 ID（首次运行的 run_id，或分区进程共享的 --resume 值）';
+COMMENT ON COLUMN stock_backfill_checkpoints.kind IS 'range=已完成区间；partition_done=分区完成；serve_refresh=serve 层刷新认领（每作业一行）';
+COMMENT ON COLUMN stock_backfill_checkpoints.range_high_id IS '区间上界（不含），回填按 id 降序推进';
+COMMENT ON COLUMN stock_backfill_checkpoints.range_low_id IS '区间内最小文章 ID（含）';
@@ -0,0 +1,26 @@
+-- Stock event store incremental sync indexes
+-- 日期: 2026-10-19
+-- scripts/event_store.py 按 (updated_at, id) keyset 增量拉取，需要对应的复合索引
+
+-- 映射表补 updated_at：冲突更新（同 event/ticker/role 重写）后镜像才能同步到新版本。
+-- 存量行回填为 created_at，再建触发器（先建触发器会把回填值覆盖成 NOW()）
+ALTER TABLE stock_event_tickers_v2
+    ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW();
+
+UPDATE stock_event_tickers_v2
+SET updated_at = created_at
+WHERE updated_at > created_at;
+
+DROP TRIGGER IF EXISTS update_stock_event_tickers_v2_updated_at ON stock_event_tickers_v2;
+CREATE TRIGGER update_stock_event_tickers_v2_updated_at
+    BEFORE UPDATE ON stock_event_tickers_v2
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+CREATE INDEX IF NOT EXISTS idx_stock_events_v2_updated_id
+    ON stock_events_v2(updated_at, id);
+DROP INDEX IF EXISTS idx_stock_event_tickers_v2_created_id;
+CREATE INDEX IF NOT EXISTS idx_stock_event_tickers_v2_updated_id
+    ON stock_event_tickers_v2(updated_at, id);
+CREATE INDEX IF NOT EXISTS idx_stock_opportunities_v2_updated_id
+    ON stock_opportunities_v2(updated_at, id);
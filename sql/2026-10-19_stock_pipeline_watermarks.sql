@@ -0,0 +1,27 @@
+-- Stock V2 pipeline article watermarks
+-- 日期: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS stock_pipeline_watermarks (
+    pipeline_name VARCHAR(64) PRIMARY KEY,
+    last_article_id BIGINT NOT NULL DEFAULT 0,
+    last_analyzed_at TIMESTAMP WITH TIME ZONE,
+    run_id VARCHAR(96) NOT NULL DEFAULT '',
+    processed_count INTEGER NOT NULL DEFAULT 0 CHECK (processed_count >= 0),
+    as_of TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+DROP TRIGGER IF EXISTS update_stock_pipeline_watermarks_updated_at ON stock_pipeline_watermarks;
+CREATE TRIGGER update_stock_pipeline_watermarks_updated_at
+    BEFORE UPDATE ON stock_pipeline_watermarks
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- keyset 分页：增量按 (analyzed_at, id) 升序 seek
+CREATE INDEX IF NOT EXISTS idx_articles_analyzed_at_id
+    ON articles(analyzed_at, id)
+    WHERE analyzed_at IS NOT NULL;
+
+COMMENT ON TABLE stock_pipeline_watermarks IS '流水线已提交的文章水位（事件写入成功后推进）';
+COMMENT ON COLUMN stock_pipeline_watermarks.last_article_id IS '水位文章 ID（与 last_analyzed_at 组成 keyset 游标）';
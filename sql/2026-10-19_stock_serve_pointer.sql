@@ -0,0 +1,96 @@
+-- Stock V2 serve-layer run pointer (versioned publish)
+-- 日期: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS stock_serve_pointer (
+    layer VARCHAR(64) PRIMARY KEY,
+    run_id VARCHAR(96) NOT NULL,
+    row_count INTEGER NOT NULL DEFAULT 0 CHECK (row_count >= 0),
+    published_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+DROP TRIGGER IF EXISTS update_stock_serve_pointer_updated_at ON stock_serve_pointer;
+CREATE TRIGGER update_stock_serve_pointer_updated_at
+    BEFORE UPDATE ON stock_serve_pointer
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+ALTER TABLE stock_serve_pointer ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS stock_serve_pointer_public_read ON stock_serve_pointer;
+CREATE POLICY stock_serve_pointer_public_read
+    ON stock_serve_pointer
+    FOR SELECT
+    TO anon, authenticated
+    USING (true);
+
+-- 读端视图：有指针时只返回指针指向的 run；该层尚无指针时退回 is_active 语义
+CREATE OR REPLACE VIEW stock_signals_v2_live
+WITH (security_invoker = true) AS
+SELECT t.*
+FROM stock_signals_v2 t
+WHERE t.run_id = (SELECT p.run_id FROM stock_serve_pointer p WHERE p.layer = 'stock_signals_v2')
+   OR (
+        t.is_active
+        AND NOT EXISTS (SELECT 1 FROM stock_serve_pointer p WHERE p.layer = 'stock_signals_v2')
+   );
+
+CREATE OR REPLACE VIEW stock_opportunities_v2_live
+WITH (security_invoker = true) AS
+SELECT t.*
+FROM stock_opportunities_v2 t
+WHERE t.run_id = (SELECT p.run_id FROM stock_serve_pointer p WHERE p.layer = 'stock_opportunities_v2')
+   OR (
+        t.is_active
+        AND NOT EXISTS (SELECT 1 FROM stock_serve_pointer p WHERE p.layer = 'stock_opportunities_v2')
+   );
+
+CREATE OR REPLACE VIEW stock_market_regime_v2_live
+WITH (security_invoker = true) AS
+SELECT t.*
+FROM stock_market_regime_v2 t
+WHERE t.run_id = (SELECT p.run_id FROM stock_serve_pointer p WHERE p.layer = 'stock_market_regime_v2')
+   OR (
+        t.is_active
+        AND NOT EXISTS (SELECT 1 FROM stock_serve_pointer p WHERE p.layer = 'stock_market_regime_v2')
+   );
+
+CREATE OR REPLACE VIEW stock_dashboard_snapshot_v2_live
+WITH (security_invoker = true) AS
+SELECT t.*
+FROM stock_dashboard_snapshot_v2 t
+WHERE t.run_id = (SELECT p.run_id FROM stock_serve_pointer p WHERE p.layer = 'stock_dashboard_snapshot_v2')
+   OR (
+        t.is_active
+        AND NOT EXISTS (SELECT 1 FROM stock_serve_pointer p WHERE p.layer = 'stock_dashboard_snapshot_v2')
+   );
+
+CREATE OR REPLACE VIEW stock_evidence_v2_live
+WITH (security_invoker = true) AS
+SELECT t.*
+FROM stock_evidence_v2 t
+WHERE t.run_id = (SELECT p.run_id FROM stock_serve_pointer p WHERE p.layer = 'stock_evidence_v2')
+   OR (
+        t.is_active
+        AND NOT EXISTS (SELECT 1 FROM stock_serve_pointer p WHERE p.layer = 'stock_evidence_v2')
+   );
+
+CREATE OR REPLACE VIEW stock_transmission_paths_v2_live
+WITH (security_invoker = true) AS
+SELECT t.*
+FROM stock_transmission_paths_v2 t
+WHERE t.run_id = (SELECT p.run_id FROM stock_serve_pointer p WHERE p.layer = 'stock_transmission_paths_v2')
+   OR (
+        t.is_active
+        AND NOT EXISTS (SELECT 1 FROM stock_serve_pointer p WHERE p.layer = 'stock_transmission_paths_v2')
+   );
+
+COMMENT ON TABLE stock_serve_pointer IS 'Stock V2 serve 层发布指针（每层一行，写完新 run 后翻转）';
+COMMENT ON COLUMN stock_serve_pointer.run_id IS '当前对读端可见的 run_id';
+COMMENT ON VIEW stock_signals_v2_live IS 'stock_signals_v2 当前已发布 run 的行';
+COMMENT ON VIEW stock_opportunities_v2_live IS 'stock_opportunities_v2 当前已发布 run 的行';
+COMMENT ON VIEW stock_market_regime_v2_live IS 'stock_market_regime_v2 当前已发布 run 的行';
+COMMENT ON VIEW stock_dashboard_snapshot_v2_live IS 'stock_dashboard_snapshot_v2 当前已发布 run 的行';
+COMMENT ON VIEW stock_evidence_v2_live IS 'stock_evidence_v2 当前已发布 run 的行';
+COMMENT ON VIEW stock_transmission_paths_v2_live IS 'stock_transmission_paths_v2 当前已发布 run 的行';
@@ -0,0 +1,56 @@
+-- Stock V2 per-ticker rolling signal aggregate state
+-- 日期: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS stock_ticker_signal_state_v2 (
+    lookback_hours INTEGER NOT NULL CHECK (lookback_hours > 0),
+    ticker VARCHAR(16) NOT NULL,
+    event_count INTEGER NOT NULL DEFAULT 0 CHECK (event_count >= 0),
+    oldest_as_of TIMESTAMP WITH TIME ZONE NOT NULL,
+    event_window JSONB NOT NULL DEFAULT '{}'::jsonb,
+    recent_events JSONB NOT NULL DEFAULT '[]'::jsonb,
+    aggregate JSONB NOT NULL DEFAULT '{}'::jsonb,
+    run_id VARCHAR(96) NOT NULL DEFAULT '',
+    as_of TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (lookback_hours, ticker)
+);
+
+DROP TRIGGER IF EXISTS update_stock_ticker_signal_state_v2_updated_at ON stock_ticker_signal_state_v2;
+CREATE TRIGGER update_stock_ticker_signal_state_v2_updated_at
+    BEFORE UPDATE ON stock_ticker_signal_state_v2
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- 增量水位：每个 lookback 窗口一行，记录已合并事件的 (updated_at, id)
+CREATE TABLE IF NOT EXISTS stock_signal_state_watermarks_v2 (
+    lookback_hours INTEGER PRIMARY KEY CHECK (lookback_hours > 0),
+    last_event_updated_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    last_event_id BIGINT NOT NULL DEFAULT 0,
+    run_id VARCHAR(96) NOT NULL DEFAULT '',
+    processed_count INTEGER NOT NULL DEFAULT 0 CHECK (processed_count >= 0),
+    as_of TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+DROP TRIGGER IF EXISTS update_stock_signal_state_watermarks_v2_updated_at ON stock_signal_state_watermarks_v2;
+CREATE TRIGGER update_stock_signal_state_watermarks_v2_updated_at
+    BEFORE UPDATE ON stock_signal_state_watermarks_v2
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+-- 首次构建：窗口内活跃事件按 id keyset 分页
+CREATE INDEX IF NOT EXISTS idx_stock_events_v2_active_asof_id
+    ON stock_events_v2(as_of, id)
+    WHERE is_active = TRUE;
+
+-- 过期补位：按 ticker 回源窗口内映射
+CREATE INDEX IF NOT EXISTS idx_stock_event_tickers_v2_ticker_asof
+    ON stock_event_tickers_v2(ticker, as_of);
+
+COMMENT ON TABLE stock_ticker_signal_state_v2 IS 'Stock V2 按 ticker 的滚动信号聚合状态（按 lookback 窗口分组）';
+COMMENT ON COLUMN stock_ticker_signal_state_v2.event_window IS '窗口内事件 {event_id:role → as_of}，用于计数与过期';
+COMMENT ON COLUMN stock_ticker_signal_state_v2.recent_events IS 'published_at 最新的 24 条事件（聚合与证据层输入）';
+COMMENT ON COLUMN stock_ticker_signal_state_v2.aggregate IS '多空质量、事件类型/来源/X 账号计数等聚合结果';
+COMMENT ON TABLE stock_signal_state_watermarks_v2 IS '信号聚合状态水位：updated_at 之后变更的事件（含停用）在下一轮合并';
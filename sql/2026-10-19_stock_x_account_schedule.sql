@@ -0,0 +1,33 @@
+-- Stock X account cadence schedule (quality-tiered ingest)
+-- 日期: 2026-10-19
+
+CREATE TABLE IF NOT EXISTS stock_x_account_schedule (
+    id BIGSERIAL PRIMARY KEY,
+    handle VARCHAR(64) NOT NULL UNIQUE,
+    tier VARCHAR(1) NOT NULL DEFAULT 'B' CHECK (tier IN ('A', 'B', 'C')),
+    value_score FLOAT NOT NULL DEFAULT 0 CHECK (value_score >= 0 AND value_score <= 1),
+    next_due_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    last_fetched_at TIMESTAMP WITH TIME ZONE,
+    last_ok BOOLEAN NOT NULL DEFAULT TRUE,
+    run_interval_min FLOAT NOT NULL DEFAULT 120 CHECK (run_interval_min > 0),
+    run_id VARCHAR(96) NOT NULL DEFAULT '',
+    as_of TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+DROP TRIGGER IF EXISTS update_stock_x_account_schedule_updated_at ON stock_x_account_schedule;
+CREATE TRIGGER update_stock_x_account_schedule_updated_at
+    BEFORE UPDATE ON stock_x_account_schedule
+    FOR EACH ROW
+    EXECUTE FUNCTION update_updated_at_column();
+
+CREATE INDEX IF NOT EXISTS idx_stock_x_schedule_due
+    ON stock_x_account_schedule(next_due_at);
+
+ALTER TABLE stock_x_account_schedule ENABLE ROW LEVEL SECURITY;
+
+COMMENT ON TABLE stock_x_account_schedule IS 'Stock X 账号分级采集节奏：A 档每轮、B 档每 3 轮、C 档每天';
+COMMENT ON COLUMN stock_x_account_schedule.value_score IS '价值分 = 质量分 0.6 + 信号产出率 0.25 + 新鲜度 0.15';
+COMMENT ON COLUMN stock_x_account_schedule.next_due_at IS '下次到期时间；采集失败时置为本次时间，下一轮重试';
+COMMENT ON COLUMN stock_x_account_schedule.run_interval_min IS '写入时的调度间隔（分钟），用于档位变化后重算到期时间';
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+回填检查点测试（续跑位置、分区数校验、serve 刷新单次认领、本地文件回退）
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.backfill_checkpoints import BackfillCheckpointStore, parse_partition
+from scripts.local_supabase import LocalSupabaseClient
+
+
+class _BrokenClient:
+    def table(self, name):
+        raise RuntimeError(f"relation {name} does not exist")
+
+
+def _counts(articles):
+    return {"article_count": articles, "event_count": articles * 2}
+
+
+def _check_job(make_store):
+    first = make_store((0, 2))
+    assert first.resume_point() == (None, {}, False)
+    first.record_range(1000, 800, "run-a", _counts(200))
+    first.record_range(800, 650, "run-a", _counts(150))
+    make_store((1, 2)).record_range(50000, 49900, "run-b", _counts(100))
+
+    before_id, totals, done = make_store((0, 2)).resume_point()
+    assert before_id == 650
+    assert totals["article_count"] == 350 and totals["event_count"] == 700
+    assert not done
+
+    try:
+        make_store((0, 3)).resume_point()
+        raise AssertionError("分区数不一致应报错")
+    except ValueError:
+        pass
+
+    first.mark_done("run-a")
+    make_store((1, 2)).mark_done("run-b")
+    assert make_store((0, 2)).resume_point()[2]
+    assert first.done_partitions() == {0, 1}
+    assert first.claim_serve_refresh("run-a")
+    assert not make_store((1, 2)).claim_serve_refresh("run-b")
+
+
+def test_table_store():
+    """检查点写表：按分区汇总，serve 刷新只认领一次"""
+    client = LocalSupabaseClient()
+    _check_job(lambda partition: BackfillCheckpointStore(client, "job-1", partition=partition))
+
+
+def test_local_fallback():
+    """表不可用时回退到本地 JSONL，行为一致"""
+    with tempfile.TemporaryDirectory() as tmp:
+        _check_job(
+            lambda partition: BackfillCheckpointStore(
+                _BrokenClient(),
+                "job-1",
+                partition=partition,
+                local_dir=tmp,
+            )
+        )
+
+
+def test_parse_partition():
+    """分区参数解析"""
+    assert parse_partition("2/4") == (2, 4)
+    for text in ("4/4", "-1/2", "1", "a/b"):
+        try:
+            parse_partition(text)
+            raise AssertionError(text)
+        except ValueError:
+            pass
+
+
+if __name__ == "__main__":
+    test_table_store()
+    test_local_fallback()
+    test_parse_partition()
+    print("backfill_checkpoints tests passed")
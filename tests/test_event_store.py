@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+事件层本地列式镜像测试（增量同步、跨分区去重、映射更新同步、同时间戳大批翻页、压实、列结构变化重建；
+未安装 pyarrow 时跳过）
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import event_store
+from scripts.event_store import EventStore
+from scripts.local_supabase import LocalSupabaseClient
+
+
+def _ts(day, hour):
+    return f"2026-01-{day:02d}T{hour:02d}:00:00+00:00"
+
+
+def _event(idx, day):
+    return {
+        "id": idx,
+        "event_key": f"e{idx}",
+        "source_ref": f"a:{idx}",
+        "event_type": "macro",
+        "direction": "LONG",
+        "summary": f"s{idx}",
+        "details": {"n": idx},
+        "as_of": _ts(day, 8),
+        "updated_at": _ts(day, 8),
+        "created_at": _ts(day, 8),
+        "run_id": f"r{day}",
+    }
+
+
+def _mapping(event_id, ticker, day):
+    return {
+        "event_id": event_id,
+        "ticker": ticker,
+        "as_of": _ts(day, 8),
+        "created_at": _ts(day, 8),
+        "updated_at": _ts(day, 8),
+        "run_id": f"r{day}",
+    }
+
+
+def _opportunity(idx, day, score):
+    return {
+        "id": idx,
+        "opportunity_key": f"o{idx}",
+        "ticker": "NVDA" if idx % 2 else "AAPL",
+        "side": "LONG",
+        "horizon": "A",
+        "opportunity_score": score,
+        "confidence": 0.6,
+        "why_now": "w",
+        "invalid_if": "i",
+        "catalysts": ["macro x1"],
+        "source_event_ids": [idx],
+        "as_of": _ts(day, 9),
+        "updated_at": _ts(day, 9),
+        "created_at": _ts(day, 9),
+        "run_id": f"r{day}",
+    }
+
+
+def _seeded_client():
+    client = LocalSupabaseClient()
+    client.seed("stock_events_v2", [_event(1, 1), _event(2, 2), _event(3, 3)])
+    client.seed(
+        "stock_event_tickers_v2",
+        [_mapping(1, "NVDA", 1), _mapping(2, "NVDA", 2), _mapping(2, "AAPL", 2), _mapping(3, "AAPL", 3)],
+    )
+    client.seed(
+        "stock_opportunities_v2",
+        [_opportunity(1, 2, 70.0), _opportunity(2, 2, 80.0), _opportunity(3, 3, 60.0)],
+    )
+    return client
+
+
+def _store(client, root):
+    return EventStore(client, root=root, overlap_sec=3600, horizon_days=100000)
+
+
+def test_sync_and_window_queries():
+    """首次同步拉全量；按 ticker / 窗口 / run 查询，行形状与 PostgREST 一致"""
+    if not event_store.HAS_PYARROW:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        store = _store(_seeded_client(), tmp)
+        counts = store.sync()
+        assert counts == {"stock_events_v2": 3, "stock_event_tickers_v2": 4, "stock_opportunities_v2": 3}
+        assert set(store.sync().values()) == {0}
+
+        events = store.events(start_iso=_ts(2, 0), tickers=["nvda"])
+        assert [row["id"] for row in events] == [2]
+        assert events[0]["tickers"] == [
+            {"ticker": "NVDA", "role": "primary", "weight": 1.0, "confidence": 0.5}
+        ]
+        assert events[0]["details"] == {"n": 2} and events[0]["as_of"] == _ts(2, 8)
+
+        window = store.events(start_iso=_ts(1, 0), end_iso=_ts(2, 23))
+        assert [row["id"] for row in window] == [2, 1]
+        assert sorted(item["ticker"] for item in window[0]["tickers"]) == ["AAPL", "NVDA"]
+
+        assert [row["id"] for row in store.opportunities(start_iso=_ts(2, 0))] == [3, 2, 1]
+        by_run = store.opportunities_by_run("r2")
+        assert [row["id"] for row in by_run] == [2, 1]
+        assert by_run[0]["catalysts"] == ["macro x1"] and by_run[0]["source_event_ids"] == [2]
+
+
+def test_updates_supersede_older_versions():
+    """重写的事件移到新分区、机会下线后，旧分区里的旧版本不再出现"""
+    if not event_store.HAS_PYARROW:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        client = _seeded_client()
+        store = _store(client, tmp)
+        store.sync()
+
+        client.table("stock_events_v2").update(
+            {"as_of": _ts(4, 8), "updated_at": _ts(4, 8), "summary": "rewritten"}
+        ).eq("id", 1).execute()
+        client.table("stock_opportunities_v2").update(
+            {"is_active": False, "updated_at": _ts(4, 9)}
+        ).eq("run_id", "r2").execute()
+        counts = store.sync()
+        assert counts["stock_events_v2"] == 1 and counts["stock_opportunities_v2"] == 2
+
+        assert [row["id"] for row in store.events(start_iso=_ts(1, 0), end_iso=_ts(2, 23))] == [2]
+        latest = store.events(start_iso=_ts(4, 0))
+        assert [(row["id"], row["summary"]) for row in latest] == [(1, "rewritten")]
+        assert [row["id"] for row in store.opportunities(start_iso=_ts(1, 0), active_only=True)] == [3]
+        assert len(store.opportunities(start_iso=_ts(1, 0))) == 3
+
+
+def test_rewritten_event_keeps_updated_mappings():
+    """事件重写到新 as_of、映射被冲突更新（as_of 不变）后，窗口查询仍带上最新映射"""
+    if not event_store.HAS_PYARROW:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        client = _seeded_client()
+        store = _store(client, tmp)
+        store.sync()
+
+        events = client.table("stock_events_v2")
+        events.update({"as_of": _ts(4, 8), "summary": "rewritten"}).eq("id", 1).execute()
+        mapping = {"event_id": 1, "ticker": "NVDA", "role": "primary", "weight": 0.7, "as_of": _ts(1, 8)}
+        client.table("stock_event_tickers_v2").upsert(
+            {**mapping, "run_id": "r4"},
+            on_conflict="event_id,ticker,role",
+        ).execute()
+        counts = store.sync()
+        assert counts["stock_events_v2"] == 1 and counts["stock_event_tickers_v2"] == 1
+
+        latest = store.events(start_iso=_ts(4, 0))
+        assert [(row["id"], row["summary"]) for row in latest] == [(1, "rewritten")]
+        assert latest[0]["tickers"] == [
+            {"ticker": "NVDA", "role": "primary", "weight": 0.7, "confidence": 0.5}
+        ]
+        assert [row["id"] for row in store.events(start_iso=_ts(4, 0), tickers=["NVDA"])] == [1]
+        assert store.events(start_iso=_ts(4, 0), tickers=["AAPL"]) == []
+
+
+def test_layout_change_resyncs_table():
+    """旧版镜像的 part 缺少新列时清空该表并重新同步"""
+    if not event_store.HAS_PYARROW:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        client = _seeded_client()
+        store = _store(client, tmp)
+        store.sync()
+        legacy = event_store.pa.table({"id": [9], "event_id": [1]})
+        legacy_dir = os.path.join(tmp, "stock_event_tickers_v2", "day=2026-01-01")
+        event_store.pq.write_table(legacy, os.path.join(legacy_dir, "part-00000000.parquet"))
+        assert store.sync()["stock_event_tickers_v2"] == 4
+        assert sorted(item["ticker"] for item in store.events(start_iso=_ts(2, 0))[1]["tickers"]) == ["AAPL", "NVDA"]
+
+
+def test_same_timestamp_batch_pages_by_id():
+    """同一时间戳的批量行超过页大小时按 id 翻页，不重复也不遗漏"""
+    if not event_store.HAS_PYARROW:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        client = LocalSupabaseClient()
+        client.seed("stock_opportunities_v2", [_opportunity(idx, 2, 50.0) for idx in range(1, 11)])
+        store = _store(client, tmp)
+        assert store.sync(tables=["stock_opportunities_v2"], page_size=3) == {"stock_opportunities_v2": 10}
+        assert sorted(row["id"] for row in store.opportunities()) == list(range(1, 11))
+
+
+def test_compact_keeps_latest_versions():
+    """压实后每个分区只剩一个 part，查询结果不变"""
+    if not event_store.HAS_PYARROW:
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        client = _seeded_client()
+        store = _store(client, tmp)
+        store.sync()
+        for hour in (10, 11, 12):
+            client.table("stock_opportunities_v2").update(
+                {"opportunity_score": float(hour), "updated_at": _ts(4, hour)}
+            ).eq("id", 1).execute()
+            store.sync(tables=["stock_opportunities_v2"])
+        before = store.opportunities()
+        assert store.compact(tables=["stock_opportunities_v2"]) == 1
+        assert all(len(parts) == 1 for _, parts in store._partitions(event_store.OPPORTUNITIES))
+        assert store.opportunities() == before
+        assert [row["opportunity_score"] for row in before if row["id"] == 1] == [12.0]
+
+
+if __name__ == "__main__":
+    test_sync_and_window_queries()
+    test_updates_supersede_older_versions()
+    test_rewritten_event_keeps_updated_mappings()
+    test_layout_change_resyncs_table()
+    test_same_timestamp_batch_pages_by_id()
+    test_compact_keeps_latest_versions()
+    print("event_store tests passed")
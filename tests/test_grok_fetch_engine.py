@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Grok 异步采集引擎测试（429 退避重试与并发减半、致命错误不重试、p95 对冲、RPM 令牌桶、完成即产出）
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.grok_fetch_engine import AIMDLimiter, GrokFetchEngine, TokenBucket, classify_error
+
+
+class _Response:
+    def __init__(self, status_code, retry_after=None):
+        self.status_code = status_code
+        self.headers = {"retry-after": retry_after} if retry_after is not None else {}
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = _Response(status_code, retry_after)
+
+
+def _engine(call, **kwargs):
+    options = {
+        "rpm": 0,
+        "initial_concurrency": 4,
+        "max_concurrency": 8,
+        "backoff_base_sec": 0.01,
+        "backoff_max_sec": 0.02,
+        "rng": random.Random(3),
+    }
+    options.update(kwargs)
+    return GrokFetchEngine(call=call, estimate_tokens=lambda job: 100, **options)
+
+
+async def _collect(engine, jobs):
+    return [outcome async for outcome in engine.iter_results(jobs)]
+
+
+def test_classify_error():
+    """429 / 超时 / 5xx / 4xx 分类与 Retry-After 解析"""
+    assert classify_error(_StatusError(429, "2")) == ("throttled", 2.0)
+    assert classify_error(asyncio.TimeoutError()) == ("timeout", 0.0)
+    assert classify_error(_StatusError(503)) == ("retryable", 0.0)
+    assert classify_error(type("APIConnectionError", (Exception,), {})()) == ("retryable", 0.0)
+    assert classify_error(_StatusError(401)) == ("fatal", 0.0)
+    assert classify_error(ValueError("bad")) == ("fatal", 0.0)
+
+
+def test_throttled_jobs_retry_and_halve_concurrency():
+    """429 后退避重试成功，AIMD 并发上限减半；401 不重试"""
+    attempts = {}
+
+    async def call(job):
+        attempts[job] = attempts.get(job, 0) + 1
+        await asyncio.sleep(0.005)
+        if job == "bad":
+            raise _StatusError(401)
+        if attempts[job] == 1 and job.startswith("t"):
+            raise _StatusError(429)
+        return f"ok:{job}", 50
+
+    engine = _engine(call)
+    outcomes = asyncio.run(_collect(engine, ["t1", "t2", "a", "bad"]))
+    by_job = {outcome.job: outcome for outcome in outcomes}
+    assert by_job["t1"].ok and by_job["t1"].attempts == 2 and by_job["t1"].value == "ok:t1"
+    assert by_job["a"].attempts == 1
+    assert not by_job["bad"].ok and by_job["bad"].attempts == 1 and "401" in by_job["bad"].error
+    stats = engine.stats
+    assert stats.throttled == 2 and stats.retries == 2 and stats.concurrency_decreases == 1
+    assert stats.jobs_ok == 3 and stats.jobs_failed == 1 and stats.tokens_used == 150
+
+
+def test_straggler_is_hedged():
+    """首次请求超过 p95 仍未返回时发对冲请求，对冲先返回即胜出"""
+    calls = {}
+
+    async def call(job):
+        calls[job] = calls.get(job, 0) + 1
+        delay = 1.0 if job == "slow" and calls[job] == 1 else 0.01
+        await asyncio.sleep(delay)
+        return job, 10
+
+    engine = _engine(call, hedge_min_samples=4, hedge_max_ratio=0.5, initial_concurrency=1)
+    started = time.perf_counter()
+    outcomes = asyncio.run(_collect(engine, [f"j{idx}" for idx in range(6)] + ["slow"]))
+    assert time.perf_counter() - started < 0.8
+    assert [outcome.job for outcome in outcomes][-1] == "slow" and all(o.ok for o in outcomes)
+    assert engine.stats.hedges == 1 and engine.stats.hedge_wins == 1 and calls["slow"] == 2
+
+
+def test_token_bucket_and_limiter():
+    """RPM 令牌桶超出突发后按速率等待；AIMD 成功后加性增长"""
+
+    async def scenario():
+        bucket = TokenBucket(rate_per_min=600, burst_sec=1.0)
+        waits = [await bucket.acquire(1) for _ in range(12)]
+        limiter = AIMDLimiter(initial=2, max_limit=4)
+        for _ in range(6):
+            await limiter.acquire()
+            limiter.release("ok")
+        return waits, limiter.limit
+
+    waits, limit = asyncio.run(scenario())
+    assert waits[:10] == [0.0] * 10 and sum(waits) > 0.15
+    assert 3.5 < limit <= 4.0
+
+
+def test_results_stream_in_completion_order():
+    """结果按完成顺序产出，不等待整批"""
+
+    async def call(job):
+        await asyncio.sleep(job / 100)
+        return job, 0
+
+    outcomes = asyncio.run(_collect(_engine(call), [5, 1, 3]))
+    assert [outcome.job for outcome in outcomes] == [1, 3, 5]
+
+
+if __name__ == "__main__":
+    test_classify_error()
+    test_throttled_jobs_retry_and_halve_concurrency()
+    test_straggler_is_hedged()
+    test_token_bucket_and_limiter()
+    test_results_stream_in_completion_order()
+    print("grok_fetch_engine tests passed")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Grok 响应录制 / 回放测试（时间桶取整、录制读回、同账号取最新时间桶、模型名随录制保存、损坏或缺模型的文件跳过）
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.grok_response_store import GrokResponseStore, time_bucket
+
+
+def test_time_bucket():
+    """按间隔分钟向下取整"""
+    ts = datetime(2026, 10, 19, 13, 47, 12, tzinfo=timezone.utc)
+    assert time_bucket(ts, 120) == "20261019T1200"
+    assert time_bucket(ts, 15) == "20261019T1345"
+    assert time_bucket(ts.replace(tzinfo=None), 60) == "20261019T1300"
+
+
+def test_record_and_load_run():
+    """录制后按 run_id 读回；同账号多个时间桶取最新；损坏 / 缺模型的文件与不存在的 run 不报错"""
+    with tempfile.TemporaryDirectory() as root:
+        store = GrokResponseStore(root, bucket_min=60)
+        early = datetime(2026, 10, 19, 9, 5, tzinfo=timezone.utc)
+        late = datetime(2026, 10, 19, 11, 30, tzinfo=timezone.utc)
+        store.record("r1", "alpha", '{"posts": [1]}', 5, model="grok-a", attempts=2, fetched_at=early)
+        store.record("r1", "alpha", '{"posts": [2]}', 3, model="grok-b", cursor_since="c1", fetched_at=late)
+        path = store.record("r1", "bad/name", '{"posts": []}', 20, model="grok-a", fetched_at=early)
+        assert path is not None and path.name == "bad_name.20261019T0900.json.gz"
+        with gzip.open(os.path.join(root, "r1", "zeta.20261019T0900.json.gz"), "wt") as fp:
+            fp.write("{not json")
+        # 没有模型名的旧录制不能回放（会把已入库事件的 source_model 覆盖为空）
+        with gzip.open(os.path.join(root, "r1", "old.20261019T0900.json.gz"), "wt") as fp:
+            legacy = {"handle": "old", "bucket": "20261019T0900", "run_id": "r1", "fetched_at": ""}
+            legacy.update(post_limit=5, attempts=1, elapsed_sec=0.1, raw_text="{}")
+            json.dump(legacy, fp)
+
+        records = store.load_run("r1")
+        assert [item.handle for item in records] == ["alpha", "bad/name"]
+        assert records[0].raw_text == '{"posts": [2]}' and records[0].post_limit == 3
+        assert records[0].model == "grok-b" and records[0].cursor_since == "c1"
+        assert records[0].bucket == "20261019T1100" and store.recorded == 3
+        assert store.load_run("missing") == [] and store.list_runs() == ["r1"]
+
+
+if __name__ == "__main__":
+    test_time_bucket()
+    test_record_and_load_run()
+    print("grok_response_store tests passed")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+多模式关键词匹配测试
+"""
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.keyword_matcher import KeywordMatcher
+
+
+GROUPS = {
+    "bullish": ("beat", "upgrade", "回购", "突破"),
+    "bearish": ("ban", "sanction", "default", "下调"),
+    "macro": ("fed", "fomc", "yield", "rates", "rate", "cpi"),
+    "sector": ("ai", "semiconductor", "半导体"),
+}
+
+
+def _naive_count(words, text):
+    lower = text.lower()
+    return sum(1 for word in words if word.lower() in lower)
+
+
+def test_counts_match_naive_substring_scan():
+    """单次扫描的分组命中数与逐词 `in` 检查完全一致"""
+    matcher = KeywordMatcher(GROUPS)
+    vocab = [word for words in GROUPS.values() for word in words]
+    rng = random.Random(7)
+    for _ in range(300):
+        parts = []
+        for _ in range(rng.randint(0, 40)):
+            if rng.random() < 0.3:
+                parts.append(rng.choice(vocab).upper() if rng.random() < 0.3 else rng.choice(vocab))
+            else:
+                parts.append("".join(rng.choice("abfrtyi 市场上涨") for _ in range(rng.randint(1, 6))))
+        text = "".join(parts)
+        hits = matcher.match(text)
+        for group, words in GROUPS.items():
+            assert hits.count(group) == _naive_count(words, text), (group, text)
+
+
+def test_overlapping_and_nested_keywords():
+    """重叠（fomcpi → fomc/cpi）与包含（rates ⊃ rate）关系都要命中"""
+    matcher = KeywordMatcher(GROUPS)
+    hits = matcher.match("FOMCPI rates")
+    assert hits.matched("macro") == ["fomc", "rates", "rate", "cpi"]
+    assert matcher.match("bank").matched("bearish") == ["ban"]
+
+
+def test_within_equals_truncated_scan():
+    """within(limit) 与对截断文本重新扫描结果一致"""
+    matcher = KeywordMatcher(GROUPS)
+    text = "中" * 10 + "sanction" + "文" * 5 + "回购"
+    hits = matcher.match(text)
+    for limit in range(len(text) + 1):
+        expected = matcher.match(text[:limit])
+        assert set(hits.within(limit).ends) == set(expected.ends), limit
+
+
+if __name__ == "__main__":
+    test_counts_match_naive_substring_scan()
+    test_overlapping_and_nested_keywords()
+    test_within_equals_truncated_scan()
+    print("keyword_matcher tests passed")
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+流式 JSON 增量解析测试
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.llm_json_stream import IncrementalJSONObject
+
+
+REQUIRED = ("direction", "strength", "title_zh", "summary_zh")
+
+
+def _feed_all(parser, text, step=3):
+    for idx in range(0, len(text), step):
+        parser.feed(text[idx : idx + step])
+        if parser.is_complete():
+            break
+    return parser
+
+
+def test_stop_when_required_keys_ready():
+    """必需字段齐备后即可提前结束，不必等待尾部输出"""
+    text = (
+        '```json\n{"direction": "LONG", "strength": 0.7, "title_zh": "苹果, 上调", '
+        '"summary_zh": "财报超预期", "notes": "这一段很长的尾部说明不需要等待'
+    )
+    parser = _feed_all(IncrementalJSONObject(REQUIRED), text + ' ", "x": 1}')
+    assert parser.has_required()
+    assert not parser.closed
+    assert parser.result["title_zh"] == "苹果, 上调"
+    assert parser.result["strength"] == 0.7
+
+
+def test_nested_values_and_escapes():
+    """嵌套结构与转义引号中的逗号不应被当作字段边界"""
+    text = '{"a": {"b": [1, 2]}, "s": "x\\", y", "direction": "SHORT"}'
+    parser = _feed_all(IncrementalJSONObject(("direction",)), text, step=1)
+    assert parser.result == {"a": {"b": [1, 2]}, "s": 'x", y', "direction": "SHORT"}
+
+
+def test_closed_object_without_required_keys():
+    """对象闭合时即完成，即使缺少必需字段"""
+    parser = _feed_all(IncrementalJSONObject(REQUIRED), '{"direction": "LONG"} trailing')
+    assert parser.closed
+    assert parser.is_complete()
+    assert not parser.has_required()
+    assert parser.result == {"direction": "LONG"}
+
+
+def test_closed_object_with_invalid_json_is_not_accepted():
+    """对象闭合但整段解析失败时不给结果，调用方走截断修复"""
+    parser = _feed_all(IncrementalJSONObject(REQUIRED), '{"summary": "x", "sentiment": bad}')
+    assert parser.closed and not parser.close_parsed
+    assert parser.final_result() is None
+    ok = _feed_all(IncrementalJSONObject(REQUIRED), '{"direction": "LONG"}')
+    assert ok.final_result() == {"direction": "LONG"}
+
+
+if __name__ == "__main__":
+    test_stop_when_required_keys_ready()
+    test_nested_values_and_escapes()
+    test_closed_object_without_required_keys()
+    test_closed_object_with_invalid_json_is_not_accepted()
+    print("llm_json_stream tests passed")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+LLM 遥测聚合测试
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.llm_telemetry import LLMTelemetry
+
+
+def test_metrics_grouped_by_caller():
+    """同一 caller 的多个模型应汇总为一组指标"""
+    telemetry = LLMTelemetry()
+    telemetry.record_call("pipeline_v2", "m1", 0.3, prompt_tokens=100, completion_tokens=50)
+    telemetry.record_call("pipeline_v2", "m2", 3.0, prompt_tokens=10, completion_tokens=5, retries=1)
+    telemetry.record_call("pipeline_v2", "m1", 1.0, retries=2, ok=False)
+    telemetry.record_cache("pipeline_v2", "m1", hit=True)
+    telemetry.record_cache("pipeline_v2", "m1", hit=False)
+    telemetry.record_call("translate_backfill", "m1", 0.1, prompt_tokens=1, completion_tokens=1)
+
+    metrics = telemetry.to_metrics()
+    assert metrics["llm_pipeline_v2_calls"] == 2
+    assert metrics["llm_pipeline_v2_failed_calls"] == 1
+    assert metrics["llm_pipeline_v2_retries"] == 3
+    assert metrics["llm_pipeline_v2_prompt_tokens"] == 110
+    assert metrics["llm_pipeline_v2_cache_hit_ratio"] == 0.5
+    assert metrics["llm_pipeline_v2_latency_p95_ms"] == 3000.0
+    assert metrics["llm_translate_backfill_calls"] == 1
+    assert all(len(name) <= 64 for name in metrics)
+
+
+def test_export_jsonl():
+    """JSONL 每个 (caller, model) 一行并带 run_id 与直方图"""
+    telemetry = LLMTelemetry()
+    telemetry.record_call("profile_enrich", "m1", 0.6, prompt_tokens=1000, completion_tokens=1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "telemetry.jsonl")
+        assert telemetry.export_jsonl(path, run_id="r1") == 1
+        with open(path, encoding="utf-8") as fp:
+            rows = [json.loads(line) for line in fp]
+    assert rows[0]["run_id"] == "r1"
+    assert rows[0]["latency_hist"]["le_1s"] == 1
+    assert rows[0]["estimated_cost"] > 0
+
+
+if __name__ == "__main__":
+    test_metrics_grouped_by_caller()
+    test_export_jsonl()
+    print("llm_telemetry tests passed")
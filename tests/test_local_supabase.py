@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+进程内 Supabase 替身测试
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.local_supabase import LocalAPIError, LocalSupabaseClient
+
+
+def _raises(code, fn):
+    try:
+        fn()
+    except LocalAPIError as e:
+        assert e.code == code, e.code
+        return
+    raise AssertionError(f"expected {code}")
+
+
+def test_schema_loaded_from_sql_files():
+    """CREATE TABLE 与后续 ALTER ADD COLUMN 都生效，默认值与自增 id 自动补齐"""
+    client = LocalSupabaseClient()
+    assert "analyzed_at" in client.schemas["articles"].columns
+    assert client.schemas["stock_event_tickers_v2"].unique == [("event_id", "ticker", "role")]
+
+    row = client.table("stock_events_v2").insert(
+        {"event_key": "k1", "source_ref": "r", "event_type": "macro", "direction": "LONG", "summary": "s", "run_id": "r1"}
+    ).execute().data[0]
+    assert (row["id"], row["details"], row["is_active"], row["strength"]) == (1, {}, True, 0.5)
+    _raises("PGRST204", lambda: client.table("stock_events_v2").insert({**row, "bogus": 1, "event_key": "k2"}).execute())
+    _raises("23505", lambda: client.table("stock_events_v2").insert({**row, "id": 9}).execute())
+
+
+def test_filters_order_range_and_single():
+    """链式过滤、or_ 表达式、not_.is_、排序分页与 maybe_single"""
+    client = LocalSupabaseClient(sql_paths=[])
+    client.seed(
+        "articles",
+        [
+            {"id": i, "analyzed_at": None if i == 3 else f"2026-01-0{i}T00:00:00+00:00", "tag": "a" if i % 2 else "b"}
+            for i in range(1, 7)
+        ],
+    )
+    query = client.table("articles").select("id").not_.is_("analyzed_at", "null")
+    rows = query.or_('analyzed_at.gt."2026-01-04T00:00:00+00:00",and(analyzed_at.eq."2026-01-02T00:00:00+00:00",id.gt.1)').order("id", desc=True).execute().data
+    assert [row["id"] for row in rows] == [6, 5, 2]
+
+    page = client.table("articles").select("id", count="exact").in_("tag", ["a"]).order("id").range(1, 2).execute()
+    assert ([row["id"] for row in page.data], page.count) == ([3, 5], 3)
+    assert client.table("articles").select("*").eq("id", 42).maybe_single().execute().data is None
+    _raises("PGRST116", lambda: client.table("articles").select("*").eq("tag", "a").maybe_single().execute())
+
+
+def test_upsert_update_delete_and_stats():
+    """on_conflict 合并、批内重复键报错并回滚、update/delete 返回受影响行、updated_at 触发器、调用计数"""
+    ticks = [datetime(2026, 1, 1, tzinfo=timezone.utc)]
+    client = LocalSupabaseClient(clock=lambda: ticks[-1])
+    table = lambda: client.table("stock_ticker_signal_state_v2")
+    base = {"lookback_hours": 168, "oldest_as_of": "2026-01-01T00:00:00+00:00"}
+    table().upsert([{**base, "ticker": "AAPL"}, {**base, "ticker": "NVDA"}], on_conflict="lookback_hours,ticker").execute()
+    table().upsert({**base, "ticker": "AAPL", "event_count": 3}, on_conflict="lookback_hours,ticker").execute()
+    _raises(
+        "21000",
+        lambda: table().upsert([{**base, "ticker": "TSLA"}, {**base, "ticker": "TSLA"}], on_conflict="lookback_hours,ticker").execute(),
+    )
+    _raises("42P10", lambda: table().upsert({**base, "ticker": "X"}, on_conflict="ticker").execute())
+    assert sorted(row["ticker"] for row in client.rows("stock_ticker_signal_state_v2")) == ["AAPL", "NVDA"]
+
+    ticks.append(datetime(2026, 1, 2, tzinfo=timezone.utc))
+    updated = table().update({"run_id": "r2", "updated_at": "1999-01-01T00:00:00+00:00"}).eq("ticker", "AAPL").execute().data
+    assert (updated[0]["event_count"], updated[0]["run_id"]) == (3, "r2")
+    assert updated[0]["updated_at"] == ticks[-1].isoformat() and updated[0]["created_at"] == ticks[0].isoformat()
+    assert len(table().delete().neq("ticker", "AAPL").execute().data) == 1
+    stats = client.stats()
+    assert stats["by_call"]["stock_ticker_signal_state_v2.upsert"] == 4
+    assert stats["rows_written"] == 5
+
+
+def test_sqlite_backing_survives_restart():
+    """SQLite 写穿：重新打开后数据与自增序列都延续"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "local.sqlite3")
+        client = LocalSupabaseClient(sql_paths=[], sqlite_path=path)
+        client.table("notes").insert([{"body": "a"}, {"body": "b"}]).execute()
+        client.table("notes").delete().eq("body", "a").execute()
+        client.close()
+
+        reopened = LocalSupabaseClient(sql_paths=[], sqlite_path=path)
+        assert [row["body"] for row in reopened.rows("notes")] == ["b"]
+        assert reopened.table("notes").insert({"body": "c"}).execute().data[0]["id"] == 3
+        reopened.close()
+
+
+if __name__ == "__main__":
+    test_schema_loaded_from_sql_files()
+    test_filters_order_range_and_single()
+    test_upsert_update_delete_and_stats()
+    test_sqlite_backing_survives_restart()
+    print("local_supabase tests passed")
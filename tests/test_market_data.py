@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+共享行情服务测试（Stooq 合并请求、FRED 解析、SQLite TTL 缓存、在途请求合并、整批失败回退）
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.market_data import MarketDataService
+
+STOOQ_CLOSES = {"spy.us": "590.12", "qqq.us": "512.3", "dia.us": "431", "zzzz.us": "N/D"}
+FRED_CSV = {
+    "VIXCLS": "observation_date,VIXCLS\n2026-01-02,17.1\n2026-01-05,16.4\n",
+    "DGS10": "observation_date,DGS10\n2026-01-02,4.21\n2026-01-05,.\n",
+    "DTWEXBGS": "observation_date,DTWEXBGS\n2026-01-02,121.5\n",
+}
+
+
+class _Response:
+    def __init__(self, text, status=200):
+        self.text = text
+        self.status = status
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise RuntimeError(f"HTTP {self.status}")
+
+
+class _FakeSession:
+    """按 URL 返回固定 CSV，记录请求并模拟网络延迟。"""
+
+    def __init__(self, delay=0.0, fail_batches=False):
+        self.delay = delay
+        self.fail_batches = fail_batches
+        self.urls = []
+        self._lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self._lock:
+            self.urls.append(url)
+        time.sleep(self.delay)
+        if params:
+            return _Response(FRED_CSV[params["id"]])
+        symbols = parse_qs(urlparse(url).query)["s"][0].split(" ")
+        if self.fail_batches and len(symbols) > 1:
+            return _Response("", status=503)
+        lines = [
+            f"{symbol.upper()},20260105,220000,1,2,0.5,{STOOQ_CLOSES.get(symbol, 'N/D')},100"
+            for symbol in symbols
+        ]
+        return _Response("\n".join(lines))
+
+
+def test_batched_quotes_and_snapshot():
+    """多 symbol 合并成一次请求；FRED 跳过空值取最后有效观测"""
+    session = _FakeSession()
+    service = MarketDataService(cache_path="", session=session)
+    closes = service.us_closes(["SPY", "qqq", "ZZZZ", "SPY"])
+    assert closes == {"SPY": 590.12, "QQQ": 512.3, "ZZZZ": None}
+    assert len(session.urls) == 1
+
+    snapshot = service.market_snapshot()
+    assert snapshot == {"spy": 590.12, "qqq": 512.3, "dia": 431.0, "vix": 16.4, "us10y": 4.21, "dxy": 121.5}
+
+
+def test_sqlite_cache_shared_and_ttl():
+    """缓存跨实例共享；过期后重新抓取；无效值不入缓存"""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "market.sqlite3")
+        first = _FakeSession()
+        MarketDataService(cache_path=path, session=first).stooq_closes(["spy.us", "zzzz.us"])
+
+        second = _FakeSession()
+        closes = MarketDataService(cache_path=path, session=second).stooq_closes(["spy.us", "zzzz.us"])
+        assert closes == {"spy.us": 590.12, "zzzz.us": None}
+        assert second.urls == ["https://stooq.com/q/l/?s=zzzz.us&i=d"]
+
+        expired = _FakeSession()
+        MarketDataService(cache_path=path, quote_ttl_sec=0, session=expired).stooq_closes(["spy.us"])
+        assert len(expired.urls) == 1
+
+
+def test_concurrent_requests_coalesce():
+    """同一 key 的并发请求只发一次"""
+    session = _FakeSession(delay=0.1)
+    service = MarketDataService(cache_path="", session=session)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(service.fred_latest(["VIXCLS"]))) for _ in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [{"VIXCLS": 16.4}] * 6
+    assert len(session.urls) == 1
+    assert service.stats["coalesced"] == 5
+
+
+def test_batch_failure_falls_back_to_single_symbols():
+    """整批请求失败时逐个 symbol 重试"""
+    session = _FakeSession(fail_batches=True)
+    service = MarketDataService(cache_path="", session=session)
+    assert service.stooq_closes(["spy.us", "dia.us"]) == {"spy.us": 590.12, "dia.us": 431.0}
+    assert len(session.urls) == 3
+
+
+if __name__ == "__main__":
+    test_batched_quotes_and_snapshot()
+    test_sqlite_cache_shared_and_ttl()
+    test_concurrent_requests_coalesce()
+    test_batch_failure_falls_back_to_single_symbols()
+    print("market_data tests passed")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+列式信号打分测试（未安装 numpy 时跳过）
+"""
+
+import os
+import random
+import sys
+from collections import defaultdict
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import signal_columns, stock_pipeline_v2
+from scripts.stock_pipeline_v2 import SIGNAL_RECENT_EVENTS, StockPipelineV2
+
+NOW = datetime(2026, 1, 6, tzinfo=timezone.utc)
+
+
+def _bundle(seed, size):
+    rng = random.Random(seed)
+    rows = []
+    for idx in range(size):
+        source_type = rng.choice(["article", "x_grok", " X_GROK ", "rss", None])
+        rows.append(
+            {
+                "event_id": idx + 1,
+                "ticker": rng.choice(["NVDA", "AAPL", "TSLA", "SPY", ""]),
+                "role": rng.choice(["primary", "secondary"]),
+                "weight": rng.choice([1.0, 0.6]),
+                "map_confidence": rng.uniform(0.4, 0.95),
+                "event_type": rng.choice(["earnings", "macro", "flow"]),
+                "direction": rng.choice(["LONG", "SHORT", "NEUTRAL"]),
+                "strength": rng.uniform(0.3, 0.95),
+                "summary": f"s{idx}",
+                # 发布时间取值少，制造同 ticker 下的并列，覆盖次级排序键
+                "published_at": rng.choice(["2026-01-05T10:00:00+00:00", "2026-01-05T09:00:00+00:00", ""]),
+                "source_type": source_type,
+                "source_ref": rng.choice(["a:1", "a:2", "x:9"]),
+                "source_handle": rng.choice(["", " macro_desk ", "chip_watch"]),
+            }
+        )
+    return rows
+
+
+def test_aggregate_matches_row_implementation():
+    """列式聚合与逐行聚合逐字段一致（含并列排序、来源规整、空 ticker、空发布时间）"""
+    if not signal_columns.HAS_NUMPY:
+        return
+    original_now = stock_pipeline_v2._now_utc
+    stock_pipeline_v2._now_utc = lambda: NOW
+    try:
+        for seed in range(5):
+            bundle = _bundle(seed, 400)
+            by_ticker = defaultdict(list)
+            for row in bundle:
+                if row["ticker"]:
+                    by_ticker[row["ticker"]].append(row)
+            expected = [
+                (ticker, StockPipelineV2._aggregate_ticker_events(None, rows), len(rows))
+                for ticker, rows in by_ticker.items()
+            ]
+            actual = signal_columns.aggregate_ticker_events(
+                bundle,
+                SIGNAL_RECENT_EVENTS,
+                now_iso=NOW.isoformat(),
+            )
+            assert expected == actual
+    finally:
+        stock_pipeline_v2._now_utc = original_now
+    assert signal_columns.aggregate_ticker_events([{"ticker": ""}], 24, now_iso="") == []
+
+
+def test_opportunity_scores_match_scalar_formula():
+    """列式机会分/置信度与逐行公式逐位一致，排序并列保持原顺序"""
+    if not signal_columns.HAS_NUMPY:
+        return
+    rng = random.Random(3)
+    inputs = [
+        {
+            "side": rng.choice(["LONG", "SHORT"]),
+            "signal_score": rng.uniform(30, 95),
+            "confidence": rng.uniform(0.3, 0.95),
+            "x_ratio": rng.choice([0.0, 0.4, 0.8]),
+            "x_count": rng.choice([0, 2]),
+            "mixed_sources": rng.random() < 0.5,
+            "resonance_score": rng.uniform(0, 1),
+            "x_quality": rng.choice([45.0, 52.0, 70.0]),
+        }
+        for _ in range(300)
+    ]
+    for boost_factor in (1.0, 0.6, 0.2):
+        scores, confs = signal_columns.score_opportunities(inputs, 0.35, boost_factor)
+        expected = [StockPipelineV2._score_opportunity(None, item, 0.35, boost_factor) for item in inputs]
+        assert list(zip(scores, confs)) == expected
+    assert signal_columns.rank_desc([1.0, 3.0, 3.0, 2.0], 3) == [1, 2, 3]
+
+
+if __name__ == "__main__":
+    test_aggregate_matches_row_implementation()
+    test_opportunity_scores_match_scalar_formula()
+    print("signal_columns tests passed")
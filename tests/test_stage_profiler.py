@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+阶段剖析器测试
+"""
+
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.stage_profiler import StageProfiler, profiled, render_summary, span_metrics
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, *args, **kwargs):
+        return self
+
+    def insert(self, rows, **kwargs):
+        return _Query(rows)
+
+    def update(self, payload):
+        return _Query(self._rows[:1])
+
+    def execute(self):
+        return _Response(self._rows)
+
+
+class _Client:
+    def table(self, name):
+        return _Query([{"id": 1}, {"id": 2}, {"id": 3}])
+
+
+class _Engine:
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.supabase = profiler.wrap_client(_Client())
+
+    @profiled("load")
+    def load(self):
+        return self.supabase.table("t").select("*").eq("a", 1).execute().data
+
+    @profiled(lambda self, table_name: f"publish:{table_name}")
+    def publish(self, table_name):
+        self.supabase.table(table_name).update({"is_active": False}).execute()
+        self.supabase.table(table_name).insert([{"id": 9}, {"id": 10}]).execute()
+
+
+def test_nested_spans_merge_and_count_db_calls():
+    """同名 span 合并计次，DB 读写行数计入最内层并向上汇总"""
+    profiler = StageProfiler()
+    engine = _Engine(profiler)
+    profiler.start("run")
+    for _ in range(3):
+        engine.load()
+    with profiler.span("serve"):
+        engine.publish("signals")
+    root = profiler.stop()
+
+    tree = root.to_dict()
+    load, serve = tree["children"]
+    assert (load["name"], load["calls"], load["db_calls"], load["rows_read"]) == ("load", 3, 3, 9)
+    assert serve["children"][0]["name"] == "publish:signals"
+    assert (serve["db_calls"], serve["rows_written"]) == (2, 3)
+    assert tree["db_calls"] == 5
+
+    metrics = span_metrics(root)
+    assert "stage_serve.publish:signals_ms" in metrics
+    assert metrics["stage_db_calls"] == 5
+    summary = render_summary(root)
+    assert summary.splitlines()[0].startswith("run")
+    assert "└─ publish:signals" in summary
+
+
+def test_spans_from_other_threads_attach_to_root():
+    """没有打开 span 的线程挂到根节点下；未 start 时装饰器直接透传"""
+    profiler = StageProfiler()
+    engine = _Engine(profiler)
+    assert engine.load() == [{"id": 1}, {"id": 2}, {"id": 3}]
+
+    profiler.start("run")
+    with profiler.span("main"):
+        worker = threading.Thread(target=engine.load)
+        worker.start()
+        worker.join()
+    root = profiler.stop()
+    assert sorted(root.children) == ["load", "main"]
+    assert profiler.stop() is None
+
+
+if __name__ == "__main__":
+    test_nested_spans_merge_and_count_db_calls()
+    test_spans_from_other_threads_attach_to_root()
+    print("stage_profiler tests passed")
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Stock V2 流水线离线测试（进程内 Supabase 替身）：增量信号聚合与全量重建一致、分块写入事件映射去重、
+传导链命中向量与合并摘要扫描一致、流式增量与整窗增量产出一致
+"""
+
+import dataclasses
+import hashlib
+import os
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts import stock_pipeline_v2
+from scripts.local_supabase import LocalSupabaseClient
+from scripts.stock_pipeline_offline_bench import build_corpus
+from scripts.stock_pipeline_v2 import StockPipelineV2
+
+BASE_TIME = datetime(2026, 10, 19, tzinfo=timezone.utc)
+
+
+class _Clock:
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+class _FakeLLM:
+    """确定性的 LLM 替身：按提示词哈希给出方向与强度，记录被调用的标题。"""
+
+    def __init__(self):
+        self.titles = []
+        self._lock = threading.Lock()
+
+    def summarize(self, prompt, use_cache=True, stream=None, required_keys=None):
+        title = next(line for line in prompt.splitlines() if line.startswith("标题: "))[4:]
+        with self._lock:
+            self.titles.append(title)
+        digest = int(hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8], 16)
+        return {
+            "direction": ("LONG", "SHORT", "NEUTRAL")[digest % 3],
+            "strength": (digest % 100) / 100,
+            "title_zh": f"标题 {digest % 997}",
+            "summary_zh": f"摘要 {digest % 991}",
+        }
+
+
+def _engine():
+    clock = _Clock(BASE_TIME)
+    stock_pipeline_v2._now_utc = clock
+    client = LocalSupabaseClient(clock=clock)
+    return StockPipelineV2(supabase_client=client), client, clock
+
+
+def _add_event(client, key, tickers, direction, strength, as_of):
+    event = client.table("stock_events_v2").insert(
+        {
+            "event_key": key,
+            "source_ref": f"ref-{key}",
+            "event_type": "earnings" if len(key) % 2 else "news",
+            "direction": direction,
+            "strength": strength,
+            "summary": f"summary {key}",
+            "published_at": as_of.isoformat(),
+            "as_of": as_of.isoformat(),
+            "run_id": "seed",
+        }
+    ).execute().data[0]
+    client.table("stock_event_tickers_v2").insert(
+        [
+            {
+                "event_id": event["id"],
+                "ticker": ticker,
+                "role": role,
+                "weight": 1.0 if role == "primary" else 0.6,
+                "confidence": 0.8,
+                "as_of": as_of.isoformat(),
+                "run_id": "seed",
+            }
+            for ticker, role in tickers
+        ]
+    ).execute()
+    return event["id"]
+
+
+def _assert_matches_full_rebuild(engine, clock, lookback_hours):
+    run_id = f"run-{clock.now.isoformat()}"
+    incremental = engine._build_signals_incremental(
+        run_id=run_id, lookback_hours=lookback_hours, now=clock.now
+    )
+    bundle = engine._load_event_bundle(lookback_hours=lookback_hours)
+    full = engine._build_signals(bundle, run_id=run_id, now=clock.now)
+    assert incremental is not None
+    by_ticker = lambda rows: {row["ticker"]: row for row in rows}
+    assert by_ticker(incremental) == by_ticker(full)
+    return by_ticker(incremental)
+
+
+def test_incremental_signals_match_full_rebuild():
+    """多轮增量刷新（新事件、过期、停用、as_of 前移）每轮都与全量重建逐行一致"""
+    original_now = stock_pipeline_v2._now_utc
+    try:
+        engine, client, clock = _engine()
+        lookback = 24
+        aapl_ids = [
+            _add_event(client, f"aapl-{idx}", [("AAPL", "primary")], "LONG" if idx % 3 else "SHORT",
+                       0.4 + idx / 100, BASE_TIME - timedelta(hours=20) + timedelta(minutes=37 * idx))
+            for idx in range(30)
+        ]
+        _add_event(client, "nvda-1", [("NVDA", "primary"), ("AMD", "related")], "LONG", 0.8,
+                   BASE_TIME - timedelta(hours=2))
+        tsla_id = _add_event(client, "tsla-1", [("TSLA", "primary")], "SHORT", 0.7,
+                             BASE_TIME - timedelta(hours=1))
+        signals = _assert_matches_full_rebuild(engine, clock, lookback)
+        assert {"AAPL", "NVDA", "AMD", "TSLA"} <= set(signals)
+
+        # 新事件 + 停用最近 24 条里的 AAPL 事件（需要回源补位）+ 停用 TSLA 唯一事件
+        clock.now = BASE_TIME + timedelta(hours=3)
+        _add_event(client, "nvda-2", [("NVDA", "primary")], "SHORT", 0.9, clock.now - timedelta(minutes=30))
+        table = lambda: client.table("stock_events_v2")
+        table().update({"is_active": False}).in_("id", [aapl_ids[-1], aapl_ids[-4], tsla_id]).execute()
+        signals = _assert_matches_full_rebuild(engine, clock, lookback)
+        assert "TSLA" not in signals and engine.stats["signal_state_reloaded_tickers"] == 1
+
+        # 早期 AAPL 事件过期；一条事件重新 upsert 到新的 as_of
+        clock.now = BASE_TIME + timedelta(hours=12)
+        moved_as_of = (clock.now - timedelta(hours=1)).isoformat()
+        table().update({"as_of": moved_as_of}).eq("id", aapl_ids[5]).execute()
+        _add_event(client, "aapl-new", [("AAPL", "primary")], "LONG", 0.95, clock.now - timedelta(minutes=5))
+        _assert_matches_full_rebuild(engine, clock, lookback)
+
+        # 全部窗口过期后状态清空
+        clock.now = BASE_TIME + timedelta(hours=40)
+        assert _assert_matches_full_rebuild(engine, clock, lookback) == {}
+        assert client.rows("stock_ticker_signal_state_v2") == []
+    finally:
+        stock_pipeline_v2._now_utc = original_now
+
+
+def test_upsert_events_dedupes_mappings_across_chunks():
+    """超过一块的事件含重复 event_key：映射按 (event_key, ticker, role) 去重并保留最后一行"""
+    original_now = stock_pipeline_v2._now_utc
+    try:
+        engine, client, clock = _engine()
+        as_of = BASE_TIME.isoformat()
+        total = stock_pipeline_v2.EVENT_WRITE_CHUNK_SIZE + 40
+        events = []
+        mappings = []
+        for idx in list(range(total)) + [3, total - 1]:
+            key = f"evt-{idx}"
+            events.append(
+                {
+                    "event_key": key,
+                    "source_ref": f"ref-{idx}",
+                    "event_type": "news",
+                    "direction": "LONG",
+                    "strength": 0.5,
+                    "summary": f"summary {idx}",
+                    "details": {},
+                    "as_of": as_of,
+                    "run_id": "r1",
+                }
+            )
+            for ticker, role in (("AAPL", "primary"), ("MSFT", "related")):
+                mappings.append(
+                    {
+                        "event_key": key,
+                        "ticker": ticker,
+                        "role": role,
+                        "weight": 1.0,
+                        # 重复事件的映射行以最后出现的为准
+                        "confidence": 0.4 + 0.1 * sum(1 for row in events if row["event_key"] == key),
+                        "as_of": as_of,
+                        "run_id": "r1",
+                    }
+                )
+
+        event_count, mapping_count = engine._upsert_events(events, mappings)
+        assert (event_count, mapping_count) == (total, total * 2)
+        # 命中向量只写入库副本，调用方的 details 不变
+        assert all(row["details"] == {} for row in events)
+        assert all("keyword_hits" in row["details"] for row in client.rows("stock_events_v2"))
+        rows = client.rows("stock_event_tickers_v2")
+        assert len(rows) == total * 2
+        ids = {row["event_key"]: row["id"] for row in client.rows("stock_events_v2")}
+        confidence = {(row["event_id"], row["ticker"]): row["confidence"] for row in rows}
+        assert round(confidence[(ids["evt-3"], "MSFT")], 6) == 0.6
+        assert round(confidence[(ids[f"evt-{total - 1}"], "AAPL")], 6) == 0.6
+        assert round(confidence[(ids["evt-4"], "AAPL")], 6) == 0.5
+    finally:
+        stock_pipeline_v2._now_utc = original_now
+
+
+def test_transmission_hits_match_merged_summary_scan():
+    """传导链因子命中：预存向量、无向量、词表签名过期的事件混用，结果与合并摘要整体扫描一致"""
+    original_now = stock_pipeline_v2._now_utc
+    try:
+        engine, _, _ = _engine()
+        summaries = [
+            "Fed signals higher rates as CPI runs hot",
+            "Brent crude rallies on supply cuts",
+            "美元走强，汇率承压",
+            "",
+            "new tariff policy draws antitrust scrutiny",
+            "oil and dollar move together; inflation expectations rise",
+            "product launch event",
+        ] * 3
+        rows = []
+        for idx, summary in enumerate(summaries):
+            details = {}
+            if idx % 3 == 0:
+                details = {"keyword_hits": engine._summary_keyword_hits(summary)}
+            elif idx % 3 == 1:
+                details = {"keyword_hits": {"vocab": "stale", "words": ["wti"]}}
+            event = {"id": idx + 1, "summary": summary, "details": details, "published_at": None}
+            rows.append(engine._bundle_row(event, {"event_id": idx + 1, "ticker": "XOM"}))
+        assert any(row["keyword_hits"] is None for row in rows)
+        assert any(row["keyword_hits"] is not None for row in rows)
+
+        opp = {"id": 7, "ticker": "XOM", "side": "LONG", "confidence": 0.5}
+        paths = engine._build_transmission_rows([opp], {"XOM": rows}, {7: [1, 2]}, run_id="r1", now=BASE_TIME)
+
+        merged = engine.keyword_matcher.match(" ".join(text for text in summaries[:16] if text.strip()))
+        counts = [(merged.count(f"macro:{idx}"), factor) for idx, factor in enumerate(engine.macro_factors)]
+        counts = sorted((item for item in counts if item[0] > 0), key=lambda item: item[0], reverse=True)[:3]
+        expected = {
+            str(factor.get("label")): round(min(0.95, 0.4 + min(4.0, count) * 0.12 + 0.05), 4)
+            for count, factor in counts
+        }
+        assert len(expected) == 3
+        assert {row["macro_factor"]: row["strength"] for row in paths} == expected
+    finally:
+        stock_pipeline_v2._now_utc = original_now
+
+
+def _event_tables(client):
+    """事件与映射按业务键取出，去掉自增 id，便于跨库比较。"""
+    events = {row["event_key"]: row for row in client.rows("stock_events_v2")}
+    keys = {row["id"]: key for key, row in events.items()}
+    mappings = {
+        (keys[row["event_id"]], row["ticker"], row["role"]): {
+            key: value for key, value in row.items() if key not in ("id", "event_id")
+        }
+        for row in client.rows("stock_event_tickers_v2")
+    }
+    events = {key: {k: v for k, v in row.items() if k != "id"} for key, row in events.items()}
+    return events, mappings
+
+
+def test_streaming_incremental_matches_in_memory():
+    """同一语料分两轮增量：流式与整窗模式写出的事件 / 映射完全一致，LLM 选中的事件也相同"""
+    original_now = stock_pipeline_v2._now_utc
+    original_prices = stock_pipeline_v2._fetch_market_prices
+    # 离线运行：不抓行情，regime 走默认值
+    stock_pipeline_v2._fetch_market_prices = None
+    corpus = build_corpus(160, seed=7, span_hours=24)
+    outputs = []
+    try:
+        for streaming in (False, True):
+            engine, client, clock = _engine()
+            engine.flags = dataclasses.replace(engine.flags, enable_stock_streaming_incremental=streaming)
+            engine.llm_client = _FakeLLM()
+            for wave in (corpus[:90], corpus[90:]):
+                client.seed("articles", wave)
+                clock.now = datetime.fromisoformat(wave[-1]["analyzed_at"]) + timedelta(minutes=1)
+                engine.run_incremental(hours=48, article_limit=500, llm_event_cap=6, lookback_hours=72)
+            events, mappings = _event_tables(client)
+            llm_keys = sorted(key for key, row in events.items() if row["details"].get("llm_used"))
+            outputs.append((events, mappings, llm_keys, sorted(engine.llm_client.titles)))
+    finally:
+        stock_pipeline_v2._now_utc = original_now
+        stock_pipeline_v2._fetch_market_prices = original_prices
+
+    (events, mappings, llm_keys, titles), streamed = outputs
+    assert len(llm_keys) == 12 and len(titles) == 12
+    assert streamed[2] == llm_keys and streamed[3] == titles
+    assert streamed[0] == events and streamed[1] == mappings
+
+
+if __name__ == "__main__":
+    test_streaming_incremental_matches_in_memory()
+    test_transmission_hits_match_merged_summary_scan()
+    test_incremental_signals_match_full_rebuild()
+    test_upsert_events_dedupes_mappings_across_chunks()
+    print("stock_pipeline_v2 tests passed")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Ticker 全集与抽取测试
+"""
+
+import json
+import os
+import re
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.ticker_universe import (
+    TickerExtractor,
+    TickerProfile,
+    TickerUniverse,
+    TrackedTickerExtractor,
+    load_ticker_universe,
+)
+
+
+def _extractor():
+    universe = TickerUniverse(
+        [
+            TickerProfile("AAPL", "Apple Inc.", "equity"),
+            TickerProfile("NVDA", "NVIDIA Corporation", "equity"),
+            TickerProfile("IT", "Gartner, Inc.", "equity"),
+            TickerProfile("T", "AT&T Inc.", "equity"),
+            TickerProfile("BRK-B", "Berkshire Hathaway Inc.", "equity"),
+            TickerProfile("AMD", "Advanced Micro Devices, Inc.", "equity"),
+            TickerProfile("TGT", "Target Corporation", "equity"),
+            TickerProfile("SPY", "SPDR S&P 500 ETF Trust", "etf"),
+        ]
+    ).with_seed(["QQQ", "TSLA"])
+    return TickerExtractor(universe)
+
+
+def test_explicit_and_bare_symbols():
+    """cashtag / 交易所前缀 / 中文紧邻的裸代码都能识别，普通英文单词不误判"""
+    extractor = _extractor()
+    assert extractor.extract("英伟达NVDA股价大涨，$aapl 与 NYSE: T 走强") == {"NVDA", "AAPL", "T"}
+    assert extractor.extract("BRK.B and SPY, QQQ") == {"BRK-B", "SPY", "QQQ"}
+    assert extractor.extract("the spy who loved me") == set()
+
+
+def test_ambiguity_rules():
+    """常见词代码裸写不计入；公司名或交易所前缀可以确认"""
+    extractor = _extractor()
+    assert extractor.extract("IT spending rose and T shares") == set()
+    assert extractor.extract("NASDAQ:IT up, Gartner said") == {"IT"}
+    assert extractor.extract("shopping at Target") == set()
+
+
+def test_company_names_and_aliases():
+    """多词公司名、带 & 的名称与内置中文别名"""
+    extractor = _extractor()
+    assert extractor.extract("Advanced Micro Devices and AT&T") == {"AMD", "T"}
+    assert extractor.extract("Nvidia 与特斯拉") == {"NVDA", "TSLA"}
+
+
+def test_snapshot_fallback_when_database_unavailable():
+    """数据库不可用时使用过期快照，并补齐种子代码"""
+
+    class _Broken:
+        def table(self, name):
+            raise RuntimeError("offline")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "universe.json")
+        with open(path, "w", encoding="utf-8") as fp:
+            json.dump(
+                {
+                    "saved_at": "2020-01-01T00:00:00+00:00",
+                    "profiles": [{"ticker": "ORCL", "display_name": "Oracle Corporation"}],
+                },
+                fp,
+            )
+        universe = load_ticker_universe(_Broken(), seed=["SPY"], snapshot_path=path)
+        assert universe.tickers == {"ORCL", "SPY"}
+        assert TickerExtractor(universe).extract("Oracle beat") == {"ORCL"}
+
+
+def test_tracked_extractor_matches_legacy_behaviour():
+    """开关关闭时的旧版抽取：大小写不敏感、不认公司名与中文别名，与改造前逐条一致"""
+    tracked = {"SPY", "QQQ", "NVDA", "MSFT", "GOOGL", "TSLA", "AAPL"}
+
+    def legacy(text):
+        return {token for token in re.findall(r"\b[A-Z]{2,5}\b", text.upper()) if token in tracked}
+
+    extractor = TrackedTickerExtractor(tracked)
+    samples = [
+        "Nvda shares rally",
+        "spy etf inflow",
+        "GOOGL and Msft",
+        "Tesla recalls cars",
+        "英伟达 财报",
+        "$AAPL beats; QQQ flat",
+        "",
+    ]
+    for text in samples:
+        assert extractor.extract(text) == legacy(text), text
+    assert extractor.extract("Nvda shares rally") == {"NVDA"}
+    assert extractor.extract("Tesla recalls cars") == set()
+
+
+if __name__ == "__main__":
+    test_explicit_and_bare_symbols()
+    test_ambiguity_rules()
+    test_company_names_and_aliases()
+    test_snapshot_fallback_when_database_unavailable()
+    test_tracked_extractor_matches_legacy_behaviour()
+    print("ticker_universe tests passed")
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+X 账号分级采集节奏测试（分级规则、到期判断、token 预算截断、调度表读写与表缺失回退）
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.local_supabase import LocalSupabaseClient
+from scripts.x_account_schedule import AccountScheduleStore, assign_tier, plan_run, tier_breakdown
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+def _score(handle, quality, posts=10, signals=10, freshness=1.0, status="healthy"):
+    return {
+        "handle": handle,
+        "score_date": "2026-10-19",
+        "quality_score": quality,
+        "freshness_score": freshness,
+        "posts_7d": posts,
+        "signals_7d": signals,
+        "status": status,
+    }
+
+
+def _accounts(*handles):
+    return [{"handle": handle, "id": idx} for idx, handle in enumerate(handles, start=1)]
+
+
+def test_assign_tier():
+    """质量分 / 信号产出率 / 新鲜度决定档位；critical 降为 C；无评分默认 B"""
+    assert assign_tier(_score("a", 90)) == "A"
+    assert assign_tier(_score("b", 60, signals=2, freshness=0.45)) == "B"
+    assert assign_tier(_score("c", 20, signals=0, freshness=0.1)) == "C"
+    assert assign_tier(_score("d", 95, status="critical")) == "C"
+    assert assign_tier(None) == "B"
+
+
+def test_plan_run_respects_due_times():
+    """A 档每轮；B / C 档未到期跳过；档位升级后按新间隔重算"""
+    scores = {
+        "a": _score("a", 90),
+        "b": _score("b", 60, signals=2, freshness=0.45),
+        "c": _score("c", 20, signals=0, freshness=0.1),
+    }
+    fetched = (NOW - timedelta(hours=6)).isoformat()
+    schedule = {
+        "a": {"next_due_at": (NOW + timedelta(hours=5)).isoformat(), "last_fetched_at": fetched},
+        "b": {"next_due_at": (NOW + timedelta(hours=21)).isoformat(), "last_fetched_at": fetched},
+        "c": {"next_due_at": (NOW + timedelta(hours=21)).isoformat(), "last_fetched_at": fetched},
+    }
+    selected, plans = plan_run(_accounts("a", "b", "c", "new"), scores, schedule, NOW)
+    # b 曾是 C 档（21 小时后到期），升为 B 档后按 6 小时前采集 + 6 小时间隔重算 -> 已到期；
+    # 同档内从未采集过的账号优先
+    assert [row["handle"] for row in selected] == ["a", "new", "b"]
+    assert plans["c"].skip_reason == "not_due" and plans["new"].tier == "B"
+    assert tier_breakdown(plans)["C"] == {"total": 1, "due": 0, "selected": 0}
+
+
+def test_token_budget_keeps_high_tiers():
+    """预算不足时按档位优先，其余到期账号延后"""
+    scores = {"a": _score("a", 90), "c": _score("c", 20, signals=0, freshness=0.1)}
+    selected, plans = plan_run(
+        _accounts("c", "x", "a"),
+        scores,
+        {},
+        NOW,
+        token_budget=2500,
+        estimate_tokens=lambda account: 1000,
+    )
+    assert [row["handle"] for row in selected] == ["a", "x"]
+    assert plans["c"].skip_reason == "token_budget" and plans["a"].estimated_tokens == 1000
+
+
+def test_store_roundtrip_and_fallback():
+    """写回后下一轮 B 档未到期、失败账号保持到期；表缺失时全部到期且不写"""
+    client = LocalSupabaseClient()
+    client.seed("stock_x_account_score_daily", [_score("a", 90), _score("b", 60, signals=2, freshness=0.45)])
+    store = AccountScheduleStore(client, run_interval_min=120)
+    handles = ["a", "b", "f"]
+    scores = store.load_scores(handles, NOW)
+    _, plans = plan_run(_accounts(*handles), scores, store.load_schedule(handles), NOW)
+    assert store.save(plans, {"a": True, "b": True, "f": False}, NOW, "r1") == 3
+
+    later = NOW + timedelta(hours=2)
+    selected, _ = plan_run(
+        _accounts(*handles), store.load_scores(handles, later), store.load_schedule(handles), later
+    )
+    assert [row["handle"] for row in selected] == ["a", "f"]
+
+    class _Broken:
+        def table(self, name):
+            raise RuntimeError(f"relation {name} does not exist")
+
+    broken = AccountScheduleStore(_Broken())
+    assert broken.load_schedule(handles) == {} and not broken.available
+    assert broken.save(plans, {"a": True}, NOW, "r2") == 0
+
+
+if __name__ == "__main__":
+    test_assign_tier()
+    test_plan_run_respects_due_times()
+    test_token_budget_keeps_high_tiers()
+    test_store_roundtrip_and_fallback()
+    print("x_account_schedule tests passed")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+X 账号增量游标测试（请求条数收缩、已入库帖子拆分计数、健康度活跃口径）
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scripts.x_handle_cursor import HandleCursor, cursor_post_limit, partition_posts, window_activity
+
+NOW = datetime(2026, 10, 19, 12, 0, tzinfo=timezone.utc)
+
+
+def _cursor(post_count, last_hours_ago):
+    cursor = HandleCursor(handle="alpha")
+    for idx in range(post_count):
+        posted_at = (NOW - timedelta(hours=last_hours_ago + idx)).isoformat()
+        cursor.add_stored_post(f"p{idx}", posted_at)
+    return cursor
+
+
+def test_cursor_post_limit():
+    """无游标用上限；按速度 × 间隔 × 1.5 + 2 收缩，下限 3、上限 post_limit"""
+    assert cursor_post_limit(None, 20, NOW) == 20
+    assert cursor_post_limit(HandleCursor(handle="empty"), 20, NOW) == 20
+    # 3 天 6 帖 = 2 帖/天，距上次 1 天 -> 2 * 1 * 1.5 + 2 = 5
+    assert cursor_post_limit(_cursor(6, 24), 20, NOW) == 5
+    assert cursor_post_limit(_cursor(6, 1), 20, NOW) == 3
+    assert cursor_post_limit(_cursor(60, 72), 20, NOW) == 20
+
+
+def test_partition_posts_splits_stored():
+    """已入库 post_id 单独返回，不进入归一化；首条即最新、重复 id 不重复计"""
+    cursor = _cursor(3, 2)
+    cursor.add_stored_post("p1", NOW.isoformat())
+    assert cursor.recent_post_ids == ["p0", "p1", "p2"] and cursor.posts_per_day == 1.0
+    assert cursor.last_posted_at == (NOW - timedelta(hours=2)).isoformat()
+
+    items = [{"post_id": "new1"}, {"post_id": "p0"}, {"post_id": "new2"}, {"post_id": "p2"}]
+    fresh, stored = partition_posts(items, cursor, lambda item: item["post_id"])
+    assert [post_id for post_id, _ in fresh] == ["new1", "new2"] and stored == ["p0", "p2"]
+    fresh, stored = partition_posts(items, None, lambda item: item["post_id"])
+    assert len(fresh) == 4 and stored == []
+
+
+def test_window_activity_counts_stored_posts():
+    """没有新帖时活跃度取窗口内已入库帖子；新帖在前，截到 post_limit"""
+    cursor = _cursor(4, 2)
+    cursor.window_posts.update({"p0": 2, "p1": 0, "p2": 1, "p3": 1})
+    assert window_activity(cursor, [], 20) == (4, 4)
+    assert window_activity(cursor, [("n1", 3), ("p0", 2)], 3) == (3, 5)
+    assert window_activity(None, [("n1", 1)], 20) == (1, 1)
+
+
+if __name__ == "__main__":
+    test_cursor_post_limit()
+    test_partition_posts_splits_stored()
+    test_window_activity_counts_stored_posts()
+    print("x_handle_cursor tests passed")